@@ -56,6 +56,8 @@ from app.agents.graph import (
     create_game_generation_graph,
     compile_graph_with_memory,
     get_compiled_graph,
+    invalidate_compiled_graphs,
+    warm_compiled_graphs,
     run_game_generation
 )
 
@@ -158,6 +160,8 @@ __all__ = [
     "create_game_generation_graph",
     "compile_graph_with_memory",
     "get_compiled_graph",
+    "invalidate_compiled_graphs",
+    "warm_compiled_graphs",
     "run_game_generation",
 
     # Core Agents
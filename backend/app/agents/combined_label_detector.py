@@ -45,30 +45,20 @@ from app.agents.state import AgentState
 from app.agents.instrumentation import InstrumentedAgentContext
 from app.services.line_detection_service import get_line_detector, HoughLineDetector
 from app.services.clip_filtering_service import get_clip_filter, is_clip_filter_enabled
+from app.services.ocr_engine import get_ocr_engine
+from app.utils import image_ops
 from app.utils.logging_config import get_logger
 
 logger = get_logger("gamed_ai.agents.combined_label_detector")
 
 
-def _get_easyocr_service():
-    """Get EasyOCR service (lazy import to avoid loading if not needed)."""
-    try:
-        import easyocr
-        return easyocr.Reader(['en'], gpu=False)
-    except ImportError:
-        logger.error("EasyOCR not installed. Install with: pip install easyocr")
-        raise
-
-
-def _detect_text_regions(image_path: str) -> List[Dict[str, Any]]:
+async def _detect_text_regions(image_path: str) -> List[Dict[str, Any]]:
     """
-    Detect text regions using EasyOCR.
+    Detect text regions using the shared EasyOCR engine.
 
     Returns list of text regions with bbox and content.
     """
-    reader = _get_easyocr_service()
-
-    results = reader.readtext(image_path)
+    results = await get_ocr_engine().readtext(image_path)
 
     text_regions = []
     for detection in results:
@@ -104,19 +94,7 @@ def _create_text_mask(
     padding: int = 10
 ) -> np.ndarray:
     """Create binary mask from text bounding boxes."""
-    h, w = image_shape[:2]
-    mask = np.zeros((h, w), dtype=np.uint8)
-
-    for region in text_regions:
-        bbox = region["bbox"]
-        x = max(0, bbox["x"] - padding)
-        y = max(0, bbox["y"] - padding)
-        x2 = min(w, bbox["x"] + bbox["width"] + padding)
-        y2 = min(h, bbox["y"] + bbox["height"] + padding)
-
-        cv2.rectangle(mask, (x, y), (x2, y2), 255, -1)
-
-    return mask
+    return image_ops.boxes_to_mask(image_shape, text_regions, padding=padding)
 
 
 def _combine_masks(
@@ -134,16 +112,13 @@ def _combine_masks(
     3. Morphological closing to fill small gaps
     """
     # Combine masks
-    combined = cv2.bitwise_or(text_mask, line_mask)
+    combined = image_ops.combine_masks(text_mask, line_mask)
 
     # Dilate to connect nearby segments
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-    combined = cv2.dilate(combined, kernel, iterations=dilate_iterations)
+    combined = image_ops.dilate_mask(combined, kernel_size, iterations=dilate_iterations)
 
     # Morphological close to fill gaps
-    combined = cv2.morphologyEx(combined, cv2.MORPH_CLOSE, kernel)
-
-    return combined
+    return image_ops.close_mask(combined, kernel_size)
 
 
 def _save_mask(mask: np.ndarray, image_path: str, suffix: str = "_detection_mask") -> str:
@@ -198,8 +173,8 @@ async def combined_label_detector(
 
     logger.info(f"Processing image: {image_path}")
 
-    # Load image for dimensions
-    image = cv2.imread(image_path)
+    # Load image once; line detection reuses the decoded array
+    image = image_ops.load_image(image_path)
     if image is None:
         logger.error(f"Could not load image: {image_path}")
         return {
@@ -213,7 +188,7 @@ async def combined_label_detector(
 
     # Step 1: Detect text with EasyOCR
     try:
-        text_regions = _detect_text_regions(image_path)
+        text_regions = await _detect_text_regions(image_path)
     except Exception as e:
         logger.error(f"EasyOCR failed: {e}")
         text_regions = []
@@ -227,7 +202,7 @@ async def combined_label_detector(
 
     # Step 3: Detect lines with Hough Transform
     line_detector = get_line_detector()
-    all_lines = line_detector.detect_lines(image_path)
+    all_lines = line_detector.detect_lines(image)
 
     # Step 4: Filter lines by proximity to text (leader lines are near text)
     if all_lines is not None and len(text_regions) > 0:
@@ -16,13 +16,13 @@ Outputs:
 """
 
 import json
-import os
 from typing import Dict, Any, List, Optional
 
 from app.agents.state import AgentState
 from app.services.llm_service import get_llm_service
 from app.utils.logging_config import get_logger
 from app.agents.instrumentation import InstrumentedAgentContext
+from app.config.run_context import get_pipeline_preset
 
 logger = get_logger("gamed_ai.agents.diagram_analyzer")
 
@@ -132,7 +132,7 @@ async def diagram_analyzer(
     Outputs: diagram_analysis
     """
     # Check preset - only run for Preset 2
-    preset = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset = get_pipeline_preset()
     if preset != "advanced_interactive_diagram":
         logger.info(f"Skipping diagram_analyzer - preset is '{preset}', not 'advanced_interactive_diagram'")
         # Return explicit skip marker instead of empty dict to avoid downstream confusion
@@ -6,10 +6,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-import httpx
-
 from app.agents.state import AgentState
 from app.agents.instrumentation import InstrumentedAgentContext
+from app.services.http_downloader import get_downloader
 from app.services.segmentation import sam_segment_image
 from app.utils.logging_config import get_logger
 
@@ -18,10 +17,8 @@ logger = get_logger("gamed_ai.agents.diagram_image_segmenter")
 
 async def _download_image(image_url: str, output_path: Path) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.get(image_url)
-        response.raise_for_status()
-        output_path.write_bytes(response.content)
+    content = await get_downloader().get_bytes(image_url)
+    output_path.write_bytes(content)
 
 
 async def diagram_image_segmenter_agent(state: AgentState, ctx: Optional[InstrumentedAgentContext] = None) -> dict:
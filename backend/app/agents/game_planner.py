@@ -27,7 +27,6 @@ BEHAVIOR:
 """
 
 import json
-import os
 import re
 from typing import Dict, Any, List, Optional, Tuple
 
@@ -37,6 +36,7 @@ from app.agents.schemas.stages import get_game_plan_schema
 from app.utils.logging_config import get_logger
 from app.agents.instrumentation import InstrumentedAgentContext
 from app.config.pedagogical_constants import BLOOM_LEVELS, DIFFICULTY_LEVEL
+from app.config.run_context import get_pipeline_preset
 from app.agents.schemas.game_plan_schemas import (
     ExtendedGamePlan, SceneBreakdown, MechanicSpec, AssetNeed,
     MechanicType, WorkflowType, ProgressionType, TransitionTrigger,
@@ -698,7 +698,7 @@ async def game_planner_agent(state: AgentState, ctx: Optional[InstrumentedAgentC
     # ==========================================================================
     # PRESET 2 FAST PATH: Use game_designer output if available
     # ==========================================================================
-    preset_name = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset_name = get_pipeline_preset()
     game_design = state.get("game_design")
 
     if preset_name == "advanced_interactive_diagram" and game_design:
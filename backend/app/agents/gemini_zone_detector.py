@@ -40,6 +40,7 @@ from app.agents.state import (
 from app.agents.instrumentation import InstrumentedAgentContext
 from app.agents.schemas.interactive_diagram import normalize_zones, create_labels_from_zones
 from app.utils.logging_config import get_logger
+from app.v4.helpers.zone_matcher import ZoneMatcher
 
 logger = get_logger("gamed_ai.agents.gemini_zone_detector")
 
@@ -78,6 +79,10 @@ def zones_to_entity_registry(
 
     scene_zone_ids = []
 
+    # Resolve parentLabel texts against this batch's zone labels in one pass
+    parent_labels = [z["parentLabel"] for z in zones if z.get("parentLabel") and not z.get("parentZoneId")]
+    parent_matches = ZoneMatcher([z.get("label", "") for z in zones]).match(parent_labels) if parent_labels else {}
+
     for zone in zones:
         zone_id = zone.get("id", f"zone_{len(registry['zones'])}")
         label = zone.get("label", "")
@@ -109,8 +114,12 @@ def zones_to_entity_registry(
         # Determine parent zone ID from parentLabel or parentZoneId
         parent_zone_id = zone.get("parentZoneId")
         if not parent_zone_id and zone.get("parentLabel"):
-            parent_label = zone["parentLabel"].lower().replace(" ", "_")
-            parent_zone_id = f"zone_{parent_label}"
+            parent_index = parent_matches.get(zone["parentLabel"])
+            if parent_index is not None and zones[parent_index].get("id"):
+                parent_zone_id = zones[parent_index]["id"]
+            else:
+                parent_label = zone["parentLabel"].lower().replace(" ", "_")
+                parent_zone_id = f"zone_{parent_label}"
 
         # Create ZoneEntity
         zone_entity: ZoneEntity = {
@@ -628,26 +637,20 @@ def create_zone_groups(
     if not groups:
         return []
 
-    # Build a mapping from label to zone ID
-    label_to_zone = {}
-    for zone in zones:
-        label = zone.get("label", "").lower()
-        zone_id = zone.get("id") or f"zone_{label.replace(' ', '_')}"
-        label_to_zone[label] = zone_id
+    # Match every parent/child text to a zone at once (one zone per distinct text)
+    referenced = []
+    for group in groups:
+        referenced.append(group.get("parent", ""))
+        referenced.extend(group.get("children") or group.get("members", []))
+    matches = ZoneMatcher([zone.get("label", "") for zone in zones]).match([t for t in referenced if t])
 
     def find_zone_id(label_text: str) -> Optional[str]:
         """Find zone ID for a label, with fuzzy matching."""
-        if not label_text:
+        index = matches.get(label_text) if label_text else None
+        if index is None:
             return None
-        label_lower = label_text.lower()
-        # Exact match
-        if label_lower in label_to_zone:
-            return label_to_zone[label_lower]
-        # Partial match
-        for label, zone_id in label_to_zone.items():
-            if label_lower in label or label in label_lower:
-                return zone_id
-        return None
+        zone = zones[index]
+        return zone.get("id") or f"zone_{zone.get('label', '').lower().replace(' ', '_')}"
 
     zone_groups = []
     for idx, group in enumerate(groups):
@@ -1321,7 +1324,8 @@ async def gemini_zone_detector(
 
     # Check if using advanced preset with polygon zones
     from app.config.presets import get_preset_feature
-    preset_name = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    from app.config.run_context import get_pipeline_preset
+    preset_name = get_pipeline_preset()
 
     use_polygon_zones = get_preset_feature(preset_name, "use_polygon_zones", False)
     unlimited_hierarchy = get_preset_feature(preset_name, "unlimited_hierarchy_depth", False)
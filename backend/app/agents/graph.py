@@ -5,11 +5,14 @@ This module defines the main orchestration graph for game generation.
 Implements the T1 Sequential Validated topology by default.
 """
 
-from typing import Literal, Optional, Callable, Any
+from typing import Literal, Optional, Callable, Any, Dict, List, Tuple
 from datetime import datetime
 import logging
 import json
+import time
 import asyncio
+import hashlib
+import threading
 
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
@@ -786,10 +789,10 @@ def should_use_preset_pipeline(state: AgentState) -> Literal["preset", "default"
         "preset" - Use the new diagram generation pipeline
         "default" - Use the default image classification pipeline
     """
-    import os
     from app.config.presets import get_preset
+    from app.config.run_context import get_pipeline_preset
 
-    preset_name = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset_name = get_pipeline_preset()
     template_type = state.get("template_selection", {}).get("template_type", "")
 
     # Only apply preset for INTERACTIVE_DIAGRAM templates
@@ -821,10 +824,10 @@ def should_use_advanced_preset(state: AgentState) -> Literal["advanced", "standa
         "advanced" - Use Preset 2 with diagram type classification
         "standard" - Use standard pipeline (Preset 1 or default)
     """
-    import os
     from app.config.presets import is_advanced_preset
+    from app.config.run_context import get_pipeline_preset
 
-    preset_name = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset_name = get_pipeline_preset()
 
     if is_advanced_preset(preset_name):
         logger.info(f"✓ Using advanced preset '{preset_name}' with diagram type classification")
@@ -845,10 +848,10 @@ def should_use_scene_sequencer(state: AgentState) -> Literal["sequencer", "direc
         "sequencer" - Use scene sequencer (Preset 2)
         "direct" - Go directly to scene_stage1_structure
     """
-    import os
     from app.config.presets import get_preset_feature
+    from app.config.run_context import get_pipeline_preset
 
-    preset_name = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset_name = get_pipeline_preset()
     use_sequencer = get_preset_feature(preset_name, "use_scene_sequencer", False)
 
     if use_sequencer:
@@ -874,10 +877,10 @@ def should_use_multi_scene_orchestrator(state: AgentState) -> Literal["multi_sce
         "multi_scene" - Use multi-scene image orchestrator
         "single_scene" - Continue with standard single-scene flow
     """
-    import os
     from app.config.presets import is_advanced_preset
+    from app.config.run_context import get_pipeline_preset
 
-    preset_name = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset_name = get_pipeline_preset()
 
     if not is_advanced_preset(preset_name):
         logger.info(f"✓ Using single-scene flow (preset={preset_name})")
@@ -910,10 +913,10 @@ def should_use_agentic_design(state: AgentState) -> Literal["agentic", "standard
         "agentic" - Use agentic design flow (Preset 2)
         "standard" - Go directly to game_planner
     """
-    import os
     from app.config.presets import is_advanced_preset
+    from app.config.run_context import get_pipeline_preset
 
-    preset_name = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset_name = get_pipeline_preset()
 
     if is_advanced_preset(preset_name):
         logger.info(f"✓ Using agentic game design flow (preset={preset_name})")
@@ -2105,14 +2108,79 @@ def compile_graph_with_memory():
     return graph.compile(checkpointer=checkpointer)
 
 
-# Singleton compiled graph
-_compiled_graph = None
+# =============================================================================
+# COMPILED GRAPH CACHE
+# =============================================================================
+# Building and compiling a graph costs the same on every run, and the result is
+# reusable: per-run state lives in the thread_id config and presets are read by
+# the routers at runtime. Compiled graphs are cached per (preset, topology,
+# checkpointer) and dropped when the agent model configuration changes.
+
+# Presets that get their own graph; any other preset runs the topology graph
+FULL_GRAPH_PRESETS = (
+    "preset_1",                     # V1 — Baseline
+    "preset_1_agentic_sequential",  # V1.1 — Agentic Sequential
+    "preset_1_react",               # V2 — ReAct
+    "had",                          # V2.5 — Hierarchical Agentic DAG
+    "interactive_diagram_hierarchical",   # V1 variant — Hierarchical
+    "advanced_interactive_diagram",       # V1 variant — Advanced
+    "v3",                           # V3 — 5-Phase ReAct (current)
+    "v4",                           # V4 — Streamlined 5-phase pipeline
+    "v4_algorithm",                 # V4 Algorithm — Algorithm games pipeline
+)
+
+_compiled_graphs: Dict[Tuple[Optional[str], Optional[str], int], Any] = {}
+_compiled_graphs_fingerprint: Optional[str] = None
+_compiled_graphs_lock = threading.Lock()
+_compiled_graph_stats: Dict[str, Any] = {"hits": 0, "misses": 0, "invalidations": 0, "compile_ms": {}}
+
+
+def _agent_config_fingerprint() -> str:
+    """Hash of the process-level agent model configuration (preset + AGENT_* overrides)."""
+    relevant = sorted((key, value) for key, value in os.environ.items() if key.startswith("AGENT_"))
+    return hashlib.sha256(json.dumps(relevant).encode()).hexdigest()[:16]
+
+
+def _graph_cache_key(topology: Optional[str], preset: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Normalise (preset, topology) so equivalent requests share one compiled graph."""
+    preset_key = preset.lower() if preset else None
+    if preset_key is None or preset_key == PRESET_1_BASELINE:
+        return preset_key, (topology or "T1").upper()
+    # Every other preset ignores the topology argument
+    return preset_key, None
+
+
+def invalidate_compiled_graphs() -> int:
+    """Drop every cached compiled graph. Returns the number of graphs dropped."""
+    with _compiled_graphs_lock:
+        dropped = len(_compiled_graphs)
+        _compiled_graphs.clear()
+        _compiled_graph_stats["invalidations"] += 1
+    if dropped:
+        logger.info(f"Invalidated {dropped} compiled graph(s)")
+    return dropped
+
+
+def get_compiled_graph_stats() -> Dict[str, Any]:
+    """Cache hits/misses and compile time per cached graph."""
+    with _compiled_graphs_lock:
+        return {
+            "enabled": os.getenv("GRAPH_CACHE_ENABLED", "true").lower() == "true",
+            "cached_graphs": len(_compiled_graphs),
+            "hits": _compiled_graph_stats["hits"],
+            "misses": _compiled_graph_stats["misses"],
+            "invalidations": _compiled_graph_stats["invalidations"],
+            "compile_ms": dict(_compiled_graph_stats["compile_ms"]),
+        }
 
 
 def get_compiled_graph(topology: Optional[str] = None, preset: Optional[str] = None):
     """
     Get compiled graph for specified topology and preset.
 
+    Graphs are compiled once per (preset, topology, checkpointer) and reused
+    across runs. Set GRAPH_CACHE_ENABLED=false to compile on every call.
+
     Args:
         topology: Topology type (T0, T1, T2, etc.) or None for default T1
         preset: Preset variant (preset_1, preset_1_agentic_sequential, preset_1_react)
@@ -2121,6 +2189,75 @@ def get_compiled_graph(topology: Optional[str] = None, preset: Optional[str] = N
     Returns:
         Compiled StateGraph with checkpointer
     """
+    global _compiled_graphs_fingerprint
+
+    if os.getenv("GRAPH_CACHE_ENABLED", "true").lower() != "true":
+        return _build_compiled_graph(topology, preset)
+
+    checkpointer = get_checkpointer()
+    preset_key, topology_key = _graph_cache_key(topology, preset)
+    key = (preset_key, topology_key, id(checkpointer))
+    fingerprint = _agent_config_fingerprint()
+
+    with _compiled_graphs_lock:
+        if fingerprint != _compiled_graphs_fingerprint:
+            if _compiled_graphs:
+                logger.info("Agent configuration changed; dropping compiled graph cache")
+                _compiled_graphs.clear()
+                _compiled_graph_stats["invalidations"] += 1
+            _compiled_graphs_fingerprint = fingerprint
+
+        graph = _compiled_graphs.get(key)
+        if graph is not None:
+            _compiled_graph_stats["hits"] += 1
+            return graph
+
+        # Compile under the lock so concurrent first requests don't each pay for it
+        _compiled_graph_stats["misses"] += 1
+        started = time.perf_counter()
+        graph = _build_compiled_graph(topology, preset)
+        compile_ms = round((time.perf_counter() - started) * 1000, 1)
+        _compiled_graphs[key] = graph
+        _compiled_graph_stats["compile_ms"][f"{preset_key or 'topology'}:{topology_key or '-'}"] = compile_ms
+        logger.info(f"Compiled graph for preset={preset_key} topology={topology_key} in {compile_ms}ms")
+        return graph
+
+
+def warm_compiled_graphs(presets: Optional[List[str]] = None, topology: Optional[str] = None) -> Dict[str, float]:
+    """
+    Precompile graphs so the first request doesn't pay the compile cost.
+
+    Args:
+        presets: Pipeline presets to compile. Defaults to GRAPH_WARMUP_PRESETS
+            (comma-separated), else PIPELINE_PRESET
+        topology: Topology for topology-based graphs. Defaults to TOPOLOGY, else T1
+
+    Returns:
+        Mapping of preset -> time taken in ms (failed presets are skipped)
+    """
+    if presets is None:
+        configured = os.getenv("GRAPH_WARMUP_PRESETS") or os.getenv("PIPELINE_PRESET", "")
+        presets = [p.strip() for p in configured.split(",") if p.strip()]
+    topology = topology or os.getenv("TOPOLOGY", "T1")
+
+    warmed: Dict[str, float] = {}
+    for preset in presets:
+        started = time.perf_counter()
+        try:
+            # Same graph selection as the generate route
+            if preset in FULL_GRAPH_PRESETS:
+                get_compiled_graph(topology=topology, preset=preset)
+            else:
+                get_compiled_graph(topology=topology)
+        except Exception as e:
+            logger.warning(f"Graph warm-up failed for preset '{preset}': {e}")
+            continue
+        warmed[preset] = round((time.perf_counter() - started) * 1000, 1)
+    return warmed
+
+
+def _build_compiled_graph(topology: Optional[str] = None, preset: Optional[str] = None):
+    """Build and compile the graph for a topology/preset (uncached)."""
     from app.agents.topologies import TopologyType, create_topology
 
     # Check for preset variants first
@@ -15,7 +15,9 @@ Resolution Strategies:
 - AUTO: Determine from relationship_type automatically
 
 Key Functions:
-- detect_overlaps: Calculate IoU between all zone pairs (polygon-aware)
+- detect_overlaps: Calculate IoU between overlapping zone pairs (polygon-aware);
+  a sweep-and-prune bbox broad phase (app.utils.spatial_index) picks the
+  candidate pairs so only those are measured
 - resolve_overlaps: Apply resolution strategy based on relationships
 - validate_hierarchy_containment: Ensure children are within parent bounds
 - validate_center_inside_polygon: Ensure zone centers are inside their polygons
@@ -25,9 +27,11 @@ import math
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from pydantic import BaseModel, Field
 
 from app.utils.logging_config import get_logger
+from app.utils.spatial_index import bbox_candidate_pairs, pair_iou
 
 # HAD v3: Try to import Shapely for polygon-aware IoU
 try:
@@ -395,44 +399,73 @@ class ZoneCollisionResolver:
 
     def _detect_overlaps(self, zones: List[Dict[str, Any]]) -> List[OverlapPair]:
         """
-        Calculate overlap (IoU) between all zone pairs.
+        Calculate overlap (IoU) between zone pairs.
 
-        HAD v3: Uses Shapely polygon IoU for polygon zones when available.
+        A bbox sweep-and-prune broad phase finds the pairs whose bounds
+        overlap; only those are measured. HAD v3: Uses Shapely polygon IoU for
+        polygon zones when available, otherwise a vectorised bbox IoU.
 
-        Returns list of OverlapPair for zones with IoU > 0.
+        Returns list of OverlapPair for zones with IoU > 0, in (i, j) order.
         """
-        overlaps = []
-
         # HAD v3: Use polygon-aware IoU for polygon zones
         use_polygon_iou = SHAPELY_AVAILABLE and any(z.get("points") for z in zones)
 
         if use_polygon_iou:
-            # Use polygon IoU for precise overlap detection
-            for i, zone_a in enumerate(zones):
-                for j, zone_b in enumerate(zones[i + 1:], start=i + 1):
-                    iou, intersection = calculate_polygon_iou(zone_a, zone_b)
-                    if iou > 0:
-                        overlaps.append(OverlapPair(
-                            zone_a_id=zone_a.get("id", f"zone_{i}"),
-                            zone_b_id=zone_b.get("id", f"zone_{j}"),
-                            iou=iou,
-                            intersection_area=intersection,
-                        ))
-        else:
-            # Fall back to bounding box IoU
-            zone_bounds = [self._get_zone_bounds(z) for z in zones]
-
-            for i, bounds_a in enumerate(zone_bounds):
-                for j, bounds_b in enumerate(zone_bounds[i + 1:], start=i + 1):
-                    iou, intersection = self._calculate_iou(bounds_a, bounds_b)
-                    if iou > 0:
-                        overlaps.append(OverlapPair(
-                            zone_a_id=bounds_a.zone_id,
-                            zone_b_id=bounds_b.zone_id,
-                            iou=iou,
-                            intersection_area=intersection,
-                        ))
+            return self._detect_polygon_overlaps(zones)
+
+        # Fall back to bounding box IoU
+        zone_bounds = [self._get_zone_bounds(z) for z in zones]
+        boxes = np.array([[b.min_x, b.min_y, b.max_x, b.max_y] for b in zone_bounds], dtype=np.float64)
+        areas = np.array([b.area for b in zone_bounds], dtype=np.float64)
+
+        first, second = bbox_candidate_pairs(boxes)
+        ious, intersections = pair_iou(boxes, first, second, areas=areas)
+        return [
+            OverlapPair(
+                zone_a_id=zone_bounds[i].zone_id,
+                zone_b_id=zone_bounds[j].zone_id,
+                iou=float(iou),
+                intersection_area=float(intersection),
+            )
+            for i, j, iou, intersection in zip(first, second, ious, intersections)
+            if iou > 0
+        ]
 
+    def _detect_polygon_overlaps(self, zones: List[Dict[str, Any]]) -> List[OverlapPair]:
+        """Polygon IoU for broad-phase candidates; each polygon is built once."""
+        polygons = []
+        for zone in zones:
+            try:
+                poly = _zone_to_shapely_polygon(zone)
+                if poly is not None and not poly.is_valid:
+                    poly = make_valid(poly)
+            except Exception:
+                poly = None
+            polygons.append(poly)
+
+        # Zones without a polygon can't overlap; give them an empty box
+        boxes = np.array(
+            [poly.bounds if poly is not None and not poly.is_empty else (0.0, 0.0, 0.0, 0.0) for poly in polygons],
+            dtype=np.float64,
+        )
+
+        overlaps = []
+        for i, j in zip(*bbox_candidate_pairs(boxes)):
+            i, j = int(i), int(j)
+            try:
+                intersection = polygons[i].intersection(polygons[j]).area
+                union = polygons[i].union(polygons[j]).area
+                iou = intersection / union if union > 0 else 0.0
+            except Exception as e:
+                logger.warning(f"Shapely IoU calculation failed: {e}, falling back to bbox")
+                iou, intersection = _calculate_bbox_iou(zones[i], zones[j])
+            if iou > 0:
+                overlaps.append(OverlapPair(
+                    zone_a_id=zones[i].get("id", f"zone_{i}"),
+                    zone_b_id=zones[j].get("id", f"zone_{j}"),
+                    iou=iou,
+                    intersection_area=intersection,
+                ))
         return overlaps
 
     def _get_zone_center(self, zone: Dict[str, Any]) -> Optional[Tuple[float, float]]:
@@ -616,43 +649,48 @@ class ZoneCollisionResolver:
         # Create mutable copy of zones
         zones_copy = [dict(z) for z in zones]
 
-        # Build zone lookup by ID
-        zone_by_id = {z.get("id"): z for z in zones_copy}
+        # Index zones once: centers, repulsion radii and pair indices as arrays.
+        # Shapes don't change while separating, so radii stay fixed and only
+        # centers move; the dicts are updated once at the end.
+        index_by_id = {z.get("id"): i for i, z in enumerate(zones_copy)}
+        centers = np.full((len(zones_copy), 2), np.nan)
+        radii = np.zeros(len(zones_copy))
+        is_polygon = np.zeros(len(zones_copy), dtype=bool)
+        for i, zone in enumerate(zones_copy):
+            center = self._get_zone_center(zone)
+            if center:
+                centers[i] = center
+            bbox = _get_zone_bbox(zone)
+            radii[i] = max(bbox[2] - bbox[0], bbox[3] - bbox[1]) / 2
+            is_polygon[i] = bool(zone.get("points"))
+        start = centers.copy()
+
+        pair_indices = []
+        for pair in overlapping_pairs:
+            a = index_by_id.get(pair.zone_a_id)
+            b = index_by_id.get(pair.zone_b_id)
+            if a is None or b is None:
+                continue
+            if np.isnan(centers[a]).any() or np.isnan(centers[b]).any():
+                logger.debug(f"Could not get centers for zones, skipping separation")
+                continue
+            pair_indices.append((a, b, pair))
 
         # Iterative repulsion
         max_iterations = 10
+        iteration = 0
         for iteration in range(max_iterations):
             moved = False
 
-            for pair in overlapping_pairs:
-                zone_a = zone_by_id.get(pair.zone_a_id)
-                zone_b = zone_by_id.get(pair.zone_b_id)
-
-                if not zone_a or not zone_b:
-                    continue
-
-                # Get zone centers - handle both circle and polygon zones
-                a_center = self._get_zone_center(zone_a)
-                b_center = self._get_zone_center(zone_b)
-
-                if not a_center or not b_center:
-                    logger.debug(f"Could not get centers for zones, skipping separation")
-                    continue
-
-                a_x, a_y = a_center
-                b_x, b_y = b_center
-
-                # Approximate radius from bounding box
-                a_bbox = _get_zone_bbox(zone_a)
-                b_bbox = _get_zone_bbox(zone_b)
-                a_r = max(a_bbox[2] - a_bbox[0], a_bbox[3] - a_bbox[1]) / 2
-                b_r = max(b_bbox[2] - b_bbox[0], b_bbox[3] - b_bbox[1]) / 2
+            for a, b, pair in pair_indices:
+                a_x, a_y = centers[a]
+                b_x, b_y = centers[b]
 
                 # Calculate distance and required separation
                 dx = b_x - a_x
                 dy = b_y - a_y
                 distance = math.sqrt(dx * dx + dy * dy)
-                min_distance = a_r + b_r + min_gap_percent
+                min_distance = radii[a] + radii[b] + min_gap_percent
 
                 if distance < min_distance and distance > 0:
                     # Calculate repulsion vector
@@ -663,35 +701,12 @@ class ZoneCollisionResolver:
                     nx = dx / distance
                     ny = dy / distance
 
-                    # Apply repulsion - shift the zone center for polygon zones
-                    shift_a = (nx * repulsion, ny * repulsion)
-                    shift_b = (-nx * repulsion, -ny * repulsion)
-
-                    if zone_a.get("points"):
-                        # Shift polygon points
-                        zone_a["points"] = [
-                            [p[0] - shift_a[0], p[1] - shift_a[1]]
-                            for p in zone_a["points"]
-                        ]
-                        if zone_a.get("center"):
-                            zone_a["center"]["x"] = zone_a["center"]["x"] - shift_a[0]
-                            zone_a["center"]["y"] = zone_a["center"]["y"] - shift_a[1]
-                    else:
-                        zone_a["x"] = max(5, min(95, a_x - shift_a[0]))
-                        zone_a["y"] = max(5, min(95, a_y - shift_a[1]))
-
-                    if zone_b.get("points"):
-                        # Shift polygon points
-                        zone_b["points"] = [
-                            [p[0] - shift_b[0], p[1] - shift_b[1]]
-                            for p in zone_b["points"]
-                        ]
-                        if zone_b.get("center"):
-                            zone_b["center"]["x"] = zone_b["center"]["x"] - shift_b[0]
-                            zone_b["center"]["y"] = zone_b["center"]["y"] - shift_b[1]
-                    else:
-                        zone_b["x"] = max(5, min(95, b_x - shift_b[0]))
-                        zone_b["y"] = max(5, min(95, b_y - shift_b[1]))
+                    # Polygon zones shift freely; circle zones stay within 5-95%
+                    centers[a] = (a_x - nx * repulsion, a_y - ny * repulsion)
+                    centers[b] = (b_x + nx * repulsion, b_y + ny * repulsion)
+                    for k in (a, b):
+                        if not is_polygon[k]:
+                            centers[k] = np.clip(centers[k], 5, 95)
 
                     moved = True
                     logger.debug(
@@ -701,6 +716,21 @@ class ZoneCollisionResolver:
             if not moved:
                 break
 
+        # Write the moved centers back to the zone dicts
+        for k in np.flatnonzero((centers != start).any(axis=1)):
+            zone = zones_copy[k]
+            shift_x, shift_y = (float(v) for v in centers[k] - start[k])
+            if is_polygon[k]:
+                zone["points"] = [[p[0] + shift_x, p[1] + shift_y] for p in zone["points"]]
+            else:
+                zone["x"], zone["y"] = float(centers[k][0]), float(centers[k][1])
+            if zone.get("center"):
+                zone["center"] = {
+                    **zone["center"],
+                    "x": zone["center"]["x"] + shift_x,
+                    "y": zone["center"]["y"] + shift_y,
+                }
+
         self.resolution_log.append({
             "action": "separate_discrete_zones",
             "pairs_resolved": len(overlapping_pairs),
@@ -25,6 +25,7 @@ from PIL import Image
 
 from app.agents.state import AgentState
 from app.agents.instrumentation import InstrumentedAgentContext
+from app.services.ocr_engine import OCRError, get_ocr_engine
 from app.utils.logging_config import get_logger
 
 logger = get_logger("gamed_ai.agents.image_label_classifier")
@@ -57,7 +58,7 @@ Respond with ONLY this JSON format:
 Return ONLY valid JSON, no other text."""
 
 
-def detect_text_fast(image_path: str, min_confidence: float = 0.6) -> List[Dict[str, Any]]:
+async def detect_text_fast(image_path: str, min_confidence: float = 0.6) -> List[Dict[str, Any]]:
     """
     Fast text detection using EasyOCR.
 
@@ -69,17 +70,8 @@ def detect_text_fast(image_path: str, min_confidence: float = 0.6) -> List[Dict[
         List of detected text regions with text and confidence
     """
     try:
-        import easyocr
-    except ImportError:
-        logger.warning("EasyOCR not available, returning empty result")
-        return []
-
-    try:
-        # Initialize reader (cached after first use)
-        reader = easyocr.Reader(['en'], gpu=False, verbose=False)
-
-        # Read and detect text
-        results = reader.readtext(image_path)
+        # Shared engine: warm reader, results cached per image
+        results = await get_ocr_engine().readtext(image_path)
 
         # Filter by confidence
         text_regions = []
@@ -96,6 +88,9 @@ def detect_text_fast(image_path: str, min_confidence: float = 0.6) -> List[Dict[
         logger.debug(f"EasyOCR detected {len(text_regions)} text regions (min_conf={min_confidence})")
         return text_regions
 
+    except OCRError as e:
+        logger.warning(f"EasyOCR not available, returning empty result: {e}")
+        return []
     except Exception as e:
         logger.warning(f"EasyOCR text detection failed: {e}")
         return []
@@ -271,7 +266,7 @@ async def image_label_classifier(
     logger.info(f"Classifying image: {image_path}")
 
     # Stage 1: Fast EasyOCR heuristic
-    text_regions = detect_text_fast(image_path, min_confidence=0.6)
+    text_regions = await detect_text_fast(image_path, min_confidence=0.6)
     text_count = len(text_regions)
 
     logger.info(f"EasyOCR detected {text_count} text regions")
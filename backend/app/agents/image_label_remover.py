@@ -11,10 +11,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.agents.state import AgentState
 from app.agents.instrumentation import InstrumentedAgentContext
+from app.services.http_downloader import get_downloader
 from app.services.inpainting_service import get_inpainting_service
 from app.utils.logging_config import get_logger
 
@@ -24,10 +23,8 @@ logger = get_logger("gamed_ai.agents.image_label_remover")
 async def _download_image(image_url: str, output_path: Path) -> None:
     """Download image from URL to local path"""
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.get(image_url)
-        response.raise_for_status()
-        output_path.write_bytes(response.content)
+    content = await get_downloader().get_bytes(image_url)
+    output_path.write_bytes(content)
 
 
 async def image_label_remover_agent(state: AgentState, ctx: Optional[InstrumentedAgentContext] = None) -> dict:
@@ -4,7 +4,7 @@ Pipeline Instrumentation for Observability
 Provides wrappers and utilities to track agent execution for the
 observability dashboard:
 - Stage execution tracking (timing, status, errors)
-- LLM metrics (tokens, latency, cost)
+- LLM metrics (tokens, latency, cost, response-cache hits)
 - State snapshot capture
 
 Usage:
@@ -15,18 +15,37 @@ Usage:
     # The instrumented agents will automatically track execution
 """
 import traceback
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable, List, Awaitable
 from functools import wraps
-from collections import defaultdict
-import json
 import logging
 
 from sqlalchemy.orm import Session
 
-from app.db.models import PipelineRun, StageExecution, ExecutionLog, Process
+from app.db.models import PipelineRun, StageExecution, ExecutionLog, Process, generate_uuid
 from app.db.database import SessionLocal
+from app.db.write_behind import get_write_queue, WriteFn
+from app.services.llm_cache import (
+    begin_stage_cache_stats,
+    get_stage_cache_stats,
+    end_stage_cache_stats,
+)
+from app.services.ocr_engine import (
+    begin_stage_ocr_stats,
+    get_stage_ocr_stats,
+    end_stage_ocr_stats,
+)
+from app.services.live_step_buffer import get_live_step_buffer
+from app.services.snapshot_store import (
+    bound_snapshot,
+    get_snapshot_blob_store,
+    get_blob_threshold_bytes,
+)
+from app.services.run_event_bus import (
+    get_run_event_bus,
+    EVENT_STAGE,
+    EVENT_LIVE_STEP,
+)
 
 logger = logging.getLogger("gamed_ai.agents.instrumentation")
 
@@ -918,14 +937,6 @@ def get_agent_metadata(agent_name: str) -> Dict[str, Any]:
 # Live Step Event Queue for Real-Time Streaming
 # =============================================================================
 
-# In-memory store for live step events per run_id
-# Structure: {run_id: [LiveStepEvent, ...]}
-_live_step_queues: Dict[str, List[Dict]] = defaultdict(list)
-
-# Locks for thread-safe access
-_queue_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
-
-
 def emit_live_step(
     run_id: str,
     stage_name: str,
@@ -937,7 +948,7 @@ def emit_live_step(
     Emit a live step event for real-time streaming.
 
     This is the synchronous version that can be called from anywhere.
-    Events are stored in memory and picked up by the SSE stream.
+    Events are stored in the run's ring buffer and pushed to SSE subscribers.
 
     Args:
         run_id: Pipeline run ID
@@ -952,35 +963,38 @@ def emit_live_step(
         "tool": tool,
         "timestamp": datetime.utcnow().isoformat()
     }
-    _live_step_queues[run_id].append({
+    seq = get_live_step_buffer().append(run_id, {
+        "stage_name": stage_name,
+        "step": step
+    })
+    get_run_event_bus().publish(run_id, EVENT_LIVE_STEP, {
+        "seq": seq,
         "stage_name": stage_name,
         "step": step
     })
     logger.debug(f"[LiveStep] {run_id}/{stage_name}: {step_type} - {content[:100]}...")
 
 
-def get_live_steps(run_id: str, from_index: int = 0) -> List[Dict]:
+def get_live_steps(run_id: str, cursor: int = 0) -> List[Dict]:
     """
-    Get live steps for a run, optionally starting from an index.
+    Get live steps for a run with sequence number >= cursor.
 
-    Used by SSE stream to get new steps since last poll.
+    Used by SSE stream to get new steps since its last read. Each event
+    carries its "seq"; the next cursor is the last event's seq + 1.
 
     Args:
         run_id: Pipeline run ID
-        from_index: Starting index for slicing
+        cursor: First sequence number wanted
 
     Returns:
-        List of step events since from_index
+        List of step events still in the buffer from cursor onwards
     """
-    return _live_step_queues.get(run_id, [])[from_index:]
+    return get_live_step_buffer().read(run_id, cursor)
 
 
 def clear_live_steps(run_id: str) -> None:
     """Clear live steps for a completed run to free memory."""
-    if run_id in _live_step_queues:
-        del _live_step_queues[run_id]
-    if run_id in _queue_locks:
-        del _queue_locks[run_id]
+    get_live_step_buffer().clear(run_id)
 
 
 def create_step_callback(run_id: str, stage_name: str, stage_id: Optional[str] = None) -> Callable[[Any], Awaitable[None]]:
@@ -1087,6 +1101,20 @@ def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
     return (input_tokens / 1_000_000 * costs["input"]) + (output_tokens / 1_000_000 * costs["output"])
 
 
+def stage_event_payload(stage: StageExecution) -> Dict[str, Any]:
+    """Per-stage summary used by run events and the SSE 'update' payload."""
+    return {
+        "stage_id": stage.id,
+        "stage_name": stage.stage_name,
+        "stage_order": stage.stage_order,
+        "status": stage.status,
+        "duration_ms": stage.duration_ms,
+        "tokens": stage.total_tokens,
+        "cost": float(stage.estimated_cost_usd) if stage.estimated_cost_usd else None,
+        "model_id": stage.model_id,
+    }
+
+
 def create_pipeline_run(
     process_id: str,
     topology: str,
@@ -1128,6 +1156,7 @@ def create_pipeline_run(
         db.commit()
         db.refresh(run)
 
+        get_run_event_bus().mark_local(run.id)
         logger.info(f"Created pipeline run {run.id} for process {process_id} (topology: {topology})")
         return run.id
 
@@ -1148,9 +1177,17 @@ def update_pipeline_run_status(
     final_state_summary: Optional[Dict] = None,
     db: Optional[Session] = None
 ):
-    """Update pipeline run status and completion info."""
+    """
+    Update pipeline run status and completion info.
+
+    Blocks until queued stage writes have landed; call it through
+    asyncio.to_thread() from async code.
+    """
     from sqlalchemy import func
 
+    # Stage rows are rolled up below; make sure queued stage writes have landed
+    get_write_queue().flush()
+
     should_close = False
     if db is None:
         db = SessionLocal()
@@ -1201,7 +1238,9 @@ def update_pipeline_run_status(
                 f"{token_sum or 0} tokens, {llm_call_count or 0} LLM calls"
             )
 
+        run_event = (run.status, run.duration_ms, run.error_message)
         db.commit()
+        get_run_event_bus().publish_run_status(run_id, *run_event)
         logger.info(f"Updated run {run_id} status to {status}")
 
     except Exception as e:
@@ -1212,6 +1251,30 @@ def update_pipeline_run_status(
             db.close()
 
 
+def _submit_write(name: str, apply: WriteFn, db: Optional[Session] = None, flush: bool = False) -> None:
+    """
+    Run an observability write through the write-behind queue.
+
+    If the caller passes its own session, flush the queue first (so this write
+    lands after anything already queued) and apply it inline on that session.
+    That flush blocks, so async callers passing a session should run the
+    tracking function through asyncio.to_thread().
+    """
+    if db is None:
+        get_write_queue().submit(name, apply, flush=flush)
+        return
+
+    get_write_queue().flush()
+    try:
+        callback = apply(db)
+        db.commit()
+        if callback:
+            callback()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to {name.replace('_', ' ')}: {e}")
+
+
 def track_stage_start(
     run_id: str,
     stage_name: str,
@@ -1222,44 +1285,41 @@ def track_stage_start(
     """
     Create a StageExecution record when a stage starts.
 
+    The row is written behind; its ID is assigned here so callers can use it
+    immediately.
+
     Args:
         run_id: Pipeline run ID
         stage_name: Name of the agent/stage
         stage_order: Execution order (1-indexed)
         input_snapshot: Relevant input state (truncated)
-        db: Optional database session
+        db: Optional database session (writes inline instead of queueing)
 
     Returns:
         stage_id: The new stage execution's ID
     """
-    should_close = False
-    if db is None:
-        db = SessionLocal()
-        should_close = True
+    stage_id = generate_uuid()
+    started_at = datetime.utcnow()
+    # Truncate now: the snapshot shares objects with live agent state
+    snapshot = _truncate_snapshot(input_snapshot) if input_snapshot else None
 
-    try:
+    def apply(session: Session):
         stage = StageExecution(
+            id=stage_id,
             run_id=run_id,
             stage_name=stage_name,
             stage_order=stage_order,
             status="running",
-            started_at=datetime.utcnow(),
-            input_snapshot=_truncate_snapshot(input_snapshot) if input_snapshot else None
+            started_at=started_at,
+            input_snapshot=snapshot
         )
-        db.add(stage)
-        db.commit()
-        db.refresh(stage)
-
-        logger.debug(f"Stage {stage_name} started (order={stage_order})")
-        return stage.id
+        session.add(stage)
+        event = stage_event_payload(stage)
+        return lambda: get_run_event_bus().publish(run_id, EVENT_STAGE, event)
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to track stage start: {e}")
-        raise
-    finally:
-        if should_close:
-            db.close()
+    _submit_write("track_stage_start", apply, db)
+    logger.debug(f"Stage {stage_name} started (order={stage_order})")
+    return stage_id
 
 
 def track_stage_complete(
@@ -1279,36 +1339,36 @@ def track_stage_complete(
     """Mark a stage as successfully completed with metrics.
 
     If used_fallback is True, the status will be 'degraded' instead of 'success'.
+    The update is written behind and the queue is flushed promptly.
     """
-    should_close = False
-    if db is None:
-        db = SessionLocal()
-        should_close = True
+    finished_at = datetime.utcnow()
+    snapshot = None
+    if output_snapshot:
+        # Add fallback info to output snapshot if applicable
+        snapshot = _truncate_snapshot(output_snapshot)
+        if used_fallback:
+            snapshot["_used_fallback"] = True
+            snapshot["_fallback_reason"] = fallback_reason or "Unknown fallback reason"
+    elif used_fallback:
+        snapshot = {
+            "_used_fallback": True,
+            "_fallback_reason": fallback_reason or "Unknown fallback reason"
+        }
 
-    try:
-        stage = db.query(StageExecution).filter(StageExecution.id == stage_id).first()
+    def apply(session: Session):
+        stage = session.query(StageExecution).filter(StageExecution.id == stage_id).first()
         if not stage:
             logger.warning(f"Stage {stage_id} not found")
-            return
+            return None
 
         # Use "degraded" status if a fallback was used
         stage.status = "degraded" if used_fallback else "success"
-        stage.finished_at = datetime.utcnow()
+        stage.finished_at = finished_at
         if stage.started_at:
             stage.duration_ms = int((stage.finished_at - stage.started_at).total_seconds() * 1000)
 
-        if output_snapshot:
-            # Add fallback info to output snapshot if applicable
-            snapshot = _truncate_snapshot(output_snapshot)
-            if used_fallback:
-                snapshot["_used_fallback"] = True
-                snapshot["_fallback_reason"] = fallback_reason or "Unknown fallback reason"
+        if snapshot is not None:
             stage.output_snapshot = snapshot
-        elif used_fallback:
-            stage.output_snapshot = {
-                "_used_fallback": True,
-                "_fallback_reason": fallback_reason or "Unknown fallback reason"
-            }
 
         # LLM metrics
         if model_id:
@@ -1332,15 +1392,11 @@ def track_stage_complete(
         if validation_errors is not None:
             stage.validation_errors = validation_errors
 
-        db.commit()
         logger.debug(f"Stage {stage.stage_name} completed successfully")
+        run_id, event = stage.run_id, stage_event_payload(stage)
+        return lambda: get_run_event_bus().publish(run_id, EVENT_STAGE, event)
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to track stage completion: {e}")
-    finally:
-        if should_close:
-            db.close()
+    _submit_write("track_stage_complete", apply, db, flush=True)
 
 
 def save_stage_checkpoint(
@@ -1359,45 +1415,34 @@ def save_stage_checkpoint(
         run_id: Pipeline run ID
         stage_name: Name of the stage (agent) that just completed
         checkpoint_id: LangGraph checkpoint_id from astream_events
-        db: Optional database session
+        db: Optional database session (writes inline instead of queueing)
     """
-    should_close = False
-    if db is None:
-        db = SessionLocal()
-        should_close = True
-    
-    try:
+    def apply(session: Session):
         # Find the most recent stage execution for this run/stage
         # Stage should be in "success" or "degraded" status (just completed)
-        stage = db.query(StageExecution).filter(
+        stage = session.query(StageExecution).filter(
             StageExecution.run_id == run_id,
             StageExecution.stage_name == stage_name,
             StageExecution.status.in_(["success", "degraded", "running"])  # Include running in case it's being updated
         ).order_by(StageExecution.stage_order.desc()).first()
-        
+
         if not stage:
             logger.warning(
                 f"Could not find stage execution for run_id={run_id}, "
                 f"stage_name={stage_name} to save checkpoint_id={checkpoint_id}"
             )
-            return
-        
+            return None
+
         # Update stage with checkpoint_id
         stage.checkpoint_id = checkpoint_id
-        db.commit()
-        
         logger.debug(
             f"Saved checkpoint_id {checkpoint_id} for stage '{stage_name}' "
             f"in run {run_id} (stage_order={stage.stage_order})"
         )
-        
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to save checkpoint for stage {stage_name}: {e}")
-        # Don't raise - checkpoint saving is non-critical
-    finally:
-        if should_close:
-            db.close()
+        return None
+
+    # Don't raise - checkpoint saving is non-critical
+    _submit_write("save_stage_checkpoint", apply, db)
 
 
 def track_stage_failed(
@@ -1407,19 +1452,16 @@ def track_stage_failed(
     db: Optional[Session] = None
 ):
     """Mark a stage as failed with error details."""
-    should_close = False
-    if db is None:
-        db = SessionLocal()
-        should_close = True
+    finished_at = datetime.utcnow()
 
-    try:
-        stage = db.query(StageExecution).filter(StageExecution.id == stage_id).first()
+    def apply(session: Session):
+        stage = session.query(StageExecution).filter(StageExecution.id == stage_id).first()
         if not stage:
             logger.warning(f"Stage {stage_id} not found")
-            return
+            return None
 
         stage.status = "failed"
-        stage.finished_at = datetime.utcnow()
+        stage.finished_at = finished_at
         if stage.started_at:
             stage.duration_ms = int((stage.finished_at - stage.started_at).total_seconds() * 1000)
 
@@ -1427,15 +1469,11 @@ def track_stage_failed(
         if error_traceback:
             stage.error_traceback = error_traceback
 
-        db.commit()
         logger.debug(f"Stage {stage.stage_name} failed: {error_message[:100]}")
+        run_id, event = stage.run_id, stage_event_payload(stage)
+        return lambda: get_run_event_bus().publish(run_id, EVENT_STAGE, event)
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to track stage failure: {e}")
-    finally:
-        if should_close:
-            db.close()
+    _submit_write("track_stage_failed", apply, db, flush=True)
 
 
 def add_execution_log(
@@ -1446,119 +1484,55 @@ def add_execution_log(
     metadata: Optional[Dict] = None,
     db: Optional[Session] = None
 ):
-    """Add an execution log entry."""
-    should_close = False
-    if db is None:
-        db = SessionLocal()
-        should_close = True
-
-    try:
-        log = ExecutionLog(
+    """Add an execution log entry (written behind unless db is given)."""
+    def apply(session: Session):
+        session.add(ExecutionLog(
             run_id=run_id,
             stage_execution_id=stage_execution_id,
             level=level,
             message=message,
             log_metadata=metadata
-        )
-        db.add(log)
-        db.commit()
+        ))
+        return None
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to add execution log: {e}")
-    finally:
-        if should_close:
-            db.close()
+    _submit_write("add_execution_log", apply, db)
 
 
 def _truncate_snapshot(data: Dict, max_size_kb: int = 200) -> Dict:
     """
     Truncate snapshot data to prevent database bloat.
-    
-    Truncates to max_size_kb (default 200KB) by calculating JSON size.
-    Preserves top-level keys and truncates nested values if needed.
+
+    Walks the snapshot once (see app/services/snapshot_store.py): large
+    strings such as base64 assets are moved to the content-addressed blob
+    store and referenced by digest, and whatever still doesn't fit in
+    max_size_kb is dropped with its path recorded in ``_elided_paths``.
     Adds metadata about truncation.
 
     Args:
         data: Dictionary to truncate
         max_size_kb: Maximum size in KB (default 200KB)
-        
+
     Returns:
         Truncated dictionary with metadata if truncated
     """
     if not isinstance(data, dict):
         return data
 
-    # Calculate current size in bytes
     try:
-        current_size_bytes = len(json.dumps(data, default=str))
-        max_size_bytes = max_size_kb * 1024
-        
-        # If within limit, return as-is
-        if current_size_bytes <= max_size_bytes:
-            return data
-        
-        # Need to truncate - preserve structure but reduce values
-        truncated = {}
-        total_size = 0
-        original_size_kb = current_size_bytes / 1024
-        
-        for key, value in data.items():
-            # Estimate size of this key-value pair
-            test_dict = {key: value}
-            pair_size = len(json.dumps(test_dict, default=str))
-            
-            # If adding this would exceed limit, truncate the value
-            if total_size + pair_size > max_size_bytes:
-                if isinstance(value, str):
-                    # Truncate string to fit remaining space
-                    remaining = max_size_bytes - total_size - len(json.dumps({key: ""}, default=str))
-                    if remaining > 100:  # Only truncate if meaningful space left
-                        truncated[key] = value[:remaining - 50] + "... (truncated)"
-                    else:
-                        truncated[key] = "... (truncated - too large)"
-                elif isinstance(value, (list, tuple)):
-                    # Keep first N items that fit
-                    truncated[key] = []
-                    for item in value:
-                        test_list = [item]
-                        item_size = len(json.dumps({key: test_list}, default=str))
-                        if total_size + item_size > max_size_bytes:
-                            truncated[key].append("... (truncated)")
-                            break
-                        truncated[key].append(item)
-                        total_size += item_size
-                elif isinstance(value, dict):
-                    # Recursively truncate nested dict
-                    remaining = max_size_bytes - total_size
-                    nested = _truncate_snapshot(value, remaining // 1024)
-                    truncated[key] = nested
-                    total_size += len(json.dumps({key: nested}, default=str))
-                else:
-                    # For other types, try to include if it fits
-                    if total_size + pair_size <= max_size_bytes:
-                        truncated[key] = value
-                        total_size += pair_size
-                    else:
-                        truncated[key] = "... (truncated - too large)"
-                break
-            else:
-                # Include this key-value pair
-                truncated[key] = value
-                total_size += pair_size
-        
-        # Add truncation metadata
-        truncated["_truncated"] = True
-        truncated["_original_size_kb"] = round(original_size_kb, 2)
-        truncated["_truncated_size_kb"] = round(len(json.dumps(truncated, default=str)) / 1024, 2)
-        
-        logger.debug(
-            f"Truncated snapshot from {original_size_kb:.2f}KB to {truncated['_truncated_size_kb']:.2f}KB "
-            f"(limit: {max_size_kb}KB)"
+        truncated = bound_snapshot(
+            data,
+            max_bytes=max_size_kb * 1024,
+            blob_store=get_snapshot_blob_store(),
+            blob_threshold_bytes=get_blob_threshold_bytes()
         )
-        
+        if truncated.get("_truncated"):
+            logger.debug(
+                f"Truncated snapshot from {truncated['_original_size_kb']:.2f}KB to "
+                f"{truncated['_truncated_size_kb']:.2f}KB (limit: {max_size_kb}KB, "
+                f"blobs: {truncated.get('_blob_count', 0)})"
+            )
         return truncated
-        
+
     except Exception as e:
         # If truncation fails, return minimal data
         logger.warning(f"Failed to truncate snapshot: {e}, returning minimal data")
@@ -2102,6 +2076,8 @@ class InstrumentedAgentContext:
         self._tool_metrics = {}
         self._react_metrics = {}
         self._step_callback = None
+        self._cache_stats_token = None
+        self._ocr_stats_token = None
 
         # Create step callback for real-time streaming if run_id is available
         if self.run_id:
@@ -2152,6 +2128,10 @@ class InstrumentedAgentContext:
             logger.debug(f"No _run_id in state, skipping instrumentation for {self.agent_name}")
             return self
 
+        # Collect LLM response-cache hits/misses for this stage
+        self._cache_stats_token = begin_stage_cache_stats()
+        self._ocr_stats_token = begin_stage_ocr_stats()
+
         try:
             stage_order = get_stage_order(self.state)
             input_keys = extract_input_keys(self.state, self.agent_name)
@@ -2171,6 +2151,13 @@ class InstrumentedAgentContext:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._cache_stats_token is not None:
+            end_stage_cache_stats(self._cache_stats_token)
+            self._cache_stats_token = None
+        if self._ocr_stats_token is not None:
+            end_stage_ocr_stats(self._ocr_stats_token)
+            self._ocr_stats_token = None
+
         if not self.stage_id:
             return False  # Don't suppress exceptions
 
@@ -2183,6 +2170,9 @@ class InstrumentedAgentContext:
                     error_traceback=traceback.format_exc()
                 )
             # Success tracking is done explicitly via complete()
+
+            # Stage writes are queued; make them durable before the next node runs
+            await get_write_queue().aflush()
         except Exception as e:
             logger.warning(f"Failed to track stage exit: {e}")
 
@@ -2317,6 +2307,16 @@ class InstrumentedAgentContext:
             if "_llm_metrics" in result:
                 output_snapshot["_llm_metrics"] = result["_llm_metrics"]
 
+            # Include LLM response-cache counters if any LLM call went through the cache
+            cache_stats = get_stage_cache_stats()
+            if cache_stats is not None and cache_stats.lookups:
+                output_snapshot["_llm_cache_metrics"] = cache_stats.to_dict()
+
+            # Include OCR latency / worker memory if the stage ran OCR
+            ocr_stats = get_stage_ocr_stats()
+            if ocr_stats is not None and ocr_stats.images:
+                output_snapshot["_ocr_metrics"] = ocr_stats.to_dict()
+
             # Include sub-stages from compound V4 nodes (for sub-node rendering)
             if hasattr(self, '_sub_stages') and self._sub_stages:
                 output_snapshot["_sub_stages"] = self._sub_stages
@@ -2428,6 +2428,7 @@ def wrap_agent_with_instrumentation(agent_func: Callable, agent_name: str) -> Ca
             message=f"Starting agent: {agent_name}",
             level="info"
         )
+        started_at = datetime.utcnow()
 
         async with InstrumentedAgentContext(state, agent_name) as ctx:
             try:
@@ -2510,15 +2511,9 @@ def wrap_agent_with_instrumentation(agent_func: Callable, agent_name: str) -> Ca
                 # Log successful completion
                 duration_msg = ""
                 if ctx.stage_id:
-                    # Try to get duration from completed stage
-                    try:
-                        db = SessionLocal()
-                        stage = db.query(StageExecution).filter(StageExecution.id == ctx.stage_id).first()
-                        if stage and stage.duration_ms:
-                            duration_msg = f" in {stage.duration_ms}ms"
-                        db.close()
-                    except Exception:
-                        pass
+                    # Stage row is written behind, so time the stage here
+                    duration_ms = int((datetime.utcnow() - started_at).total_seconds() * 1000)
+                    duration_msg = f" in {duration_ms}ms"
 
                 add_execution_log(
                     run_id=run_id,
@@ -25,13 +25,13 @@ Outputs:
 
 import asyncio
 import logging
-import os
 from typing import Dict, Any, List, Optional
 
 from app.agents.state import AgentState
 from app.agents.instrumentation import InstrumentedAgentContext
 from app.services.llm_service import get_llm_service
 from app.utils.logging_config import get_logger
+from app.config.run_context import get_pipeline_preset
 
 logger = get_logger("gamed_ai.agents.multi_scene_image_orchestrator")
 
@@ -52,7 +52,7 @@ async def multi_scene_image_orchestrator(
     For single-scene games, this agent is skipped.
     """
     # Check preset - only run for Preset 2
-    preset = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset = get_pipeline_preset()
     if preset != "advanced_interactive_diagram":
         logger.info(f"Skipping multi_scene_image_orchestrator - preset is '{preset}'")
         return {}
@@ -33,6 +33,7 @@ import numpy as np
 
 from app.agents.state import AgentState
 from app.agents.instrumentation import InstrumentedAgentContext
+from app.services.ocr_engine import get_ocr_engine
 from app.utils.logging_config import get_logger
 
 logger = get_logger("gamed_ai.agents.qwen_annotation_detector")
@@ -384,20 +385,19 @@ class QwenAnnotationDetector:
         This avoids the problem of Hough detecting diagram structure by
         constraining the search to regions near text boxes.
         """
-        import easyocr
-
         logger.info("Using hybrid detection: EasyOCR + geometric line inference")
 
         # Step 1: EasyOCR for precise text detection
         # Use lower thresholds to catch more text (especially smaller/faded labels)
-        reader = easyocr.Reader(['en'], gpu=False)
-        ocr_results = reader.readtext(
+        ocr_results = await get_ocr_engine().readtext(
             image_path,
-            paragraph=False,
-            min_size=5,
-            text_threshold=0.3,  # Lower threshold for better recall
-            low_text=0.3,
-            link_threshold=0.3
+            options=dict(
+                paragraph=False,
+                min_size=5,
+                text_threshold=0.3,  # Lower threshold for better recall
+                low_text=0.3,
+                link_threshold=0.3
+            )
         )
 
         img = cv2.imread(image_path)
@@ -859,13 +859,10 @@ async def _fallback_easyocr_detection(image_path: str) -> Dict[str, Any]:
 
     Note: This will NOT detect leader lines, only text boxes.
     """
-    import easyocr
-
     logger.info("Running EasyOCR fallback detection")
     start_time = time.time()
 
-    reader = easyocr.Reader(['en'], gpu=False)
-    results = reader.readtext(image_path)
+    results = await get_ocr_engine().readtext(image_path)
 
     img = cv2.imread(image_path)
     h, w = img.shape[:2]
@@ -29,13 +29,13 @@ Outputs:
 import json
 
 from app.utils.logging_config import get_logger
-import os
 import re
 from typing import Dict, Any, Optional, List
 
 from app.agents.state import AgentState
 from app.agents.instrumentation import InstrumentedAgentContext
 from app.services.llm_service import get_llm_service
+from app.config.run_context import get_pipeline_preset
 
 logger = get_logger("gamed_ai.agents.scene_sequencer")
 
@@ -128,7 +128,7 @@ async def scene_sequencer_agent(
     """
     # CRITICAL: Only run for Preset 2 (advanced_interactive_diagram)
     # Preset 1 must NOT run this agent to preserve original behavior
-    preset = os.getenv("PIPELINE_PRESET", "interactive_diagram_hierarchical")
+    preset = get_pipeline_preset()
     if preset != "advanced_interactive_diagram":
         logger.info(f"Skipping scene_sequencer - preset is '{preset}', not 'advanced_interactive_diagram'")
         # Return minimal state to indicate skipped (not an error)
@@ -21,6 +21,14 @@ from app.config.agent_models import (
     set_runtime_config
 )
 
+from app.config.run_context import (
+    RunContext,
+    run_context,
+    get_run_context,
+    get_pipeline_preset,
+    get_agent_preset
+)
+
 __all__ = [
     # Model Registry
     "ModelProvider",
@@ -35,5 +43,12 @@ __all__ = [
     "get_agent_config",
     "load_config_from_env",
     "get_runtime_config",
-    "set_runtime_config"
+    "set_runtime_config",
+
+    # Per-run Context
+    "RunContext",
+    "run_context",
+    "get_run_context",
+    "get_pipeline_preset",
+    "get_agent_preset"
 ]
@@ -5,9 +5,12 @@ Provides plug-and-play model assignment for each agent in the pipeline.
 Supports presets for different optimization goals (cost, quality, balanced).
 
 Environment Variables:
-    AGENT_CONFIG_PRESET: Use a preset ("cost_optimized", "quality_optimized", "balanced")
+    AGENT_CONFIG_PRESET: Use a preset ("cost_optimized", "quality_optimized", "balanced");
+        a run's own preset (app.config.run_context) takes precedence
     AGENT_MODEL_<AGENT_NAME>: Override model for specific agent
     AGENT_TEMPERATURE_<AGENT_NAME>: Override temperature for specific agent
+    AGENT_CACHE_<AGENT_NAME>: "false" to bypass the LLM response cache for an agent
+    AGENT_PRIORITY_<AGENT_NAME>: LLM rate-limiter priority (0 = critical path, 1 = normal, 2 = background)
 
 Example:
     AGENT_CONFIG_PRESET=quality_optimized
@@ -25,13 +28,33 @@ Usage:
 import os
 import logging
 from dataclasses import dataclass, field
-from typing import Dict, Optional, List, Literal
+from typing import Dict, Optional, List, Literal, Tuple
 from contextvars import ContextVar
 
 from app.config.models import MODEL_REGISTRY
+from app.config.run_context import RunContext, get_run_context, get_agent_preset
 
 logger = logging.getLogger("gamed_ai.config.agent_models")
 
+# LLM rate-limiter priorities (app/services/llm_rate_limiter.py); lower is served first
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+
+# Single-instance stages every later stage waits on. Their calls go ahead of
+# fan-out workers (scene/content/interaction designers) queued on the same provider,
+# and slow ones are hedged on an equivalent model (app/services/llm_router.py).
+DEFAULT_AGENT_PRIORITIES: Dict[str, int] = {
+    "router": PRIORITY_CRITICAL,
+    "input_enhancer": PRIORITY_CRITICAL,
+    "input_analyzer": PRIORITY_CRITICAL,
+    "dk_retriever": PRIORITY_CRITICAL,
+    "domain_knowledge_retriever": PRIORITY_CRITICAL,
+    "game_concept_designer": PRIORITY_CRITICAL,
+    "game_designer": PRIORITY_CRITICAL,
+    "game_planner": PRIORITY_CRITICAL,
+    "blueprint_generator": PRIORITY_CRITICAL,
+}
+
 
 @dataclass
 class AgentModelConfig:
@@ -43,6 +66,8 @@ class AgentModelConfig:
         agent_models: Mapping of agent name to model key
         agent_temperatures: Mapping of agent name to temperature
         agent_max_tokens: Mapping of agent name to max tokens
+        agent_cache_enabled: Mapping of agent name to LLM response cache opt-in
+        agent_priorities: Mapping of agent name to LLM rate-limiter priority
     """
 
     # Default model for all agents
@@ -230,6 +255,14 @@ class AgentModelConfig:
         "v4a_scene_content_gen_constraint_puzzle": 12288,    # Board config + constraints
     })
 
+    # Per-agent LLM response cache opt-out (agents not listed use the cache)
+    # Set False for agents whose repeated calls must produce fresh samples
+    agent_cache_enabled: Dict[str, bool] = field(default_factory=dict)
+
+    # Per-agent rate-limiter priority overrides (lower is served first);
+    # agents not listed fall back to DEFAULT_AGENT_PRIORITIES, then normal
+    agent_priorities: Dict[str, int] = field(default_factory=dict)
+
     def get_model(self, agent_name: str) -> str:
         """Get model key for an agent"""
         model = self.agent_models.get(agent_name, self.default_model)
@@ -249,6 +282,16 @@ class AgentModelConfig:
         """Get max tokens for an agent"""
         return self.agent_max_tokens.get(agent_name, 4096)
 
+    def is_cache_enabled(self, agent_name: str) -> bool:
+        """Whether an agent's LLM calls may be served from the response cache"""
+        return self.agent_cache_enabled.get(agent_name, True)
+
+    def get_priority(self, agent_name: str) -> int:
+        """Rate-limiter queue priority for an agent's LLM calls (lower is served first)"""
+        if agent_name in self.agent_priorities:
+            return self.agent_priorities[agent_name]
+        return DEFAULT_AGENT_PRIORITIES.get(agent_name, PRIORITY_NORMAL)
+
     def set_model(self, agent_name: str, model_key: str) -> None:
         """Set model for an agent"""
         if model_key not in MODEL_REGISTRY:
@@ -309,6 +352,8 @@ class AgentModelConfig:
             "agent_models": dict(self.agent_models),
             "agent_temperatures": dict(self.agent_temperatures),
             "agent_max_tokens": dict(self.agent_max_tokens),
+            "agent_cache_enabled": dict(self.agent_cache_enabled),
+            "agent_priorities": dict(self.agent_priorities),
         }
 
     @classmethod
@@ -320,6 +365,8 @@ class AgentModelConfig:
             agent_models=data.get("agent_models", {}),
             agent_temperatures=data.get("agent_temperatures", {}),
             agent_max_tokens=data.get("agent_max_tokens", {}),
+            agent_cache_enabled=data.get("agent_cache_enabled", {}),
+            agent_priorities=data.get("agent_priorities", {}),
         )
 
 
@@ -921,10 +968,11 @@ def load_config_from_env() -> AgentModelConfig:
     Load agent configuration from environment variables.
 
     Priority:
-    1. AGENT_CONFIG_PRESET (set by user's provider selection)
+    1. Run context agent preset, else AGENT_CONFIG_PRESET (set by user's provider selection)
     2. Individual AGENT_MODEL_<NAME> overrides
     3. Individual AGENT_TEMPERATURE_<NAME> overrides
-    4. Default "balanced" preset
+    4. Individual AGENT_CACHE_<NAME> response-cache opt-outs
+    5. Default "balanced" preset
 
     The system respects the user's explicit provider selection and does NOT
     automatically override to local models regardless of USE_OLLAMA setting.
@@ -933,7 +981,7 @@ def load_config_from_env() -> AgentModelConfig:
         AgentModelConfig with merged settings
     """
     # Start with preset (or balanced default)
-    preset_name = os.getenv("AGENT_CONFIG_PRESET", "balanced")
+    preset_name = get_agent_preset()
     if preset_name not in PRESET_CONFIGS:
         logger.warning(
             f"Unknown preset '{preset_name}', using 'balanced'. "
@@ -980,19 +1028,39 @@ def load_config_from_env() -> AgentModelConfig:
             except ValueError:
                 logger.warning(f"Invalid temperature in {env_key}: {env_value}")
 
+    # Apply individual response-cache opt-outs
+    for env_key, env_value in os.environ.items():
+        if env_key.startswith("AGENT_CACHE_"):
+            agent_name = env_key[12:].lower()  # Remove prefix, lowercase
+            config.agent_cache_enabled[agent_name] = env_value.lower() == "true"
+            logger.info(f"Override: {agent_name} response cache → {env_value}")
+
+    # Apply individual rate-limiter priorities
+    for env_key, env_value in os.environ.items():
+        if env_key.startswith("AGENT_PRIORITY_"):
+            agent_name = env_key[15:].lower()  # Remove prefix, lowercase
+            try:
+                config.agent_priorities[agent_name] = int(env_value)
+                logger.info(f"Override: {agent_name} priority → {env_value}")
+            except ValueError:
+                logger.warning(f"Invalid priority in {env_key}: {env_value}")
+
     return config
 
 
-def get_agent_config(preset: str = "balanced") -> AgentModelConfig:
+def get_agent_config(preset: Optional[str] = None) -> AgentModelConfig:
     """
     Get a preset agent configuration.
 
     Args:
-        preset: Name of preset ("cost_optimized", "quality_optimized", "balanced")
+        preset: Name of preset ("cost_optimized", "quality_optimized", "balanced").
+            Defaults to the current run's agent preset (see get_agent_preset).
 
     Returns:
         AgentModelConfig for the preset
     """
+    if preset is None:
+        preset = get_agent_preset()
     if preset not in PRESET_CONFIGS:
         raise ValueError(
             f"Unknown preset: '{preset}'. Available: {list(PRESET_CONFIGS.keys())}"
@@ -1000,19 +1068,25 @@ def get_agent_config(preset: str = "balanced") -> AgentModelConfig:
     return PRESET_CONFIGS[preset]
 
 
-# Context-aware runtime configuration (per-run context)
-_runtime_config_var: ContextVar[Optional[AgentModelConfig]] = ContextVar('agent_config', default=None)
+# Context-aware runtime configuration (per-run context).
+# The loaded config is remembered together with the RunContext it was loaded
+# under, so entering a run with a different agent preset reloads it.
+_runtime_config_var: ContextVar[Optional[Tuple[Optional[RunContext], AgentModelConfig]]] = ContextVar(
+    'agent_config', default=None
+)
 
 
 def get_runtime_config() -> AgentModelConfig:
     """Get the runtime configuration (per-run context)"""
-    config = _runtime_config_var.get()
-    if config is None:
-        config = load_config_from_env()
-        _runtime_config_var.set(config)
+    run_ctx = get_run_context()
+    cached = _runtime_config_var.get()
+    if cached is not None and cached[0] is run_ctx:
+        return cached[1]
+    config = load_config_from_env()
+    _runtime_config_var.set((run_ctx, config))
     return config
 
 
 def set_runtime_config(config: AgentModelConfig) -> None:
     """Set the runtime configuration for current context"""
-    _runtime_config_var.set(config)
+    _runtime_config_var.set((get_run_context(), config))
@@ -9,16 +9,21 @@ Supports:
 - Anthropic (Claude Opus, Sonnet, Haiku)
 - Local models (future: Ollama, vLLM)
 
+Equivalence classes (MODEL_EQUIVALENCE_CLASSES) group interchangeable models
+across providers; LLMService's router hedges and fails over within a class.
+
 Usage:
     from app.config.models import MODEL_REGISTRY, get_model_config
 
     config = get_model_config("claude-sonnet")
     print(f"Using {config.model_id} at ${config.cost_per_1k_input}/1k tokens")
+
+    get_equivalent_models("gemini-2.5-pro")  # ["gemini-3-pro", "claude-sonnet", "gpt-4o"]
 """
 
 from enum import Enum
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class ModelProvider(Enum):
@@ -433,6 +438,46 @@ MODEL_REGISTRY: Dict[str, ModelConfig] = {
 }
 
 
+# =============================================================================
+# EQUIVALENCE CLASSES
+# =============================================================================
+
+# Models that can stand in for each other: comparable quality, and the same
+# prompts and JSON schemas work on each. The LLM router (app/services/llm_router.py)
+# sends hedged duplicates and fails over only within a class. Local models are
+# deliberately absent so a run never silently moves between local and hosted.
+MODEL_EQUIVALENCE_CLASSES: Dict[str, List[str]] = {
+    "premium": ["gemini-2.5-pro", "gemini-3-pro", "claude-sonnet", "gpt-4o"],
+    "balanced": ["gemini-2.5-flash", "gemini-3-flash", "gpt-4o-mini", "claude-haiku"],
+    "lite": ["gemini-2.5-flash-lite", "llama-3.1-8b-instant"],
+}
+
+
+def resolve_model_key(model: Optional[str]) -> Optional[str]:
+    """Registry key for a model key or API model id (None if unknown)."""
+    if not model:
+        return None
+    if model in MODEL_REGISTRY:
+        return model
+    return next((key for key, config in MODEL_REGISTRY.items() if config.model_id == model), None)
+
+
+def get_equivalent_models(model_key: str) -> List[str]:
+    """
+    Other members of a model's equivalence class, in declared preference order.
+
+    Registry aliases (e.g. "claude-3-5-sonnet-20241022" for "claude-sonnet")
+    share their class; members with the same model_id are not returned.
+    """
+    config = MODEL_REGISTRY.get(model_key)
+    if config is None:
+        return []
+    for members in MODEL_EQUIVALENCE_CLASSES.values():
+        if any(MODEL_REGISTRY[member].model_id == config.model_id for member in members):
+            return [m for m in members if MODEL_REGISTRY[m].model_id != config.model_id]
+    return []
+
+
 def get_model_config(model_key: str) -> ModelConfig:
     """
     Get configuration for a model by its key.
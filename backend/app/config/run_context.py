@@ -0,0 +1,91 @@
+"""
+Per-Run Configuration Context
+
+Carries the presets chosen for one generation run (pipeline preset, agent
+model preset, topology) in a ContextVar instead of process-wide environment
+variables. Runs started concurrently on the same worker each see their own
+presets; LangGraph nodes and asyncio tasks spawned inside the run inherit the
+context automatically.
+
+Outside a run (CLI scripts, tests, request handlers) the getters fall back to
+the PIPELINE_PRESET / AGENT_CONFIG_PRESET environment variables, so existing
+configuration keeps working.
+
+Usage:
+    with run_context(pipeline_preset="v4", agent_preset="gemini_only", run_id=run_id):
+        graph = get_compiled_graph(preset="v4")
+        await graph.ainvoke(state, config)
+
+    preset_name = get_pipeline_preset()   # "v4" inside the block
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Iterator, Optional
+
+DEFAULT_PIPELINE_PRESET = "interactive_diagram_hierarchical"
+DEFAULT_AGENT_PRESET = "balanced"
+
+
+@dataclass(frozen=True)
+class RunContext:
+    """Presets in effect for the current generation run."""
+    run_id: Optional[str] = None
+    pipeline_preset: Optional[str] = None
+    agent_preset: Optional[str] = None
+    topology: Optional[str] = None
+
+
+_run_context_var: ContextVar[Optional[RunContext]] = ContextVar("run_context", default=None)
+
+
+def get_run_context() -> Optional[RunContext]:
+    """Get the current run context (None outside a run)."""
+    return _run_context_var.get()
+
+
+@contextmanager
+def run_context(
+    run_id: Optional[str] = None,
+    pipeline_preset: Optional[str] = None,
+    agent_preset: Optional[str] = None,
+    topology: Optional[str] = None
+) -> Iterator[RunContext]:
+    """
+    Scope presets to the enclosed code (and tasks it spawns).
+
+    Fields left as None inherit from an enclosing run context, if any.
+    """
+    parent = _run_context_var.get() or RunContext()
+    updates = {
+        key: value for key, value in (
+            ("run_id", run_id),
+            ("pipeline_preset", pipeline_preset),
+            ("agent_preset", agent_preset),
+            ("topology", topology),
+        ) if value is not None
+    }
+    context = replace(parent, **updates)
+    token = _run_context_var.set(context)
+    try:
+        yield context
+    finally:
+        _run_context_var.reset(token)
+
+
+def get_pipeline_preset(default: str = DEFAULT_PIPELINE_PRESET) -> str:
+    """Pipeline preset for the current run, else PIPELINE_PRESET, else default."""
+    context = _run_context_var.get()
+    if context and context.pipeline_preset:
+        return context.pipeline_preset
+    return os.getenv("PIPELINE_PRESET", default)
+
+
+def get_agent_preset(default: str = DEFAULT_AGENT_PRESET) -> str:
+    """Agent model preset for the current run, else AGENT_CONFIG_PRESET, else default."""
+    context = _run_context_var.get()
+    if context and context.agent_preset:
+        return context.agent_preset
+    return os.getenv("AGENT_CONFIG_PRESET", default)
@@ -1,12 +1,17 @@
 """Database configuration and engine setup"""
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+from typing import AsyncIterator, Optional
 import os
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger("gamed_ai.db.database")
+
 # Database URL - SQLite for development, PostgreSQL for production
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -42,6 +47,28 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def create_background_sessionmaker() -> sessionmaker:
+    """
+    Session factory for a dedicated background thread (e.g. the write-behind queue).
+
+    SQLite's StaticPool shares a single connection across threads, so a
+    background transaction could be committed or rolled back by a request
+    session. Give the thread its own connection to the same file instead.
+    """
+    in_memory = DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
+    if not DATABASE_URL.startswith("sqlite") or in_memory:
+        return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    background_engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": 30},
+        poolclass=StaticPool,
+        echo=False
+    )
+    event.listen(background_engine, "connect", set_sqlite_pragma)
+    return sessionmaker(autocommit=False, autoflush=False, bind=background_engine)
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
@@ -51,10 +78,101 @@ def get_db():
         db.close()
 
 
+# =============================================================================
+# Async engine (read-heavy request handlers)
+# =============================================================================
+# async def routes that query through the sync Session above block the event
+# loop for the whole query, so status polling stalls behind a pipeline that is
+# writing stage metrics. Hot endpoints use get_async_db instead, backed by
+# aiosqlite (dev) or asyncpg (Postgres) against the same database.
+
+def to_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL to its async driver equivalent."""
+    if url.startswith("sqlite+aiosqlite:") or url.startswith("postgresql+asyncpg:"):
+        return url
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_database_url(DATABASE_URL)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the async engine (created on first use so asyncpg is only needed when used)."""
+    global _async_engine
+    if _async_engine is not None:
+        return _async_engine
+
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        if ASYNC_DATABASE_URL in ("sqlite+aiosqlite://", "sqlite+aiosqlite:///:memory:"):
+            logger.warning("In-memory SQLite: async sessions do not share data with the sync engine")
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            connect_args={"timeout": 30},
+            echo=False
+        )
+        event.listen(_async_engine.sync_engine, "connect", set_sqlite_pragma)
+    else:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            echo=False
+        )
+    return _async_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Async session factory bound to the async engine."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        # expire_on_commit=False: attributes can't be lazily refreshed on an AsyncSession
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for getting an async database session"""
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections (app shutdown)."""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+
 def init_db():
     """Initialize database - create all tables"""
     from app.db.models import Base
+    from app.db.game_summary import ensure_game_summary_schema
     Base.metadata.create_all(bind=engine)
+    ensure_game_summary_schema(engine)
+
+    # WAL lets readers (status polling) proceed while a pipeline commits
+    # stage metrics. The setting is persisted in the database file.
+    if DATABASE_URL.startswith("sqlite") and os.getenv("SQLITE_WAL", "true").lower() == "true":
+        try:
+            with engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        except Exception as e:
+            logger.warning(f"Could not enable SQLite WAL mode: {e}")
 
 
 def init_db_with_seed():
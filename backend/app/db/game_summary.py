@@ -0,0 +1,185 @@
+"""
+Game summary columns and keyset pagination for gallery listings.
+
+The /processes and /observability/games listings only need a title,
+thumbnail, mechanic and template type per game, but used to load the full
+JSON blueprint (and one Visualization query per row) to find them. Those
+fields are now denormalised onto ``visualizations`` whenever a blueprint is
+saved (see the Visualization mapper events in models.py), so the listings
+are a single joined query.
+
+- summarize_blueprint(): the summary fields for a blueprint dict
+- ensure_game_summary_schema(): adds the columns/indexes to an existing
+  database and backfills them (run from init_db)
+- encode_cursor()/decode_cursor(): opaque keyset cursors over
+  (timestamp, id), newest first
+- latest_visualization_id(): correlated subquery picking one visualization
+  per process, so joining it never duplicates listing rows
+
+Usage:
+    rows = query.where(tuple_(Process.created_at, Process.id) < decode_cursor(cursor))
+    next_cursor = encode_cursor(last.created_at, last.id)
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("gamed_ai.db.game_summary")
+
+# (column, DDL type) added to visualizations
+SUMMARY_COLUMNS = (
+    ("title", "VARCHAR(500)"),
+    ("thumbnail_url", "TEXT"),
+    ("mechanic_type", "VARCHAR(100)"),
+)
+
+# Indexes used by the listing queries (names match models.py)
+SUMMARY_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_visualization_process ON visualizations (process_id)",
+    "CREATE INDEX IF NOT EXISTS idx_process_created ON processes (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_run_process_started ON pipeline_runs (process_id, started_at)",
+)
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def summarize_blueprint(blueprint: Any) -> Dict[str, Optional[str]]:
+    """Extract title, thumbnail URL and mechanic type from a blueprint."""
+    summary: Dict[str, Optional[str]] = {"title": None, "thumbnail_url": None, "mechanic_type": None}
+    if not blueprint or not isinstance(blueprint, dict):
+        return summary
+
+    summary["title"] = blueprint.get("title")
+
+    # Try multiple paths for diagram URL
+    diagram = blueprint.get("diagram", {})
+    if diagram and isinstance(diagram, dict):
+        summary["thumbnail_url"] = diagram.get("assetUrl")
+    # Also check scenes for multi-scene games
+    if not summary["thumbnail_url"]:
+        scenes = blueprint.get("scenes", [])
+        if scenes and isinstance(scenes, list) and isinstance(scenes[0], dict):
+            scene_diagram = scenes[0].get("diagram", {})
+            if scene_diagram and isinstance(scene_diagram, dict):
+                summary["thumbnail_url"] = scene_diagram.get("assetUrl")
+
+    # Mechanic type from mechanics array or interactionMode
+    mechanics = blueprint.get("mechanics", [])
+    if mechanics and isinstance(mechanics, list) and isinstance(mechanics[0], dict):
+        summary["mechanic_type"] = mechanics[0].get("type")
+    if not summary["mechanic_type"]:
+        summary["mechanic_type"] = blueprint.get("interactionMode")
+
+    return summary
+
+
+def latest_visualization_id(process_id_column):
+    """
+    Scalar subquery for the newest visualization id of the correlated process.
+
+    A process can have several visualizations (regenerations, retries), so
+    listings join ``Visualization.id == latest_visualization_id(Process.id)``
+    rather than on process_id to keep exactly one row per game.
+    """
+    from sqlalchemy.orm import aliased
+    from app.db.models import Visualization
+
+    viz = aliased(Visualization)
+    return (
+        select(viz.id)
+        .where(viz.process_id == process_id_column)
+        .order_by(viz.created_at.desc(), viz.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def ensure_game_summary_schema(engine: Engine) -> int:
+    """
+    Add the summary columns and listing indexes to an existing database.
+
+    create_all() only creates missing tables, so databases created before the
+    summary columns existed are migrated here. Newly added columns are
+    backfilled from the stored blueprints.
+
+    Returns:
+        Number of visualizations backfilled
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    if not {"visualizations", "processes", "pipeline_runs"} <= tables:
+        return 0
+
+    existing = {column["name"] for column in inspector.get_columns("visualizations")}
+    missing = [(name, ddl) for name, ddl in SUMMARY_COLUMNS if name not in existing]
+
+    with engine.begin() as conn:
+        for name, ddl in missing:
+            conn.exec_driver_sql(f"ALTER TABLE visualizations ADD COLUMN {name} {ddl}")
+            logger.info(f"Added visualizations.{name}")
+        for statement in SUMMARY_INDEXES:
+            conn.exec_driver_sql(statement)
+
+    if not missing:
+        return 0
+    return backfill_game_summaries(engine)
+
+
+def backfill_game_summaries(engine: Engine) -> int:
+    """Recompute the summary columns for every visualization from its blueprint."""
+    updated = 0
+    last_id = ""
+    update = text(
+        "UPDATE visualizations SET title = :title, thumbnail_url = :thumbnail_url, "
+        "mechanic_type = :mechanic_type WHERE id = :id"
+    )
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("SELECT id, blueprint FROM visualizations WHERE id > :last_id ORDER BY id LIMIT :limit"),
+                {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+            ).all()
+            if not rows:
+                break
+            params = []
+            for row_id, blueprint in rows:
+                if isinstance(blueprint, str):
+                    try:
+                        blueprint = json.loads(blueprint)
+                    except ValueError:
+                        blueprint = None
+                params.append({"id": row_id, **summarize_blueprint(blueprint)})
+            conn.execute(update, params)
+            updated += len(rows)
+            last_id = rows[-1][0]
+
+    if updated:
+        logger.info(f"Backfilled game summaries for {updated} visualizations")
+    return updated
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Opaque keyset cursor for the row a page ended on."""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(timestamp), row_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
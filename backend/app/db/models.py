@@ -1,10 +1,12 @@
 """Database Models for GamED.AI v2"""
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey, Index
+from sqlalchemy import Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 import uuid
 
+from app.db.game_summary import summarize_blueprint
+
 Base = declarative_base()
 
 
@@ -58,6 +60,11 @@ class Process(Base):
     human_reviews = relationship("HumanReview", back_populates="process")
     visualization = relationship("Visualization", back_populates="process", uselist=False)
 
+    __table_args__ = (
+        # Keyset pagination for /processes (newest first)
+        Index('idx_process_created', 'created_at', 'id'),
+    )
+
 
 class AgentExecution(Base):
     """Track individual agent executions within a pipeline"""
@@ -117,10 +124,29 @@ class Visualization(Base):
     story_data = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Gallery summary, denormalised from blueprint on save (see _sync_game_summary)
+    title = Column(String(500), nullable=True)
+    thumbnail_url = Column(Text, nullable=True)
+    mechanic_type = Column(String(100), nullable=True)
+
     # Relationships
     process = relationship("Process", back_populates="visualization")
     sessions = relationship("LearningSession", back_populates="visualization")
 
+    __table_args__ = (
+        Index('idx_visualization_process', 'process_id'),
+    )
+
+
+@event.listens_for(Visualization, "before_insert")
+@event.listens_for(Visualization, "before_update")
+def _sync_game_summary(mapper, connection, target):
+    """Keep the gallery summary columns in step with the saved blueprint."""
+    summary = summarize_blueprint(target.blueprint)
+    target.title = summary["title"]
+    target.thumbnail_url = summary["thumbnail_url"]
+    target.mechanic_type = summary["mechanic_type"]
+
 
 class LearningSession(Base):
     """Enhanced session tracking with learning analytics"""
@@ -237,6 +263,11 @@ class PipelineRun(Base):
     stage_executions = relationship("StageExecution", back_populates="run", cascade="all, delete-orphan")
     execution_logs = relationship("ExecutionLog", back_populates="run", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Latest run per process for /observability/games
+        Index('idx_run_process_started', 'process_id', 'started_at'),
+    )
+
 
 class StageExecution(Base):
     """
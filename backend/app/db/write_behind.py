@@ -0,0 +1,339 @@
+"""
+Write-behind queue for observability writes.
+
+Instrumentation (execution logs, stage start/complete/failed, checkpoint ids)
+used to open a session and commit synchronously from inside async agent nodes
+and every ReAct step callback, blocking the event loop on SQLite fsyncs. These
+writes now go onto a queue that a dedicated thread drains into batched
+transactions.
+
+- Ordering: writes are applied in submission order (FIFO), so a stage's
+  completion always lands after its start
+- Batching: up to ``batch_size`` writes per transaction, or whatever arrived
+  within ``flush_interval`` seconds
+- Guarantees: flush()/aflush() block until everything submitted before the
+  call is committed. InstrumentedAgentContext awaits aflush() when a stage
+  exits and the app flushes on shutdown (plus an atexit hook for scripts)
+- Failures: if a batch fails, its writes are retried one by one so a single
+  bad row doesn't drop the rest
+
+Environment Variables:
+    DB_WRITE_BEHIND_ENABLED: "true" (default) or "false" to write inline
+    DB_WRITE_BATCH_SIZE: Max writes per transaction (default: 100)
+    DB_WRITE_FLUSH_INTERVAL_MS: Max time a write waits for batch-mates (default: 50)
+
+Usage:
+    queue = get_write_queue()
+    queue.submit("add_execution_log", lambda db: db.add(ExecutionLog(...)))
+    await queue.aflush()
+"""
+
+import os
+import time
+import queue
+import atexit
+import asyncio
+import threading
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("gamed_ai.db.write_behind")
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL_SECONDS = 0.05
+DEFAULT_FLUSH_TIMEOUT_SECONDS = 30.0
+
+# A write applies itself to a session and may return a callback to run after commit
+WriteFn = Callable[[Session], Optional[Callable[[], None]]]
+
+
+@dataclass
+class _Write:
+    name: str
+    apply: WriteFn
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _FlushMarker:
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    FIFO of pending DB writes drained by a single background thread.
+
+    submit() never blocks on the database. When disabled, writes are applied
+    inline in the caller's thread (previous behaviour).
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        enabled: bool = True
+    ):
+        self._session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._submitted = 0
+        self._written = 0
+        self._failed = 0
+        self._batches = 0
+        self._max_depth = 0
+        self._commit_ms: deque = deque(maxlen=256)
+        self._lag_ms: deque = deque(maxlen=256)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, name: str, apply: WriteFn, flush: bool = False) -> None:
+        """
+        Queue a write.
+
+        Args:
+            name: Label used in logs/metrics (usually the calling function)
+            apply: Callable that adds/updates rows on the given session
+            flush: Commit the current batch as soon as this write is reached
+                instead of waiting for flush_interval
+        """
+        with self._stats_lock:
+            self._submitted += 1
+
+        if not self.enabled or self._closed:
+            self._write_batch([_Write(name, apply)])
+            return
+
+        self._ensure_started()
+        self._queue.put(_Write(name, apply))
+        if flush:
+            self._queue.put(_FlushMarker())
+
+        depth = self._queue.qsize()
+        if depth > self._max_depth:
+            with self._stats_lock:
+                self._max_depth = max(self._max_depth, depth)
+
+    def flush(self, timeout: float = DEFAULT_FLUSH_TIMEOUT_SECONDS) -> bool:
+        """Block until every write submitted so far is committed."""
+        if not self.enabled or self._thread is None or not self._thread.is_alive():
+            return True
+        if threading.current_thread() is self._thread:
+            # Called from a post-commit callback; everything before it is already written
+            return True
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        done = marker.done.wait(timeout)
+        if not done:
+            logger.warning(f"Write-behind flush timed out after {timeout}s (depth={self._queue.qsize()})")
+        return done
+
+    async def aflush(self, timeout: float = DEFAULT_FLUSH_TIMEOUT_SECONDS) -> bool:
+        """flush() without blocking the event loop."""
+        if not self.enabled or self._thread is None or not self._thread.is_alive():
+            return True
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def close(self, timeout: float = DEFAULT_FLUSH_TIMEOUT_SECONDS) -> None:
+        """Flush pending writes and stop the writer thread."""
+        with self._start_lock:
+            self._closed = True
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"Write-behind thread did not stop within {timeout}s")
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and commit latency."""
+        with self._stats_lock:
+            commit_ms = sorted(self._commit_ms)
+            lag_ms = sorted(self._lag_ms)
+            return {
+                "enabled": self.enabled,
+                "running": bool(self._thread and self._thread.is_alive()),
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_depth,
+                "submitted": self._submitted,
+                "written": self._written,
+                "failed": self._failed,
+                "batches": self._batches,
+                "avg_batch_size": round(self._written / self._batches, 2) if self._batches else 0.0,
+                "commit_ms_avg": round(sum(commit_ms) / len(commit_ms), 2) if commit_ms else 0.0,
+                "commit_ms_p95": _percentile(commit_ms, 0.95),
+                "enqueue_to_commit_ms_p95": _percentile(lag_ms, 0.95),
+                "batch_size": self.batch_size,
+                "flush_interval_ms": int(self.flush_interval * 1000),
+            }
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._session_factory is None:
+                from app.db.database import create_background_sessionmaker
+                self._session_factory = create_background_sessionmaker()
+            self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[_Write] = []
+            markers: List[_FlushMarker] = []
+            stop = False
+
+            # Collect until the batch is full, a flush is requested, or the interval passes
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+
+                if stop or markers or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if stop:
+                # Drain whatever was queued before the stop request
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, _FlushMarker):
+                        markers.append(item)
+                    elif item is not _STOP:
+                        batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[_Write]) -> None:
+        started = time.monotonic()
+        callbacks: List[Callable[[], None]] = []
+        db = self._session()
+        try:
+            for write in batch:
+                callback = write.apply(db)
+                # Later writes in the batch may query rows added by earlier ones
+                db.flush()
+                if callback:
+                    callbacks.append(callback)
+            db.commit()
+            written, failed = len(batch), 0
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Write-behind batch of {len(batch)} failed ({e}); retrying individually")
+            callbacks, written, failed = self._write_individually(db, batch)
+        finally:
+            db.close()
+
+        finished = time.monotonic()
+        with self._stats_lock:
+            self._batches += 1
+            self._written += written
+            self._failed += failed
+            self._commit_ms.append((finished - started) * 1000)
+            self._lag_ms.append((finished - batch[0].enqueued_at) * 1000)
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Write-behind post-commit callback failed: {e}")
+
+    def _write_individually(self, db: Session, batch: List[_Write]):
+        callbacks: List[Callable[[], None]] = []
+        written = failed = 0
+        for write in batch:
+            try:
+                callback = write.apply(db)
+                db.commit()
+                written += 1
+                if callback:
+                    callbacks.append(callback)
+            except Exception as e:
+                db.rollback()
+                failed += 1
+                logger.error(f"Write-behind {write.name} failed: {e}")
+        return callbacks, written, failed
+
+    def _session(self) -> Session:
+        if self._session_factory is None:
+            if not self.enabled:
+                # Inline writes run on the caller's thread, like any request session
+                from app.db.database import SessionLocal
+                return SessionLocal()
+            from app.db.database import create_background_sessionmaker
+            self._session_factory = create_background_sessionmaker()
+        return self._session_factory()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 2)
+
+
+# Singleton instance
+_write_queue: Optional[WriteBehindQueue] = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> WriteBehindQueue:
+    """Get the process-wide write-behind queue."""
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteBehindQueue(
+                    batch_size=int(os.getenv("DB_WRITE_BATCH_SIZE", str(DEFAULT_BATCH_SIZE))),
+                    flush_interval=float(os.getenv(
+                        "DB_WRITE_FLUSH_INTERVAL_MS", str(int(DEFAULT_FLUSH_INTERVAL_SECONDS * 1000))
+                    )) / 1000,
+                    enabled=os.getenv("DB_WRITE_BEHIND_ENABLED", "true").lower() == "true",
+                )
+                # Scripts and CLI runs don't go through the FastAPI shutdown hook
+                atexit.register(_write_queue.close)
+    return _write_queue
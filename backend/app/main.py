@@ -75,6 +75,20 @@ async def startup_event():
             logger.info("Agent registry seeded successfully")
         except Exception as e:
             logger.warning(f"Agent registry seeding failed (non-fatal): {e}")
+
+        # Precompile the configured pipeline graphs so the first run doesn't pay for it
+        from app.agents.graph import warm_compiled_graphs
+        try:
+            warmed = warm_compiled_graphs()
+            logger.info("Pipeline graphs precompiled", metadata={"compile_ms": warmed})
+        except Exception as e:
+            logger.warning(f"Graph warm-up failed (non-fatal): {e}")
+
+        # Drop live step buffers for runs nobody is streaming
+        from app.services.live_step_buffer import get_live_step_buffer
+        get_live_step_buffer().start_janitor(
+            interval_seconds=float(os.getenv("LIVE_STEP_SWEEP_INTERVAL_SECONDS", "60"))
+        )
     except Exception as e:
         logger.error("Database initialization failed", exc_info=True, metadata={"error": str(e)})
 
@@ -84,6 +98,25 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Application shutting down...")
 
+    from app.services.live_step_buffer import get_live_step_buffer
+    get_live_step_buffer().stop_janitor()
+
+    # Commit any observability writes still queued
+    from app.db.write_behind import get_write_queue
+    get_write_queue().close()
+
+    from app.db.database import dispose_async_engine
+    await dispose_async_engine()
+
+    from app.services.asset_gen.segmentation_pool import shutdown_segmentation_pool
+    shutdown_segmentation_pool()
+
+    from app.services.http_downloader import shutdown_downloader
+    await shutdown_downloader()
+
+    from app.services.ocr_engine import shutdown_ocr_engine
+    shutdown_ocr_engine()
+
 
 # CORS middleware - secure configuration
 # Allow origins from environment variable or default to localhost
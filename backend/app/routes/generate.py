@@ -1,10 +1,13 @@
 """Game Generation API Routes"""
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
 from fastapi.responses import Response
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from pydantic import BaseModel, Field, field_validator
 from typing import Literal
+import asyncio
 import logging
 import uuid
 import httpx
@@ -16,11 +19,15 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.db.models import Question, Process
+from app.db.game_summary import encode_cursor, decode_cursor, latest_visualization_id
 from app.agents import state as agent_state
-from app.agents.graph import get_compiled_graph
+from app.agents.graph import get_compiled_graph, FULL_GRAPH_PRESETS
 from app.agents.instrumentation import create_pipeline_run
+from app.config.agent_models import get_runtime_config
+from app.config.run_context import run_context
+from app.services.run_event_bus import get_run_event_bus
 
 logger = logging.getLogger("gamed_ai.routes.generate")
 
@@ -181,6 +188,8 @@ class ProcessSummary(BaseModel):
     question_text: str
     template_type: Optional[str] = None
     thumbnail_url: Optional[str] = None
+    mechanic_type: Optional[str] = None
+    title: Optional[str] = None
     status: str
     current_agent: Optional[str] = None
     progress_percent: Optional[float] = None
@@ -193,6 +202,7 @@ class ProcessListResponse(BaseModel):
     """Response model for listing processes"""
     processes: List[ProcessSummary]
     total: int
+    next_cursor: Optional[str] = None
 
 
 class GenerationStatusResponse(BaseModel):
@@ -303,51 +313,44 @@ def _build_agent_outputs(state: dict) -> dict:
 
 @router.get("/processes", response_model=ProcessListResponse)
 async def list_processes(
-    limit: int = 20,
-    offset: int = 0,
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces offset)"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> ProcessListResponse:
     """List all generation processes with their questions"""
     from app.db.models import Visualization
 
-    processes = db.query(Process).order_by(Process.created_at.desc()).offset(offset).limit(limit).all()
+    # One joined query: question text (truncated in SQL) and the denormalised
+    # visualization summary instead of per-row lookups into the blueprint
+    query = (
+        select(
+            Process,
+            func.substr(Question.text, 1, 201).label("question_text"),
+            Visualization.template_type,
+            Visualization.thumbnail_url,
+            Visualization.mechanic_type,
+            Visualization.title,
+        )
+        .outerjoin(Question, Question.id == Process.question_id)
+        .outerjoin(Visualization, Visualization.id == latest_visualization_id(Process.id))
+        .order_by(Process.created_at.desc(), Process.id.desc())
+    )
+    if cursor:
+        try:
+            query = query.where(tuple_(Process.created_at, Process.id) < decode_cursor(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        query = query.offset(offset)
 
-    result = []
-    for p in processes:
-        # Get question text
-        question = p.question
-        question_text = question.text if question else "Untitled question"
-
-        # Get template type and thumbnail from visualization if available
-        template_type = None
-        thumbnail_url = None
-        mechanic_type = None
-        title = None
-        visualization = db.query(Visualization).filter(Visualization.process_id == p.id).first()
-        if visualization:
-            template_type = visualization.template_type
-            # Extract thumbnail URL and mechanic from blueprint
-            blueprint = visualization.blueprint
-            if blueprint and isinstance(blueprint, dict):
-                title = blueprint.get("title")
-                # Try multiple paths for diagram URL
-                diagram = blueprint.get("diagram", {})
-                if diagram and isinstance(diagram, dict):
-                    thumbnail_url = diagram.get("assetUrl")
-                # Also check scenes for multi-scene games
-                if not thumbnail_url:
-                    scenes = blueprint.get("scenes", [])
-                    if scenes and isinstance(scenes, list) and len(scenes) > 0:
-                        scene_diagram = scenes[0].get("diagram", {})
-                        if scene_diagram:
-                            thumbnail_url = scene_diagram.get("assetUrl")
-                # Extract mechanic type from mechanics array or interactionMode
-                mechanics = blueprint.get("mechanics", [])
-                if mechanics and isinstance(mechanics, list) and len(mechanics) > 0:
-                    mechanic_type = mechanics[0].get("type")
-                if not mechanic_type:
-                    mechanic_type = blueprint.get("interactionMode")
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
+    result = []
+    for p, question_text, template_type, thumbnail_url, mechanic_type, title in rows:
+        question_text = question_text or "Untitled question"
         result.append({
             "id": p.id,
             "question_id": p.question_id,
@@ -364,9 +367,11 @@ async def list_processes(
             "completed_at": p.completed_at.isoformat() if p.completed_at else None
         })
 
+    last = rows[-1][0] if rows else None
     return {
         "processes": result,
-        "total": db.query(Process).count()
+        "total": await db.scalar(select(func.count()).select_from(Process)),
+        "next_cursor": encode_cursor(last.created_at, last.id) if has_more and last.created_at else None
     }
 
 
@@ -532,10 +537,10 @@ async def start_generation(
 @router.get("/generate/{process_id}/status", response_model=GenerationStatusResponse)
 async def get_generation_status(
     process_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> GenerationStatusResponse:
     """Get the status of a game generation process"""
-    process = db.query(Process).filter(Process.id == process_id).first()
+    process = await db.get(Process, process_id)
     if not process:
         raise HTTPException(status_code=404, detail="Process not found")
 
@@ -981,6 +986,41 @@ async def run_generation_pipeline(
     pipeline_preset: str = "default"  # Add parameter for pipeline routing
 ):
     """Run the LangGraph generation pipeline"""
+    # Scope presets to this run (and every node/task it spawns) so concurrent
+    # generations with different presets don't pick up each other's models
+    with run_context(
+        run_id=run_id,
+        pipeline_preset=pipeline_preset,
+        agent_preset=agent_preset,
+        topology=topology
+    ):
+        # Load agent models once here so graph nodes inherit them
+        get_runtime_config()
+        await _run_generation_pipeline(
+            process_id=process_id,
+            question_id=question_id,
+            question_text=question_text,
+            question_options=question_options,
+            thread_id=thread_id,
+            run_id=run_id,
+            topology=topology,
+            agent_preset=agent_preset,
+            pipeline_preset=pipeline_preset
+        )
+
+
+async def _run_generation_pipeline(
+    process_id: str,
+    question_id: str,
+    question_text: str,
+    question_options: Optional[list],
+    thread_id: str,
+    run_id: Optional[str],
+    topology: str,
+    agent_preset: str,
+    pipeline_preset: str
+):
+    """Pipeline body; runs inside the run_context set by run_generation_pipeline."""
     from app.db.database import SessionLocal
     from app.db.models import Visualization
     from datetime import datetime
@@ -1000,13 +1040,7 @@ async def run_generation_pipeline(
     success = False
     # run_id is passed as parameter, don't overwrite it
 
-    # Temporarily set environment variables for this run
-    original_agent_preset = os.environ.get("AGENT_CONFIG_PRESET")
-    original_pipeline_preset = os.environ.get("PIPELINE_PRESET")
-    os.environ["AGENT_CONFIG_PRESET"] = agent_preset
-    os.environ["PIPELINE_PRESET"] = pipeline_preset
-
-    logger.info(f"Starting pipeline with PIPELINE_PRESET={pipeline_preset}, AGENT_CONFIG_PRESET={agent_preset}")
+    logger.info(f"Starting pipeline with pipeline_preset={pipeline_preset}, agent_preset={agent_preset}")
     
     try:
         # Update process status
@@ -1043,6 +1077,7 @@ async def run_generation_pipeline(
             run = db.query(PipelineRun).filter(PipelineRun.id == run_id).first()
             if run:
                 run.status = "running"
+                get_run_event_bus().mark_local(run_id)
                 if not run.started_at:
                     run.started_at = datetime.utcnow()
                 db.commit()
@@ -1059,18 +1094,7 @@ async def run_generation_pipeline(
         # Architecture presets and game-type presets that need the full graph
         # must be passed as preset to get create_game_generation_graph() wiring
         # (which includes game_designer → design_interpreter → workflow routing)
-        presets_needing_full_graph = (
-            "preset_1",                     # V1 — Baseline
-            "preset_1_agentic_sequential",  # V1.1 — Agentic Sequential
-            "preset_1_react",               # V2 — ReAct
-            "had",                          # V2.5 — Hierarchical Agentic DAG
-            "interactive_diagram_hierarchical",   # V1 variant — Hierarchical
-            "advanced_interactive_diagram",       # V1 variant — Advanced
-            "v3",                           # V3 — 5-Phase ReAct (current)
-            "v4",                           # V4 — Streamlined 5-phase pipeline
-            "v4_algorithm",                 # V4 Algorithm — Algorithm games pipeline
-        )
-        if pipeline_preset in presets_needing_full_graph:
+        if pipeline_preset in FULL_GRAPH_PRESETS:
             graph = get_compiled_graph(topology=topology, preset=pipeline_preset)
         else:
             graph = get_compiled_graph(topology=topology)
@@ -1112,8 +1136,7 @@ async def run_generation_pipeline(
                             save_stage_checkpoint(
                                 run_id=run_id,
                                 stage_name=node_name,
-                                checkpoint_id=checkpoint_id,
-                                db=db
+                                checkpoint_id=checkpoint_id
                             )
                             logger.debug(f"Captured checkpoint {checkpoint_id} for stage '{node_name}'")
                         except Exception as save_error:
@@ -1185,7 +1208,9 @@ async def run_generation_pipeline(
         
         # Update pipeline run status
         if run_id:
-            update_pipeline_run_status(
+            # Flushes the write-behind queue first; keep that wait off the event loop
+            await asyncio.to_thread(
+                update_pipeline_run_status,
                 run_id=run_id,
                 status="success" if success else "failed",
                 error_message=final_state.get("error_message"),
@@ -1232,7 +1257,8 @@ async def run_generation_pipeline(
 
         # Update pipeline run status - store reference ID, not full traceback
         if run_id:
-            update_pipeline_run_status(
+            await asyncio.to_thread(
+                update_pipeline_run_status,
                 run_id=run_id,
                 status="failed",
                 error_message=user_msg,
@@ -1269,7 +1295,8 @@ async def run_generation_pipeline(
 
             # Update pipeline run with final state summary
             if run_id and success:
-                update_pipeline_run_status(
+                await asyncio.to_thread(
+                    update_pipeline_run_status,
                     run_id=run_id,
                     status="success",
                     final_state_summary={
@@ -1286,17 +1313,9 @@ async def run_generation_pipeline(
                 exc_info=True
             )
         db.close()
-
-        # Restore original presets
-        if original_agent_preset:
-            os.environ["AGENT_CONFIG_PRESET"] = original_agent_preset
-        elif "AGENT_CONFIG_PRESET" in os.environ:
-            del os.environ["AGENT_CONFIG_PRESET"]
-
-        if original_pipeline_preset:
-            os.environ["PIPELINE_PRESET"] = original_pipeline_preset
-        elif "PIPELINE_PRESET" in os.environ:
-            del os.environ["PIPELINE_PRESET"]
+        if run_id:
+            # The run no longer executes here, even if its terminal status was never published
+            get_run_event_bus().mark_finished(run_id)
 
 
 async def resume_generation_pipeline(
@@ -11,9 +11,10 @@ Provides endpoints for:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Path
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, distinct
+from fastapi.responses import StreamingResponse, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, distinct, select, tuple_
 from typing import Optional, List, Tuple
 from pydantic import BaseModel
 from datetime import datetime
@@ -21,7 +22,9 @@ import asyncio
 import json
 import logging
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
+from app.db.game_summary import encode_cursor, decode_cursor, latest_visualization_id
+from app.db.write_behind import get_write_queue
 from app.db.models import (
     PipelineRun, StageExecution, ExecutionLog, AgentRegistry,
     Process, Question, Visualization
@@ -29,9 +32,20 @@ from app.db.models import (
 from app.agents.instrumentation import (
     get_live_steps,
     clear_live_steps,
+    stage_event_payload,
     AGENT_METADATA_REGISTRY,
     get_agent_metadata
 )
+from app.config.run_context import run_context, get_pipeline_preset
+from app.services.run_event_bus import (
+    get_run_event_bus,
+    EVENT_STAGE,
+    EVENT_LIVE_STEP,
+    EVENT_RUN_STATUS,
+    EVENT_RESYNC,
+    TERMINAL_RUN_STATUSES,
+)
+from app.services.snapshot_store import get_snapshot_blob_store, restore_snapshot
 
 logger = logging.getLogger("gamed_ai.routes.observability")
 router = APIRouter(prefix="/observability", tags=["observability"])
@@ -140,6 +154,10 @@ class RunDetailResponse(BaseModel):
     total_prompt_tokens: int
     total_completion_tokens: int
     total_retries: int
+    total_cache_hits: int = 0
+    total_cache_misses: int = 0
+    total_cache_tokens_saved: int = 0
+    total_cache_bytes_saved: int = 0
     stages_completed: int
     stages_failed: int
     total_stages: int
@@ -175,6 +193,9 @@ class GameSummary(BaseModel):
     process_id: str
     question_text: str
     template_type: Optional[str]
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    mechanic_type: Optional[str] = None
     status: str
     created_at: str
     run_count: int
@@ -185,6 +206,7 @@ class GamesListResponse(BaseModel):
     """Response for listing games"""
     games: List[GameSummary]
     total: int
+    next_cursor: Optional[str] = None
 
 
 # =============================================================================
@@ -197,22 +219,27 @@ async def list_runs(
     offset: int = Query(0, ge=0),
     status: Optional[str] = Query(None, description="Filter by status"),
     process_id: Optional[str] = Query(None, description="Filter by process ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all pipeline runs with pagination.
 
     Returns runs sorted by start time (most recent first).
     """
-    query = db.query(PipelineRun)
+    query = select(PipelineRun)
 
     if status:
-        query = query.filter(PipelineRun.status == status)
+        query = query.where(PipelineRun.status == status)
     if process_id:
-        query = query.filter(PipelineRun.process_id == process_id)
+        query = query.where(PipelineRun.process_id == process_id)
 
-    total = query.count()
-    runs = query.order_by(desc(PipelineRun.started_at)).offset(offset).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    runs = (await db.scalars(
+        query.options(selectinload(PipelineRun.process).selectinload(Process.question))
+        .order_by(desc(PipelineRun.started_at))
+        .offset(offset)
+        .limit(limit)
+    )).all()
 
     result = []
     for run in runs:
@@ -220,16 +247,20 @@ async def list_runs(
         question_text = None
         template_type = None
         if run.process_id:
-            process = db.query(Process).filter(Process.id == run.process_id).first()
+            process = run.process
             if process and process.question:
                 question_text = process.question.text[:100] + "..." if len(process.question.text) > 100 else process.question.text
-            viz = db.query(Visualization).filter(Visualization.process_id == run.process_id).first()
+            viz = await db.scalar(
+                select(Visualization).where(Visualization.process_id == run.process_id).limit(1)
+            )
             if viz:
                 template_type = viz.template_type
 
         # Count stages (include "degraded" as completed since they finished with fallback)
-        stages = db.query(StageExecution).filter(StageExecution.run_id == run.id).all()
-        stages_completed = len([s for s in stages if s.status in ["success", "degraded"]])
+        stages = (await db.scalars(
+            select(StageExecution.status).where(StageExecution.run_id == run.id)
+        )).all()
+        stages_completed = len([s for s in stages if s in ["success", "degraded"]])
 
         result.append({
             "id": run.id,
@@ -260,7 +291,7 @@ async def list_runs(
 @router.get("/runs/{run_id}", response_model=RunDetailResponse)
 async def get_run(
     run_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get detailed information about a specific pipeline run.
@@ -271,12 +302,15 @@ async def get_run(
     - Final state summary
     - List of stage executions with status
     """
-    run = db.query(PipelineRun).filter(PipelineRun.id == run_id).first()
+    run = await db.get(PipelineRun, run_id)
     if not run:
         # Also try lookup by process_id (frontend games page links with process_id)
-        run = db.query(PipelineRun).filter(
-            PipelineRun.process_id == run_id
-        ).order_by(PipelineRun.started_at.desc()).first()
+        run = await db.scalar(
+            select(PipelineRun)
+            .where(PipelineRun.process_id == run_id)
+            .order_by(PipelineRun.started_at.desc())
+            .limit(1)
+        )
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
 
@@ -284,23 +318,29 @@ async def get_run(
     actual_run_id = run.id
 
     # Get stages
-    stages = db.query(StageExecution).filter(
-        StageExecution.run_id == actual_run_id
-    ).order_by(StageExecution.stage_order).all()
+    stages = (await db.scalars(
+        select(StageExecution)
+        .where(StageExecution.run_id == actual_run_id)
+        .order_by(StageExecution.stage_order)
+    )).all()
 
     # Get question and template info
     question_text = None
     template_type = None
     if run.process_id:
-        process = db.query(Process).filter(Process.id == run.process_id).first()
+        process = await db.get(Process, run.process_id, options=[selectinload(Process.question)])
         if process and process.question:
             question_text = process.question.text
-        viz = db.query(Visualization).filter(Visualization.process_id == run.process_id).first()
+        viz = await db.scalar(
+            select(Visualization).where(Visualization.process_id == run.process_id).limit(1)
+        )
         if viz:
             template_type = viz.template_type
 
     # Get child runs (retries)
-    child_runs = db.query(PipelineRun).filter(PipelineRun.parent_run_id == actual_run_id).all()
+    child_runs = (await db.scalars(
+        select(PipelineRun).where(PipelineRun.parent_run_id == actual_run_id)
+    )).all()
 
     # Calculate aggregated totals from stages
     total_cost = sum(float(s.estimated_cost_usd or 0) for s in stages)
@@ -312,6 +352,12 @@ async def get_run(
     stages_completed = len([s for s in stages if s.status in ('success', 'degraded')])
     stages_failed = len([s for s in stages if s.status == 'failed'])
 
+    # LLM response-cache savings (recorded per stage by instrumentation)
+    cache_metrics = [
+        (s.output_snapshot or {}).get("_llm_cache_metrics") or {}
+        for s in stages
+    ]
+
     return {
         "id": run.id,
         "process_id": run.process_id,
@@ -336,6 +382,10 @@ async def get_run(
         "total_completion_tokens": total_completion_tokens,
         "total_llm_calls": total_llm_calls,
         "total_retries": total_retries,
+        "total_cache_hits": sum(m.get("hits", 0) for m in cache_metrics),
+        "total_cache_misses": sum(m.get("misses", 0) for m in cache_metrics),
+        "total_cache_tokens_saved": sum(m.get("tokens_saved", 0) for m in cache_metrics),
+        "total_cache_bytes_saved": sum(m.get("bytes_saved", 0) for m in cache_metrics),
         "stages_completed": stages_completed,
         "stages_failed": stages_failed,
         "total_stages": len(stages),
@@ -468,6 +518,97 @@ async def get_run_logs(
     }
 
 
+# Seconds between SSE keepalive comments on push streams
+STREAM_KEEPALIVE_SECONDS = 15
+# Seconds between DB polls when the run executes in another worker
+STREAM_POLL_INTERVAL_SECONDS = 1
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _build_update_payload(run_id: str, status: str, duration_ms: Optional[int], stages: List[dict]) -> dict:
+    """Build the 'update' event from per-stage summaries (see stage_event_payload)."""
+    stages = sorted(stages, key=lambda s: s.get("stage_order") or 0)
+    current_stage = next((s for s in stages if s["status"] == "running"), None)
+
+    # Calculate progress (include "degraded" as completed since they finished with fallback)
+    stages_completed = len([s for s in stages if s["status"] in ["success", "degraded"]])
+    total_stages = max(len(stages), 15)  # Estimate 15 total if still running
+    progress_percent = int((stages_completed / total_stages) * 100)
+
+    # Calculate aggregate metrics from stages
+    total_tokens = sum(s.get("tokens") or 0 for s in stages)
+    total_cost_usd = sum(s.get("cost") or 0 for s in stages)
+
+    return {
+        "run_id": run_id,
+        "status": status,
+        "current_stage": current_stage["stage_name"] if current_stage else None,
+        "stages_completed": stages_completed,
+        "total_stages": len(stages),
+        "progress_percent": progress_percent,
+        "duration_ms": duration_ms,
+        # Aggregate metrics
+        "total_tokens": total_tokens,
+        "total_cost_usd": round(total_cost_usd, 6),
+        # Per-stage data with metrics
+        "stages": [
+            {
+                "stage_name": s["stage_name"],
+                "status": s["status"],
+                "duration_ms": s.get("duration_ms"),
+                "tokens": s.get("tokens"),
+                "cost": s.get("cost"),
+                "model_id": s.get("model_id"),
+            }
+            for s in stages
+        ]
+    }
+
+
+def _build_complete_payload(run_id: str, status: str, duration_ms: Optional[int],
+                            error_message: Optional[str], update_data: dict) -> dict:
+    return {
+        "run_id": run_id,
+        "status": status,
+        "duration_ms": duration_ms,
+        "error_message": error_message,
+        # Include final metrics in complete event
+        "total_tokens": update_data["total_tokens"],
+        "total_cost_usd": update_data["total_cost_usd"],
+    }
+
+
+def _live_step_event(step_event: dict) -> str:
+    return _sse("live_step", {
+        "type": "live_step",
+        "stage_name": step_event.get("stage_name", "unknown"),
+        "step": step_event.get("step", {})
+    })
+
+
+def _load_run_snapshot(run_id: str) -> Optional[Tuple[dict, List[dict]]]:
+    """Read the run row and its stage summaries in one short-lived session."""
+    db_session = next(get_db())
+    try:
+        run = db_session.query(PipelineRun).filter(PipelineRun.id == run_id).first()
+        if not run:
+            return None
+        stages = db_session.query(StageExecution).filter(
+            StageExecution.run_id == run_id
+        ).order_by(StageExecution.stage_order).all()
+        run_data = {
+            "status": run.status,
+            "duration_ms": run.duration_ms,
+            "error_message": run.error_message,
+        }
+        return run_data, [stage_event_payload(s) for s in stages]
+    finally:
+        db_session.close()
+
+
 @router.get("/runs/{run_id}/stream")
 async def stream_run_updates(
     run_id: str,
@@ -485,136 +626,22 @@ async def stream_run_updates(
     - total_tokens: Aggregate token count across all stages
     - total_cost_usd: Aggregate cost across all stages
     - Per-stage tokens and cost in the stages array
+
+    Runs executing in this process are streamed from the run event bus (one DB
+    snapshot, then pushed deltas). Runs executing in another worker fall back
+    to polling the database every second.
     """
     run = db.query(PipelineRun).filter(PipelineRun.id == run_id).first()
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
 
-    async def event_generator():
-        """Generate SSE events for run updates"""
-        last_stage_count = 0
-        last_live_step_check = 0
-
-        while True:
-            # Get fresh run data
-            db_session = next(get_db())
-            try:
-                current_run = db_session.query(PipelineRun).filter(
-                    PipelineRun.id == run_id
-                ).first()
-
-                if not current_run:
-                    yield f"event: error\ndata: {json.dumps({'error': 'Run not found'})}\n\n"
-                    break
-
-                # Get stages with full metrics
-                stages = db_session.query(StageExecution).filter(
-                    StageExecution.run_id == run_id
-                ).order_by(StageExecution.stage_order).all()
-
-                current_stage = next(
-                    (s for s in stages if s.status == "running"),
-                    None
-                )
-
-                # Calculate progress (include "degraded" as completed since they finished with fallback)
-                stages_completed = len([s for s in stages if s.status in ["success", "degraded"]])
-                total_stages = max(len(stages), 15)  # Estimate 15 total if still running
-                progress_percent = int((stages_completed / total_stages) * 100)
-
-                # Calculate aggregate metrics from stages
-                total_tokens = sum(s.total_tokens or 0 for s in stages)
-                total_cost_usd = sum(float(s.estimated_cost_usd or 0) for s in stages)
-
-                # Build update payload with enhanced metrics
-                update_data = {
-                    "run_id": run_id,
-                    "status": current_run.status,
-                    "current_stage": current_stage.stage_name if current_stage else None,
-                    "stages_completed": stages_completed,
-                    "total_stages": len(stages),
-                    "progress_percent": progress_percent,
-                    "duration_ms": current_run.duration_ms,
-                    # Aggregate metrics
-                    "total_tokens": total_tokens,
-                    "total_cost_usd": round(total_cost_usd, 6),
-                    # Per-stage data with metrics
-                    "stages": [
-                        {
-                            "stage_name": s.stage_name,
-                            "status": s.status,
-                            "duration_ms": s.duration_ms,
-                            # Per-stage metrics (NEW)
-                            "tokens": s.total_tokens,
-                            "cost": float(s.estimated_cost_usd) if s.estimated_cost_usd else None,
-                            "model_id": s.model_id,
-                        }
-                        for s in stages
-                    ]
-                }
-
-                yield f"event: update\ndata: {json.dumps(update_data)}\n\n"
-
-                # Check for live steps from in-memory queue (real-time)
-                new_live_steps = get_live_steps(run_id, from_index=last_live_step_check)
-                for step_event in new_live_steps:
-                    live_step_data = {
-                        "type": "live_step",
-                        "stage_name": step_event.get("stage_name", "unknown"),
-                        "step": step_event.get("step", {})
-                    }
-                    yield f"event: live_step\ndata: {json.dumps(live_step_data)}\n\n"
-                last_live_step_check += len(new_live_steps)
-
-                # Fallback: Check for live steps from saved output snapshot
-                # (for agents that don't use the new streaming API)
-                if current_stage and current_stage.output_snapshot:
-                    saved_steps = _extract_live_steps_from_stage(current_stage)
-                    # Only emit saved steps that aren't in the queue
-                    for step in saved_steps[last_live_step_check:]:
-                        live_step_data = {
-                            "type": "live_step",
-                            "stage_name": current_stage.stage_name,
-                            "step": step
-                        }
-                        yield f"event: live_step\ndata: {json.dumps(live_step_data)}\n\n"
-
-                # Check if run is complete
-                if current_run.status in ["success", "failed", "cancelled"]:
-                    # Emit any remaining live steps before completion
-                    final_steps = get_live_steps(run_id, from_index=last_live_step_check)
-                    for step_event in final_steps:
-                        live_step_data = {
-                            "type": "live_step",
-                            "stage_name": step_event.get("stage_name", "unknown"),
-                            "step": step_event.get("step", {})
-                        }
-                        yield f"event: live_step\ndata: {json.dumps(live_step_data)}\n\n"
-
-                    complete_data = {
-                        "run_id": run_id,
-                        "status": current_run.status,
-                        "duration_ms": current_run.duration_ms,
-                        "error_message": current_run.error_message,
-                        # Include final metrics in complete event
-                        "total_tokens": total_tokens,
-                        "total_cost_usd": round(total_cost_usd, 6),
-                    }
-                    yield f"event: complete\ndata: {json.dumps(complete_data)}\n\n"
-
-                    # Clean up in-memory queue
-                    clear_live_steps(run_id)
-                    break
-
-                last_stage_count = len(stages)
-
-            finally:
-                db_session.close()
-
-            await asyncio.sleep(1)  # Poll every second
+    if get_run_event_bus().is_local(run_id):
+        generator = _push_run_events(run_id)
+    else:
+        generator = _poll_run_events(run_id)
 
     return StreamingResponse(
-        event_generator(),
+        generator,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -624,6 +651,152 @@ async def stream_run_updates(
     )
 
 
+async def _push_run_events(run_id: str):
+    """Generate SSE events from run event bus deltas."""
+    bus = get_run_event_bus()
+    # Subscribe before the snapshot so nothing published in between is lost;
+    # stage deltas are keyed by stage_id and live steps by seq, so replays are harmless
+    sub = bus.subscribe(run_id)
+    try:
+        snapshot = await asyncio.to_thread(_load_run_snapshot, run_id)
+        if snapshot is None:
+            yield _sse("error", {"error": "Run not found"})
+            return
+        run_data, stage_list = snapshot
+        stages = {s["stage_id"]: s for s in stage_list}
+        step_cursor = 0
+
+        def catch_up_live_steps():
+            nonlocal step_cursor
+            pending = get_live_steps(run_id, cursor=step_cursor)
+            if pending:
+                step_cursor = pending[-1]["seq"] + 1
+            return [_live_step_event(step_event) for step_event in pending]
+
+        update_data = _build_update_payload(run_id, run_data["status"], run_data["duration_ms"], list(stages.values()))
+        yield _sse("update", update_data)
+        for chunk in catch_up_live_steps():
+            yield chunk
+
+        while run_data["status"] not in TERMINAL_RUN_STATUSES:
+            event = await sub.get(timeout=STREAM_KEEPALIVE_SECONDS)
+
+            if event is None:
+                if not bus.is_local(run_id):
+                    # Run finished (or moved) without a status event reaching us
+                    event = {"type": EVENT_RESYNC, "data": {}}
+                else:
+                    yield ": keepalive\n\n"
+                    continue
+
+            event_type, data = event["type"], event["data"]
+
+            if event_type == EVENT_LIVE_STEP:
+                if data["seq"] >= step_cursor:
+                    # Anything skipped (published before we subscribed) comes from the buffer
+                    for chunk in catch_up_live_steps():
+                        yield chunk
+                continue
+
+            if event_type == EVENT_STAGE:
+                stages[data["stage_id"]] = data
+            elif event_type == EVENT_RUN_STATUS:
+                run_data.update(data)
+            elif event_type == EVENT_RESYNC:
+                snapshot = await asyncio.to_thread(_load_run_snapshot, run_id)
+                if snapshot is None:
+                    yield _sse("error", {"error": "Run not found"})
+                    return
+                run_data, stage_list = snapshot
+                stages = {s["stage_id"]: s for s in stage_list}
+                for chunk in catch_up_live_steps():
+                    yield chunk
+
+            update_data = _build_update_payload(run_id, run_data["status"], run_data["duration_ms"], list(stages.values()))
+            yield _sse("update", update_data)
+
+        # Emit any remaining live steps before completion
+        for chunk in catch_up_live_steps():
+            yield chunk
+        yield _sse("complete", _build_complete_payload(
+            run_id, run_data["status"], run_data["duration_ms"], run_data.get("error_message"), update_data
+        ))
+
+        # Clean up in-memory queue
+        clear_live_steps(run_id)
+    finally:
+        bus.unsubscribe(sub)
+
+
+async def _poll_run_events(run_id: str):
+    """Generate SSE events by polling the database (run executing in another worker)."""
+    live_step_cursor = 0
+
+    while True:
+        # Get fresh run data
+        db_session = next(get_db())
+        try:
+            current_run = db_session.query(PipelineRun).filter(
+                PipelineRun.id == run_id
+            ).first()
+
+            if not current_run:
+                yield _sse("error", {"error": "Run not found"})
+                break
+
+            # Get stages with full metrics
+            stages = db_session.query(StageExecution).filter(
+                StageExecution.run_id == run_id
+            ).order_by(StageExecution.stage_order).all()
+
+            current_stage = next(
+                (s for s in stages if s.status == "running"),
+                None
+            )
+
+            update_data = _build_update_payload(
+                run_id, current_run.status, current_run.duration_ms,
+                [stage_event_payload(s) for s in stages]
+            )
+            yield _sse("update", update_data)
+
+            # Check for live steps from in-memory queue (real-time)
+            new_live_steps = get_live_steps(run_id, cursor=live_step_cursor)
+            for step_event in new_live_steps:
+                yield _live_step_event(step_event)
+            if new_live_steps:
+                live_step_cursor = new_live_steps[-1]["seq"] + 1
+
+            # Fallback: Check for live steps from saved output snapshot
+            # (for agents that don't use the new streaming API)
+            if current_stage and current_stage.output_snapshot:
+                saved_steps = _extract_live_steps_from_stage(current_stage)
+                # Only emit saved steps that aren't in the queue
+                for step in saved_steps[live_step_cursor:]:
+                    yield _live_step_event({"stage_name": current_stage.stage_name, "step": step})
+
+            # Check if run is complete
+            if current_run.status in ["success", "failed", "cancelled"]:
+                # Emit any remaining live steps before completion
+                final_steps = get_live_steps(run_id, cursor=live_step_cursor)
+                for step_event in final_steps:
+                    yield _live_step_event(step_event)
+
+                yield _sse("complete", _build_complete_payload(
+                    run_id, current_run.status, current_run.duration_ms,
+                    current_run.error_message, update_data
+                ))
+
+                # Clean up in-memory queue
+                clear_live_steps(run_id)
+                break
+
+        finally:
+            db_session.close()
+
+        await asyncio.sleep(STREAM_POLL_INTERVAL_SECONDS)
+
+
 def _extract_live_steps_from_stage(stage: StageExecution) -> List[dict]:
     """
     Extract live reasoning steps from a stage's output snapshot.
@@ -709,6 +882,9 @@ async def retry_from_stage(
     
     Uses SELECT FOR UPDATE to prevent concurrent retries of the same stage.
     """
+    # Stage rows of a run that just failed may still be queued; let them land first
+    await get_write_queue().aflush()
+
     try:
         # Lock the original run row to prevent concurrent retries
         # This ensures only one retry can be created at a time for the same stage
@@ -813,11 +989,14 @@ async def retry_from_stage(
     logger.info(f"Created retry run {new_run.id} from stage {retry_request.from_stage}")
 
     # Start pipeline from the specific stage in background
+    snapshot = original_run.config_snapshot or {}
     background_tasks.add_task(
         run_retry_pipeline,
         new_run.id,
         run_id,
-        retry_request.from_stage
+        retry_request.from_stage,
+        pipeline_preset=snapshot.get("pipeline_preset"),
+        agent_preset=snapshot.get("agent_config_preset")
     )
 
     return {
@@ -851,6 +1030,7 @@ async def cancel_run(
         run.duration_ms = int((run.finished_at - run.started_at).total_seconds() * 1000)
 
     db.commit()
+    get_run_event_bus().publish_run_status(run_id, "cancelled", run.duration_ms)
 
     logger.info(f"Cancelled run {run_id}")
 
@@ -923,6 +1103,22 @@ async def get_stage_details(
 # Agent Registry
 # =============================================================================
 
+@router.get("/snapshot-blobs/{digest}")
+async def get_snapshot_blob(
+    digest: str = Path(..., min_length=64, max_length=64, pattern="^[0-9a-f]{64}$")
+):
+    """
+    Get a large snapshot value that was moved out of a stage snapshot.
+
+    Stage snapshots reference these as {"_blob": "<digest>", "bytes": n}.
+    """
+    store = get_snapshot_blob_store()
+    data = await asyncio.to_thread(store.get, digest) if store else None
+    if data is None:
+        raise HTTPException(status_code=404, detail="Snapshot blob not found")
+    return Response(content=data, media_type="application/octet-stream")
+
+
 @router.get("/agents")
 async def list_agents(
     category: Optional[str] = Query(None, description="Filter by category"),
@@ -985,61 +1181,66 @@ async def get_agent(
 @router.get("/games", response_model=GamesListResponse)
 async def list_games_from_runs(
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get unique games from PipelineRuns, grouped by process_id.
     This is a fallback when /api/processes is not available.
     Returns the most recent run for each unique process_id.
     """
-    # Get distinct process_ids with their most recent run
-    subquery = (
-        db.query(
+    # Most recent run and run count per process
+    latest = (
+        select(
             PipelineRun.process_id,
-            func.max(PipelineRun.started_at).label('max_started_at')
+            func.max(PipelineRun.started_at).label('max_started_at'),
+            func.count(PipelineRun.id).label('run_count')
         )
-        .filter(PipelineRun.process_id.isnot(None))
+        .where(PipelineRun.process_id.isnot(None))
         .group_by(PipelineRun.process_id)
         .subquery()
     )
 
-    # Get the most recent run for each process
-    runs = (
-        db.query(PipelineRun)
+    # One joined query for the run, question and visualization summary
+    query = (
+        select(
+            PipelineRun.id,
+            PipelineRun.process_id,
+            PipelineRun.status,
+            PipelineRun.started_at,
+            latest.c.run_count,
+            func.substr(Question.text, 1, 201).label('question_text'),
+            Visualization.template_type,
+            Visualization.title,
+            Visualization.thumbnail_url,
+            Visualization.mechanic_type,
+        )
         .join(
-            subquery,
-            (PipelineRun.process_id == subquery.c.process_id) &
-            (PipelineRun.started_at == subquery.c.max_started_at)
+            latest,
+            (PipelineRun.process_id == latest.c.process_id) &
+            (PipelineRun.started_at == latest.c.max_started_at)
         )
-        .order_by(desc(PipelineRun.started_at))
-        .limit(limit)
-        .all()
+        .outerjoin(Process, Process.id == PipelineRun.process_id)
+        .outerjoin(Question, Question.id == Process.question_id)
+        .outerjoin(Visualization, Visualization.id == latest_visualization_id(PipelineRun.process_id))
+        .order_by(desc(PipelineRun.started_at), desc(PipelineRun.id))
     )
+    if cursor:
+        try:
+            query = query.where(tuple_(PipelineRun.started_at, PipelineRun.id) < decode_cursor(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    games = []
-    for run in runs:
-        if not run.process_id:
-            continue
-
-        # Get question text and template type
-        question_text = None
-        template_type = None
-        process = db.query(Process).filter(Process.id == run.process_id).first()
-        if process and process.question:
-            question_text = process.question.text
-        elif run.question_text:
-            question_text = run.question_text
-        else:
-            question_text = "Untitled question"
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-        viz = db.query(Visualization).filter(Visualization.process_id == run.process_id).first()
-        if viz:
-            template_type = viz.template_type
-        elif run.template_type:
-            template_type = run.template_type
+    games = []
+    for row in rows:
+        question_text = row.question_text or "Untitled question"
 
         # Determine status from run
-        status = run.status
+        status = row.status
         if status == 'success':
             status = 'completed'
         elif status == 'failed':
@@ -1048,16 +1249,23 @@ async def list_games_from_runs(
             status = 'processing'
 
         games.append({
-            "process_id": run.process_id,
+            "process_id": row.process_id,
             "question_text": question_text[:200] + "..." if len(question_text) > 200 else question_text,
-            "template_type": template_type,
+            "template_type": row.template_type,
+            "title": row.title,
+            "thumbnail_url": row.thumbnail_url,
+            "mechanic_type": row.mechanic_type,
             "status": status,
-            "created_at": run.started_at.isoformat() if run.started_at else None
+            "created_at": row.started_at.isoformat() if row.started_at else "",
+            "run_count": row.run_count,
+            "latest_run_status": row.status
         })
 
+    last = rows[-1] if rows else None
     return {
         "games": games,
-        "total": len(games)
+        "total": await db.scalar(select(func.count()).select_from(latest)),
+        "next_cursor": encode_cursor(last.started_at, last.id) if has_more and last.started_at else None
     }
 
 
@@ -1077,14 +1285,8 @@ async def get_graph_structure(
         - edges: List of edges with type (direct/conditional) and conditions
         - conditionalFunctions: List of routing functions with their outcomes
     """
-    import os
-
-    # Set preset environment variable temporarily for graph structure extraction
-    original_preset = os.environ.get("PIPELINE_PRESET")
-    if preset:
-        os.environ["PIPELINE_PRESET"] = preset
-
-    try:
+    # Scope the requested preset to this request for graph structure extraction
+    with run_context(pipeline_preset=preset):
         # Use centralized agent metadata registry from instrumentation.py
         # This is the SINGLE SOURCE OF TRUTH for agent metadata
 
@@ -1591,19 +1793,12 @@ async def get_graph_structure(
 
         return {
             "topology": topology,
-            "preset": preset or os.environ.get("PIPELINE_PRESET", "interactive_diagram_hierarchical"),
+            "preset": get_pipeline_preset(),
             "nodes": nodes,
             "edges": filtered_edges,
             "conditionalFunctions": conditional_functions
         }
 
-    finally:
-        # Restore original preset
-        if original_preset is not None:
-            os.environ["PIPELINE_PRESET"] = original_preset
-        elif preset and "PIPELINE_PRESET" in os.environ:
-            del os.environ["PIPELINE_PRESET"]
-
 
 @router.get("/runs/{run_id}/execution-path")
 async def get_execution_path(
@@ -1891,6 +2086,18 @@ async def get_agent_analytics(
 # =============================================================================
 
 async def run_retry_pipeline(
+    new_run_id: str,
+    original_run_id: str,
+    from_stage: str,
+    pipeline_preset: Optional[str] = None,
+    agent_preset: Optional[str] = None
+):
+    """Run a retry under the original run's presets (see _run_retry_pipeline)."""
+    with run_context(run_id=new_run_id, pipeline_preset=pipeline_preset, agent_preset=agent_preset):
+        await _run_retry_pipeline(new_run_id, original_run_id, from_stage)
+
+
+async def _run_retry_pipeline(
     new_run_id: str,
     original_run_id: str,
     from_stage: str
@@ -1922,6 +2129,10 @@ async def run_retry_pipeline(
         if not run.started_at:
             run.started_at = datetime.utcnow()
         db.commit()
+        get_run_event_bus().mark_local(new_run_id)
+
+        # Reconstruct from fully persisted stage outputs and logs (aflush waits in a worker thread)
+        await get_write_queue().aflush()
 
         # Reconstruct state from original run
         restored_state = await reconstruct_state_before_stage(
@@ -2075,6 +2286,15 @@ async def run_retry_pipeline(
             logger.error(f"Failed to update run status after error: {update_error}", exc_info=True)
             db.rollback()
     finally:
+        # Tell live streams the retry finished (every exit path above sets a terminal status)
+        if run is not None:
+            try:
+                get_run_event_bus().publish_run_status(
+                    new_run_id, run.status, run.duration_ms, run.error_message
+                )
+            except Exception as publish_error:
+                logger.warning(f"Failed to publish retry run status: {publish_error}")
+        get_run_event_bus().mark_finished(new_run_id)
         # Always close the database session
         db.close()
 
@@ -2131,11 +2351,13 @@ async def reconstruct_state_before_stage(
             break
         
         if stage.output_snapshot:
+            # Large values were moved to the blob store; merge their content, not the refs
+            output = restore_snapshot(stage.output_snapshot, get_snapshot_blob_store())
             # Validate stage output before merging
-            is_valid, validation_error = _validate_stage_output(stage.output_snapshot, stage.stage_name)
+            is_valid, validation_error = _validate_stage_output(output, stage.stage_name)
             
             if is_valid:
-                state.update(stage.output_snapshot)
+                state.update(output)
                 if stage.status == "degraded":
                     logger.info(
                         f"Including degraded stage '{stage.stage_name}' output in state reconstruction "
@@ -2363,6 +2585,115 @@ async def get_metrics_summary(
     )
 
 
+@router.get("/analytics/llm-cache")
+async def get_llm_cache_stats():
+    """
+    Get process-wide LLM response cache statistics.
+
+    Returns hit/miss counters, tokens and bytes saved since startup, and the
+    current on-disk store size. Per-run savings are on /runs/{run_id}.
+    """
+    from app.services.llm_cache import get_llm_cache
+
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/analytics/llm-rate-limiter")
+async def get_llm_rate_limiter_stats(
+    run_id: Optional[str] = Query(None, description="Only this run's queue/throttle counters")
+):
+    """
+    Get shared LLM rate limiter statistics.
+
+    Returns live queue depth per provider, in-flight calls, remaining
+    RPM/TPM budget, retry-hint pauses and throttle time per limiter, and
+    queue depth / throttle time per run. With run_id, only that run.
+    """
+    from app.services.llm_rate_limiter import get_llm_rate_limiter
+
+    limiter = get_llm_rate_limiter()
+    if run_id:
+        stats = limiter.run_stats(run_id)
+        if stats is None:
+            raise HTTPException(status_code=404, detail=f"No rate-limited LLM calls for run {run_id}")
+        return stats
+    return limiter.stats()
+
+
+@router.get("/analytics/llm-router")
+async def get_llm_router_stats():
+    """
+    Get latency-aware LLM routing statistics.
+
+    Returns hedge / failover counts, p50/p95 latency per model and output
+    budget, error counts per model and circuit breaker state per provider.
+    """
+    from app.services.llm_router import get_llm_router
+
+    router = get_llm_router()
+    if router is None:
+        return {"enabled": False}
+    return {"enabled": True, **router.stats()}
+
+
+@router.get("/analytics/structured-output")
+async def get_structured_output_stats():
+    """
+    Get native structured output statistics.
+
+    Returns, per agent, native vs prompted JSON calls with their repairs,
+    re-prompts and failures, estimated repairs / retries avoided, and the
+    models that rejected a schema.
+    """
+    from app.services.structured_output import get_structured_output_stats as get_stats
+
+    return get_stats().stats()
+
+
+@router.get("/analytics/live-steps")
+async def get_live_step_stats():
+    """
+    Get live step buffer and run event bus statistics.
+
+    Returns per-process event counts, approximate memory use, evictions and
+    idle-run expiries for the live step ring buffers, plus SSE subscriber
+    counts, for sizing LIVE_STEP_BUFFER_SIZE under load.
+    """
+    from app.services.live_step_buffer import get_live_step_buffer
+
+    return {
+        "buffer": get_live_step_buffer().stats(),
+        "event_bus": get_run_event_bus().stats(),
+    }
+
+
+@router.get("/analytics/write-queue")
+async def get_write_queue_stats():
+    """
+    Get write-behind queue statistics for observability writes.
+
+    Returns current and peak queue depth, batch counts and commit latency
+    (average and p95) for execution logs and stage tracking.
+    """
+    return get_write_queue().stats()
+
+
+@router.get("/analytics/graph-cache")
+async def get_graph_cache_stats():
+    """
+    Get compiled graph cache statistics.
+
+    Returns the number of cached graphs, hit/miss counts and how long each
+    cached graph took to compile.
+    """
+    from app.agents.graph import get_compiled_graph_stats
+
+    return get_compiled_graph_stats()
+
+
 @router.get("/analytics/cost-trend", response_model=CostTrendResponse)
 async def get_cost_trend(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
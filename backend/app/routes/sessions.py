@@ -1,12 +1,13 @@
 """Learning Session API Routes"""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from datetime import datetime
 import logging
 import uuid
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db.models import LearningSession, AttemptRecord, Visualization
 
 logger = logging.getLogger("gamed_ai.routes.sessions")
@@ -19,13 +20,11 @@ async def create_session(
     question_id: str,
     user_identifier: Optional[str] = None,
     total_questions: int = 1,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new learning session"""
     # Verify visualization exists
-    visualization = db.query(Visualization).filter(
-        Visualization.id == visualization_id
-    ).first()
+    visualization = await db.get(Visualization, visualization_id)
     if not visualization:
         raise HTTPException(status_code=404, detail="Visualization not found")
 
@@ -38,8 +37,8 @@ async def create_session(
         status="active"
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
 
     logger.info(f"Created session {session.id} for visualization {visualization_id}")
 
@@ -53,18 +52,18 @@ async def create_session(
 @router.get("/sessions/{session_id}")
 async def get_session(
     session_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get session details with all attempts"""
-    session = db.query(LearningSession).filter(
-        LearningSession.id == session_id
-    ).first()
+    session = await db.get(LearningSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    attempts = db.query(AttemptRecord).filter(
-        AttemptRecord.session_id == session_id
-    ).order_by(AttemptRecord.created_at).all()
+    attempts = (await db.scalars(
+        select(AttemptRecord)
+        .where(AttemptRecord.session_id == session_id)
+        .order_by(AttemptRecord.created_at)
+    )).all()
 
     return {
         "id": session.id,
@@ -116,12 +115,10 @@ async def record_attempts(
     attempts: List[dict],
     score: Optional[dict] = None,
     total_active_time: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Record one or more attempts for a session"""
-    session = db.query(LearningSession).filter(
-        LearningSession.id == session_id
-    ).first()
+    session = await db.get(LearningSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -152,7 +149,7 @@ async def record_attempts(
         session.active_time_seconds = total_active_time
 
     session.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
     logger.info(f"Recorded {len(attempts)} attempts for session {session_id}")
 
@@ -168,12 +165,10 @@ async def end_session(
     total_active_time: Optional[int] = None,
     final_score: Optional[dict] = None,
     blooms_assessment: Optional[dict] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """End a learning session with final analytics"""
-    session = db.query(LearningSession).filter(
-        LearningSession.id == session_id
-    ).first()
+    session = await db.get(LearningSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -198,7 +193,7 @@ async def end_session(
         session.concepts_mastered = blooms_assessment.get("conceptsMastered")
         session.concepts_struggling = blooms_assessment.get("conceptsStruggling")
 
-    db.commit()
+    await db.commit()
 
     logger.info(f"Session {session_id} ended with score {session.raw_score}/{session.max_score}")
 
@@ -220,12 +215,15 @@ async def end_session(
 async def get_user_sessions(
     user_identifier: str,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all sessions for a user"""
-    sessions = db.query(LearningSession).filter(
-        LearningSession.user_identifier == user_identifier
-    ).order_by(LearningSession.created_at.desc()).limit(limit).all()
+    sessions = (await db.scalars(
+        select(LearningSession)
+        .where(LearningSession.user_identifier == user_identifier)
+        .order_by(LearningSession.created_at.desc())
+        .limit(limit)
+    )).all()
 
     return {
         "user_identifier": user_identifier,
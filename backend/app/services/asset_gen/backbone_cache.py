@@ -0,0 +1,314 @@
+"""SAM3 backbone feature cache keyed by image content.
+
+Computing SAM3 backbone features costs 2-4 s per image and the same diagram
+is often segmented more than once: asset retries, detect_zones followed by
+detect_zones_guided, and re-runs of the same question. Text and box prompts
+only need the backbone state, so it is cached:
+
+- Key: SHA-256 of the decoded RGB pixels and size (re-encoding the same
+  image still hits), namespaced by model
+- Memory tier: LRU of the state flattened to NumPy arrays, bounded in MB
+- Disk tier: every entry is written through as one .npy per array and loaded
+  back memory-mapped read-only, so hits survive restarts
+- Restore: arrays are copied and converted back to the framework they came
+  from (MLX, torch or NumPy) into a fresh state dict, since prompt calls and
+  _cleanup_state mutate the state they are given
+
+Environment Variables:
+    SAM3_FEATURE_CACHE_ENABLED: "true" (default) or "false"
+    SAM3_FEATURE_CACHE_DIR: Disk tier directory (default: pipeline_outputs/cache/sam3_features)
+    SAM3_FEATURE_CACHE_MEMORY_MB: Memory tier budget (default: 1024)
+    SAM3_FEATURE_CACHE_DISK_MB: Disk tier budget (default: 8192)
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger("gamed_ai.asset_gen.backbone_cache")
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent.parent / "pipeline_outputs" / "cache" / "sam3_features"
+DEFAULT_MEMORY_MB = 1024
+DEFAULT_DISK_MB = 8192
+
+_META_FILE = "meta.pkl"
+
+
+@dataclass
+class _ArrayRef:
+    """Placeholder for an array leaf in the flattened state tree."""
+    index: int
+    kind: str                      # "mlx" | "torch" | "numpy"
+    device: Optional[str] = None   # torch only
+
+
+@dataclass
+class _Entry:
+    tree: Any
+    arrays: list
+    backbone_ms: int
+    nbytes: int = field(init=False)
+
+    def __post_init__(self):
+        self.nbytes = sum(int(a.nbytes) for a in self.arrays)
+
+
+def image_content_key(image: Image.Image, namespace: str = "sam3") -> str:
+    """Content hash of an image's pixels (independent of file encoding)."""
+    rgb = image if image.mode == "RGB" else image.convert("RGB")
+    digest = hashlib.sha256()
+    digest.update(f"{namespace}:{rgb.size[0]}x{rgb.size[1]}:".encode())
+    digest.update(rgb.tobytes())
+    return digest.hexdigest()
+
+
+def _array_kind(value: Any) -> Optional[str]:
+    module = type(value).__module__
+    if isinstance(value, np.ndarray):
+        return "numpy"
+    if module.startswith("mlx"):
+        return "mlx"
+    if module.startswith("torch") and hasattr(value, "detach"):
+        return "torch"
+    return None
+
+
+def _flatten(value: Any, arrays: list) -> Any:
+    """Replace array leaves with _ArrayRef and collect them as NumPy arrays."""
+    if isinstance(value, dict):
+        return {k: _flatten(v, arrays) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_flatten(v, arrays) for v in value]
+        return items if isinstance(value, list) else tuple(items)
+    kind = _array_kind(value)
+    if kind is None:
+        return value
+    if kind == "torch":
+        ref = _ArrayRef(len(arrays), kind, device=str(value.device))
+        arrays.append(value.detach().cpu().numpy())
+    else:
+        ref = _ArrayRef(len(arrays), kind)
+        arrays.append(np.array(value, copy=True) if kind == "numpy" else np.array(value))
+    return ref
+
+
+def _unflatten(tree: Any, arrays: list) -> Any:
+    """Rebuild a fresh state tree, converting arrays back to their framework."""
+    if isinstance(tree, dict):
+        return {k: _unflatten(v, arrays) for k, v in tree.items()}
+    if isinstance(tree, list):
+        return [_unflatten(v, arrays) for v in tree]
+    if isinstance(tree, tuple):
+        return tuple(_unflatten(v, arrays) for v in tree)
+    if not isinstance(tree, _ArrayRef):
+        return tree
+    array = arrays[tree.index]
+    if tree.kind == "mlx":
+        import mlx.core as mx
+        return mx.array(array)
+    if tree.kind == "torch":
+        import torch
+        return torch.from_numpy(np.array(array)).to(tree.device or "cpu")
+    # NumPy: always a private in-memory copy; the cached array (or read-only
+    # memmap) is shared with every other hit
+    return np.array(array)
+
+
+class BackboneFeatureCache:
+    """Two-tier (memory LRU + memory-mapped disk) cache of SAM3 backbone states."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        memory_bytes: int = DEFAULT_MEMORY_MB * 1024 * 1024,
+        disk_bytes: int = DEFAULT_DISK_MB * 1024 * 1024,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.backbone_ms_saved = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a fresh backbone state for key, or None on a miss."""
+        t0 = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+        if entry is None:
+            entry = self._load_from_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, entry)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        state = _unflatten(entry.tree, entry.arrays)
+        restore_ms = int((time.time() - t0) * 1000)
+        with self._lock:
+            self.hits += 1
+            self.backbone_ms_saved += max(0, entry.backbone_ms - restore_ms)
+        return state
+
+    def put(self, key: str, state: dict, backbone_ms: int) -> None:
+        """Cache a freshly computed backbone state (before any prompts run)."""
+        arrays: list = []
+        tree = _flatten(state, arrays)
+        entry = _Entry(tree=tree, arrays=arrays, backbone_ms=backbone_ms)
+        self._remember(key, entry)
+        if self.cache_dir is not None:
+            try:
+                self._write_to_disk(key, entry)
+            except Exception as e:
+                logger.warning(f"[SAM3:cache] Could not write features for {key[:12]}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "backbone_ms_saved": self.backbone_ms_saved,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_used / (1024 * 1024), 1),
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        if self.cache_dir is not None and self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_used -= previous.nbytes
+            if entry.nbytes > self.memory_bytes:
+                return  # Too large for memory; disk tier only
+            self._memory[key] = entry
+            self._memory_used += entry.nbytes
+            while self._memory_used > self.memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= evicted.nbytes
+                self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def _write_to_disk(self, key: str, entry: _Entry) -> None:
+        target = self._entry_dir(key)
+        if (target / _META_FILE).exists():
+            return
+        tmp = target.with_name(f".tmp-{key}-{os.getpid()}-{threading.get_ident()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+        try:
+            for i, array in enumerate(entry.arrays):
+                np.save(tmp / f"{i}.npy", np.ascontiguousarray(array), allow_pickle=False)
+            with open(tmp / _META_FILE, "wb") as f:
+                pickle.dump({"tree": entry.tree, "count": len(entry.arrays), "backbone_ms": entry.backbone_ms}, f)
+            os.replace(tmp, target)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not (target / _META_FILE).exists():
+                raise
+        self._enforce_disk_budget()
+
+    def _load_from_disk(self, key: str) -> Optional[_Entry]:
+        if self.cache_dir is None:
+            return None
+        entry_dir = self._entry_dir(key)
+        meta_path = entry_dir / _META_FILE
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "rb") as f:
+                meta = pickle.load(f)
+            arrays = [
+                np.load(entry_dir / f"{i}.npy", mmap_mode="r", allow_pickle=False)
+                for i in range(meta["count"])
+            ]
+            os.utime(meta_path)  # LRU order for disk eviction
+            return _Entry(tree=meta["tree"], arrays=arrays, backbone_ms=meta["backbone_ms"])
+        except Exception as e:
+            logger.warning(f"[SAM3:cache] Dropping unreadable entry {key[:12]}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+    def _enforce_disk_budget(self) -> None:
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob(f"*/*/{_META_FILE}"):
+            entry_dir = meta_path.parent
+            size = sum(p.stat().st_size for p in entry_dir.iterdir())
+            entries.append((meta_path.stat().st_mtime, size, entry_dir))
+            total += size
+        if total <= self.disk_bytes:
+            return
+        for _, size, entry_dir in sorted(entries):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            if total <= self.disk_bytes:
+                break
+
+
+# Singleton instance
+_feature_cache: Optional[BackboneFeatureCache] = None
+_feature_cache_lock = threading.Lock()
+
+
+def get_backbone_cache() -> Optional[BackboneFeatureCache]:
+    """Get the process-wide backbone cache (None when disabled)."""
+    global _feature_cache
+    if os.getenv("SAM3_FEATURE_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _feature_cache is None:
+        with _feature_cache_lock:
+            if _feature_cache is None:
+                _feature_cache = BackboneFeatureCache(
+                    cache_dir=Path(os.getenv("SAM3_FEATURE_CACHE_DIR", str(DEFAULT_CACHE_DIR))),
+                    memory_bytes=int(float(os.getenv("SAM3_FEATURE_CACHE_MEMORY_MB", str(DEFAULT_MEMORY_MB))) * 1024 * 1024),
+                    disk_bytes=int(float(os.getenv("SAM3_FEATURE_CACHE_DISK_MB", str(DEFAULT_DISK_MB))) * 1024 * 1024),
+                )
+    return _feature_cache
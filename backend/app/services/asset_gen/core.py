@@ -15,6 +15,8 @@ from typing import Optional
 
 from PIL import Image
 
+from app.utils.image_ops import remove_background
+
 from .gemini_image import GeminiImageEditor
 from .imagen import ImagenGenerator
 from .search import ImageSearcher
@@ -245,19 +247,7 @@ class AssetGenService:
     @staticmethod
     def _remove_background(image_bytes: bytes, threshold: int = 240) -> bytes:
         """Remove near-white background from image, producing transparent PNG."""
-        img = Image.open(BytesIO(image_bytes)).convert("RGBA")
-        data = img.getdata()
-        new_data = []
-        for r, g, b, a in data:
-            # If pixel is near-white, make transparent
-            if r > threshold and g > threshold and b > threshold:
-                new_data.append((r, g, b, 0))
-            else:
-                new_data.append((r, g, b, a))
-        img.putdata(new_data)
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        return buf.getvalue()
+        return remove_background(image_bytes, threshold=threshold)
 
     async def generate_items_from_references(
         self,
@@ -1,15 +1,15 @@
 """Image search via Serper API with scoring, download, and caching."""
 
 import asyncio
-import hashlib
 import logging
 import os
 from io import BytesIO
-from pathlib import Path
 from typing import Optional
 
 import httpx
 
+from app.services.http_downloader import get_downloader
+
 logger = logging.getLogger("gamed_ai.asset_gen.search")
 
 SERPER_IMAGE_URL = "https://google.serper.dev/images"
@@ -35,13 +35,11 @@ TRUSTED_DOMAINS = {
 class ImageSearcher:
     """Search for educational reference images using Serper API."""
 
-    def __init__(self, api_key: str | None = None, cache_dir: Path | None = None):
+    def __init__(self, api_key: str | None = None):
         key = api_key or os.getenv("SERPER_API_KEY")
         if not key:
             raise ValueError("SERPER_API_KEY not set")
         self.api_key = key
-        self.cache_dir = cache_dir or Path(__file__).parent.parent.parent.parent / "assets" / "cache"
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
 
     async def search(
         self,
@@ -153,11 +151,8 @@ class ImageSearcher:
         return score
 
     async def download(self, url: str, timeout: float = 30) -> bytes:
-        """Download an image from URL, return raw bytes."""
-        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.content
+        """Download an image from URL, return raw bytes (shared pooled client, uncached)."""
+        return await get_downloader().get_bytes(url, use_cache=False, timeout=timeout)
 
     async def search_and_download_best(
         self,
@@ -235,18 +230,9 @@ class ImageSearcher:
         logger.info(f"Downloaded {sum(1 for v in output.values() if v)} of {len(items)} item images")
         return output
 
-    def get_cache_path(self, url: str) -> Path:
-        """Get a deterministic cache file path for a URL."""
-        url_hash = hashlib.sha256(url.encode()).hexdigest()[:16]
-        return self.cache_dir / f"{url_hash}.png"
-
     async def download_cached(self, url: str) -> bytes:
-        """Download with filesystem caching."""
-        cache_path = self.get_cache_path(url)
-        if cache_path.exists():
-            logger.debug(f"Cache hit: {cache_path.name}")
-            return cache_path.read_bytes()
-
-        data = await self.download(url)
-        cache_path.write_bytes(data)
-        return data
+        """Download through the shared size-bounded, revalidating download cache."""
+        result = await get_downloader().fetch(url)
+        if result.from_cache:
+            logger.debug(f"Cache hit: {url[:80]}")
+        return result.content
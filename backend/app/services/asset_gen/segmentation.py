@@ -7,12 +7,17 @@ Supports three modes:
      for pixel-precise segmentation within the guided region
   3. Box-only: Gemini boxes used as geometric prompts without text
 
+Segmentation runs in out-of-process workers (segmentation_pool) so scenes
+segment in parallel; with SAM3_WORKER_POOL_ENABLED=false it runs in-process
+behind _SAM3_SEMAPHORE.
+
 Falls back gracefully (returns None) if SAM3/MLX is unavailable.
 """
 
 import asyncio
 import logging
 import math
+import os
 import threading
 import time
 from io import BytesIO
@@ -21,10 +26,14 @@ from typing import Optional
 import numpy as np
 from PIL import Image
 
+from app.services.asset_gen.backbone_cache import get_backbone_cache, image_content_key
+from app.services.asset_gen.segmentation_pool import get_segmentation_pool, peek_segmentation_pool
+
 logger = logging.getLogger("gamed_ai.asset_gen.segmentation")
 
 # Serialize SAM3 Metal GPU access — concurrent backbone computations crash on Apple Silicon.
-# Only 1 SAM3 inference (backbone + prompts) may run at a time.
+# Only 1 SAM3 inference (backbone + prompts) may run at a time. Only used when the
+# worker pool is disabled (SAM3_WORKER_POOL_ENABLED=false); see segmentation_pool.
 _SAM3_SEMAPHORE = asyncio.Semaphore(1)
 
 # ── SAM3 status tracker (read by /health/sam3 endpoint) ──────────────────────
@@ -32,6 +41,7 @@ _sam3_status = {
     "state": "idle",           # idle | loading | busy | error
     "model_loaded": False,
     "current_scene": None,     # scene_id being processed
+    "active_scenes": [],       # scene_ids in the worker pool (several run at once)
     "current_mode": None,      # "text-only" | "guided"
     "current_label": None,     # label currently being segmented
     "queue_waiting": 0,        # coroutines waiting on semaphore
@@ -40,6 +50,7 @@ _sam3_status = {
     "total_errors": 0,
     "last_error": None,
     "last_backbone_ms": None,
+    "last_backbone_cached": None,  # True when the last backbone came from the feature cache
     "last_prompt_ms": None,
     "last_completed_at": None,
     "busy_since": None,        # timestamp when current inference started
@@ -52,11 +63,23 @@ def get_sam3_status() -> dict:
     """Return a snapshot of SAM3 status for the health endpoint."""
     with _status_lock:
         snap = dict(_sam3_status)
+        snap["active_scenes"] = list(_sam3_status["active_scenes"])
     # Add derived fields
     if snap["busy_since"]:
         snap["busy_duration_s"] = round(time.time() - snap["busy_since"], 1)
     else:
         snap["busy_duration_s"] = 0
+    cache = get_backbone_cache()
+    if cache is not None:
+        cache_stats = cache.stats()
+        snap["feature_cache_hit_rate"] = cache_stats["hit_rate"]
+        snap["backbone_ms_saved"] = cache_stats["backbone_ms_saved"]
+        snap["feature_cache"] = cache_stats
+    pool = peek_segmentation_pool()
+    if pool is not None:
+        pool_stats = pool.stats()
+        snap["queue_waiting"] = pool_stats["queue_depth"]
+        snap["worker_pool"] = pool_stats
     return snap
 
 
@@ -65,6 +88,35 @@ def _update_status(**kwargs):
         _sam3_status.update(kwargs)
 
 
+def _pool_scene_started(scene_id: str, mode: str) -> None:
+    """Mark a scene as in progress in the worker pool."""
+    with _status_lock:
+        active = _sam3_status["active_scenes"]
+        if not active:
+            _sam3_status["busy_since"] = time.time()
+        active.append(scene_id)
+        _sam3_status.update(
+            state="busy",
+            current_scene=scene_id,
+            current_mode=mode,
+            total_calls=_sam3_status["total_calls"] + 1,
+        )
+
+
+def _pool_scene_finished(scene_id: str, **kwargs) -> None:
+    """Drop a finished scene; the tracker goes idle once no pool scene is left."""
+    with _status_lock:
+        active = _sam3_status["active_scenes"]
+        if scene_id in active:
+            active.remove(scene_id)
+        if active:
+            _sam3_status["current_scene"] = active[-1]
+            kwargs.pop("state", None)  # Other scenes are still running
+        else:
+            _sam3_status.update(current_scene=None, current_mode=None, busy_since=None)
+        _sam3_status.update(kwargs)
+
+
 def _mask_to_polygon(
     mask: np.ndarray,
     simplify_tolerance: float = 0.5,
@@ -214,15 +266,34 @@ class LocalSegmentationService:
         This is the expensive step (~2-4s). The returned state can be reused
         for multiple text/box prompts via reset_all_prompts() which preserves
         backbone_out but clears prompt-specific data.
+
+        States are cached by image content (see backbone_cache), so the same
+        diagram only pays for the backbone once across calls and restarts.
+        Every call returns a fresh state that the caller may mutate.
         """
         tid = threading.current_thread().name
         _update_status(executor_thread=tid)
+        cache = get_backbone_cache()
+        key = image_content_key(image, namespace=os.getenv("SAM3_MLX_MODEL", "sam3")) if cache is not None else None
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                _update_status(last_backbone_cached=True)
+                logger.info(f"[SAM3:backbone] Feature cache hit {key[:12]} on thread={tid}")
+                return cached
+
         logger.info(f"[SAM3:backbone] Starting on thread={tid}")
         t0 = time.time()
         self._sam3._ensure_loaded()
         state = self._sam3._processor.set_image(image)
         elapsed = int((time.time() - t0) * 1000)
         logger.info(f"[SAM3:backbone] Completed in {elapsed}ms on thread={tid}")
+        _update_status(last_backbone_cached=False)
+        if cache is not None:
+            try:
+                cache.put(key, state, backbone_ms=elapsed)
+            except Exception as e:
+                logger.warning(f"[SAM3:backbone] Could not cache features: {e}")
         return state
 
     def _run_text_prompt(self, state: dict, label: str) -> dict:
@@ -262,6 +333,84 @@ class LocalSegmentationService:
 
         return [cx, cy, bw, bh]
 
+    def segment_labels(
+        self,
+        image_bytes: bytes,
+        labels: list[str],
+        guide_boxes: Optional[dict[str, dict]] = None,
+        scene_id: str = "unknown",
+    ) -> dict:
+        """Segment labels on one image synchronously (executor thread or pool worker).
+
+        Computes the backbone ONCE, then runs one prompt per label against it:
+        a text prompt, or text + box prompt when guide_boxes is given (labels
+        without a guide box are skipped).
+
+        Returns {"zones", "backbone_ms", "backbone_cached", "prompt_ms"}.
+        """
+        mode = "guided" if guide_boxes is not None else "text-only"
+        image = Image.open(BytesIO(image_bytes)).convert("RGB")
+        img_w, img_h = image.size
+
+        # Compute backbone ONCE (expensive ~2-4s)
+        t_backbone = time.time()
+        _update_status(current_label="<backbone>")
+        logger.info(f"[SAM3:{scene_id}] Computing backbone ({img_w}x{img_h})... "
+                    f"thread={threading.current_thread().name}")
+        state = self._compute_backbone(image)
+        backbone_ms = int((time.time() - t_backbone) * 1000)
+        _update_status(last_backbone_ms=backbone_ms)
+        logger.info(f"[SAM3:{scene_id}] Backbone ready in {backbone_ms}ms")
+
+        zones: list[dict] = []
+        total_prompt_ms = 0
+        try:
+            for i, label in enumerate(labels):
+                sam_box = None
+                if guide_boxes is not None:
+                    box_info = guide_boxes.get(label)
+                    if not box_info:
+                        logger.warning(f"[SAM3:{scene_id}] No guide box for '{label}', skipping")
+                        continue
+
+                try:
+                    t_prompt = time.time()
+                    _update_status(current_label=f"{label} ({i+1}/{len(labels)})")
+                    if guide_boxes is not None:
+                        sam_box = self._box_from_guide(box_info)
+                        state = self._run_guided_prompt(state, label, sam_box)
+                    else:
+                        state = self._run_text_prompt(state, label)
+                    prompt_ms = int((time.time() - t_prompt) * 1000)
+                    total_prompt_ms += prompt_ms
+                    _update_status(last_prompt_ms=prompt_ms)
+
+                    binary = self._extract_mask_from_result(state, (img_w, img_h))
+                    if binary is None:
+                        logger.info(f"[SAM3:{scene_id}] {mode}: no mask for '{label}' ({prompt_ms}ms)")
+                        continue
+
+                    zone = self._mask_to_zone(binary, label)
+                    if zone:
+                        zones.append(zone)
+                        box_note = (
+                            f", box: {sam_box[0]:.2f},{sam_box[1]:.2f} {sam_box[2]:.2f}x{sam_box[3]:.2f}"
+                            if sam_box else ""
+                        )
+                        logger.info(f"[SAM3:{scene_id}] {mode} '{label}' → "
+                                    f"{len(zone['points'])}-pt polygon ({prompt_ms}ms{box_note})")
+                except Exception as e:
+                    logger.warning(f"[SAM3:{scene_id}] {mode} failed for '{label}': {e}")
+        finally:
+            self._cleanup_state(state)
+
+        return {
+            "zones": zones,
+            "backbone_ms": backbone_ms,
+            "backbone_cached": bool(_sam3_status.get("last_backbone_cached")),
+            "prompt_ms": total_prompt_ms,
+        }
+
     async def detect_zones(
         self,
         image_bytes: bytes,
@@ -276,95 +425,7 @@ class LocalSegmentationService:
 
         Returns a list of zone dicts, or None if SAM3 is unavailable.
         """
-        try:
-            self._ensure_loaded()
-            _update_status(model_loaded=True)
-        except Exception as e:
-            logger.info(f"SAM3 not available: {e}")
-            _update_status(state="error", last_error=str(e))
-            return None
-
-        _update_status(queue_waiting=_sam3_status["queue_waiting"] + 1)
-        logger.info(f"[SAM3:{scene_id}] Waiting for semaphore (queue={_sam3_status['queue_waiting']})")
-        sem_wait_start = time.time()
-
-        async with _SAM3_SEMAPHORE:
-            sem_wait_ms = int((time.time() - sem_wait_start) * 1000)
-            _update_status(
-                queue_waiting=max(0, _sam3_status["queue_waiting"] - 1),
-                state="busy",
-                current_scene=scene_id,
-                current_mode="text-only",
-                busy_since=time.time(),
-                total_calls=_sam3_status["total_calls"] + 1,
-            )
-            logger.info(f"[SAM3:{scene_id}] Semaphore acquired after {sem_wait_ms}ms "
-                        f"(queue_remaining={_sam3_status['queue_waiting']})")
-
-            try:
-                image = Image.open(BytesIO(image_bytes)).convert("RGB")
-                img_w, img_h = image.size
-                loop = asyncio.get_event_loop()
-
-                # Compute backbone ONCE (expensive ~2-4s)
-                t_backbone = time.time()
-                _update_status(current_label="<backbone>")
-                logger.info(f"[SAM3:{scene_id}] Computing backbone ({img_w}x{img_h})... "
-                            f"thread={threading.current_thread().name}")
-                state = await loop.run_in_executor(None, self._compute_backbone, image)
-                backbone_ms = int((time.time() - t_backbone) * 1000)
-                _update_status(last_backbone_ms=backbone_ms)
-                logger.info(f"[SAM3:{scene_id}] Backbone ready in {backbone_ms}ms")
-
-                zones: list[dict] = []
-                for i, label in enumerate(expected_labels):
-                    try:
-                        t_prompt = time.time()
-                        _update_status(current_label=f"{label} ({i+1}/{len(expected_labels)})")
-                        state = await loop.run_in_executor(
-                            None, self._run_text_prompt, state, label
-                        )
-                        prompt_ms = int((time.time() - t_prompt) * 1000)
-                        _update_status(last_prompt_ms=prompt_ms)
-
-                        binary = self._extract_mask_from_result(state, (img_w, img_h))
-                        if binary is None:
-                            logger.info(f"[SAM3:{scene_id}] '{label}' → no mask ({prompt_ms}ms)")
-                            continue
-                        zone = self._mask_to_zone(binary, label)
-                        if zone:
-                            zones.append(zone)
-                            logger.info(f"[SAM3:{scene_id}] '{label}' → {len(zone['points'])}-pt polygon ({prompt_ms}ms)")
-                    except Exception as e:
-                        logger.warning(f"[SAM3:{scene_id}] text-only failed for '{label}': {e}")
-
-                self._cleanup_state(state)
-                _update_status(
-                    state="idle",
-                    current_scene=None,
-                    current_mode=None,
-                    current_label=None,
-                    busy_since=None,
-                    total_completed=_sam3_status["total_completed"] + 1,
-                    last_completed_at=time.time(),
-                )
-
-                if not zones:
-                    logger.warning(f"[SAM3:{scene_id}] text-only: 0/{len(expected_labels)} zones")
-                    return None
-                logger.info(f"[SAM3:{scene_id}] text-only: {len(zones)}/{len(expected_labels)} zones")
-                return zones
-
-            except Exception as e:
-                _update_status(
-                    state="error",
-                    current_scene=None,
-                    busy_since=None,
-                    total_errors=_sam3_status["total_errors"] + 1,
-                    last_error=f"{scene_id}: {e}",
-                )
-                logger.error(f"[SAM3:{scene_id}] text-only crashed: {e}", exc_info=True)
-                raise
+        return await self._detect(image_bytes, expected_labels, None, scene_id)
 
     async def detect_zones_guided(
         self,
@@ -394,6 +455,68 @@ class LocalSegmentationService:
         Returns:
             List of zone dicts with pixel-precise polygon boundaries, or None.
         """
+        return await self._detect(image_bytes, expected_labels, guide_boxes or {}, scene_id)
+
+    async def _detect(
+        self,
+        image_bytes: bytes,
+        labels: list[str],
+        guide_boxes: Optional[dict[str, dict]],
+        scene_id: str,
+    ) -> list[dict] | None:
+        """Run segment_labels in the worker pool, or in-process when it is disabled."""
+        mode = "guided" if guide_boxes is not None else "text-only"
+        pool = get_segmentation_pool()
+        if pool is not None:
+            result = await self._detect_in_pool(pool, image_bytes, labels, guide_boxes, scene_id, mode)
+        else:
+            result = await self._detect_in_process(image_bytes, labels, guide_boxes, scene_id, mode)
+        if result is None:
+            return None
+
+        zones = result["zones"]
+        if not zones:
+            logger.warning(f"[SAM3:{scene_id}] {mode}: 0/{len(labels)} zones")
+            return None
+        logger.info(f"[SAM3:{scene_id}] {mode}: {len(zones)}/{len(labels)} zones")
+        return zones
+
+    async def _detect_in_pool(self, pool, image_bytes, labels, guide_boxes, scene_id, mode) -> dict | None:
+        """Submit to the worker pool; scenes segment in parallel up to the worker count."""
+        _pool_scene_started(scene_id, mode)
+        try:
+            result = await pool.segment(image_bytes, labels, guide_boxes, scene_id)
+        except asyncio.CancelledError:
+            _pool_scene_finished(scene_id, state="idle")
+            raise
+        except Exception as e:
+            _pool_scene_finished(
+                scene_id,
+                state="error",
+                total_errors=_sam3_status["total_errors"] + 1,
+                last_error=f"{scene_id}: {e}",
+            )
+            logger.error(f"[SAM3:{scene_id}] {mode} crashed in worker pool: {e}", exc_info=True)
+            raise
+
+        if result.get("unavailable"):
+            logger.info(f"SAM3 not available in worker: {result.get('error')}")
+            _pool_scene_finished(scene_id, state="error", last_error=result.get("error"))
+            return None
+
+        _pool_scene_finished(
+            scene_id,
+            state="idle",
+            model_loaded=True,
+            total_completed=_sam3_status["total_completed"] + 1,
+            last_completed_at=time.time(),
+            last_backbone_ms=result.get("backbone_ms"),
+            last_backbone_cached=result.get("backbone_cached"),
+        )
+        return result
+
+    async def _detect_in_process(self, image_bytes, labels, guide_boxes, scene_id, mode) -> dict | None:
+        """Load SAM3 here and serialize access with _SAM3_SEMAPHORE."""
         try:
             self._ensure_loaded()
             _update_status(model_loaded=True)
@@ -412,7 +535,7 @@ class LocalSegmentationService:
                 queue_waiting=max(0, _sam3_status["queue_waiting"] - 1),
                 state="busy",
                 current_scene=scene_id,
-                current_mode="guided",
+                current_mode=mode,
                 busy_since=time.time(),
                 total_calls=_sam3_status["total_calls"] + 1,
             )
@@ -420,56 +543,10 @@ class LocalSegmentationService:
                         f"(queue_remaining={_sam3_status['queue_waiting']})")
 
             try:
-                image = Image.open(BytesIO(image_bytes)).convert("RGB")
-                img_w, img_h = image.size
                 loop = asyncio.get_event_loop()
-
-                # Compute backbone ONCE
-                t_backbone = time.time()
-                _update_status(current_label="<backbone>")
-                logger.info(f"[SAM3:{scene_id}] Computing backbone ({img_w}x{img_h})... "
-                            f"thread={threading.current_thread().name}")
-                state = await loop.run_in_executor(None, self._compute_backbone, image)
-                backbone_ms = int((time.time() - t_backbone) * 1000)
-                _update_status(last_backbone_ms=backbone_ms)
-                logger.info(f"[SAM3:{scene_id}] Backbone ready in {backbone_ms}ms")
-
-                zones: list[dict] = []
-                for i, label in enumerate(expected_labels):
-                    box_info = guide_boxes.get(label)
-                    if not box_info:
-                        logger.warning(f"[SAM3:{scene_id}] No guide box for '{label}', skipping")
-                        continue
-
-                    try:
-                        sam_box = self._box_from_guide(box_info)
-
-                        t_prompt = time.time()
-                        _update_status(current_label=f"{label} ({i+1}/{len(expected_labels)})")
-                        state = await loop.run_in_executor(
-                            None, self._run_guided_prompt, state, label, sam_box
-                        )
-                        prompt_ms = int((time.time() - t_prompt) * 1000)
-                        _update_status(last_prompt_ms=prompt_ms)
-
-                        binary = self._extract_mask_from_result(state, (img_w, img_h))
-                        if binary is None:
-                            logger.warning(f"[SAM3:{scene_id}] guided: no mask for '{label}' ({prompt_ms}ms)")
-                            continue
-
-                        zone = self._mask_to_zone(binary, label)
-                        if zone:
-                            zones.append(zone)
-                            logger.info(
-                                f"[SAM3:{scene_id}] guided '{label}' → {len(zone['points'])}-pt polygon "
-                                f"({prompt_ms}ms, box: {sam_box[0]:.2f},{sam_box[1]:.2f} "
-                                f"{sam_box[2]:.2f}x{sam_box[3]:.2f})"
-                            )
-
-                    except Exception as e:
-                        logger.warning(f"[SAM3:{scene_id}] guided failed for '{label}': {e}")
-
-                self._cleanup_state(state)
+                result = await loop.run_in_executor(
+                    None, self.segment_labels, image_bytes, labels, guide_boxes, scene_id
+                )
                 _update_status(
                     state="idle",
                     current_scene=None,
@@ -479,12 +556,7 @@ class LocalSegmentationService:
                     total_completed=_sam3_status["total_completed"] + 1,
                     last_completed_at=time.time(),
                 )
-
-                if not zones:
-                    logger.warning(f"[SAM3:{scene_id}] guided: 0/{len(expected_labels)} zones")
-                    return None
-                logger.info(f"[SAM3:{scene_id}] guided: {len(zones)}/{len(expected_labels)} zones")
-                return zones
+                return result
 
             except Exception as e:
                 _update_status(
@@ -494,7 +566,7 @@ class LocalSegmentationService:
                     total_errors=_sam3_status["total_errors"] + 1,
                     last_error=f"{scene_id}: {e}",
                 )
-                logger.error(f"[SAM3:{scene_id}] guided crashed: {e}", exc_info=True)
+                logger.error(f"[SAM3:{scene_id}] {mode} crashed: {e}", exc_info=True)
                 raise
 
     @staticmethod
@@ -0,0 +1,370 @@
+"""Out-of-process SAM3 segmentation worker pool.
+
+SAM3 used to run in the API process behind a single asyncio semaphore, so
+every scene of a multi-scene run queued behind one inference while the
+prompt loop held the GIL. This pool moves the work into N spawned worker
+processes, each holding its own model:
+
+- Local job queue: jobs wait in the pool until a worker is free; the
+  ProcessPoolExecutor only ever holds one batch per worker
+- Batching: queued jobs for the same image (and mode) are merged into one
+  batch, so the backbone runs once and each caller gets its labels' zones
+- Device: workers use Metal/CUDA when MLX reports one, else the MLX CPU
+  backend with BLAS threads split across workers
+- Sizing: 1 worker with an accelerator (one GPU), otherwise cpu_count // 4
+  (max 4); each worker holds a full model (~3.5GB)
+- Stats: queue depth, in-flight batches and per-job latency for /health/sam3
+
+Environment Variables:
+    SAM3_WORKER_POOL_ENABLED: "true" (default) or "false" to segment in-process
+    SAM3_WORKERS: Number of worker processes (default: sized from the host, see above)
+
+Usage:
+    pool = get_segmentation_pool()
+    result = await pool.segment(image_bytes, labels, guide_boxes=None, scene_id="scene_1")
+    result["zones"]
+"""
+
+import asyncio
+import copy
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+logger = logging.getLogger("gamed_ai.asset_gen.segmentation_pool")
+
+MAX_WORKERS_CPU = 4
+LATENCY_WINDOW = 200
+
+
+# ── Worker process side ──────────────────────────────────────────────────────
+
+_worker_service = None
+_worker_device: Optional[str] = None
+_worker_error: Optional[str] = None
+
+
+def probe_device() -> str:
+    """Which MLX device a worker would use ("metal"/"cuda"/"cpu"), without selecting it."""
+    try:
+        import mlx.core as mx
+    except ImportError:
+        return "unavailable"
+    for backend in ("metal", "cuda"):
+        module = getattr(mx, backend, None)
+        try:
+            if module is not None and module.is_available():
+                return backend
+        except Exception:
+            continue
+    return "cpu"
+
+
+def select_device() -> str:
+    """Pick the MLX device in a worker, making CPU the default when there is no accelerator."""
+    device = probe_device()
+    if device == "cpu":
+        import mlx.core as mx
+        mx.set_default_device(mx.cpu)
+    return device
+
+
+def _worker_init(threads: int) -> None:
+    """Runs once in each worker before any job."""
+    global _worker_device
+    if threads > 0:
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(var, str(threads))
+    _worker_device = select_device()
+
+
+def _run_batch(image_bytes: bytes, labels: list[str], guide_boxes: Optional[dict], scene_id: str) -> dict:
+    """Segment one image in a worker; the model is loaded on the first batch."""
+    global _worker_service, _worker_error
+    if _worker_error is not None:
+        return {"zones": [], "unavailable": True, "error": _worker_error}
+    if _worker_service is None:
+        from app.services.asset_gen.segmentation import LocalSegmentationService
+        service = LocalSegmentationService()
+        try:
+            service._ensure_loaded()
+            service._sam3._ensure_loaded()
+        except Exception as e:
+            _worker_error = str(e)
+            return {"zones": [], "unavailable": True, "error": _worker_error}
+        _worker_service = service
+
+    result = _worker_service.segment_labels(image_bytes, labels, guide_boxes, scene_id)
+    result.update(pid=os.getpid(), device=_worker_device)
+    return result
+
+
+# ── API process side ─────────────────────────────────────────────────────────
+
+def default_worker_count() -> int:
+    """SAM3_WORKERS, else 1 on an accelerator or cpu_count // 4 (max 4) on CPU."""
+    configured = os.getenv("SAM3_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    # Probe only: the API process never runs MLX itself, so its default device is left alone
+    if probe_device() in ("metal", "cuda"):
+        return 1
+    return max(1, min(MAX_WORKERS_CPU, (os.cpu_count() or 1) // 4))
+
+
+@dataclass
+class _Job:
+    labels: list[str]
+    scene_id: str
+    future: Future
+    submitted_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class _Batch:
+    key: str
+    image_bytes: bytes
+    guide_boxes: Optional[dict]
+    labels: list[str]
+    jobs: list[_Job]
+    started_at: Optional[float] = None
+
+    def accepts(self, guide_boxes: Optional[dict]) -> bool:
+        """Guided jobs merge only if shared labels use the same boxes."""
+        if guide_boxes is None or self.guide_boxes is None:
+            return guide_boxes is None and self.guide_boxes is None
+        return all(self.guide_boxes.get(label, box) == box for label, box in guide_boxes.items())
+
+    def add(self, job: _Job, guide_boxes: Optional[dict]) -> None:
+        self.jobs.append(job)
+        self.labels.extend(label for label in job.labels if label not in self.labels)
+        if guide_boxes is not None:
+            self.guide_boxes.update(guide_boxes)
+
+
+class SegmentationWorkerPool:
+    """Dispatches segmentation batches to worker processes."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        job_fn: Callable[..., dict] = _run_batch,
+        mp_context: str = "spawn",
+    ):
+        self.workers = workers or default_worker_count()
+        self._job_fn = job_fn
+        self._mp_context = mp_context
+        cpu_count = os.cpu_count() or 1
+        self._threads_per_worker = max(1, cpu_count // self.workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.RLock()  # done-callbacks may fire inside dispatch
+        self._pending: deque[_Batch] = deque()
+        self._in_flight = 0
+        self._closed = False
+
+        self._jobs_submitted = 0
+        self._jobs_completed = 0
+        self._jobs_failed = 0
+        self._jobs_merged = 0
+        self._batches_dispatched = 0
+        self._backbone_cache_hits = 0
+        self._latencies_ms: deque[int] = deque(maxlen=LATENCY_WINDOW)
+        self._queue_waits_ms: deque[int] = deque(maxlen=LATENCY_WINDOW)
+        self._devices: dict[int, str] = {}
+        self._last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        image_bytes: bytes,
+        labels: list[str],
+        guide_boxes: Optional[dict] = None,
+        scene_id: str = "unknown",
+    ) -> Future:
+        """Queue a job; the future resolves to {"zones": [...], ...timings}."""
+        job = _Job(labels=list(labels), scene_id=scene_id, future=Future())
+        key = hashlib.sha256(image_bytes).hexdigest()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Segmentation worker pool is shut down")
+            self._jobs_submitted += 1
+            batch = next((b for b in self._pending if b.key == key and b.accepts(guide_boxes)), None)
+            if batch is not None:
+                batch.add(job, guide_boxes)
+                self._jobs_merged += 1
+                logger.info(f"[SAM3:pool] {scene_id}: merged into queued batch for image {key[:12]} "
+                            f"({len(batch.jobs)} jobs, {len(batch.labels)} labels)")
+            else:
+                self._pending.append(_Batch(
+                    key=key,
+                    image_bytes=image_bytes,
+                    guide_boxes=dict(guide_boxes) if guide_boxes is not None else None,
+                    labels=list(dict.fromkeys(labels)),
+                    jobs=[job],
+                ))
+            self._dispatch_locked()
+        return job.future
+
+    async def segment(
+        self,
+        image_bytes: bytes,
+        labels: list[str],
+        guide_boxes: Optional[dict] = None,
+        scene_id: str = "unknown",
+    ) -> dict:
+        """Async wrapper around submit()."""
+        return await asyncio.wrap_future(self.submit(image_bytes, labels, guide_boxes, scene_id))
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            waits = list(self._queue_waits_ms)
+            return {
+                "workers": self.workers,
+                "devices": sorted(set(self._devices.values())),
+                "queue_depth": sum(len(b.jobs) for b in self._pending),
+                "queued_batches": len(self._pending),
+                "in_flight_batches": self._in_flight,
+                "jobs_submitted": self._jobs_submitted,
+                "jobs_completed": self._jobs_completed,
+                "jobs_failed": self._jobs_failed,
+                "jobs_merged": self._jobs_merged,
+                "batches_dispatched": self._batches_dispatched,
+                "backbone_cache_hits": self._backbone_cache_hits,
+                "job_latency_ms": {
+                    "last": self._latencies_ms[-1] if self._latencies_ms else None,
+                    "avg": int(sum(latencies) / len(latencies)) if latencies else None,
+                    "p50": latencies[len(latencies) // 2] if latencies else None,
+                    "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+                },
+                "avg_queue_wait_ms": int(sum(waits) / len(waits)) if waits else None,
+                "last_error": self._last_error,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+            pending, self._pending = list(self._pending), deque()
+            executor, self._executor = self._executor, None
+        for batch in pending:
+            for job in batch.jobs:
+                job.future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _ensure_executor_locked(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self._mp_context),
+                initializer=_worker_init,
+                initargs=(self._threads_per_worker,),
+            )
+            logger.info(f"[SAM3:pool] Started {self.workers} worker(s), "
+                        f"{self._threads_per_worker} thread(s) each")
+        return self._executor
+
+    def _dispatch_locked(self) -> None:
+        """Hand queued batches to free workers (caller holds the lock)."""
+        while self._pending and self._in_flight < self.workers and not self._closed:
+            batch = self._pending.popleft()
+            batch.started_at = time.time()
+            try:
+                future = self._ensure_executor_locked().submit(
+                    self._job_fn, batch.image_bytes, batch.labels, batch.guide_boxes, batch.jobs[0].scene_id
+                )
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._executor = None
+                self._fail_batch_locked(batch, e)
+                continue
+            self._in_flight += 1
+            self._batches_dispatched += 1
+            future.add_done_callback(lambda f, b=batch: self._on_batch_done(b, f))
+
+    def _on_batch_done(self, batch: _Batch, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            try:
+                result = future.result()
+            except BaseException as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._executor = None  # Recreated on next dispatch
+                self._fail_batch_locked(batch, e)
+            else:
+                self._complete_batch_locked(batch, result)
+            self._dispatch_locked()
+
+    def _complete_batch_locked(self, batch: _Batch, result: dict) -> None:
+        now = time.time()
+        if result.get("pid") is not None:
+            self._devices[result["pid"]] = result.get("device")
+        if result.get("backbone_cached"):
+            self._backbone_cache_hits += 1
+        if result.get("error"):
+            self._last_error = result["error"]
+        zones = result.get("zones") or []
+        shared = len(batch.jobs) > 1
+        for job in batch.jobs:
+            wanted = set(job.labels)
+            job_zones = [z for z in zones if z.get("label") in wanted]
+            job_result = {**result, "zones": copy.deepcopy(job_zones) if shared else job_zones,
+                          "batch_jobs": len(batch.jobs)}
+            self._jobs_completed += 1
+            self._latencies_ms.append(int((now - job.submitted_at) * 1000))
+            self._queue_waits_ms.append(int((batch.started_at - job.submitted_at) * 1000))
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_result(job_result)
+
+    def _fail_batch_locked(self, batch: _Batch, error: BaseException) -> None:
+        self._last_error = f"{type(error).__name__}: {error}"
+        logger.error(f"[SAM3:pool] Batch for image {batch.key[:12]} failed: {self._last_error}")
+        for job in batch.jobs:
+            self._jobs_failed += 1
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(error)
+
+
+# Singleton instance
+_pool: Optional[SegmentationWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_segmentation_pool() -> Optional[SegmentationWorkerPool]:
+    """Get the process-wide pool (None when SAM3_WORKER_POOL_ENABLED=false)."""
+    global _pool
+    if os.getenv("SAM3_WORKER_POOL_ENABLED", "true").lower() != "true":
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SegmentationWorkerPool()
+    return _pool
+
+
+def peek_segmentation_pool() -> Optional[SegmentationWorkerPool]:
+    """Return the pool if it has been started, without starting it."""
+    return _pool
+
+
+def shutdown_segmentation_pool() -> None:
+    """Stop worker processes (called on app shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
@@ -0,0 +1,166 @@
+"""
+CLIP Embedding Helpers.
+
+Batched encoding shared by CLIPZoneLabeler and CLIPAnnotationFilter. Both
+used to run a full CLIP forward pass (image + every prompt) per crop; here:
+
+- Image crops are encoded in batches, one forward pass per batch
+- Prompt texts are encoded once per model and kept in an LRU cache, so a
+  label set is embedded once no matter how many crops or images use it
+- Crop x prompt probabilities come from one matmul + softmax over the
+  normalised embeddings, the same values as CLIPModel's logits_per_image
+
+Environment Variables:
+    CLIP_BATCH_SIZE: Crops per image forward pass (default: 32)
+    CLIP_TEXT_CACHE_SIZE: Prompt embeddings kept in memory (default: 4096)
+
+Usage:
+    texts = get_text_embedding_cache().get_many(model_name, prompts, encode_fn)
+    images = encode_images(model, processor, device, crops)
+    probs = similarity_probabilities(images, texts, logit_scale(model))
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("gamed_ai.services.clip_embeddings")
+
+
+def clip_batch_size() -> int:
+    """Crops per image forward pass."""
+    return max(1, int(os.getenv("CLIP_BATCH_SIZE", "32")))
+
+
+class TextEmbeddingCache:
+    """Thread-safe LRU of normalised prompt embeddings keyed by (model, text)."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("CLIP_TEXT_CACHE_SIZE", "4096"))
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(
+        self,
+        model_name: str,
+        texts: Sequence[str],
+        encode: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Embeddings for texts, in order, as an (N, D) array.
+
+        Texts not cached are encoded together with a single encode() call.
+        """
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text in texts:
+                entry = self._entries.get((model_name, text))
+                if entry is not None:
+                    self._entries.move_to_end((model_name, text))
+                    found[text] = entry
+            missing = list(dict.fromkeys(t for t in texts if t not in found))
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            encoded = np.asarray(encode(missing), dtype=np.float32)
+            with self._lock:
+                for text, embedding in zip(missing, encoded):
+                    found[text] = embedding
+                    self._entries[(model_name, text)] = embedding
+                    self._entries.move_to_end((model_name, text))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return np.stack([found[t] for t in texts]) if texts else np.zeros((0, 0), dtype=np.float32)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def encode_texts(model, processor, device: str, texts: List[str]) -> np.ndarray:
+    """Normalised CLIP text embeddings, one forward pass."""
+    import torch
+
+    inputs = processor(text=texts, return_tensors="pt", padding=True)
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+    with torch.no_grad():
+        features = model.get_text_features(**inputs)
+        features = features / features.norm(dim=-1, keepdim=True)
+    return features.cpu().numpy()
+
+
+def encode_images(
+    model,
+    processor,
+    device: str,
+    images: Sequence[Any],
+    batch_size: Optional[int] = None,
+) -> np.ndarray:
+    """Normalised CLIP image embeddings, batch_size images per forward pass."""
+    import torch
+
+    if not images:
+        return np.zeros((0, 0), dtype=np.float32)
+    batch_size = batch_size or clip_batch_size()
+    chunks = []
+    for start in range(0, len(images), batch_size):
+        inputs = processor(images=list(images[start:start + batch_size]), return_tensors="pt")
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+        with torch.no_grad():
+            features = model.get_image_features(**inputs)
+            features = features / features.norm(dim=-1, keepdim=True)
+        chunks.append(features.cpu().numpy())
+    return np.concatenate(chunks)
+
+
+def logit_scale(model) -> float:
+    """CLIP's learned temperature (exp of logit_scale)."""
+    return float(model.logit_scale.exp().item())
+
+
+def similarity_probabilities(
+    image_embeddings: np.ndarray,
+    text_embeddings: np.ndarray,
+    scale: float,
+) -> np.ndarray:
+    """(images, texts) softmax over texts of scale * cosine similarity."""
+    if len(image_embeddings) == 0:
+        return np.zeros((0, len(text_embeddings)), dtype=np.float64)
+    logits = scale * (np.asarray(image_embeddings, dtype=np.float64) @ np.asarray(text_embeddings, dtype=np.float64).T)
+    logits -= logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+# Singleton instance
+_text_cache: Optional[TextEmbeddingCache] = None
+_text_cache_lock = threading.Lock()
+
+
+def get_text_embedding_cache() -> TextEmbeddingCache:
+    """Get or create the shared prompt embedding cache."""
+    global _text_cache
+    if _text_cache is None:
+        with _text_cache_lock:
+            if _text_cache is None:
+                _text_cache = TextEmbeddingCache()
+    return _text_cache
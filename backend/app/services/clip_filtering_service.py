@@ -7,6 +7,9 @@ diagram content (anatomical structures, scientific diagrams, etc.).
 
 This helps filter out false positives from Hough line detection by checking
 if a detected line region looks like an annotation vs. diagram structure.
+
+Regions are classified in batches: crops go through CLIP together and the
+annotation/content prompts are embedded once (see clip_embeddings.py).
 """
 
 import logging
@@ -16,8 +19,28 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from app.services.clip_embeddings import (
+    encode_images,
+    encode_texts,
+    get_text_embedding_cache,
+    logit_scale,
+    similarity_probabilities,
+)
+
 logger = logging.getLogger("gamed_ai.services.clip_filtering")
 
+DEFAULT_ANNOTATION_LABELS = [
+    "annotation label text pointer line arrow",
+    "text label with line pointing to diagram",
+    "educational annotation marker"
+]
+
+DEFAULT_CONTENT_LABELS = [
+    "anatomical diagram organ tissue structure",
+    "scientific diagram showing structure",
+    "biological or scientific illustration"
+]
+
 
 class CLIPAnnotationFilter:
     """
@@ -104,78 +127,84 @@ class CLIPAnnotationFilter:
         Returns:
             Dict with 'annotation_score', 'content_score', 'is_annotation' (bool)
         """
-        from PIL import Image
+        return self.classify_regions(image, [crop_bbox], annotation_labels, content_labels)[0]
+
+    def classify_regions(
+        self,
+        image,
+        crop_bboxes: List[Tuple[int, int, int, int]],
+        annotation_labels: List[str] = None,
+        content_labels: List[str] = None
+    ) -> List[Dict[str, float]]:
+        """
+        Classify many cropped regions with batched CLIP passes.
+
+        Same result per region as classify_region; crops are encoded in
+        batches and the label prompts only once.
+
+        Args:
+            image: PIL Image
+            crop_bboxes: (x1, y1, x2, y2) bounding boxes to crop
+            annotation_labels: Labels describing annotations
+            content_labels: Labels describing diagram content
 
+        Returns:
+            One score dict per bbox, in order
+        """
         self._ensure_loaded()
 
-        # Default labels
         if annotation_labels is None:
-            annotation_labels = [
-                "annotation label text pointer line arrow",
-                "text label with line pointing to diagram",
-                "educational annotation marker"
-            ]
-
+            annotation_labels = DEFAULT_ANNOTATION_LABELS
         if content_labels is None:
-            content_labels = [
-                "anatomical diagram organ tissue structure",
-                "scientific diagram showing structure",
-                "biological or scientific illustration"
-            ]
-
-        # Crop the region
-        x1, y1, x2, y2 = crop_bbox
-        # Ensure valid bounds
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(image.width, x2)
-        y2 = min(image.height, y2)
-
-        if x2 <= x1 or y2 <= y1:
-            return {"annotation_score": 0.0, "content_score": 1.0, "is_annotation": False}
-
-        crop = image.crop((x1, y1, x2, y2))
-
-        # Ensure minimum size for CLIP
-        if crop.width < 10 or crop.height < 10:
-            # Too small to classify meaningfully
-            return {"annotation_score": 0.5, "content_score": 0.5, "is_annotation": False}
-
-        # Prepare inputs for CLIP
-        all_labels = annotation_labels + content_labels
-        inputs = self._processor(
-            text=all_labels,
-            images=crop,
-            return_tensors="pt",
-            padding=True
-        )
+            content_labels = DEFAULT_CONTENT_LABELS
 
-        # Move to device
-        inputs = {k: v.to(self._device) for k, v in inputs.items()}
+        results: List[Optional[Dict[str, float]]] = []
+        crops, crop_indices = [], []
+        for crop_bbox in crop_bboxes:
+            # Crop the region, clamped to the image
+            x1, y1, x2, y2 = crop_bbox
+            x1 = max(0, x1)
+            y1 = max(0, y1)
+            x2 = min(image.width, x2)
+            y2 = min(image.height, y2)
 
-        # Get similarities
-        import torch
-        with torch.no_grad():
-            outputs = self._model(**inputs)
-            logits = outputs.logits_per_image
-            probs = logits.softmax(dim=1)[0].cpu().numpy()
+            if x2 <= x1 or y2 <= y1:
+                results.append({"annotation_score": 0.0, "content_score": 1.0, "is_annotation": False})
+                continue
 
-        # Calculate aggregate scores
-        num_annotation = len(annotation_labels)
-        annotation_score = float(probs[:num_annotation].sum())
-        content_score = float(probs[num_annotation:].sum())
+            crop = image.crop((x1, y1, x2, y2))
+
+            # Ensure minimum size for CLIP
+            if crop.width < 10 or crop.height < 10:
+                # Too small to classify meaningfully
+                results.append({"annotation_score": 0.5, "content_score": 0.5, "is_annotation": False})
+                continue
+
+            crop_indices.append(len(results))
+            crops.append(crop)
+            results.append(None)
+
+        if not crops:
+            return results
 
-        # Normalize
-        total = annotation_score + content_score
-        if total > 0:
-            annotation_score /= total
-            content_score /= total
+        probs = self._label_probabilities(crops, annotation_labels + content_labels)
 
-        return {
-            "annotation_score": annotation_score,
-            "content_score": content_score,
-            "is_annotation": annotation_score > 0.5
-        }
+        # Aggregate and normalise scores per crop
+        num_annotation = len(annotation_labels)
+        annotation_scores = probs[:, :num_annotation].sum(axis=1)
+        content_scores = probs[:, num_annotation:].sum(axis=1)
+        totals = annotation_scores + content_scores
+        safe = np.where(totals > 0, totals, 1.0)
+        annotation_scores = np.where(totals > 0, annotation_scores / safe, annotation_scores)
+        content_scores = np.where(totals > 0, content_scores / safe, content_scores)
+
+        for index, annotation_score, content_score in zip(crop_indices, annotation_scores, content_scores):
+            results[index] = {
+                "annotation_score": float(annotation_score),
+                "content_score": float(content_score),
+                "is_annotation": bool(annotation_score > 0.5)
+            }
+        return results
 
     def is_annotation(
         self,
@@ -197,6 +226,16 @@ class CLIPAnnotationFilter:
         result = self.classify_region(image, crop_bbox)
         return result["annotation_score"]
 
+    def _label_probabilities(self, crops: List[Any], texts: List[str]) -> np.ndarray:
+        """(crops, texts) probabilities, equal to CLIP's per-image softmax."""
+        text_embeddings = get_text_embedding_cache().get_many(
+            self.model_name,
+            texts,
+            lambda missing: encode_texts(self._model, self._processor, self._device, missing),
+        )
+        image_embeddings = encode_images(self._model, self._processor, self._device, crops)
+        return similarity_probabilities(image_embeddings, text_embeddings, logit_scale(self._model))
+
     def filter_hough_lines(
         self,
         image_path: str,
@@ -227,18 +266,20 @@ class CLIPAnnotationFilter:
 
         logger.info(f"CLIP filtering {len(lines)} lines with threshold {threshold}")
 
-        for i, line in enumerate(lines):
+        # Bounding box around each line with padding
+        bboxes = []
+        for line in lines:
             x1, y1, x2, y2 = line[0]
-
-            # Create bounding box around line with padding
-            bbox = (
+            bboxes.append((
                 min(x1, x2) - padding,
                 min(y1, y2) - padding,
                 max(x1, x2) + padding,
                 max(y1, y2) + padding
-            )
+            ))
+        results = self.classify_regions(image, bboxes)
 
-            score = self.is_annotation(image, bbox, threshold)
+        for i, (line, result) in enumerate(zip(lines, results)):
+            score = result["annotation_score"]
 
             if score > threshold:
                 filtered.append(line)
@@ -280,6 +321,7 @@ class CLIPAnnotationFilter:
         image = Image.open(image_path)
         filtered = []
 
+        bboxes = []
         for region in text_regions:
             bbox_dict = region.get("bbox", {})
             x = bbox_dict.get("x", 0)
@@ -287,16 +329,15 @@ class CLIPAnnotationFilter:
             w = bbox_dict.get("width", 0)
             h = bbox_dict.get("height", 0)
 
-            bbox = (
+            bboxes.append((
                 x - padding,
                 y - padding,
                 x + w + padding,
                 y + h + padding
-            )
+            ))
 
-            score = self.is_annotation(image, bbox, threshold)
-
-            if score > threshold:
+        for region, result in zip(text_regions, self.classify_regions(image, bboxes)):
+            if result["annotation_score"] > threshold:
                 filtered.append(region)
 
         logger.info(f"CLIP text filter: {len(text_regions)} -> {len(filtered)} regions")
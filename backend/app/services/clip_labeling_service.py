@@ -10,6 +10,10 @@ The approach:
 2. Use CLIP to compute similarity between the crop and each canonical label
 3. Assign the most similar label to each zone
 4. Handle conflicts using confidence scores and spatial reasoning
+
+Crops are encoded in batches and prompt embeddings are cached per label
+set (see clip_embeddings.py); the zone x label matrix is one matmul and
+labels are assigned with an optimal one-to-one matching.
 """
 
 import logging
@@ -19,6 +23,15 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from app.services.clip_embeddings import (
+    encode_images,
+    encode_texts,
+    get_text_embedding_cache,
+    logit_scale,
+    similarity_probabilities,
+)
+from app.utils.assignment import max_weight_assignment
+
 logger = logging.getLogger("gamed_ai.services.clip_labeling")
 
 
@@ -104,29 +117,11 @@ class CLIPZoneLabeler:
                 - confidence: Confidence score (0-1)
                 - all_scores: Dict of all label scores
         """
-        import torch
-
         self._ensure_loaded()
 
         # Enhance labels with context for better matching
         enhanced_labels = [f"{context_prefix} {label}" for label in canonical_labels]
-
-        # Prepare inputs
-        inputs = self._processor(
-            text=enhanced_labels,
-            images=zone_crop,
-            return_tensors="pt",
-            padding=True
-        )
-
-        # Move to device
-        inputs = {k: v.to(self._device) for k, v in inputs.items()}
-
-        # Get similarities
-        with torch.no_grad():
-            outputs = self._model(**inputs)
-            logits = outputs.logits_per_image
-            probs = logits.softmax(dim=1)[0].cpu().numpy()
+        probs = self._label_probabilities([zone_crop], enhanced_labels)[0]
 
         # Find best match
         best_idx = int(np.argmax(probs))
@@ -151,10 +146,10 @@ class CLIPZoneLabeler:
         """
         Label all zones using CLIP, ensuring unique label assignment.
 
-        Uses a greedy assignment strategy:
-        1. For each zone, compute similarity to all labels
-        2. Assign highest-confidence matches first
-        3. Remove assigned labels from consideration
+        1. Encode all zone crops in batches and the label prompts once
+        2. Compute the zone x label probability matrix in one matmul
+        3. Solve a one-to-one assignment maximising total confidence;
+           matches below min_confidence are left unassigned
 
         Args:
             image: PIL Image
@@ -166,8 +161,6 @@ class CLIPZoneLabeler:
         Returns:
             Zones with added 'label' and 'label_confidence' fields
         """
-        from PIL import Image
-
         self._ensure_loaded()
 
         if not zones:
@@ -179,58 +172,30 @@ class CLIPZoneLabeler:
 
         logger.info(f"Labeling {len(zones)} zones with {len(canonical_labels)} canonical labels")
 
-        # Compute all scores
-        zone_scores = []
+        # Crop every zone; very small crops get no scores
+        crops, crop_indices = [], []
         for i, zone in enumerate(zones):
             bbox = zone["bbox"]
-
-            # Crop zone from image
             crop = image.crop((
                 bbox["x"],
                 bbox["y"],
                 bbox["x"] + bbox["width"],
                 bbox["y"] + bbox["height"]
             ))
-
-            # Skip very small crops
             if crop.width < 10 or crop.height < 10:
-                zone_scores.append({"zone_idx": i, "scores": {}})
                 continue
+            crops.append(crop)
+            crop_indices.append(i)
 
-            # Get scores for this zone
-            result = self.label_zone(crop, canonical_labels, context_prefix)
-            zone_scores.append({
-                "zone_idx": i,
-                "scores": result["all_scores"]
-            })
+        enhanced_labels = [f"{context_prefix} {label}" for label in canonical_labels]
+        scores = np.full((len(zones), len(canonical_labels)), -np.inf)
+        if crops:
+            scores[crop_indices] = self._label_probabilities(crops, enhanced_labels)
 
-        # Greedy assignment: assign highest confidence matches first
         labeled_zones = [zone.copy() for zone in zones]
-        assigned_labels = set()
-
-        # Create list of (zone_idx, label, score) tuples
-        all_assignments = []
-        for zs in zone_scores:
-            for label, score in zs["scores"].items():
-                all_assignments.append((zs["zone_idx"], label, score))
-
-        # Sort by score descending
-        all_assignments.sort(key=lambda x: x[2], reverse=True)
-
-        # Assign greedily
-        assigned_zones = set()
-        for zone_idx, label, score in all_assignments:
-            if zone_idx in assigned_zones:
-                continue
-            if label in assigned_labels:
-                continue
-            if score < min_confidence:
-                continue
-
-            labeled_zones[zone_idx]["label"] = label
-            labeled_zones[zone_idx]["label_confidence"] = score
-            assigned_labels.add(label)
-            assigned_zones.add(zone_idx)
+        for zone_idx, label_idx in max_weight_assignment(scores, min_weight=min_confidence):
+            labeled_zones[zone_idx]["label"] = canonical_labels[label_idx]
+            labeled_zones[zone_idx]["label_confidence"] = float(scores[zone_idx, label_idx])
 
         # Handle unassigned zones
         for i, zone in enumerate(labeled_zones):
@@ -287,8 +252,8 @@ class CLIPZoneLabeler:
         """
         Compute CLIP embeddings for a list of labels.
 
-        Useful for caching embeddings when labeling multiple images
-        with the same set of labels.
+        Embeddings come from the shared prompt cache, so repeated label
+        sets are only encoded once per model.
 
         Args:
             labels: List of label strings
@@ -297,25 +262,10 @@ class CLIPZoneLabeler:
         Returns:
             Numpy array of shape (num_labels, embedding_dim)
         """
-        import torch
-
         self._ensure_loaded()
 
         enhanced = [f"{context_prefix} {label}" for label in labels]
-
-        inputs = self._processor(
-            text=enhanced,
-            return_tensors="pt",
-            padding=True
-        )
-
-        inputs = {k: v.to(self._device) for k, v in inputs.items()}
-
-        with torch.no_grad():
-            text_features = self._model.get_text_features(**inputs)
-            text_features = text_features / text_features.norm(dim=-1, keepdim=True)
-
-        return text_features.cpu().numpy()
+        return self._text_embeddings(enhanced)
 
     def get_image_embedding(self, image) -> np.ndarray:
         """
@@ -327,18 +277,21 @@ class CLIPZoneLabeler:
         Returns:
             Numpy array of shape (embedding_dim,)
         """
-        import torch
-
         self._ensure_loaded()
+        return encode_images(self._model, self._processor, self._device, [image])[0]
+
+    def _text_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Prompt embeddings from the shared cache, encoding any misses in one pass."""
+        return get_text_embedding_cache().get_many(
+            self.model_name,
+            texts,
+            lambda missing: encode_texts(self._model, self._processor, self._device, missing),
+        )
 
-        inputs = self._processor(images=image, return_tensors="pt")
-        inputs = {k: v.to(self._device) for k, v in inputs.items()}
-
-        with torch.no_grad():
-            image_features = self._model.get_image_features(**inputs)
-            image_features = image_features / image_features.norm(dim=-1, keepdim=True)
-
-        return image_features.cpu().numpy()[0]
+    def _label_probabilities(self, crops: List[Any], texts: List[str]) -> np.ndarray:
+        """(crops, texts) probabilities, equal to CLIP's per-image softmax."""
+        image_embeddings = encode_images(self._model, self._processor, self._device, crops)
+        return similarity_probabilities(image_embeddings, self._text_embeddings(texts), logit_scale(self._model))
 
 
 # Singleton instance
@@ -217,14 +217,12 @@ class GeminiService:
             f"Duration: {metrics.duration_ms}ms | Cost: ${metrics.estimated_cost_usd:.4f}"
         )
 
-    def _load_image(self, image_path: str) -> "Image.Image":
-        """Load image from path or URL."""
+    async def _load_image(self, image_path: str) -> "Image.Image":
+        """Load image from path or URL (URLs via the shared downloader)."""
         if image_path.startswith("http://") or image_path.startswith("https://"):
-            import io
-            import urllib.request
-            req = urllib.request.Request(image_path, headers={"User-Agent": "Mozilla/5.0"})
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                return Image.open(io.BytesIO(resp.read()))
+            from app.services.http_downloader import get_downloader
+            data = await get_downloader().get_bytes(image_path)
+            return Image.open(io.BytesIO(data))
         return Image.open(image_path)
 
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
@@ -296,7 +294,7 @@ class GeminiService:
             client = self._get_client()
             from google.genai import types
 
-            img = self._load_image(image_path)
+            img = await self._load_image(image_path)
 
             start_time = time.time()
 
@@ -593,7 +591,7 @@ Return ONLY valid JSON, no markdown code blocks or explanation."""
             client = self._get_client()
             from google.genai import types
 
-            img = self._load_image(image_path)
+            img = await self._load_image(image_path)
 
             start_time = time.time()
 
@@ -0,0 +1,424 @@
+"""
+Shared HTTP Downloader for Reference Images
+
+One connection-pooled client for image downloads instead of a fresh
+httpx.AsyncClient (or blocking urllib call) per download:
+
+- Pooling: one httpx.AsyncClient per event loop with keep-alive and HTTP/2
+  (when the h2 package is installed), bounded total connections
+- Per-host limits: at most DOWNLOAD_PER_HOST_LIMIT concurrent requests to
+  one host, so a scene's fan-out doesn't hammer a single CDN
+- Coalescing: concurrent requests for the same URL (and cache mode) share
+  one fetch
+- Disk cache: content-addressed blobs (sha256 of the bytes, so the same
+  image behind several URLs is stored once) plus a small JSON record per
+  URL. Size-bounded with LRU eviction. Stale records are revalidated with
+  If-None-Match / If-Modified-Since, and a 304 reuses the stored blob.
+  Responses marked Cache-Control: no-store are never written
+
+Environment Variables:
+    DOWNLOAD_MAX_CONNECTIONS: Pool size per event loop (default: 32)
+    DOWNLOAD_PER_HOST_LIMIT: Concurrent requests per host (default: 4)
+    DOWNLOAD_TIMEOUT_SECONDS: Request timeout (default: 30)
+    DOWNLOAD_HTTP2: "true" (default) or "false"; needs the h2 package
+    DOWNLOAD_CACHE_ENABLED: "true" (default) or "false"
+    DOWNLOAD_CACHE_DIR: Cache directory (default: pipeline_outputs/cache/downloads)
+    DOWNLOAD_CACHE_MB: Disk budget for cached blobs (default: 1024)
+    DOWNLOAD_CACHE_TTL_SECONDS: Freshness when the server sends no max-age (default: 86400)
+
+Usage:
+    downloader = get_downloader()
+    result = await downloader.fetch(url)          # DownloadResult
+    data = await downloader.get_bytes(url)        # raises httpx.HTTPError on failure
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("gamed_ai.services.http_downloader")
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / "pipeline_outputs" / "cache" / "downloads"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "image/*,*/*;q=0.8",
+}
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class DownloadResult:
+    """Downloaded body plus what callers check about it."""
+    url: str
+    content: bytes
+    content_type: str = ""
+    status_code: int = 200
+    from_cache: bool = False
+
+
+@dataclass
+class _CacheRecord:
+    """Per-URL record pointing at a content-addressed blob."""
+    url: str
+    digest: str
+    content_type: str
+    fetched_at: float
+    max_age: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.fetched_at < self.max_age
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _is_no_store(headers: httpx.Headers) -> bool:
+    return "no-store" in headers.get("cache-control", "").lower()
+
+
+def _response_max_age(headers: httpx.Headers, default: float) -> float:
+    """Freshness lifetime from Cache-Control; no-cache means revalidate."""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else default
+
+
+class DownloadCache:
+    """
+    Content-addressed, size-bounded disk cache for downloaded bodies.
+
+    Layout: blobs/<sha256 of content> and urls/<sha256 of url>.json. Blob
+    mtimes track recency; when the blobs exceed the budget the least
+    recently used are deleted along with the URL records pointing at them.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+    ):
+        self.cache_dir = Path(cache_dir or os.getenv("DOWNLOAD_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("DOWNLOAD_CACHE_MB", "1024")) * 1024 * 1024
+        self.default_ttl = default_ttl if default_ttl is not None else float(os.getenv("DOWNLOAD_CACHE_TTL_SECONDS", "86400"))
+        self._blob_dir = self.cache_dir / "blobs"
+        self._url_dir = self.cache_dir / "urls"
+        self._blob_dir.mkdir(parents=True, exist_ok=True)
+        self._url_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def lookup(self, url: str) -> Optional[tuple]:
+        """(record, content) for a cached URL, or None."""
+        record_path = self._record_path(url)
+        try:
+            record = _CacheRecord(**json.loads(record_path.read_text()))
+            blob_path = self._blob_dir / record.digest
+            content = blob_path.read_bytes()
+        except (OSError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(blob_path)  # LRU order for eviction
+        except OSError:
+            pass
+        return record, content
+
+    def store(self, url: str, content: bytes, response: httpx.Response) -> Optional[_CacheRecord]:
+        """
+        Write the body (once per distinct content) and the URL record.
+
+        Cache-Control: no-store responses are not written, and any earlier
+        record for the URL is dropped; returns None for those.
+        """
+        if _is_no_store(response.headers):
+            self._record_path(url).unlink(missing_ok=True)
+            return None
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_dir / digest
+        if not blob_path.exists():
+            self._atomic_write(blob_path, content)
+        else:
+            os.utime(blob_path)
+        record = _CacheRecord(
+            url=url,
+            digest=digest,
+            content_type=response.headers.get("content-type", ""),
+            fetched_at=time.time(),
+            max_age=_response_max_age(response.headers, self.default_ttl),
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+        self._write_record(record)
+        self._enforce_budget()
+        return record
+
+    def refresh(self, record: _CacheRecord, response: httpx.Response) -> _CacheRecord:
+        """Mark a record fresh again after a 304 Not Modified."""
+        record.fetched_at = time.time()
+        record.max_age = _response_max_age(response.headers, self.default_ttl)
+        record.etag = response.headers.get("etag", record.etag)
+        record.last_modified = response.headers.get("last-modified", record.last_modified)
+        self._write_record(record)
+        return record
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self._blob_dir.iterdir() if not p.name.startswith("."))
+
+    def clear(self) -> None:
+        with self._lock:
+            for directory in (self._blob_dir, self._url_dir):
+                for path in directory.iterdir():
+                    path.unlink(missing_ok=True)
+
+    def _record_path(self, url: str) -> Path:
+        return self._url_dir / f"{_url_key(url)}.json"
+
+    def _write_record(self, record: _CacheRecord) -> None:
+        self._atomic_write(self._record_path(record.url), json.dumps(record.__dict__).encode())
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _enforce_budget(self) -> None:
+        with self._lock:
+            blobs = []
+            for path in self._blob_dir.iterdir():
+                if path.name.startswith("."):
+                    continue  # write in progress
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in blobs)
+            if total <= self.max_bytes:
+                return
+            evicted = set()
+            for _, size, path in sorted(blobs, key=lambda b: b[0]):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                evicted.add(path.name)
+                total -= size
+                logger.debug(f"Evicted cached download {path.name[:12]} ({size} bytes)")
+            self._drop_records(evicted)
+
+    def _drop_records(self, digests: set) -> None:
+        """Delete the URL records pointing at evicted blobs."""
+        for record_path in self._url_dir.glob("*.json"):
+            try:
+                digest = json.loads(record_path.read_text()).get("digest")
+            except (OSError, ValueError):
+                digest = None
+            if digest is None or digest in digests:
+                record_path.unlink(missing_ok=True)
+
+
+@dataclass
+class _LoopState:
+    """Client and coordination primitives bound to one event loop."""
+    client: httpx.AsyncClient
+    host_limits: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    inflight: Dict[Tuple[str, bool], asyncio.Future] = field(default_factory=dict)
+
+
+class HttpDownloader:
+    """Pooled, coalescing, cache-backed downloader (see module docstring)."""
+
+    def __init__(self, cache: Optional[DownloadCache] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cache = cache
+        self.per_host_limit = max(1, int(os.getenv("DOWNLOAD_PER_HOST_LIMIT", "4")))
+        self.max_connections = max(1, int(os.getenv("DOWNLOAD_MAX_CONNECTIONS", "32")))
+        self.timeout = float(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "30"))
+        self.http2 = (
+            os.getenv("DOWNLOAD_HTTP2", "true").lower() == "true"
+            and importlib.util.find_spec("h2") is not None
+        )
+        self._transport = transport
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "network_fetches": 0,
+            "cache_hits": 0,
+            "revalidated": 0,
+            "coalesced": 0,
+            "bytes_downloaded": 0,
+        }
+
+    def _state(self) -> _LoopState:
+        """Per-loop client: httpx clients and asyncio primitives can't cross loops."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is None or state.client.is_closed:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    http2=self.http2,
+                    headers=DEFAULT_HEADERS,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                    transport=self._transport,
+                )
+                state = _LoopState(client=client)
+                self._loops[loop] = state
+            return state
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    async def fetch(self, url: str, use_cache: bool = True, timeout: Optional[float] = None) -> DownloadResult:
+        """
+        Download url, sharing the fetch with concurrent callers of the same URL.
+
+        Only callers with the same use_cache coalesce, so a use_cache=False
+        caller always gets a fresh network response.
+
+        Raises httpx.HTTPError (including HTTPStatusError for 4xx/5xx).
+        """
+        self._count("requests")
+        state = self._state()
+        key = (url, use_cache)
+        pending = state.inflight.get(key)
+        if pending is not None:
+            self._count("coalesced")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller that started the fetch was cancelled; fetch ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        state.inflight[key] = future
+        try:
+            result = await self._fetch(state, url, use_cache, timeout)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a fetch nobody else awaited doesn't warn
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if state.inflight.get(key) is future:
+                del state.inflight[key]
+
+    async def get_bytes(self, url: str, use_cache: bool = True, timeout: Optional[float] = None) -> bytes:
+        """Body of url; raises httpx.HTTPError on failure."""
+        return (await self.fetch(url, use_cache=use_cache, timeout=timeout)).content
+
+    async def _fetch(
+        self,
+        state: _LoopState,
+        url: str,
+        use_cache: bool,
+        timeout: Optional[float],
+    ) -> DownloadResult:
+        cache = self.cache if use_cache else None
+        cached = await asyncio.to_thread(cache.lookup, url) if cache else None
+        if cached:
+            record, content = cached
+            if record.is_fresh(time.time()):
+                self._count("cache_hits")
+                return DownloadResult(url, content, record.content_type, from_cache=True)
+
+        headers = cached[0].validators() if cached else {}
+        host = urlsplit(url).netloc
+        limit = state.host_limits.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        async with limit:
+            self._count("network_fetches")
+            response = await state.client.get(url, headers=headers, timeout=timeout or self.timeout)
+
+        if cached and response.status_code == 304:
+            record, content = cached
+            await asyncio.to_thread(cache.refresh, record, response)
+            self._count("revalidated")
+            return DownloadResult(url, content, record.content_type, status_code=304, from_cache=True)
+
+        response.raise_for_status()
+        content = response.content
+        self._count("bytes_downloaded", len(content))
+        if cache and content:
+            await asyncio.to_thread(cache.store, url, content, response)
+        return DownloadResult(url, content, response.headers.get("content-type", ""), response.status_code)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["http2"] = self.http2
+        stats["cache_enabled"] = self.cache is not None
+        return stats
+
+    async def aclose(self) -> None:
+        """Close the client bound to the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.pop(loop, None)
+        if state is not None:
+            await state.client.aclose()
+
+
+# Singleton instance
+_downloader: Optional[HttpDownloader] = None
+_downloader_lock = threading.Lock()
+
+
+def get_downloader() -> HttpDownloader:
+    """Get or create the shared downloader."""
+    global _downloader
+    if _downloader is None:
+        with _downloader_lock:
+            if _downloader is None:
+                cache = None
+                if os.getenv("DOWNLOAD_CACHE_ENABLED", "true").lower() == "true":
+                    try:
+                        cache = DownloadCache()
+                    except OSError as e:
+                        logger.warning(f"Download cache disabled: {e}")
+                _downloader = HttpDownloader(cache=cache)
+    return _downloader
+
+
+async def shutdown_downloader() -> None:
+    """Close the shared client on the current loop (app shutdown)."""
+    if _downloader is not None:
+        await _downloader.aclose()
@@ -6,7 +6,8 @@ Uses a tiered approach for best results:
 2. LaMa via IOPaint (good quality, fast)
 3. OpenCV inpainting (fallback, always available)
 
-Text detection uses EasyOCR with fallback to VLM-based detection.
+Text detection uses the shared EasyOCR engine (app/services/ocr_engine.py)
+with fallback to VLM-based detection.
 """
 
 from __future__ import annotations
@@ -19,6 +20,8 @@ from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from app.services.ocr_engine import OCRError, get_ocr_engine
+
 logger = logging.getLogger("gamed_ai.services.inpainting")
 
 # Import advanced inpainting services
@@ -42,7 +45,7 @@ class InpaintingService:
     Text detection + removal using EasyOCR + Inpaint Anything (SAM + LaMa).
 
     Workflow:
-    1. Detect text regions using EasyOCR
+    1. Detect text regions using the shared EasyOCR engine
     2. For each text region, use Inpaint Anything to remove it
     3. Return cleaned image path
 
@@ -50,11 +53,10 @@ class InpaintingService:
     - INPAINT_ANYTHING_PATH: Path to Inpaint Anything repo (default: ./third_party/Inpaint-Anything)
     - SAM_CKPT: SAM model checkpoint path
     - LAMA_CKPT: LaMa model checkpoint path
-    - EASYOCR_GPU: Whether to use GPU for EasyOCR (default: true)
+    - EASYOCR_GPU: Whether to use GPU for EasyOCR (default: false, read by the OCR engine)
     """
 
     def __init__(self):
-        self._reader = None
         self.inpaint_anything_path = Path(os.getenv(
             "INPAINT_ANYTHING_PATH",
             str(Path(__file__).parent.parent.parent / "third_party" / "Inpaint-Anything")
@@ -67,18 +69,6 @@ class InpaintingService:
             "LAMA_CKPT",
             str(Path(__file__).parent.parent.parent / "pretrained_models" / "big-lama")
         )
-        self.use_gpu = os.getenv("EASYOCR_GPU", "true").lower() == "true"
-
-    @property
-    def reader(self):
-        """Lazy load EasyOCR reader."""
-        if self._reader is None:
-            try:
-                import easyocr
-                self._reader = easyocr.Reader(['en'], gpu=self.use_gpu)
-            except ImportError:
-                raise InpaintingError("EasyOCR not installed. Run: pip install easyocr")
-        return self._reader
 
     async def detect_text_regions(self, image_path: str, min_confidence: float = 0.3) -> List[Dict[str, Any]]:
         """
@@ -94,19 +84,14 @@ class InpaintingService:
         """
         logger.info(f"InpaintingService: Detecting text in {image_path} (min_confidence={min_confidence})")
 
-        # Run in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(
-            None,
-            lambda: self.reader.readtext(image_path, detail=1)
-        )
+        # Warm reader in the OCR worker pool; results are cached per image
+        try:
+            results = await get_ocr_engine().readtext(image_path, min_confidence=min_confidence)
+        except OCRError as e:
+            raise InpaintingError(str(e))
 
         regions = []
         for bbox, text, confidence in results:
-            # Filter by confidence
-            if confidence < min_confidence:
-                continue
-                
             # bbox is [[x1,y1], [x2,y1], [x2,y2], [x1,y2]]
             x_coords = [p[0] for p in bbox]
             y_coords = [p[1] for p in bbox]
@@ -334,10 +319,10 @@ class InpaintingService:
             Path to the mask image
         """
         try:
-            from PIL import Image, ImageDraw
-            import numpy as np
+            from PIL import Image
+            from app.utils import image_ops
         except ImportError:
-            raise InpaintingError("PIL not installed. Run: pip install Pillow")
+            raise InpaintingError("PIL/OpenCV not installed. Run: pip install Pillow opencv-python")
 
         # Load image to get dimensions
         image = Image.open(image_path)
@@ -348,28 +333,13 @@ class InpaintingService:
             dilation = self._calculate_adaptive_dilation(text_regions, width, height)
             logger.info(f"Using adaptive dilation: {dilation}px for {len(text_regions)} text regions")
 
-        # Create black mask (0 = keep, 255 = inpaint)
-        mask = Image.new('L', (width, height), 0)
-        draw = ImageDraw.Draw(mask)
-
-        # Mask text regions with region-specific dilation
-        for region in text_regions:
-            bbox = region["bbox"]
-            x, y = bbox["x"], bbox["y"]
-            w, h = bbox["width"], bbox["height"]
-
-            # Calculate region-specific dilation
-            region_dilation = self._calculate_region_specific_dilation(
-                region, dilation, "text"
-            )
-
-            # Apply dilation (adaptive for better coverage)
-            x1 = max(0, x - region_dilation)
-            y1 = max(0, y - region_dilation)
-            x2 = min(width, x + w + region_dilation)
-            y2 = min(height, y + h + region_dilation)
-
-            draw.rectangle([x1, y1, x2, y2], fill=255)
+        # Black mask (0 = keep, 255 = inpaint); text regions use region-specific dilation
+        shape = (height, width)
+        text_dilations = [
+            self._calculate_region_specific_dilation(region, dilation, "text")
+            for region in text_regions
+        ]
+        mask = image_ops.boxes_to_mask(shape, text_regions, padding=text_dilations or 0)
 
         # Mask connecting lines if enabled
         line_regions = []
@@ -380,39 +350,22 @@ class InpaintingService:
                 {"bbox": {"height": dilation}}, dilation, "line"
             )
 
-            for line_region in line_regions:
-                bbox = line_region["bbox"]
-                x, y = bbox["x"], bbox["y"]
-                w, h = bbox["width"], bbox["height"]
-
-                # Check if line is near any text region (within 50 pixels)
-                is_near_text = False
-                for text_region in text_regions:
-                    tx, ty = text_region["bbox"]["x"], text_region["bbox"]["y"]
-                    tw, th = text_region["bbox"]["width"], text_region["bbox"]["height"]
-                    tx_center = tx + tw / 2
-                    ty_center = ty + th / 2
-                    line_center_x = x + w / 2
-                    line_center_y = y + h / 2
-
-                    # Check proximity (scaled by image size for consistency)
-                    proximity_threshold = max(80, min(width, height) * 0.1)
-                    dist = np.sqrt((tx_center - line_center_x)**2 + (ty_center - line_center_y)**2)
-                    if dist < proximity_threshold:
-                        is_near_text = True
-                        break
-
-                if is_near_text:
-                    # Mask the line with adaptive padding (less than text)
-                    x1 = max(0, x - line_dilation)
-                    y1 = max(0, y - line_dilation)
-                    x2 = min(width, x + w + line_dilation)
-                    y2 = min(height, y + h + line_dilation)
-                    draw.rectangle([x1, y1, x2, y2], fill=255)
+            if line_regions and text_regions:
+                # Keep lines whose centre is near any text centre (scaled by image size)
+                proximity_threshold = max(80, min(width, height) * 0.1)
+                distances = image_ops.pairwise_center_distance(
+                    image_ops.boxes_array(line_regions), image_ops.boxes_array(text_regions)
+                )
+                near_text = image_ops.select(line_regions, (distances < proximity_threshold).any(axis=1))
+
+                # Mask the lines with adaptive padding (less than text)
+                mask = image_ops.combine_masks(
+                    mask, image_ops.boxes_to_mask(shape, near_text, padding=line_dilation)
+                )
 
         # Save mask
         mask_path = str(Path(image_path).parent / f"{Path(image_path).stem}_mask.png")
-        mask.save(mask_path)
+        Image.fromarray(mask).save(mask_path)
 
         logger.info(f"InpaintingService: Created text+line mask at {mask_path} ({len(text_regions)} text regions, {len(line_regions) if include_lines else 0} lines)")
         return mask_path
@@ -14,11 +14,13 @@ Key Features:
 import logging
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
+from app.utils import image_ops
+
 logger = logging.getLogger("gamed_ai.services.line_detection")
 
 
@@ -62,22 +64,22 @@ class HoughLineDetector:
             f"max_line_gap={self.max_line_gap}, proximity_threshold={self.proximity_threshold}"
         )
 
-    def detect_lines(self, image_path: str) -> Optional[np.ndarray]:
+    def detect_lines(self, image: Union[str, np.ndarray]) -> Optional[np.ndarray]:
         """
         Detect straight lines using Probabilistic Hough Transform.
 
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, or an already-loaded BGR/grayscale array
 
         Returns:
             Array of lines, each as [[x1, y1, x2, y2]], or None if no lines found
         """
-        img = cv2.imread(image_path)
+        img = image_ops.load_image(image) if isinstance(image, (str, Path)) else image
         if img is None:
-            logger.error(f"Could not load image: {image_path}")
+            logger.error(f"Could not load image: {image}")
             return None
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = image_ops.to_gray(img)
 
         # Apply Gaussian blur to reduce noise
         blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -102,37 +104,6 @@ class HoughLineDetector:
 
         return lines
 
-    def _point_near_box(
-        self,
-        point: Tuple[int, int],
-        box: Dict[str, Any],
-        max_distance: int
-    ) -> bool:
-        """
-        Check if a point is within max_distance pixels of a bounding box.
-
-        Args:
-            point: (x, y) coordinates
-            box: Dict with 'x', 'y', 'width', 'height' keys
-            max_distance: Maximum distance in pixels
-
-        Returns:
-            True if point is near the box
-        """
-        px, py = point
-        bx = box.get("x", 0)
-        by = box.get("y", 0)
-        bw = box.get("width", 0)
-        bh = box.get("height", 0)
-
-        # Calculate distance from point to box edges
-        # If point is inside the box, distance is 0
-        dx = max(bx - px, 0, px - (bx + bw))
-        dy = max(by - py, 0, py - (by + bh))
-
-        distance = np.sqrt(dx**2 + dy**2)
-        return distance <= max_distance
-
     def filter_lines_near_text(
         self,
         lines: Optional[np.ndarray],
@@ -161,23 +132,14 @@ class HoughLineDetector:
             return []
 
         max_dist = max_distance or self.proximity_threshold
-        filtered = []
-
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
+        lines = list(lines)
+        segments = image_ops.as_segments(lines)
+        boxes = image_ops.boxes_array(text_boxes)
 
-            # Check if either endpoint is near any text box
-            for text_region in text_boxes:
-                # Handle different bbox formats
-                if "bbox" in text_region:
-                    box = text_region["bbox"]
-                else:
-                    box = text_region
-
-                if self._point_near_box((x1, y1), box, max_dist) or \
-                   self._point_near_box((x2, y2), box, max_dist):
-                    filtered.append(line)
-                    break
+        # Keep a line if either endpoint is near any text box (lines x boxes at once)
+        near_start = image_ops.points_near_boxes(segments[:, 0:2], boxes, max_dist)
+        near_end = image_ops.points_near_boxes(segments[:, 2:4], boxes, max_dist)
+        filtered = image_ops.select(lines, (near_start | near_end).any(axis=1))
 
         logger.info(f"Filtered {len(lines)} lines to {len(filtered)} lines near text")
         return filtered
@@ -211,21 +173,12 @@ class HoughLineDetector:
                 (40, 50),   # Diagonal
             ]
 
-        filtered = []
-
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-
-            # Calculate angle in degrees (0-90 range)
-            angle = abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
-            if angle > 90:
-                angle = 180 - angle
-
-            # Check if angle falls within any allowed range
-            for min_angle, max_angle in allowed_angles:
-                if min_angle <= angle <= max_angle:
-                    filtered.append(line)
-                    break
+        # Angle in degrees (0-90 range), checked against every allowed range
+        angles = image_ops.segment_angles(image_ops.as_segments(lines))
+        keep = np.zeros(len(angles), dtype=bool)
+        for min_angle, max_angle in allowed_angles:
+            keep |= (angles >= min_angle) & (angles <= max_angle)
+        filtered = image_ops.select(lines, keep)
 
         logger.info(f"Angle filter: {len(lines)} -> {len(filtered)} lines")
         return filtered
@@ -260,14 +213,8 @@ class HoughLineDetector:
         min_length = diagonal * min_length_ratio
         max_length = diagonal * max_length_ratio
 
-        filtered = []
-
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            length = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-
-            if min_length <= length <= max_length:
-                filtered.append(line)
+        lengths = image_ops.segment_lengths(image_ops.as_segments(lines))
+        filtered = image_ops.select(lines, (lengths >= min_length) & (lengths <= max_length))
 
         logger.info(
             f"Length filter (min={min_length:.1f}, max={max_length:.1f}): "
@@ -292,16 +239,10 @@ class HoughLineDetector:
         Returns:
             Binary mask (255 where lines are, 0 elsewhere)
         """
-        h, w = image_shape[:2]
-        mask = np.zeros((h, w), dtype=np.uint8)
-
         if lines is None or len(lines) == 0:
-            return mask
-
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            cv2.line(mask, (x1, y1), (x2, y2), 255, thickness)
+            return image_ops.lines_to_mask(image_shape, None)
 
+        mask = image_ops.lines_to_mask(image_shape, lines, thickness=thickness)
         logger.info(f"Created line mask with {len(lines)} lines, thickness={thickness}")
         return mask
 
@@ -320,14 +261,14 @@ class HoughLineDetector:
         Returns:
             Tuple of (filtered_lines, line_mask)
         """
-        # Load image for dimensions
-        img = cv2.imread(image_path)
+        # Load image once for both dimensions and line detection
+        img = image_ops.load_image(image_path)
         if img is None:
             logger.error(f"Could not load image: {image_path}")
             return [], np.zeros((1, 1), dtype=np.uint8)
 
         # Detect all lines
-        lines = self.detect_lines(image_path)
+        lines = self.detect_lines(img)
         if lines is None:
             return [], np.zeros(img.shape[:2], dtype=np.uint8)
 
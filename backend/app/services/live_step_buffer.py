@@ -0,0 +1,213 @@
+"""
+Live Step Buffer for GamED.AI v2
+
+Bounded per-run ring buffers for the live reasoning steps (thought, action,
+observation, decision) that instrumentation emits and the SSE stream replays.
+
+- Each run keeps at most ``capacity`` events; older ones fall off the front
+- Every event gets a monotonically increasing ``seq`` (per run), so readers
+  hold a cursor instead of a list index and never re-slice the whole trace
+- A janitor thread drops runs that have been idle longer than ``idle_ttl``,
+  so runs nobody streamed don't keep their trace forever
+
+Environment Variables:
+    LIVE_STEP_BUFFER_SIZE: Max events kept per run (default: 1000)
+    LIVE_STEP_IDLE_TTL_SECONDS: Drop runs idle this long (default: 3600)
+    LIVE_STEP_SWEEP_INTERVAL_SECONDS: Janitor interval (default: 60)
+
+Usage:
+    buffer = get_live_step_buffer()
+    seq = buffer.append(run_id, {"stage_name": "router", "step": {...}})
+    events = buffer.read(run_id, cursor=0)
+    cursor = events[-1]["seq"] + 1 if events else cursor
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger("gamed_ai.services.live_step_buffer")
+
+DEFAULT_CAPACITY = 1000
+DEFAULT_IDLE_TTL_SECONDS = 3600
+DEFAULT_SWEEP_INTERVAL_SECONDS = 60
+
+# Rough per-event overhead (dicts, timestamps) on top of string payloads
+_EVENT_OVERHEAD_BYTES = 400
+
+
+def _estimate_event_bytes(event: Dict[str, Any]) -> int:
+    step = event.get("step") or {}
+    return (
+        _EVENT_OVERHEAD_BYTES
+        + len(event.get("stage_name") or "")
+        + len(step.get("content") or "")
+        + len(step.get("tool") or "")
+    )
+
+
+class _RunRing:
+    """Ring of events for one run plus its bookkeeping."""
+
+    __slots__ = ("events", "sizes", "next_seq", "bytes", "last_active")
+
+    def __init__(self, capacity: int):
+        self.events: deque = deque(maxlen=capacity)
+        self.sizes: deque = deque(maxlen=capacity)
+        self.next_seq = 0
+        self.bytes = 0
+        self.last_active = time.monotonic()
+
+
+class LiveStepBuffer:
+    """
+    Capped ring buffer of live step events per run.
+
+    append() is O(1); read() is O(events returned). All methods are
+    thread-safe.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        idle_ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS
+    ):
+        self.capacity = capacity
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._lock = threading.Lock()
+        self._runs: Dict[str, _RunRing] = {}
+        self._evicted_events = 0
+        self._expired_runs = 0
+        self._janitor: Optional[threading.Thread] = None
+        self._janitor_stop = threading.Event()
+
+    def append(self, run_id: str, event: Dict[str, Any]) -> int:
+        """Add an event to run_id's ring; returns the event's sequence number."""
+        size = _estimate_event_bytes(event)
+        with self._lock:
+            ring = self._runs.get(run_id)
+            if ring is None:
+                ring = self._runs[run_id] = _RunRing(self.capacity)
+
+            if len(ring.events) == self.capacity:
+                ring.bytes -= ring.sizes[0]
+                self._evicted_events += 1
+
+            seq = ring.next_seq
+            ring.events.append({**event, "seq": seq})
+            ring.sizes.append(size)
+            ring.next_seq += 1
+            ring.bytes += size
+            ring.last_active = time.monotonic()
+            return seq
+
+    def read(self, run_id: str, cursor: int = 0) -> List[Dict[str, Any]]:
+        """
+        Return events with seq >= cursor, oldest first.
+
+        Events already evicted from the ring are skipped; the first returned
+        event's seq tells the caller how many were lost.
+        """
+        with self._lock:
+            ring = self._runs.get(run_id)
+            if ring is None:
+                return []
+            ring.last_active = time.monotonic()
+            wanted = min(ring.next_seq - cursor, len(ring.events))
+            if wanted <= 0:
+                return []
+            newest_first = list(islice(reversed(ring.events), wanted))
+        newest_first.reverse()
+        return newest_first
+
+    def next_seq(self, run_id: str) -> int:
+        """Sequence number the next event for run_id will get."""
+        with self._lock:
+            ring = self._runs.get(run_id)
+            return ring.next_seq if ring else 0
+
+    def clear(self, run_id: str) -> None:
+        """Drop run_id's ring."""
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop rings idle for longer than idle_ttl_seconds; returns how many."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [
+                run_id for run_id, ring in self._runs.items()
+                if now - ring.last_active > self.idle_ttl_seconds
+            ]
+            for run_id in expired:
+                del self._runs[run_id]
+            self._expired_runs += len(expired)
+        if expired:
+            logger.info(f"Live step janitor dropped {len(expired)} idle run(s)")
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """Approximate memory use and eviction counters."""
+        with self._lock:
+            rings = list(self._runs.values())
+            largest = max((len(r.events) for r in rings), default=0)
+            return {
+                "runs": len(rings),
+                "events": sum(len(r.events) for r in rings),
+                "approx_bytes": sum(r.bytes for r in rings),
+                "largest_run_events": largest,
+                "evicted_events": self._evicted_events,
+                "expired_runs": self._expired_runs,
+                "capacity_per_run": self.capacity,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "janitor_running": bool(self._janitor and self._janitor.is_alive()),
+            }
+
+    # ------------------------------------------------------------------
+    # Janitor
+    # ------------------------------------------------------------------
+
+    def start_janitor(self, interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS) -> None:
+        """Start the background idle-TTL sweep (idempotent)."""
+        if self._janitor and self._janitor.is_alive():
+            return
+        self._janitor_stop.clear()
+
+        def _run():
+            while not self._janitor_stop.wait(interval_seconds):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.warning(f"Live step janitor sweep failed: {e}")
+
+        self._janitor = threading.Thread(target=_run, name="live-step-janitor", daemon=True)
+        self._janitor.start()
+
+    def stop_janitor(self) -> None:
+        """Stop the background sweep."""
+        self._janitor_stop.set()
+        if self._janitor:
+            self._janitor.join(timeout=5)
+            self._janitor = None
+
+
+# Singleton instance
+_live_step_buffer: Optional[LiveStepBuffer] = None
+_live_step_buffer_lock = threading.Lock()
+
+
+def get_live_step_buffer() -> LiveStepBuffer:
+    """Get the process-wide live step buffer."""
+    global _live_step_buffer
+    if _live_step_buffer is None:
+        with _live_step_buffer_lock:
+            if _live_step_buffer is None:
+                _live_step_buffer = LiveStepBuffer(
+                    capacity=int(os.getenv("LIVE_STEP_BUFFER_SIZE", str(DEFAULT_CAPACITY))),
+                    idle_ttl_seconds=float(os.getenv("LIVE_STEP_IDLE_TTL_SECONDS", str(DEFAULT_IDLE_TTL_SECONDS))),
+                )
+    return _live_step_buffer
@@ -0,0 +1,304 @@
+"""
+LLM Response Cache for GamED.AI v2
+
+Content-addressed cache for LLMService completions so that retries, resumes
+and re-runs of the same question do not re-pay for identical prompts.
+
+- Key: SHA-256 over provider, model, system prompt, prompt, temperature, max_tokens
+- Storage: on-disk SQLite file with TTL and size-based LRU eviction
+- Metrics: process-wide counters plus per-stage counters that instrumentation
+  folds into the StageExecution output snapshot (``_llm_cache_metrics``)
+
+Environment Variables:
+    LLM_CACHE_ENABLED: "true" (default) or "false" to disable globally
+    LLM_CACHE_PATH: SQLite file path (default: pipeline_outputs/cache/llm_responses.db)
+    LLM_CACHE_TTL_SECONDS: Entry lifetime in seconds (default: 86400)
+    LLM_CACHE_MAX_MB: Size budget before LRU eviction kicks in (default: 256)
+
+Per-agent opt-out lives in AgentModelConfig.agent_cache_enabled.
+
+Usage:
+    cache = get_llm_cache()
+    if cache:
+        key = cache.make_key("google", "gemini-2.5-flash", system, prompt, 0.2, 4096)
+        payload = cache.get(key)
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger("gamed_ai.services.llm_cache")
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "pipeline_outputs" / "cache" / "llm_responses.db"
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_MB = 256
+
+# Evict down to this fraction of max_bytes so every put doesn't trigger eviction
+_EVICTION_LOW_WATERMARK = 0.9
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for the response cache."""
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+    tokens_saved: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["hit_rate"] = round(self.hits / self.lookups, 3) if self.lookups else 0.0
+        return result
+
+
+# Per-stage counters. InstrumentedAgentContext opens a scope for each stage;
+# the stats object is mutable so increments from child tasks (which get a
+# copy of the context) still land in the same stage.
+_stage_cache_stats: ContextVar[Optional[CacheStats]] = ContextVar("llm_cache_stats", default=None)
+
+
+def begin_stage_cache_stats() -> Token:
+    """Start collecting cache stats for the current stage."""
+    return _stage_cache_stats.set(CacheStats())
+
+
+def get_stage_cache_stats() -> Optional[CacheStats]:
+    """Get the cache stats for the current stage (None outside a stage)."""
+    return _stage_cache_stats.get()
+
+
+def end_stage_cache_stats(token: Token) -> None:
+    """Close the stage scope opened by begin_stage_cache_stats()."""
+    try:
+        _stage_cache_stats.reset(token)
+    except ValueError:
+        # Token created in a different context (e.g. exit ran in another task)
+        _stage_cache_stats.set(None)
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed response cache with TTL and size-based LRU eviction.
+
+    Payloads are small JSON dicts (content + token counts). All methods are
+    thread-safe; callers on the event loop should go through asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_lru ON llm_cache(last_accessed)")
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM llm_cache"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: Optional[str],
+        system_prompt: Optional[str],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build the content-addressed key for a generate() call."""
+        parts = [provider, model or "", system_prompt or "", prompt, round(float(temperature), 4), int(max_tokens)]
+        if response_schema:
+            # Constrained output is a different request; keys without a schema are unchanged
+            parts.append(json.dumps(response_schema, sort_keys=True))
+        material = json.dumps(parts, ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, size_bytes, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[2] + self.ttl_seconds < now:
+                if row is not None:
+                    self._delete(key, row[1])
+                self._record_miss()
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_accessed = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            payload = json.loads(row[0])
+            self._record_hit(row[1], payload)
+            return payload
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        """Store a payload, evicting least-recently-used entries if over budget."""
+        data = json.dumps(payload, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT size_bytes FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, payload, size_bytes, created_at, last_accessed, hits) "
+                "VALUES (?, ?, ?, ?, ?, 0)",
+                (key, data, size, now, now)
+            )
+            self._total_bytes += size - (existing[0] if existing else 0)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict(now)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a single entry (e.g. a response that later failed to parse)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size_bytes FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._delete(key, row[0])
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Process-wide counters plus current store size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            result = self._stats.to_dict()
+            result.update({
+                "entries": entries,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "path": str(self.path),
+            })
+            return result
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds self._lock)
+    # ------------------------------------------------------------------
+
+    def _delete(self, key: str, size: int) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self._total_bytes -= size
+
+    def _evict(self, now: float) -> None:
+        # Expired entries go first, then least-recently-used until under the watermark
+        expired = self._conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0), COUNT(*) FROM llm_cache WHERE created_at < ?",
+            (now - self.ttl_seconds,)
+        ).fetchone()
+        if expired[1]:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._total_bytes -= expired[0]
+
+        target = int(self.max_bytes * _EVICTION_LOW_WATERMARK)
+        evicted = 0
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size_bytes FROM llm_cache ORDER BY last_accessed ASC LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, size in rows:
+                self._delete(key, size)
+                evicted += 1
+                if self._total_bytes <= target:
+                    break
+
+        if evicted:
+            logger.debug(f"LLM cache evicted {evicted} entries ({self._total_bytes} bytes remain)")
+
+    def _record_hit(self, size: int, payload: Dict[str, Any]) -> None:
+        tokens = int(payload.get("input_tokens") or 0) + int(payload.get("output_tokens") or 0)
+        for stats in (self._stats, _stage_cache_stats.get()):
+            if stats is not None:
+                stats.hits += 1
+                stats.bytes_saved += size
+                stats.tokens_saved += tokens
+
+    def _record_miss(self) -> None:
+        for stats in (self._stats, _stage_cache_stats.get()):
+            if stats is not None:
+                stats.misses += 1
+
+
+# Singleton instance
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_initialized = False
+_llm_cache_init_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the shared response cache, or None if disabled/unavailable."""
+    global _llm_cache, _llm_cache_initialized
+    if _llm_cache_initialized:
+        return _llm_cache
+
+    with _llm_cache_init_lock:
+        if _llm_cache_initialized:
+            return _llm_cache
+
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true":
+            try:
+                _llm_cache = LLMResponseCache(
+                    path=Path(os.getenv("LLM_CACHE_PATH", str(DEFAULT_CACHE_PATH))),
+                    ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+                    max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", str(DEFAULT_MAX_MB))) * 1024 * 1024),
+                )
+                logger.info(f"LLM response cache enabled at {_llm_cache.path}")
+            except Exception as e:
+                logger.warning(f"LLM response cache unavailable, continuing without it: {e}")
+                _llm_cache = None
+        else:
+            logger.info("LLM response cache disabled (LLM_CACHE_ENABLED=false)")
+
+        _llm_cache_initialized = True
+        return _llm_cache
@@ -0,0 +1,595 @@
+"""
+LLM Rate Limiter for GamED.AI v2
+
+Shared governor that every LLMService provider call passes through, so that
+fan-out stages (V4 scene designers, content generators and interaction
+designers dispatched via Send) queue locally instead of triggering 429 storms:
+
+- Token buckets: requests-per-minute and tokens-per-minute, per provider and
+  optionally per model ("google" and "google/gemini-2.5-pro" are separate
+  limiters; a call must clear both)
+- Concurrency cap: max in-flight requests per provider (and per model)
+- Priority queue: waiters are served by (priority, arrival); critical-path
+  agents (AgentModelConfig.agent_priorities) go before fan-out workers, and a
+  lower-priority call only overtakes when the one ahead is held by its own
+  model limiter
+- Token estimates: prompt chars / 4 plus min(max_tokens, 1024) are reserved
+  up front and reconciled (refunded or charged) once the response reports
+  actual usage; reserving the full max_tokens would let a 40k TPM budget
+  admit only a handful of calls per minute
+- Retry hints: Retry-After / retry-after-ms headers and "retry in 17s" /
+  retryDelay bodies pause the model's limiter, so every queued caller waits
+  the hint out instead of retrying into the same 429
+- Metrics: live queue depth, in-flight calls and throttle time per limiter
+  and per run (``/observability/analytics/llm-rate-limiter``)
+
+Environment Variables:
+    LLM_RATE_LIMIT_ENABLED: "true" (default) or "false" to disable the governor
+    LLM_RATE_LIMITS: JSON overrides merged over DEFAULT_LIMITS, keyed by
+        provider or "provider/model", e.g.
+        {"google": {"rpm": 2000, "tpm": 4000000}, "groq/llama-3.3-70b-versatile": {"tpm": 12000}}
+    LLM_MAX_RETRY_PAUSE_SECONDS: Upper bound for server retry hints (default: 60)
+
+Usage:
+    limiter = get_llm_rate_limiter()
+    async with limiter.slot("google", "gemini-2.5-flash", estimate_tokens(prompt, max_tokens=4096)) as slot:
+        response = await call_provider(...)
+        slot.settle(response_total_tokens)
+
+    with request_priority(PRIORITY_CRITICAL):
+        await llm.generate(...)
+"""
+
+import asyncio
+import bisect
+import email.utils
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from app.config.run_context import get_run_context
+
+logger = logging.getLogger("gamed_ai.services.llm_rate_limiter")
+
+# Lower value = served first
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+DEFAULT_MAX_RETRY_PAUSE_SECONDS = 60.0
+
+# Runs kept in the per-run stats table
+_MAX_TRACKED_RUNS = 256
+
+# Status codes that mean "slow down" rather than "this request is bad"
+_THROTTLE_STATUS_CODES = {429, 503, 529}
+
+_RETRY_HINT_PATTERNS = [
+    # Gemini RetryInfo detail: 'retryDelay': '17s'
+    re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(?P<s>\d+(?:\.\d+)?)s", re.I),
+    # "Please retry in 17.35s", "Please try again in 1m12.5s" / "in 350ms"
+    re.compile(r"(?:retry|try again) in\s+(?:(?P<m>\d+)m)?(?P<s>\d+(?:\.\d+)?)(?P<ms>ms)?", re.I),
+]
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Limits for one provider or model; 0 means unlimited."""
+    rpm: float = 0
+    tpm: float = 0
+    concurrency: int = 0
+
+
+# Output tokens reserved per call before the response reports actual usage
+OUTPUT_TOKEN_ESTIMATE_CAP = 1024
+
+# Conservative defaults around the entry paid tiers; raise them via LLM_RATE_LIMITS.
+# Anthropic and Groq TPM limits vary too much by tier (and count input and
+# output separately) for a useful default, so they get none unless configured.
+DEFAULT_LIMITS: Dict[str, RateLimits] = {
+    "google": RateLimits(rpm=1000, tpm=1_000_000, concurrency=16),
+    "openai": RateLimits(rpm=500, tpm=200_000, concurrency=16),
+    "anthropic": RateLimits(rpm=50, concurrency=8),
+    "groq": RateLimits(rpm=30, concurrency=4),
+    "local": RateLimits(concurrency=4),
+}
+
+
+# Priority for calls made in the current context (set by *_for_agent methods)
+_request_priority: ContextVar[int] = ContextVar("llm_request_priority", default=PRIORITY_NORMAL)
+
+
+def get_request_priority() -> int:
+    """Priority of LLM calls made in the current context."""
+    return _request_priority.get()
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Queue LLM calls made inside the block (and tasks it spawns) at this priority."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def estimate_tokens(*parts: Any, max_tokens: int = 0) -> int:
+    """
+    Rough request size: ~4 characters per input token plus the expected output.
+
+    max_tokens is a ceiling most responses stay far below, so the output part
+    is capped at OUTPUT_TOKEN_ESTIMATE_CAP; LLMSlot.settle() charges the rest
+    when a response really is that long.
+    """
+    chars = sum(len(part) if isinstance(part, str) else len(str(part)) for part in parts if part)
+    return chars // 4 + min(max_tokens, OUTPUT_TOKEN_ESTIMATE_CAP)
+
+
+def retry_hint_seconds(error: BaseException) -> Optional[float]:
+    """Server-provided retry delay from response headers or the error body, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            value = headers.get("retry-after-ms")
+            if value is not None:
+                return max(0.0, float(value) / 1000.0)
+            value = headers.get("retry-after")
+            if value is not None:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    retry_at = email.utils.parsedate_to_datetime(value)
+                    return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError, AttributeError):
+            pass
+
+    text = str(error)
+    for pattern in _RETRY_HINT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            seconds = float(match.group("s"))
+            if match.groupdict().get("ms"):
+                seconds /= 1000.0
+            if match.groupdict().get("m"):
+                seconds += 60 * int(match.group("m"))
+            return seconds
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception is a provider throttle (429 / overloaded)."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) and value in _THROTTLE_STATUS_CODES:
+            return True
+    text = str(error).lower()
+    return "429" in text or "resource_exhausted" in text or "rate limit" in text
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute and holds at most one minute's worth."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Limiter:
+    """Buckets, concurrency cap and retry pause for one provider or model."""
+
+    def __init__(self, key: str, limits: RateLimits, now: float):
+        self.key = key
+        self.limits = limits
+        self.requests = TokenBucket(limits.rpm, now) if limits.rpm else None
+        self.tokens = TokenBucket(limits.tpm, now) if limits.tpm else None
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.granted = 0
+        self.throttle_ms = 0.0
+        self.retry_pauses = 0
+
+    def wait_time(self, cost: int, now: float) -> Optional[float]:
+        """Seconds until a call of `cost` tokens may start; None = wait for a release."""
+        if self.limits.concurrency and self.in_flight >= self.limits.concurrency:
+            return None
+        wait = max(0.0, self.paused_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(cost, now))
+        return wait
+
+    def take(self, cost: int, now: float) -> None:
+        if self.requests:
+            self.requests.take(1, now)
+        if self.tokens:
+            self.tokens.take(cost, now)
+        self.in_flight += 1
+        self.granted += 1
+
+    def adjust_tokens(self, delta: int, now: float) -> None:
+        """Refund (delta > 0) or charge (delta < 0) tokens once actual usage is known."""
+        if not self.tokens:
+            return
+        if delta > 0:
+            self.tokens.give(delta)
+        else:
+            self.tokens.take(-delta, now)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "limits": asdict(self.limits),
+            "in_flight": self.in_flight,
+            "granted": self.granted,
+            "throttle_ms": round(self.throttle_ms, 1),
+            "retry_pauses": self.retry_pauses,
+            "paused_for_s": round(max(0.0, self.paused_until - now), 2),
+            "requests_available": round(self.requests.level, 1) if self.requests else None,
+            "tokens_available": round(self.tokens.level) if self.tokens else None,
+        }
+
+
+@dataclass
+class RunThrottleStats:
+    """Governor counters for one generation run."""
+    requests: int = 0
+    throttled_requests: int = 0
+    throttle_ms: float = 0.0
+    queued: int = 0
+    max_queue_depth: int = 0
+    in_flight: int = 0
+    retry_pauses: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["throttle_ms"] = round(self.throttle_ms, 1)
+        return result
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    provider: str = field(compare=False)
+    model_key: str = field(compare=False)
+    cost: int = field(compare=False)
+    run_id: Optional[str] = field(compare=False)
+    loop: asyncio.AbstractEventLoop = field(compare=False)
+    event: asyncio.Event = field(compare=False)
+
+
+class LLMSlot:
+    """A granted call; settle() reconciles the token reservation with actual usage."""
+
+    def __init__(self, limiter: "LLMRateLimiter", provider: str, model_key: str,
+                 reserved: int, waited_ms: float, run_id: Optional[str]):
+        self._limiter = limiter
+        self.provider = provider
+        self.model_key = model_key
+        self.reserved = reserved
+        self.waited_ms = waited_ms
+        self.run_id = run_id
+        self._settled = False
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        """Report actual prompt + completion tokens (None/0 keeps the estimate)."""
+        if self._settled or not actual_tokens:
+            return
+        self._settled = True
+        self._limiter._adjust_tokens(self.provider, self.model_key, self.reserved - int(actual_tokens))
+
+
+class LLMRateLimiter:
+    """
+    Per-provider / per-model token-bucket governor with a priority queue.
+
+    Thread-safe: state is guarded by a lock and waiters are woken on their
+    own event loop, so services running on different loops share one budget.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimits]] = None,
+        enabled: bool = True,
+        max_retry_pause: float = DEFAULT_MAX_RETRY_PAUSE_SECONDS,
+        clock=time.monotonic
+    ):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.enabled = enabled
+        self.max_retry_pause = max_retry_pause
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._limiters: Dict[str, _Limiter] = {}
+        self._queues: Dict[str, List[_Waiter]] = {}
+        self._runs: "OrderedDict[str, RunThrottleStats]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Acquire / release
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        model: Optional[str],
+        tokens: int,
+        priority: Optional[int] = None
+    ) -> AsyncIterator[LLMSlot]:
+        """Wait for a call slot; server retry hints raised inside the block pause the model."""
+        if not self.enabled:
+            yield LLMSlot(self, provider, "", 0, 0.0, None)
+            return
+
+        model_key = f"{provider}/{model}" if model else provider
+        slot = await self._acquire(provider, model_key, tokens, priority)
+        try:
+            yield slot
+        except Exception as e:
+            self.report_error(provider, model, e)
+            raise
+        finally:
+            self._release(slot)
+
+    async def _acquire(self, provider: str, model_key: str, tokens: int, priority: Optional[int]) -> LLMSlot:
+        run_context = get_run_context()
+        waiter = _Waiter(
+            priority=_request_priority.get() if priority is None else priority,
+            seq=next(self._seq),
+            provider=provider,
+            model_key=model_key,
+            cost=max(0, int(tokens)),
+            run_id=run_context.run_id if run_context else None,
+            loop=asyncio.get_running_loop(),
+            event=asyncio.Event(),
+        )
+        started = self._clock()
+        with self._lock:
+            bisect.insort(self._queues.setdefault(provider, []), waiter)
+            run = self._run_stats(waiter.run_id)
+            if run:
+                run.requests += 1
+                run.queued += 1
+                run.max_queue_depth = max(run.max_queue_depth, run.queued)
+
+        try:
+            while True:
+                waiter.event.clear()
+                with self._lock:
+                    wait = self._try_grant(waiter)
+                if wait == 0:
+                    break
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                queue = self._queues.get(provider, [])
+                if waiter in queue:
+                    queue.remove(waiter)
+                    run = self._run_stats(waiter.run_id)
+                    if run:
+                        run.queued -= 1
+                self._notify(provider)
+            raise
+
+        waited_ms = (self._clock() - started) * 1000
+        with self._lock:
+            for limiter in self._limiters_for(provider, model_key):
+                limiter.throttle_ms += waited_ms
+            run = self._run_stats(waiter.run_id)
+            if run:
+                run.throttle_ms += waited_ms
+                if waited_ms >= 1:
+                    run.throttled_requests += 1
+        if waited_ms >= 1000:
+            logger.info(f"LLM call to {model_key} throttled {waited_ms:.0f}ms (priority={waiter.priority})")
+        return LLMSlot(self, provider, model_key, waiter.cost, waited_ms, waiter.run_id)
+
+    def _try_grant(self, waiter: _Waiter) -> Optional[float]:
+        """Grant the waiter if nothing ahead has precedence; else seconds to wait (None = until woken)."""
+        now = self._clock()
+        queue = self._queues[waiter.provider]
+
+        for ahead in queue:
+            if ahead is waiter:
+                break
+            if ahead.model_key in (waiter.model_key, waiter.provider):
+                return None
+            # Overtake only a waiter that is held by its own model limiter
+            if self._limiter(ahead.model_key).wait_time(ahead.cost, now) == 0:
+                return None
+
+        limiters = self._limiters_for(waiter.provider, waiter.model_key)
+        waits = [limiter.wait_time(waiter.cost, now) for limiter in limiters]
+        if None in waits:
+            return None
+        wait = max(waits)
+        if wait > 0:
+            return wait
+
+        for limiter in limiters:
+            limiter.take(waiter.cost, now)
+        queue.remove(waiter)
+        run = self._run_stats(waiter.run_id)
+        if run:
+            run.queued -= 1
+            run.in_flight += 1
+        self._notify(waiter.provider)
+        return 0
+
+    def _release(self, slot: LLMSlot) -> None:
+        if not slot.model_key:
+            return
+        with self._lock:
+            for limiter in self._limiters_for(slot.provider, slot.model_key):
+                limiter.in_flight -= 1
+            run = self._run_stats(slot.run_id)
+            if run:
+                run.in_flight -= 1
+            self._notify(slot.provider)
+
+    def _adjust_tokens(self, provider: str, model_key: str, delta: int) -> None:
+        if not model_key or delta == 0:
+            return
+        with self._lock:
+            now = self._clock()
+            for limiter in self._limiters_for(provider, model_key):
+                limiter.adjust_tokens(delta, now)
+            if delta > 0:
+                self._notify(provider)
+
+    def _notify(self, provider: str) -> None:
+        """Wake every waiter queued on a provider so it re-checks (caller holds the lock)."""
+        for waiter in self._queues.get(provider, ()):
+            try:
+                waiter.loop.call_soon_threadsafe(waiter.event.set)
+            except RuntimeError:
+                pass  # Loop closed; the waiter is gone with it
+
+    # ------------------------------------------------------------------
+    # Retry hints
+    # ------------------------------------------------------------------
+
+    def report_error(self, provider: str, model: Optional[str], error: BaseException) -> Optional[float]:
+        """Pause the model's limiter for a server retry hint; returns the pause in seconds."""
+        hint = retry_hint_seconds(error)
+        if hint is None or not self.enabled:
+            return None
+        return self.pause(provider, model, hint)
+
+    def pause(self, provider: str, model: Optional[str], seconds: float) -> float:
+        """Hold new calls to a model (or whole provider) for `seconds`."""
+        seconds = min(max(0.0, seconds), self.max_retry_pause)
+        model_key = f"{provider}/{model}" if model else provider
+        with self._lock:
+            limiter = self._limiter(model_key)
+            limiter.paused_until = max(limiter.paused_until, self._clock() + seconds)
+            limiter.retry_pauses += 1
+            run_context = get_run_context()
+            run = self._run_stats(run_context.run_id if run_context else None)
+            if run:
+                run.retry_pauses += 1
+        logger.warning(f"LLM rate limit on {model_key}: pausing new calls for {seconds:.1f}s")
+        return seconds
+
+    def paused_for(self, provider: str, model: Optional[str]) -> float:
+        """Seconds left on a retry pause for a model (0 if not paused)."""
+        model_key = f"{provider}/{model}" if model else provider
+        with self._lock:
+            limiter = self._limiters.get(model_key)
+            return max(0.0, limiter.paused_until - self._clock()) if limiter else 0.0
+
+    # ------------------------------------------------------------------
+    # Internals / stats
+    # ------------------------------------------------------------------
+
+    def _limiter(self, key: str) -> _Limiter:
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = _Limiter(key, self.limits.get(key, RateLimits()), self._clock())
+            self._limiters[key] = limiter
+        return limiter
+
+    def _limiters_for(self, provider: str, model_key: str) -> Tuple[_Limiter, ...]:
+        """Provider limiter, plus the model limiter when the call names a model."""
+        if model_key == provider:
+            return (self._limiter(provider),)
+        return self._limiter(provider), self._limiter(model_key)
+
+    def _run_stats(self, run_id: Optional[str]) -> Optional[RunThrottleStats]:
+        if not run_id:
+            return None
+        stats = self._runs.get(run_id)
+        if stats is None:
+            stats = self._runs[run_id] = RunThrottleStats()
+            while len(self._runs) > _MAX_TRACKED_RUNS:
+                self._runs.popitem(last=False)
+        else:
+            self._runs.move_to_end(run_id)
+        return stats
+
+    def run_stats(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Queue depth and throttle time for one run (None if it made no governed calls)."""
+        with self._lock:
+            stats = self._runs.get(run_id)
+            return stats.to_dict() if stats else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Live queue depth per provider plus per-limiter and per-run counters."""
+        with self._lock:
+            now = self._clock()
+            return {
+                "enabled": self.enabled,
+                "queue_depth": {provider: len(queue) for provider, queue in self._queues.items()},
+                "limiters": {key: limiter.stats(now) for key, limiter in self._limiters.items()},
+                "runs": {run_id: stats.to_dict() for run_id, stats in self._runs.items()},
+            }
+
+
+def _load_limits() -> Dict[str, RateLimits]:
+    """DEFAULT_LIMITS with LLM_RATE_LIMITS overrides applied."""
+    limits = dict(DEFAULT_LIMITS)
+    raw = os.getenv("LLM_RATE_LIMITS", "").strip()
+    if not raw:
+        return limits
+    try:
+        overrides = json.loads(raw)
+        for key, values in overrides.items():
+            base = asdict(limits.get(key, RateLimits()))
+            base.update({k: v for k, v in values.items() if k in base})
+            limits[key] = RateLimits(**base)
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"Ignoring invalid LLM_RATE_LIMITS: {e}")
+    return limits
+
+
+_rate_limiter: Optional[LLMRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """Get or create the process-wide rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = LLMRateLimiter(
+                    limits=_load_limits(),
+                    enabled=os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true",
+                    max_retry_pause=float(
+                        os.getenv("LLM_MAX_RETRY_PAUSE_SECONDS", str(DEFAULT_MAX_RETRY_PAUSE_SECONDS))
+                    ),
+                )
+    return _rate_limiter
@@ -0,0 +1,479 @@
+"""
+Latency-Aware LLM Router for GamED.AI v2
+
+Sits between LLMService.generate() and the provider calls for models in
+MODEL_REGISTRY, and uses the equivalence classes in app/config/models.py:
+
+- Rolling stats: latency of recent successful calls per model and max_tokens
+  budget (a 16k-token design stage and a 2k-token classifier have different
+  tails), and recent outcomes per model
+- Hedging: when a call has not returned after the p95 of its model's recent
+  latency, a duplicate goes to the fastest healthy equivalent model; the
+  first success wins and the loser is cancelled. Only calls at critical
+  rate-limiter priority are hedged by default (long sequential stages such
+  as game_concept_designer and blueprint_generator)
+- Circuit breaker: a provider with sustained errors (consecutive failures or
+  a high error rate over its recent calls) is skipped for a cooldown, then
+  one probe call decides whether it closes again. Calls for a model whose
+  provider is open go to an equivalent model instead
+- Failover: a call that fails after the provider's own retries is tried once
+  on the best healthy equivalent model, preferring another provider
+- Error classes: only provider errors (timeouts, connection errors, 5xx,
+  throttling) count against a breaker or fail over. Client errors (a bad
+  request, a rejected schema, an oversized prompt) would fail the same way
+  on any model, so they are re-raised as they are. Every error raised
+  through the router carries the model that raised it as `routed_model_key`
+
+Environment Variables:
+    LLM_ROUTER_ENABLED: "true" (default) or "false" to call providers directly
+    LLM_HEDGE_MAX_PRIORITY: Hedge calls at this priority or more urgent
+        (0 = critical only, default; 2 = all calls; -1 = never hedge)
+    LLM_HEDGE_MIN_DELAY_MS: Floor for the hedge delay (default: 2000)
+    LLM_BREAKER_COOLDOWN_SECONDS: How long a tripped provider is skipped (default: 30)
+
+Usage:
+    router = get_llm_router()
+    response = await router.route(
+        "gemini-2.5-pro",
+        lambda model_key: call_model(model_key),
+        is_available=has_client_for,
+        max_tokens=8192,
+    )
+    router.stats()
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config.models import MODEL_REGISTRY, get_equivalent_models
+from app.services.llm_rate_limiter import PRIORITY_CRITICAL, get_request_priority, is_rate_limit_error
+
+logger = logging.getLogger("gamed_ai.services.llm_router")
+
+DEFAULT_HEDGE_MIN_DELAY_MS = 2000
+DEFAULT_BREAKER_COOLDOWN_SECONDS = 30.0
+
+# Rolling window sizes
+LATENCY_WINDOW = 50
+OUTCOME_WINDOW = 20
+
+# Latency samples needed before p95 is trusted for hedging
+MIN_LATENCY_SAMPLES = 5
+
+
+# Exception class name fragments of SDK/httpx transport errors (APITimeoutError, ConnectError, ...)
+_TRANSIENT_ERROR_NAMES = ("Timeout", "Connect", "Transport", "Network", "RemoteProtocol", "Unavailable")
+_TRANSIENT_ERROR_TEXT = ("unavailable", "deadline_exceeded", "overloaded", "internal server error", "timed out")
+_SERVER_STATUS_PREFIX = re.compile(r"^\s*5\d\d\b")
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code", "status"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+    return None
+
+
+def is_provider_error(error: BaseException) -> bool:
+    """Whether an error says the provider is unhealthy (timeout, connection, 5xx, throttle) rather than the request bad."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if is_rate_limit_error(error):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status >= 500 or status == 408
+    if any(name in type(error).__name__ for name in _TRANSIENT_ERROR_NAMES):
+        return True
+    text = str(error)
+    return bool(_SERVER_STATUS_PREFIX.match(text)) or any(marker in text.lower() for marker in _TRANSIENT_ERROR_TEXT)
+
+
+def _tag_model(error: BaseException, model_key: str) -> None:
+    """Record on the error which model raised it (read as `routed_model_key`), since it may not be the one requested."""
+    try:
+        error.routed_model_key = model_key
+    except AttributeError:
+        pass
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one provider.
+
+    Trips after `failure_threshold` consecutive failures, or when at least
+    `min_volume` of the last OUTCOME_WINDOW calls are in and `error_rate` of
+    them failed. After `cooldown` seconds one probe call is let through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        error_rate: float = 0.5,
+        min_volume: int = 10,
+        cooldown: float = DEFAULT_BREAKER_COOLDOWN_SECONDS,
+        clock=time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_volume = min_volume
+        self.cooldown = cooldown
+        self._clock = clock
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self.consecutive_failures = 0
+        self.outcomes: Deque[bool] = deque(maxlen=OUTCOME_WINDOW)
+        self._probe_in_flight = False
+
+    def available(self) -> bool:
+        """Whether a call could be admitted now (no side effects)."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return self._clock() - self.opened_at >= self.cooldown
+        return not self._probe_in_flight
+
+    def admit(self) -> bool:
+        """Admit a call; in half-open state only a single probe is admitted."""
+        if not self.available():
+            return False
+        if self.state != self.CLOSED:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = True
+        return True
+
+    def record(self, ok: bool) -> None:
+        self.outcomes.append(ok)
+        self._probe_in_flight = False
+        if ok:
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                self.outcomes.clear()
+            return
+
+        self.consecutive_failures += 1
+        failures = self.outcomes.count(False)
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold or (
+            len(self.outcomes) >= self.min_volume and failures / len(self.outcomes) >= self.error_rate
+        ):
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+
+    def release(self) -> None:
+        """Give back an admitted probe that was cancelled before it finished."""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "consecutive_failures": self.consecutive_failures,
+            "recent_error_rate": round(self.outcomes.count(False) / len(self.outcomes), 3) if self.outcomes else 0.0,
+        }
+
+
+@dataclass
+class RouterStats:
+    """Process-wide routing counters."""
+    calls: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    breaker_reroutes: int = 0
+    client_errors: int = 0
+
+
+class LLMRouter:
+    """Tracks per-model latency/health and routes calls within equivalence classes."""
+
+    def __init__(
+        self,
+        hedge_max_priority: int = PRIORITY_CRITICAL,
+        hedge_min_delay_ms: float = DEFAULT_HEDGE_MIN_DELAY_MS,
+        breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN_SECONDS,
+        clock=time.monotonic
+    ):
+        self.hedge_max_priority = hedge_max_priority
+        self.hedge_min_delay = hedge_min_delay_ms / 1000.0
+        self.breaker_cooldown = breaker_cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latencies: Dict[Tuple[str, int], Deque[float]] = {}
+        self._errors: Dict[str, int] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats = RouterStats()
+
+    # ------------------------------------------------------------------
+    # Health bookkeeping
+    # ------------------------------------------------------------------
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = CircuitBreaker(cooldown=self.breaker_cooldown, clock=self._clock)
+        return breaker
+
+    def _provider(self, model_key: str) -> str:
+        return MODEL_REGISTRY[model_key].provider.value
+
+    def p95(self, model_key: str, max_tokens: int) -> Optional[float]:
+        """p95 latency (seconds) of recent successful calls, once enough are in."""
+        with self._lock:
+            samples = self._latencies.get((model_key, max_tokens))
+            if not samples or len(samples) < MIN_LATENCY_SAMPLES:
+                return None
+            return _percentile(list(samples), 0.95)
+
+    def record(self, model_key: str, max_tokens: int, latency: float, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self._latencies.setdefault((model_key, max_tokens), deque(maxlen=LATENCY_WINDOW)).append(latency)
+            else:
+                self._errors[model_key] = self._errors.get(model_key, 0) + 1
+            breaker = self.breaker(self._provider(model_key))
+            was_open = breaker.state == CircuitBreaker.OPEN
+            breaker.record(ok)
+            tripped = breaker.state == CircuitBreaker.OPEN and not was_open
+        if tripped:
+            logger.warning(
+                f"Circuit breaker opened for provider '{self._provider(model_key)}' "
+                f"after repeated errors (cooldown {self.breaker_cooldown:.0f}s)"
+            )
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def _rank(self, candidates: List[str], max_tokens: int) -> List[str]:
+        """Fastest known p95 first; models without enough samples keep declared order."""
+        order = {key: i for i, key in enumerate(candidates)}
+
+        def sort_key(key: str):
+            p95 = self.p95(key, max_tokens)
+            return (p95 is None, p95 or 0.0, order[key])
+
+        return sorted(candidates, key=sort_key)
+
+    def _healthy(self, model_key: str) -> bool:
+        with self._lock:
+            return self.breaker(self._provider(model_key)).available()
+
+    async def _attempt(
+        self,
+        model_key: str,
+        call: Callable[[str], Awaitable[Any]],
+        max_tokens: int
+    ) -> Any:
+        """One call on a model, recorded in its stats and (for provider errors) its provider's breaker."""
+        with self._lock:
+            breaker = self.breaker(self._provider(model_key))
+            # route() only picks an open provider when no equivalent model is
+            # available, so the call goes ahead either way (better than failing)
+            breaker.admit()
+        started = self._clock()
+        try:
+            result = await call(model_key)
+        except asyncio.CancelledError:
+            with self._lock:
+                breaker.release()
+            raise
+        except Exception as e:
+            _tag_model(e, model_key)
+            if is_provider_error(e):
+                self.record(model_key, max_tokens, self._clock() - started, ok=False)
+            else:
+                # The provider answered; the request itself was bad
+                with self._lock:
+                    breaker.release()
+                    self._stats.client_errors += 1
+            raise
+        self.record(model_key, max_tokens, self._clock() - started, ok=True)
+        return result
+
+    async def route(
+        self,
+        model_key: str,
+        call: Callable[[str], Awaitable[Any]],
+        is_available: Callable[[str], bool] = lambda key: True,
+        max_tokens: int = 0,
+        priority: Optional[int] = None
+    ) -> Any:
+        """
+        Run `call(model_key)` on the requested model or an equivalent one.
+
+        Args:
+            model_key: Requested MODEL_REGISTRY key
+            call: Coroutine factory taking the registry key to call
+            is_available: Whether a model can be called here (client configured)
+            max_tokens: Output budget, used to bucket latency stats
+            priority: Rate-limiter priority (default: the current context's)
+
+        Returns:
+            The first successful result
+        """
+        with self._lock:
+            self._stats.calls += 1
+        alternates = [key for key in get_equivalent_models(model_key) if is_available(key) and self._healthy(key)]
+        alternates = self._rank(alternates, max_tokens)
+
+        primary = model_key
+        if not self._healthy(model_key) and alternates:
+            primary = alternates.pop(0)
+            with self._lock:
+                self._stats.breaker_reroutes += 1
+            logger.info(f"Provider for '{model_key}' is open; routing to '{primary}'")
+
+        priority = get_request_priority() if priority is None else priority
+        delay = self.p95(primary, max_tokens) if priority <= self.hedge_max_priority else None
+        if not alternates or delay is None:
+            return await self._call_with_failover(primary, alternates, call, max_tokens)
+        return await self._hedged(primary, alternates[0], alternates[1:], call, max_tokens,
+                                  max(delay, self.hedge_min_delay))
+
+    async def _call_with_failover(
+        self,
+        primary: str,
+        alternates: List[str],
+        call: Callable[[str], Awaitable[Any]],
+        max_tokens: int
+    ) -> Any:
+        try:
+            return await self._attempt(primary, call, max_tokens)
+        except Exception as e:
+            if not is_provider_error(e):
+                raise
+            return await self._failover(primary, e, alternates, call, max_tokens)
+
+    async def _failover(
+        self,
+        failed: str,
+        error: Exception,
+        alternates: List[str],
+        call: Callable[[str], Awaitable[Any]],
+        max_tokens: int
+    ) -> Any:
+        """Retry a failed call once on the best healthy alternate (other providers first), else re-raise."""
+        provider = self._provider(failed)
+        ordered = sorted(alternates, key=lambda key: self._provider(key) == provider)
+        fallback = next((key for key in ordered if self._healthy(key)), None)
+        if fallback is None:
+            raise error
+        with self._lock:
+            self._stats.failovers += 1
+        logger.warning(f"LLM call on '{failed}' failed ({error}); failing over to '{fallback}'")
+        return await self._attempt(fallback, call, max_tokens)
+
+    async def _hedged(
+        self,
+        primary: str,
+        hedge: str,
+        rest: List[str],
+        call: Callable[[str], Awaitable[Any]],
+        max_tokens: int,
+        delay: float
+    ) -> Any:
+        """Start `hedge` if `primary` is slower than `delay`; first success wins."""
+        primary_task = asyncio.ensure_future(self._attempt(primary, call, max_tokens))
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+        if done:
+            error = primary_task.exception()
+            if error is None or not is_provider_error(error):
+                return primary_task.result()
+            # Primary failed before the hedge point: plain failover
+            return await self._failover(primary, error, [hedge, *rest], call, max_tokens)
+
+        with self._lock:
+            self._stats.hedges += 1
+        logger.info(f"Hedging '{primary}' (slower than {delay * 1000:.0f}ms) with '{hedge}'")
+        hedge_task = asyncio.ensure_future(self._attempt(hedge, call, max_tokens))
+        pending = {primary_task, hedge_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        if task is hedge_task:
+                            with self._lock:
+                                self._stats.hedge_wins += 1
+                        return task.result()
+                    if not is_provider_error(error):
+                        # A bad request fails on every model; don't wait for the other copy
+                        return task.result()
+            # Both failed: surface the primary model's error
+            return primary_task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing counters, per-model latency percentiles and provider breaker states."""
+        with self._lock:
+            models: Dict[str, Dict[str, Any]] = {}
+            for (model_key, max_tokens), samples in self._latencies.items():
+                values = list(samples)
+                models.setdefault(model_key, {})[str(max_tokens)] = {
+                    "samples": len(values),
+                    "p50_ms": round(_percentile(values, 0.5) * 1000),
+                    "p95_ms": round(_percentile(values, 0.95) * 1000),
+                }
+            return {
+                **vars(self._stats),
+                "latency": models,
+                "errors": dict(self._errors),
+                "breakers": {provider: breaker.stats() for provider, breaker in self._breakers.items()},
+            }
+
+
+_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> Optional[LLMRouter]:
+    """Get or create the process-wide router (None if LLM_ROUTER_ENABLED=false)."""
+    global _router
+    if os.getenv("LLM_ROUTER_ENABLED", "true").lower() != "true":
+        return None
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = LLMRouter(
+                    hedge_max_priority=int(os.getenv("LLM_HEDGE_MAX_PRIORITY", str(PRIORITY_CRITICAL))),
+                    hedge_min_delay_ms=float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", str(DEFAULT_HEDGE_MIN_DELAY_MS))),
+                    breaker_cooldown=float(
+                        os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", str(DEFAULT_BREAKER_COOLDOWN_SECONDS))
+                    ),
+                )
+    return _router
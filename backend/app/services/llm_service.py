@@ -6,8 +6,11 @@ Provides async LLM integration for agents with:
 - Tool calling (function calling) for agentic workflows
 - ReAct reasoning loops (Reason→Act→Observe)
 - Retry logic with exponential backoff
+- Shared per-provider/per-model rate limiting with priority queueing (llm_rate_limiter.py)
+- Latency-aware routing: hedged requests and circuit breakers across equivalent models (llm_router.py)
 - Token tracking
-- Structured output parsing
+- Structured output parsing, with provider-native schema-constrained JSON (structured_output.py)
+- Streaming JSON: fields/items reported as they close, corrupt output aborted early (streaming_json.py)
 - Per-agent model configuration (plug-and-play)
 
 Usage:
@@ -43,6 +46,7 @@ import json
 import asyncio
 import time
 import copy
+import functools
 from typing import Dict, Any, Optional, List, Union, Callable, Awaitable, TYPE_CHECKING
 import httpx
 from dataclasses import dataclass, field
@@ -55,6 +59,15 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 
 from app.utils.logging_config import get_logger
+from app.services.llm_cache import get_llm_cache
+from app.services.llm_rate_limiter import (
+    estimate_tokens,
+    get_llm_rate_limiter,
+    is_rate_limit_error,
+    request_priority,
+)
+from app.services.streaming_json import StreamingJSONError
+from app.services.structured_output import anthropic_tool, is_schema_rejection, openai_response_format
 
 logger = get_logger("gamed_ai.services.llm_service")
 
@@ -62,6 +75,7 @@ logger = get_logger("gamed_ai.services.llm_service")
 if TYPE_CHECKING:
     from app.config.agent_models import AgentModelConfig
     from app.config.models import ModelConfig, ModelProvider
+    from app.services.streaming_json import IncrementalJSONParser, JSONEvent
 
 
 @dataclass
@@ -73,6 +87,11 @@ class LLMResponse:
     output_tokens: int = 0
     total_tokens: int = 0
     latency_ms: int = 0
+    # Served from the response cache (tokens are zero on cache hits)
+    cached: bool = False
+    cache_key: Optional[str] = None
+    # Output was constrained to a response_schema by the provider (see structured_output.py)
+    structured: bool = False
     # Raw Gemini Content object for thought signature preservation (Gemini 3+)
     # This should be passed back in multi-turn conversations to maintain reasoning context
     _raw_gemini_content: Any = None
@@ -108,11 +127,14 @@ class Tool:
         description: Human-readable description of what the tool does
         parameters: JSON Schema describing the tool's parameters
         function: Async callable that executes the tool
+        parallel_safe: Whether the tool may run concurrently with other calls
+            from the same turn (set False for tools with side effects)
     """
     name: str
     description: str
     parameters: Dict[str, Any]  # JSON Schema
     function: Callable[..., Awaitable[Any]]
+    parallel_safe: bool = True
 
     def to_openai_format(self) -> Dict[str, Any]:
         """Convert to OpenAI function calling format"""
@@ -270,6 +292,38 @@ StreamCallback = Callable[[StreamingChunk], Awaitable[None]]
 StepCallback = Callable[[LiveStepEvent], Awaitable[None]]
 
 
+# Transient error patterns that should trigger a tool retry
+_TRANSIENT_TOOL_ERRORS = [
+    "timeout",
+    "rate limit",
+    "429",
+    "503",
+    "502",
+    "504",
+    "connection",
+    "temporary",
+    "retry",
+    "unavailable",
+]
+
+
+def _is_transient_tool_error(error: str) -> bool:
+    """Check if a tool error is likely transient and worth retrying."""
+    error_lower = error.lower()
+    return any(pattern in error_lower for pattern in _TRANSIENT_TOOL_ERRORS)
+
+
+def _with_agent_priority(method):
+    """Queue an *_for_agent call's provider requests at the agent's priority."""
+    @functools.wraps(method)
+    async def wrapper(self, agent_name: str, *args, **kwargs):
+        from app.config.agent_models import get_runtime_config
+
+        with request_priority(get_runtime_config().get_priority(agent_name)):
+            return await method(self, agent_name, *args, **kwargs)
+    return wrapper
+
+
 class LLMService:
     """
     Async LLM service supporting OpenAI, Anthropic, Google Gemini, Groq, and Ollama.
@@ -294,6 +348,9 @@ class LLMService:
     # Ollama API base URL (OpenAI-compatible)
     OLLAMA_BASE_URL = "http://localhost:11434/v1"
 
+    # Max tool calls from one LLM turn executed concurrently (1 = sequential)
+    DEFAULT_TOOL_CONCURRENCY = 4
+
     def __init__(
         self,
         openai_api_key: Optional[str] = None,
@@ -308,6 +365,7 @@ class LLMService:
         prefer_ollama: bool = False
     ):
         self.retry_config = retry_config or RetryConfig()
+        self.tool_concurrency = max(1, int(os.getenv("LLM_TOOL_CONCURRENCY", str(self.DEFAULT_TOOL_CONCURRENCY))))
         self.prefer_anthropic = prefer_anthropic
         self.prefer_gemini = prefer_gemini
         self.prefer_groq = prefer_groq
@@ -397,11 +455,22 @@ class LLMService:
         use_anthropic: Optional[bool] = None,
         use_gemini: Optional[bool] = None,
         use_groq: Optional[bool] = None,
-        use_ollama: Optional[bool] = None
+        use_ollama: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        stream_callback: Optional["StreamCallback"] = None
     ) -> LLMResponse:
         """
         Generate text from an LLM.
 
+        Identical requests are served from the response cache (see
+        llm_cache.py) unless use_cache is False or the cache is disabled.
+        With response_schema, registry models on providers that support it
+        return JSON constrained to the schema (response.structured is True).
+        With stream_callback, the text is passed to it as it is generated
+        (cache hits and providers without a streaming call pass it in one
+        chunk); the callback may raise StreamingJSONError to abort.
+
         Args:
             prompt: User prompt
             system_prompt: Optional system prompt
@@ -410,146 +479,289 @@ class LLMService:
             max_tokens: Maximum output tokens
             use_anthropic: Force Anthropic (None = use preference)
             use_groq: Force Groq (None = use preference)
+            use_cache: Read/write the response cache (None = cache default)
+            response_schema: JSON schema for provider-native structured output
+            stream_callback: Receives StreamingChunks while the response is generated
 
         Returns:
             LLMResponse with content and metadata
         """
-        import time
         start_time = time.time()
 
-        # Determine which client to use
-        from app.config.models import MODEL_REGISTRY, ModelProvider
-        
-        # If model is specified and in registry, use its provider
-        if model and model in MODEL_REGISTRY:
-            config = MODEL_REGISTRY[model]
-            if config.provider == ModelProvider.GOOGLE and self.gemini_client:
-                response = await self._call_gemini(
-                    prompt, system_prompt, config.model_id, temperature, max_tokens
-                )
-            elif config.provider == ModelProvider.GROQ and self.groq_client:
-                response = await self._call_groq(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif config.provider == ModelProvider.LOCAL and self.ollama_client:
-                response = await self._call_ollama(
-                    prompt, system_prompt, model, temperature, max_tokens
+        cache = get_llm_cache() if use_cache is not False else None
+        cache_key = None
+        if cache:
+            provider = self._resolve_cache_provider(
+                model, use_anthropic, use_gemini, use_groq, use_ollama
+            )
+            cache_key = cache.make_key(
+                provider, model, system_prompt, prompt, temperature, max_tokens, response_schema
+            )
+            try:
+                cached = await asyncio.to_thread(cache.get, cache_key)
+            except Exception as e:
+                logger.warning(f"LLM cache lookup failed: {e}")
+                cached = None
+            if cached is not None:
+                logger.debug(f"LLM cache hit for model={cached.get('model')} key={cache_key[:12]}")
+                if stream_callback:
+                    try:
+                        await self._replay_stream(cached["content"], stream_callback)
+                    except StreamingJSONError:
+                        await self._invalidate_cached_response(LLMResponse(content="", model="", cache_key=cache_key))
+                        raise
+                # Tokens are reported as zero so stage cost reflects what was actually paid
+                return LLMResponse(
+                    content=cached["content"],
+                    model=cached.get("model") or model or "",
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    cached=True,
+                    cache_key=cache_key,
+                    structured=bool(cached.get("structured"))
                 )
-            elif config.provider == ModelProvider.ANTHROPIC and self.anthropic_client:
-                response = await self._call_anthropic(
-                    prompt, system_prompt, model, temperature, max_tokens
+
+        response = await self._generate_uncached(
+            prompt, system_prompt, model, temperature, max_tokens,
+            use_anthropic, use_gemini, use_groq, use_ollama, response_schema, stream_callback
+        )
+
+        if cache and response.content:
+            response.cache_key = cache_key
+            try:
+                await asyncio.to_thread(cache.put, cache_key, {
+                    "content": response.content,
+                    "model": response.model,
+                    "input_tokens": response.input_tokens,
+                    "output_tokens": response.output_tokens,
+                    "structured": response.structured,
+                })
+            except Exception as e:
+                logger.warning(f"LLM cache store failed: {e}")
+
+        response.latency_ms = int((time.time() - start_time) * 1000)
+        return response
+
+    def _resolve_cache_provider(
+        self,
+        model: Optional[str],
+        use_anthropic: Optional[bool],
+        use_gemini: Optional[bool],
+        use_groq: Optional[bool],
+        use_ollama: Optional[bool]
+    ) -> str:
+        """Provider component of the cache key (registry provider, else routing flags)."""
+        from app.config.models import MODEL_REGISTRY
+
+        if model and model in MODEL_REGISTRY:
+            return MODEL_REGISTRY[model].provider.value
+        flags = {
+            "ollama": use_ollama if use_ollama is not None else self.prefer_ollama,
+            "google": use_gemini if use_gemini is not None else self.prefer_gemini,
+            "groq": use_groq if use_groq is not None else self.prefer_groq,
+            "anthropic": use_anthropic if use_anthropic is not None else self.prefer_anthropic,
+        }
+        return next((name for name, enabled in flags.items() if enabled), "default")
+
+    async def _replay_stream(self, content: str, stream_callback: "StreamCallback") -> None:
+        """Pass an already complete response to a stream callback as one chunk."""
+        await stream_callback(StreamingChunk(content=content, accumulated_content=content))
+        await stream_callback(StreamingChunk(content="", is_final=True, accumulated_content=content))
+
+    async def _invalidate_cached_response(self, response: LLMResponse) -> None:
+        """Drop a cached response that turned out to be unusable (e.g. bad JSON)."""
+        cache = get_llm_cache()
+        if cache and response.cache_key:
+            try:
+                await asyncio.to_thread(cache.invalidate, response.cache_key)
+            except Exception as e:
+                logger.warning(f"LLM cache invalidation failed: {e}")
+
+    async def _generate_uncached(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        use_anthropic: Optional[bool],
+        use_gemini: Optional[bool],
+        use_groq: Optional[bool],
+        use_ollama: Optional[bool],
+        response_schema: Optional[Dict[str, Any]] = None,
+        stream_callback: Optional["StreamCallback"] = None
+    ) -> LLMResponse:
+        """
+        Provider dispatch for generate() (no caching).
+
+        Registry models go through the latency-aware router (llm_router.py),
+        which may hedge or fail over to an equivalent model; anything else
+        falls back to the provider flags (without native structured output).
+        Streamed calls go straight to the provider's streaming method: a
+        hedge or failover would feed the callback a second response.
+        """
+        start_time = time.time()
+
+        from app.config.models import MODEL_REGISTRY, resolve_model_key
+        from app.services.llm_router import get_llm_router
+
+        model_key = resolve_model_key(model)
+        router = get_llm_router()
+        streaming_call = self._streaming_call(model_key) if stream_callback else None
+
+        if streaming_call:
+            from app.services.structured_output import supports_native
+
+            provider = MODEL_REGISTRY[model_key].provider.value
+            kwargs = {"response_schema": response_schema} if supports_native(provider, response_schema) else {}
+            response = await streaming_call(
+                prompt, system_prompt, MODEL_REGISTRY[model_key].model_id, temperature, max_tokens,
+                stream_callback=stream_callback, **kwargs
+            )
+        elif model_key and self._provider_client(MODEL_REGISTRY[model_key].provider):
+            async def call(key: str) -> LLMResponse:
+                return await self._call_registry_model(
+                    key, prompt, system_prompt, temperature, max_tokens, response_schema
                 )
-            elif config.provider == ModelProvider.OPENAI and self.openai_client:
-                response = await self._call_openai(
-                    prompt, system_prompt, model, temperature, max_tokens
+
+            if router:
+                response = await router.route(
+                    model_key,
+                    call,
+                    is_available=lambda key: self._provider_client(MODEL_REGISTRY[key].provider) is not None,
+                    max_tokens=max_tokens,
                 )
             else:
-                # Fallback to flag-based logic
-                use_anthropic = use_anthropic if use_anthropic is not None else self.prefer_anthropic
-                use_gemini = use_gemini if use_gemini is not None else self.prefer_gemini
-                use_groq = use_groq if use_groq is not None else self.prefer_groq
-                use_ollama = use_ollama if use_ollama is not None else self.prefer_ollama
-
-                # NOTE: Removed USE_OLLAMA env override here - it was causing Gemini models to route to Ollama
-                # Provider should be determined by model configuration, not global env flag
-
-                if use_ollama and self.ollama_client:
-                    response = await self._call_ollama(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif use_gemini and self.gemini_client:
-                    response = await self._call_gemini(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif use_groq and self.groq_client:
-                    response = await self._call_groq(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif use_anthropic and self.anthropic_client:
-                    response = await self._call_anthropic(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif self.openai_client:
-                    response = await self._call_openai(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif self.gemini_client:
-                    # Fallback to Gemini if available
-                    response = await self._call_gemini(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif self.ollama_client:
-                    # Fallback to Ollama if available (LOCAL! - prioritize when USE_OLLAMA=true)
-                    response = await self._call_ollama(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif self.groq_client:
-                    # Fallback to Groq if available (FREE!)
-                    response = await self._call_groq(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                elif self.anthropic_client:
-                    response = await self._call_anthropic(
-                        prompt, system_prompt, model, temperature, max_tokens
-                    )
-                else:
-                    raise ValueError("No LLM client available. Configure USE_OLLAMA=true (local), GOOGLE_API_KEY, GROQ_API_KEY (free!), OPENAI_API_KEY, or ANTHROPIC_API_KEY.")
+                response = await call(model_key)
         else:
-            # No model specified or model not in registry, use flag-based logic
-            use_anthropic = use_anthropic if use_anthropic is not None else self.prefer_anthropic
-            use_gemini = use_gemini if use_gemini is not None else self.prefer_gemini
-            use_groq = use_groq if use_groq is not None else self.prefer_groq
-            use_ollama = use_ollama if use_ollama is not None else self.prefer_ollama
-
-            # NOTE: Removed USE_OLLAMA env override here - it was causing Gemini models to route to Ollama
-            # Provider should be determined by model configuration, not global env flag
-            # The USE_OLLAMA flag is now only used for initializing the Ollama client at startup
-
-            if use_ollama and self.ollama_client:
-                response = await self._call_ollama(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif use_gemini and self.gemini_client:
-                response = await self._call_gemini(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif use_groq and self.groq_client:
-                response = await self._call_groq(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif use_anthropic and self.anthropic_client:
-                response = await self._call_anthropic(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif self.openai_client:
-                response = await self._call_openai(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif self.gemini_client:
-                # Fallback to Gemini if available
-                response = await self._call_gemini(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif self.ollama_client:
-                # Fallback to Ollama if available (LOCAL! - prioritize when USE_OLLAMA=true)
-                response = await self._call_ollama(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif self.groq_client:
-                # Fallback to Groq if available (FREE!)
-                response = await self._call_groq(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            elif self.anthropic_client:
-                response = await self._call_anthropic(
-                    prompt, system_prompt, model, temperature, max_tokens
-                )
-            else:
-                raise ValueError("No LLM client available. Configure USE_OLLAMA=true (local), GOOGLE_API_KEY, GROQ_API_KEY (free!), OPENAI_API_KEY, or ANTHROPIC_API_KEY.")
+            response = await self._generate_by_flags(
+                prompt, system_prompt, model, temperature, max_tokens,
+                use_anthropic, use_gemini, use_groq, use_ollama
+            )
+
+        if stream_callback and not streaming_call:
+            await self._replay_stream(response.content or "", stream_callback)
 
         response.latency_ms = int((time.time() - start_time) * 1000)
         return response
 
+    def _streaming_call(self, model_key: Optional[str]) -> Optional[Callable[..., Awaitable[LLMResponse]]]:
+        """Streaming method for a registry model's provider (None if it has none or no client)."""
+        from app.config.models import MODEL_REGISTRY, ModelProvider
+
+        if not model_key:
+            return None
+        provider = MODEL_REGISTRY[model_key].provider
+        if not self._provider_client(provider):
+            return None
+        return {
+            ModelProvider.GOOGLE: self._call_gemini_streaming,
+            ModelProvider.GROQ: self._call_groq_streaming,
+            ModelProvider.LOCAL: self._call_ollama_streaming,
+        }.get(provider)
+
+    def _provider_client(self, provider: "ModelProvider") -> Optional[Any]:
+        """Initialized client for a registry provider (None if not configured)."""
+        from app.config.models import ModelProvider
+
+        return {
+            ModelProvider.GOOGLE: self.gemini_client,
+            ModelProvider.GROQ: self.groq_client,
+            ModelProvider.LOCAL: self.ollama_client,
+            ModelProvider.ANTHROPIC: self.anthropic_client,
+            ModelProvider.OPENAI: self.openai_client,
+        }.get(provider)
+
+    async def _call_registry_model(
+        self,
+        model_key: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> LLMResponse:
+        """Call a MODEL_REGISTRY model on its own provider (schema only where supported)."""
+        from app.config.models import MODEL_REGISTRY, ModelProvider
+        from app.services.structured_output import supports_native
+
+        config = MODEL_REGISTRY[model_key]
+        call = {
+            ModelProvider.GOOGLE: self._call_gemini,
+            ModelProvider.GROQ: self._call_groq,
+            ModelProvider.LOCAL: self._call_ollama,
+            ModelProvider.ANTHROPIC: self._call_anthropic,
+            ModelProvider.OPENAI: self._call_openai,
+        }[config.provider]
+        if supports_native(config.provider.value, response_schema):
+            return await call(
+                prompt, system_prompt, config.model_id, temperature, max_tokens, response_schema=response_schema
+            )
+        return await call(prompt, system_prompt, config.model_id, temperature, max_tokens)
+
+    async def _generate_by_flags(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        use_anthropic: Optional[bool],
+        use_gemini: Optional[bool],
+        use_groq: Optional[bool],
+        use_ollama: Optional[bool]
+    ) -> LLMResponse:
+        """Pick a provider from the use_* flags / preferences, then any configured client."""
+        use_anthropic = use_anthropic if use_anthropic is not None else self.prefer_anthropic
+        use_gemini = use_gemini if use_gemini is not None else self.prefer_gemini
+        use_groq = use_groq if use_groq is not None else self.prefer_groq
+        use_ollama = use_ollama if use_ollama is not None else self.prefer_ollama
+
+        # NOTE: Removed USE_OLLAMA env override here - it was causing Gemini models to route to Ollama
+        # Provider should be determined by model configuration, not global env flag
+        # The USE_OLLAMA flag is now only used for initializing the Ollama client at startup
+
+        if use_ollama and self.ollama_client:
+            return await self._call_ollama(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif use_gemini and self.gemini_client:
+            return await self._call_gemini(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif use_groq and self.groq_client:
+            return await self._call_groq(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif use_anthropic and self.anthropic_client:
+            return await self._call_anthropic(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif self.openai_client:
+            return await self._call_openai(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif self.gemini_client:
+            # Fallback to Gemini if available
+            return await self._call_gemini(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif self.ollama_client:
+            # Fallback to Ollama if available (LOCAL! - prioritize when USE_OLLAMA=true)
+            return await self._call_ollama(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif self.groq_client:
+            # Fallback to Groq if available (FREE!)
+            return await self._call_groq(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        elif self.anthropic_client:
+            return await self._call_anthropic(
+                prompt, system_prompt, model, temperature, max_tokens
+            )
+        else:
+            raise ValueError("No LLM client available. Configure USE_OLLAMA=true (local), GOOGLE_API_KEY, GROQ_API_KEY (free!), OPENAI_API_KEY, or ANTHROPIC_API_KEY.")
+
     async def generate_json(
         self,
         prompt: str,
@@ -602,6 +814,7 @@ class LLMService:
                 except json.JSONDecodeError:
                     pass
 
+            await self._invalidate_cached_response(response)
             logger.error(
                 "Failed to parse JSON response",
                 exc_info=True,
@@ -611,6 +824,7 @@ class LLMService:
             )
             raise ValueError(f"LLM response was not valid JSON: {e}")
 
+    @_with_agent_priority
     async def generate_for_agent(
         self,
         agent_name: str,
@@ -641,6 +855,7 @@ class LLMService:
         model_key = config.get_model(agent_name)
         temperature = config.get_temperature(agent_name)
         max_tokens = config.get_max_tokens(agent_name)
+        kwargs.setdefault("use_cache", config.is_cache_enabled(agent_name))
 
         model_config = MODEL_REGISTRY.get(model_key)
         if not model_config:
@@ -677,20 +892,31 @@ class LLMService:
             **kwargs
         )
 
+    @_with_agent_priority
     async def generate_json_for_agent(
         self,
         agent_name: str,
         prompt: str,
         system_prompt: Optional[str] = None,
         schema_hint: Optional[str] = None,
-        json_schema: Optional[Dict[str, Any]] = None,
+        json_schema: Optional[Any] = None,
         max_json_retries: int = 3,
+        on_json_event: Optional[Callable[["JSONEvent"], Awaitable[None]]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Generate and parse JSON using agent-specific model configuration.
 
         Enhanced with:
+        - Provider-native structured output when json_schema is given
+          (structured_output.py), falling back to prompted JSON
+        - Streaming (agents enabled by LLM_STREAM_JSON): output is parsed
+          incrementally (streaming_json.py), completed top-level fields and
+          array items go to on_json_event as they close, and structurally
+          corrupt output - or an event the callback rejects by raising
+          StreamingJSONError - aborts the generation and re-prompts with the
+          error. Streamed calls skip the router (no hedging or failover), so
+          other agents get on_json_event on the complete response instead
         - Multi-stage JSON repair for malformed output
         - Retry with error feedback for persistent failures
         - Detailed logging for debugging
@@ -700,7 +926,9 @@ class LLMService:
             prompt: User prompt
             system_prompt: Optional system prompt
             schema_hint: Description of expected JSON schema
+            json_schema: Pydantic model class, type or JSON schema dict for the output
             max_json_retries: Max retries for JSON parsing failures
+            on_json_event: Async callback for each JSONEvent while streaming
             **kwargs: Additional args
 
         Returns:
@@ -708,6 +936,13 @@ class LLMService:
         """
         # Import JSON repair module
         from app.services.json_repair import repair_json, JSONRepairError, get_error_context
+        from app.services.streaming_json import IncrementalJSONParser, json_streaming_enabled
+        from app.services.structured_output import (
+            get_structured_output_stats,
+            is_schema_rejection,
+            resolve_json_schema,
+            use_native_structured_output,
+        )
 
         # Import model config
         from app.config.models import MODEL_REGISTRY, ModelProvider
@@ -717,6 +952,8 @@ class LLMService:
         model_key = config.get_model(agent_name)
         temperature = config.get_temperature(agent_name)
         max_tokens = config.get_max_tokens(agent_name)
+        kwargs.setdefault("use_cache", config.is_cache_enabled(agent_name))
+        json_schema = resolve_json_schema(json_schema)
 
         model_config = MODEL_REGISTRY.get(model_key)
         if not model_config:
@@ -776,7 +1013,15 @@ class LLMService:
             except Exception as e:
                 logger.warning(f"SGLang guided decoding failed, falling back to standard JSON: {e}")
 
-        for attempt in range(max_json_retries):
+        structured_stats = get_structured_output_stats()
+        native = use_native_structured_output(model_key, model_config.provider.value, json_schema)
+        attempts = 0
+        stream_json = json_streaming_enabled(agent_name)
+        stream_aborts = 0
+
+        attempt = -1
+        while attempt + 1 < max_json_retries:
+            attempt += 1
             logger.info(
                 f"JSON gen attempt {attempt + 1}/{max_json_retries} "
                 f"agent={agent_name} model={model_config.model_id} max_tok={max_tokens}"
@@ -791,6 +1036,9 @@ class LLMService:
                     attempt=attempt
                 )
 
+            parser = IncrementalJSONParser() if stream_json or on_json_event else None
+            stream_callback = self._json_stream_callback(parser, on_json_event, attempt + 1) if parser else None
+
             try:
                 response = await self.generate(
                     prompt=current_prompt,
@@ -802,8 +1050,18 @@ class LLMService:
                     use_gemini=use_gemini,
                     use_groq=use_groq,
                     use_ollama=use_ollama,
+                    response_schema=json_schema if native else None,
+                    stream_callback=stream_callback if stream_json else None,
                     **kwargs
                 )
+                if parser and not stream_json:
+                    # Routed (unstreamed) call: run the same checks on the complete output
+                    try:
+                        await self._replay_stream(response.content or "", stream_callback)
+                    except StreamingJSONError:
+                        await self._invalidate_cached_response(response)
+                        raise
+                attempts += 1
 
                 content = response.content.strip() if response.content else ""
 
@@ -824,6 +1082,7 @@ class LLMService:
                         logger.warning(
                             f"Agent '{agent_name}' JSON was repaired: {repair_log}"
                         )
+                    structured_stats.record(agent_name, response.structured, attempts, was_repaired, ok=True)
 
                     logger.info(
                         "JSON parsed successfully",
@@ -842,10 +1101,16 @@ class LLMService:
                         "latency_ms": response.latency_ms,
                         "prompt_preview": prompt_preview,
                         "response_preview": response_preview,
+                        "structured_output": "native" if response.structured else "prompted",
+                        "json_attempts": attempts,
+                        "json_repaired": was_repaired,
                     }
+                    if parser:
+                        result["_llm_metrics"]["json_stream_aborts"] = stream_aborts
                     return result
 
                 except JSONRepairError as e:
+                    await self._invalidate_cached_response(response)
                     last_error = str(e.original_error)
                     last_error_context = get_error_context(content, e.position)
 
@@ -855,7 +1120,27 @@ class LLMService:
                     )
                     logger.debug(f"Error context: {last_error_context}")
 
+            except StreamingJSONError as e:
+                # Corrupt or rejected output caught mid-stream: re-prompt now rather than at max_tokens
+                attempts += 1
+                stream_aborts += 1
+                last_error = e.message
+                last_error_context = get_error_context(parser.text, e.position) if e.position >= 0 else None
+                logger.warning(
+                    f"Agent '{agent_name}' output aborted mid-stream on attempt {attempt + 1} "
+                    f"after {len(parser.text)} chars: {last_error}"
+                )
+
             except Exception as e:
+                if native and is_schema_rejection(e):
+                    # Schema refused by the provider, not a bad answer: redo this attempt unconstrained
+                    # without spending one of max_json_retries (native is now off, so this happens once).
+                    # Blame the model that actually served the call (the router may have used an equivalent)
+                    served_key = getattr(e, "routed_model_key", None) or model_key
+                    structured_stats.record_fallback(agent_name, served_key, e, json_schema)
+                    native = False
+                    attempt -= 1
+                    continue
                 logger.error(
                     f"Agent '{agent_name}' LLM call failed on attempt {attempt + 1}: {e}",
                     exc_info=True
@@ -863,6 +1148,8 @@ class LLMService:
                 last_error = str(e)
                 last_error_context = None
 
+        structured_stats.record(agent_name, native, attempts, repaired=False, ok=False)
+
         # All retries exhausted
         error_msg = (
             f"Failed to generate valid JSON for agent '{agent_name}' after "
@@ -874,6 +1161,21 @@ class LLMService:
 
         raise ValueError(error_msg)
 
+    def _json_stream_callback(
+        self,
+        parser: "IncrementalJSONParser",
+        on_json_event: Optional[Callable[["JSONEvent"], Awaitable[None]]],
+        attempt: int
+    ) -> StreamCallback:
+        """Stream callback feeding one attempt's chunks to the parser and its events to on_json_event."""
+        async def on_chunk(chunk: StreamingChunk) -> None:
+            for event in parser.feed(chunk.content):
+                event.attempt = attempt
+                if on_json_event:
+                    await on_json_event(event)
+
+        return on_chunk
+
     async def _call_sglang_guided(
         self,
         prompt: str,
@@ -1009,7 +1311,8 @@ Make sure to:
         max_iterations: int = 10,
         mode: str = "single",
         tool_timeout: float = 60.0,
-        step_callback: Optional[StepCallback] = None
+        step_callback: Optional[StepCallback] = None,
+        tool_concurrency: Optional[int] = None
     ) -> ToolCallingResponse:
         """
         Generate with tool calling support.
@@ -1025,6 +1328,7 @@ Make sure to:
             mode: "single" (one LLM call + tools) or "react" (multi-step loop)
             tool_timeout: Timeout in seconds for tool execution
             step_callback: Optional callback for real-time ReAct step events
+            tool_concurrency: Max concurrent tool calls per turn (None = service default)
 
         Returns:
             ToolCallingResponse with content, tool calls, and metrics
@@ -1060,7 +1364,8 @@ Make sure to:
                 provider=provider,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                tool_timeout=tool_timeout
+                tool_timeout=tool_timeout,
+                tool_concurrency=tool_concurrency
             )
         elif mode == "react":
             result = await self._generate_with_tools_react(
@@ -1073,7 +1378,8 @@ Make sure to:
                 max_tokens=max_tokens,
                 max_iterations=max_iterations,
                 tool_timeout=tool_timeout,
-                step_callback=step_callback
+                step_callback=step_callback,
+                tool_concurrency=tool_concurrency
             )
         else:
             raise ValueError(f"Unknown mode: {mode}. Use 'single' or 'react'.")
@@ -1081,6 +1387,7 @@ Make sure to:
         result.total_latency_ms = int((time.time() - start_time) * 1000)
         return result
 
+    @_with_agent_priority
     async def generate_with_tools_for_agent(
         self,
         agent_name: str,
@@ -1090,7 +1397,8 @@ Make sure to:
         max_iterations: int = 10,
         mode: str = "single",
         tool_timeout: float = 60.0,
-        step_callback: Optional[StepCallback] = None
+        step_callback: Optional[StepCallback] = None,
+        tool_concurrency: Optional[int] = None
     ) -> ToolCallingResponse:
         """
         Generate with tools using agent-specific model configuration.
@@ -1104,6 +1412,7 @@ Make sure to:
             mode: "single" or "react"
             tool_timeout: Timeout for tool execution
             step_callback: Optional callback for real-time ReAct step events
+            tool_concurrency: Max concurrent tool calls per turn (None = service default)
 
         Returns:
             ToolCallingResponse with full interaction details
@@ -1125,7 +1434,8 @@ Make sure to:
             max_iterations=max_iterations,
             mode=mode,
             tool_timeout=tool_timeout,
-            step_callback=step_callback
+            step_callback=step_callback,
+            tool_concurrency=tool_concurrency
         )
 
     async def _generate_with_tools_single(
@@ -1137,7 +1447,8 @@ Make sure to:
         provider: "ModelProvider",
         temperature: float,
         max_tokens: int,
-        tool_timeout: float
+        tool_timeout: float,
+        tool_concurrency: Optional[int] = None
     ) -> ToolCallingResponse:
         """
         Single-shot tool calling: one LLM call, execute any tools, return.
@@ -1181,7 +1492,9 @@ Make sure to:
         # Execute tool calls if any
         tool_results = []
         if tool_calls:
-            tool_results = await self._execute_tools(tool_calls, tools, tool_timeout)
+            tool_results = await self._execute_tools(
+                tool_calls, tools, tool_timeout, concurrency=tool_concurrency
+            )
 
             # If we got tool results, make a final LLM call for the response
             if tool_results:
@@ -1247,7 +1560,8 @@ Make sure to:
         max_tokens: int,
         max_iterations: int,
         tool_timeout: float,
-        step_callback: Optional[StepCallback] = None
+        step_callback: Optional[StepCallback] = None,
+        tool_concurrency: Optional[int] = None
     ) -> ToolCallingResponse:
         """
         ReAct loop: Reason→Act→Observe until task complete or max iterations.
@@ -1440,7 +1754,9 @@ Make sure to:
                     ))
 
             # Execute tools
-            tool_results = await self._execute_tools(tool_calls, tools, tool_timeout)
+            tool_results = await self._execute_tools(
+                tool_calls, tools, tool_timeout, concurrency=tool_concurrency
+            )
             all_tool_calls.extend(tool_calls)
             all_tool_results.extend(tool_results)
 
@@ -1546,109 +1862,131 @@ Remember:
         tools: List[Tool],
         timeout: float,
         max_retries: int = 2,
-        retry_delay: float = 1.0
+        retry_delay: float = 1.0,
+        concurrency: Optional[int] = None
     ) -> List[ToolResult]:
         """
         Execute tool calls and return results with retry logic for transient failures.
 
+        Independent calls from the same turn run concurrently (up to
+        `concurrency` at a time). A call to a tool with parallel_safe=False
+        acts as a barrier: everything before it finishes first, and it runs
+        alone. Results are always returned in call order.
+
         Args:
             tool_calls: List of tool calls to execute
             tools: Available tools
             timeout: Timeout per tool call
             max_retries: Maximum retries for transient failures (default 2)
             retry_delay: Delay between retries in seconds (default 1.0)
+            concurrency: Max concurrent calls (None = service default, 1 = sequential)
         """
         tool_map = {t.name: t for t in tools}
-        results = []
-
-        # Transient error patterns that should trigger retry
-        TRANSIENT_ERRORS = [
-            "timeout",
-            "rate limit",
-            "429",
-            "503",
-            "502",
-            "504",
-            "connection",
-            "temporary",
-            "retry",
-            "unavailable",
-        ]
+        limit = max(1, concurrency if concurrency is not None else self.tool_concurrency)
+
+        if limit == 1 or len(tool_calls) <= 1:
+            return [
+                await self._execute_tool_call(tc, tool_map, timeout, max_retries, retry_delay)
+                for tc in tool_calls
+            ]
+
+        semaphore = asyncio.Semaphore(limit)
 
-        def is_transient_error(error: str) -> bool:
-            """Check if error is likely transient and worth retrying."""
-            error_lower = error.lower()
-            return any(pattern in error_lower for pattern in TRANSIENT_ERRORS)
+        async def run_limited(tc: ToolCall) -> ToolResult:
+            async with semaphore:
+                return await self._execute_tool_call(tc, tool_map, timeout, max_retries, retry_delay)
 
+        results: List[ToolResult] = []
+        batch: List[ToolCall] = []
         for tc in tool_calls:
-            start_time = time.time()
+            tool = tool_map.get(tc.name)
+            if tool is not None and not tool.parallel_safe:
+                if batch:
+                    results.extend(await asyncio.gather(*(run_limited(b) for b in batch)))
+                    batch = []
+                results.append(
+                    await self._execute_tool_call(tc, tool_map, timeout, max_retries, retry_delay)
+                )
+            else:
+                batch.append(tc)
+        if batch:
+            results.extend(await asyncio.gather(*(run_limited(b) for b in batch)))
 
-            if tc.name not in tool_map:
-                results.append(ToolResult(
-                    tool_call_id=tc.id,
-                    name=tc.name,
-                    result=None,
-                    status=ToolCallStatus.ERROR,
-                    error=f"Tool '{tc.name}' not found"
-                ))
-                continue
+        logger.debug(f"Executed {len(tool_calls)} tool calls (concurrency={limit})")
+        return results
 
-            tool = tool_map[tc.name]
-            last_error = None
+    async def _execute_tool_call(
+        self,
+        tc: ToolCall,
+        tool_map: Dict[str, Tool],
+        timeout: float,
+        max_retries: int,
+        retry_delay: float
+    ) -> ToolResult:
+        """Execute a single tool call with timeout and transient-error retries."""
+        start_time = time.time()
 
-            # Retry loop for transient failures
-            for attempt in range(max_retries + 1):
-                try:
-                    # Execute with timeout
-                    result = await asyncio.wait_for(
-                        tool.function(**tc.arguments),
-                        timeout=timeout
-                    )
+        if tc.name not in tool_map:
+            return ToolResult(
+                tool_call_id=tc.id,
+                name=tc.name,
+                result=None,
+                status=ToolCallStatus.ERROR,
+                error=f"Tool '{tc.name}' not found"
+            )
+
+        tool = tool_map[tc.name]
+        last_error = None
+
+        # Retry loop for transient failures
+        for attempt in range(max_retries + 1):
+            try:
+                # Execute with timeout
+                result = await asyncio.wait_for(
+                    tool.function(**tc.arguments),
+                    timeout=timeout
+                )
 
-                    results.append(ToolResult(
+                return ToolResult(
+                    tool_call_id=tc.id,
+                    name=tc.name,
+                    result=result,
+                    status=ToolCallStatus.SUCCESS,
+                    latency_ms=int((time.time() - start_time) * 1000)
+                )
+
+            except asyncio.TimeoutError:
+                last_error = f"Tool '{tc.name}' timed out after {timeout}s"
+                if attempt < max_retries:
+                    logger.warning(f"{last_error} (attempt {attempt + 1}/{max_retries + 1}), retrying...")
+                    await asyncio.sleep(retry_delay)
+                else:
+                    return ToolResult(
                         tool_call_id=tc.id,
                         name=tc.name,
-                        result=result,
-                        status=ToolCallStatus.SUCCESS,
+                        result=None,
+                        status=ToolCallStatus.TIMEOUT,
+                        error=last_error,
                         latency_ms=int((time.time() - start_time) * 1000)
-                    ))
-                    break  # Success, exit retry loop
-
-                except asyncio.TimeoutError:
-                    last_error = f"Tool '{tc.name}' timed out after {timeout}s"
-                    if attempt < max_retries:
-                        logger.warning(f"{last_error} (attempt {attempt + 1}/{max_retries + 1}), retrying...")
-                        await asyncio.sleep(retry_delay)
-                    else:
-                        results.append(ToolResult(
-                            tool_call_id=tc.id,
-                            name=tc.name,
-                            result=None,
-                            status=ToolCallStatus.TIMEOUT,
-                            error=last_error,
-                            latency_ms=int((time.time() - start_time) * 1000)
-                        ))
-
-                except Exception as e:
-                    last_error = str(e)
+                    )
 
-                    # Only retry if it looks like a transient error
-                    if attempt < max_retries and is_transient_error(last_error):
-                        logger.warning(f"Tool '{tc.name}' transient error: {last_error} (attempt {attempt + 1}/{max_retries + 1}), retrying...")
-                        await asyncio.sleep(retry_delay * (attempt + 1))  # Exponential backoff
-                    else:
-                        logger.error(f"Tool '{tc.name}' execution error: {e}", exc_info=True)
-                        results.append(ToolResult(
-                            tool_call_id=tc.id,
-                            name=tc.name,
-                            result=None,
-                            status=ToolCallStatus.ERROR,
-                            error=last_error,
-                            latency_ms=int((time.time() - start_time) * 1000)
-                        ))
-                        break  # Non-transient error, don't retry
+            except Exception as e:
+                last_error = str(e)
 
-        return results
+                # Only retry if it looks like a transient error
+                if attempt < max_retries and _is_transient_tool_error(last_error):
+                    logger.warning(f"Tool '{tc.name}' transient error: {last_error} (attempt {attempt + 1}/{max_retries + 1}), retrying...")
+                    await asyncio.sleep(retry_delay * (attempt + 1))  # Exponential backoff
+                else:
+                    logger.error(f"Tool '{tc.name}' execution error: {e}", exc_info=True)
+                    return ToolResult(
+                        tool_call_id=tc.id,
+                        name=tc.name,
+                        result=None,
+                        status=ToolCallStatus.ERROR,
+                        error=last_error,
+                        latency_ms=int((time.time() - start_time) * 1000)
+                    )
 
     def _format_tool_results_for_react(self, results: List[ToolResult]) -> str:
         """Format tool results for ReAct observation."""
@@ -1679,13 +2017,15 @@ Remember:
 
         openai_tools = [t.to_openai_format() for t in tools]
 
-        response = await self.openai_client.chat.completions.create(
-            model=model,
-            messages=messages,
-            tools=openai_tools if openai_tools else None,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        async with self._llm_slot("openai", model, max_tokens, messages, openai_tools) as slot:
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                tools=openai_tools if openai_tools else None,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            slot.settle(response.usage.total_tokens if response.usage else None)
 
         # Parse tool calls
         tool_calls = []
@@ -1754,12 +2094,14 @@ Remember:
                 "content": result_content
             })
 
-        response = await self.openai_client.chat.completions.create(
-            model=model,
-            messages=updated_messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        async with self._llm_slot("openai", model, max_tokens, updated_messages) as slot:
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=updated_messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            slot.settle(response.usage.total_tokens if response.usage else None)
 
         return LLMResponse(
             content=response.choices[0].message.content or "",
@@ -1831,14 +2173,16 @@ Remember:
             else:
                 user_messages.append(msg)
 
-        response = await self.anthropic_client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            system=system_prompt,
-            messages=user_messages,
-            tools=anthropic_tools if anthropic_tools else None,
-            temperature=temperature
-        )
+        async with self._llm_slot("anthropic", model, max_tokens, system_prompt, user_messages, anthropic_tools) as slot:
+            response = await self.anthropic_client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                messages=user_messages,
+                tools=anthropic_tools if anthropic_tools else None,
+                temperature=temperature
+            )
+            slot.settle((response.usage.input_tokens + response.usage.output_tokens) if response.usage else None)
 
         # Parse response content and tool calls
         text_content = ""
@@ -1915,13 +2259,15 @@ Remember:
             "content": tool_result_content
         })
 
-        response = await self.anthropic_client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            system=system_prompt,
-            messages=user_messages,
-            temperature=temperature
-        )
+        async with self._llm_slot("anthropic", model, max_tokens, system_prompt, user_messages) as slot:
+            response = await self.anthropic_client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                messages=user_messages,
+                temperature=temperature
+            )
+            slot.settle((response.usage.input_tokens + response.usage.output_tokens) if response.usage else None)
 
         text_content = ""
         for block in response.content:
@@ -2102,12 +2448,14 @@ Remember:
             config.system_instruction = system_instruction
 
         # Run synchronous Gemini call in thread pool to avoid blocking event loop
-        response = await asyncio.to_thread(
-            self.gemini_client.models.generate_content,
-            model=model,
-            contents=contents,
-            config=config
-        )
+        async with self._llm_slot("google", model, max_tokens, system_instruction, contents, gemini_tools) as slot:
+            response = await asyncio.to_thread(
+                self.gemini_client.models.generate_content,
+                model=model,
+                contents=contents,
+                config=config
+            )
+            slot.settle(getattr(response.usage_metadata, "total_token_count", None) if getattr(response, "usage_metadata", None) else None)
 
         # Parse response - handle both text and function_call parts
         text_content = ""
@@ -2242,12 +2590,14 @@ Remember:
             config.system_instruction = system_instruction
 
         # Run synchronous Gemini call in thread pool
-        response = await asyncio.to_thread(
-            self.gemini_client.models.generate_content,
-            model=model,
-            contents=contents,
-            config=config
-        )
+        async with self._llm_slot("google", model, max_tokens, system_instruction, contents) as slot:
+            response = await asyncio.to_thread(
+                self.gemini_client.models.generate_content,
+                model=model,
+                contents=contents,
+                config=config
+            )
+            slot.settle(getattr(response.usage_metadata, "total_token_count", None) if getattr(response, "usage_metadata", None) else None)
 
         # Parse response
         text_content = ""
@@ -2391,13 +2741,43 @@ Remember:
     # Original provider methods (without tools)
     # ========================================================================
 
+    def _llm_slot(self, provider: str, model: Optional[str], max_tokens: int, *inputs: Any):
+        """Shared rate-limiter slot for one provider call, sized from its inputs."""
+        return get_llm_rate_limiter().slot(
+            provider, model, estimate_tokens(*inputs, max_tokens=max_tokens)
+        )
+
+    def _response_format_kwargs(self, response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """response_format for OpenAI-compatible clients when output is schema-constrained."""
+        if response_schema is None:
+            return {}
+        return {"response_format": openai_response_format(response_schema)}
+
+    async def _retry_backoff(self, provider: str, model: Optional[str], error: Exception, delay: float) -> None:
+        """
+        Wait before retrying a failed provider call.
+
+        Throttle errors pause the shared limiter rather than sleeping locally,
+        so every queued call to the model backs off together; a server retry
+        hint (already applied by the slot) replaces the exponential delay.
+        """
+        limiter = get_llm_rate_limiter()
+        if limiter.enabled:
+            if limiter.paused_for(provider, model) > 0:
+                return
+            if is_rate_limit_error(error):
+                limiter.pause(provider, model, delay)
+                return
+        await asyncio.sleep(delay)
+
     async def _call_openai(
         self,
         prompt: str,
         system_prompt: Optional[str],
         model: Optional[str],
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """Call OpenAI API with retry logic"""
         if not self.openai_client:
@@ -2418,27 +2798,34 @@ Remember:
 
         for attempt in range(self.retry_config.max_retries):
             try:
-                response = await self.openai_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
+                async with self._llm_slot("openai", model, max_tokens, system_prompt, prompt) as slot:
+                    response = await self.openai_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **self._response_format_kwargs(response_schema)
+                    )
 
-                return LLMResponse(
-                    content=response.choices[0].message.content,
-                    model=model,
-                    input_tokens=response.usage.prompt_tokens if response.usage else 0,
-                    output_tokens=response.usage.completion_tokens if response.usage else 0,
-                    total_tokens=response.usage.total_tokens if response.usage else 0
-                )
+                    slot.settle(response.usage.total_tokens if response.usage else None)
+
+                    return LLMResponse(
+                        content=response.choices[0].message.content,
+                        model=model,
+                        input_tokens=response.usage.prompt_tokens if response.usage else 0,
+                        output_tokens=response.usage.completion_tokens if response.usage else 0,
+                        total_tokens=response.usage.total_tokens if response.usage else 0,
+                        structured=response_schema is not None
+                    )
 
             except Exception as e:
                 last_error = e
                 logger.warning(f"OpenAI attempt {attempt + 1} failed: {e}")
+                if response_schema is not None and is_schema_rejection(e):
+                    break
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("openai", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -2452,7 +2839,8 @@ Remember:
         system_prompt: Optional[str],
         model: Optional[str],
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """Call Anthropic API with retry logic"""
         if not self.anthropic_client:
@@ -2468,37 +2856,58 @@ Remember:
 
         for attempt in range(self.retry_config.max_retries):
             try:
-                response = await self.anthropic_client.messages.create(
-                    model=model,
-                    max_tokens=max_tokens,
-                    system=system_prompt or "",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=temperature
-                )
+                async with self._llm_slot("anthropic", model, max_tokens, system_prompt, prompt) as slot:
+                    structured_kwargs = {}
+                    if response_schema is not None:
+                        # Tool-forced output: the single tool's input is the JSON result
+                        tool = anthropic_tool(response_schema)
+                        structured_kwargs = {"tools": [tool], "tool_choice": {"type": "tool", "name": tool["name"]}}
+                    response = await self.anthropic_client.messages.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        system=system_prompt or "",
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        **structured_kwargs
+                    )
 
-                logger.debug(
-                    f"Anthropic response: model={model}, stop_reason={response.stop_reason}, "
-                    f"output_tokens={response.usage.output_tokens if response.usage else '?'}, "
-                    f"content_len={len(response.content[0].text) if response.content else 0}"
-                )
+                    if response_schema is not None:
+                        tool_input = next(
+                            (block.input for block in response.content if getattr(block, "type", None) == "tool_use"),
+                            None
+                        )
+                        content = json.dumps(tool_input) if tool_input is not None else ""
+                    else:
+                        content = response.content[0].text
 
-                return LLMResponse(
-                    content=response.content[0].text,
-                    model=model,
-                    input_tokens=response.usage.input_tokens if response.usage else 0,
-                    output_tokens=response.usage.output_tokens if response.usage else 0,
-                    total_tokens=(
-                        (response.usage.input_tokens + response.usage.output_tokens)
-                        if response.usage else 0
+                    logger.debug(
+                        f"Anthropic response: model={model}, stop_reason={response.stop_reason}, "
+                        f"output_tokens={response.usage.output_tokens if response.usage else '?'}, "
+                        f"content_len={len(content) if response.content else 0}"
+                    )
+
+                    slot.settle((response.usage.input_tokens + response.usage.output_tokens) if response.usage else None)
+
+                    return LLMResponse(
+                        content=content,
+                        model=model,
+                        input_tokens=response.usage.input_tokens if response.usage else 0,
+                        output_tokens=response.usage.output_tokens if response.usage else 0,
+                        total_tokens=(
+                            (response.usage.input_tokens + response.usage.output_tokens)
+                            if response.usage else 0
+                        ),
+                        structured=response_schema is not None
                     )
-                )
 
             except Exception as e:
                 last_error = e
                 logger.warning(f"Anthropic attempt {attempt + 1} failed: {e}")
+                if response_schema is not None and is_schema_rejection(e):
+                    break
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("anthropic", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -2512,7 +2921,8 @@ Remember:
         system_prompt: Optional[str],
         model: Optional[str],
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """Call Google Gemini API with retry logic"""
         if not self.gemini_client:
@@ -2535,54 +2945,65 @@ Remember:
             try:
                 from google.genai import types
 
-                # Generate content
-                response = self.gemini_client.models.generate_content(
-                    model=model,
-                    contents=full_prompt,
-                    config=types.GenerateContentConfig(
-                        temperature=temperature,
-                        max_output_tokens=max_tokens,
+                async with self._llm_slot("google", model, max_tokens, full_prompt) as slot:
+                    # Run synchronous Gemini call in thread pool so it can be hedged/cancelled
+                    response = await asyncio.to_thread(
+                        self.gemini_client.models.generate_content,
+                        model=model,
+                        contents=full_prompt,
+                        config=types.GenerateContentConfig(
+                            temperature=temperature,
+                            max_output_tokens=max_tokens,
+                            **({
+                                "response_mime_type": "application/json",
+                                "response_json_schema": response_schema,
+                            } if response_schema is not None else {})
+                        )
                     )
-                )
 
-                # Extract text from response
-                text_content = ""
-                if hasattr(response, 'text'):
-                    text_content = response.text
-                elif hasattr(response, 'parts'):
-                    for part in response.parts:
-                        if hasattr(part, 'text') and part.text:
-                            text_content += part.text
-
-                # Get token counts from usage metadata if available
-                input_tokens = 0
-                output_tokens = 0
-                if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                    input_tokens = getattr(response.usage_metadata, 'prompt_token_count', 0) or 0
-                    output_tokens = getattr(response.usage_metadata, 'candidates_token_count', 0) or 0
-
-                finish_reason = None
-                if hasattr(response, 'candidates') and response.candidates:
-                    finish_reason = getattr(response.candidates[0], 'finish_reason', None)
-                logger.debug(
-                    f"Gemini response: model={model}, finish_reason={finish_reason}, "
-                    f"output_tokens={output_tokens}, content_len={len(text_content)}"
-                )
+                    # Extract text from response
+                    text_content = ""
+                    if hasattr(response, 'text'):
+                        text_content = response.text
+                    elif hasattr(response, 'parts'):
+                        for part in response.parts:
+                            if hasattr(part, 'text') and part.text:
+                                text_content += part.text
+
+                    # Get token counts from usage metadata if available
+                    input_tokens = 0
+                    output_tokens = 0
+                    if hasattr(response, 'usage_metadata') and response.usage_metadata:
+                        input_tokens = getattr(response.usage_metadata, 'prompt_token_count', 0) or 0
+                        output_tokens = getattr(response.usage_metadata, 'candidates_token_count', 0) or 0
+
+                    finish_reason = None
+                    if hasattr(response, 'candidates') and response.candidates:
+                        finish_reason = getattr(response.candidates[0], 'finish_reason', None)
+                    logger.debug(
+                        f"Gemini response: model={model}, finish_reason={finish_reason}, "
+                        f"output_tokens={output_tokens}, content_len={len(text_content)}"
+                    )
 
-                return LLMResponse(
-                    content=text_content,
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    total_tokens=input_tokens + output_tokens
-                )
+                    slot.settle(input_tokens + output_tokens)
+
+                    return LLMResponse(
+                        content=text_content,
+                        model=model,
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        total_tokens=input_tokens + output_tokens,
+                        structured=response_schema is not None
+                    )
 
             except Exception as e:
                 last_error = e
                 logger.warning(f"Gemini attempt {attempt + 1} failed: {e}")
+                if response_schema is not None and is_schema_rejection(e):
+                    break
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("google", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -2617,27 +3038,30 @@ Remember:
 
         for attempt in range(self.retry_config.max_retries):
             try:
-                response = await self.groq_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
+                async with self._llm_slot("groq", model, max_tokens, system_prompt, prompt) as slot:
+                    response = await self.groq_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
 
-                return LLMResponse(
-                    content=response.choices[0].message.content,
-                    model=model,
-                    input_tokens=response.usage.prompt_tokens if response.usage else 0,
-                    output_tokens=response.usage.completion_tokens if response.usage else 0,
-                    total_tokens=response.usage.total_tokens if response.usage else 0
-                )
+                    slot.settle(response.usage.total_tokens if response.usage else None)
+
+                    return LLMResponse(
+                        content=response.choices[0].message.content,
+                        model=model,
+                        input_tokens=response.usage.prompt_tokens if response.usage else 0,
+                        output_tokens=response.usage.completion_tokens if response.usage else 0,
+                        total_tokens=response.usage.total_tokens if response.usage else 0
+                    )
 
             except Exception as e:
                 last_error = e
                 logger.warning(f"Groq attempt {attempt + 1} failed: {e}")
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("groq", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -2651,7 +3075,8 @@ Remember:
         system_prompt: Optional[str],
         model: Optional[str],
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """Call Ollama API with retry logic (OpenAI-compatible)"""
         if not self.ollama_client:
@@ -2682,23 +3107,32 @@ Remember:
 
         for attempt in range(self.retry_config.max_retries):
             try:
-                response = await self.ollama_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
+                async with self._llm_slot("local", model, max_tokens, system_prompt, prompt) as slot:
+                    # Ollama maps a json_schema response_format to its native `format`
+                    response = await self.ollama_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **self._response_format_kwargs(response_schema)
+                    )
 
-                return LLMResponse(
-                    content=response.choices[0].message.content,
-                    model=model,
-                    input_tokens=response.usage.prompt_tokens if response.usage else 0,
-                    output_tokens=response.usage.completion_tokens if response.usage else 0,
-                    total_tokens=response.usage.total_tokens if response.usage else 0
-                )
+                    slot.settle(response.usage.total_tokens if response.usage else None)
+
+                    return LLMResponse(
+                        content=response.choices[0].message.content,
+                        model=model,
+                        input_tokens=response.usage.prompt_tokens if response.usage else 0,
+                        output_tokens=response.usage.completion_tokens if response.usage else 0,
+                        total_tokens=response.usage.total_tokens if response.usage else 0,
+                        structured=response_schema is not None
+                    )
 
             except Exception as e:
                 last_error = e
+                if response_schema is not None and is_schema_rejection(e):
+                    logger.warning(f"Ollama rejected response_format for '{model}': {e}")
+                    break
                 error_msg = str(e)
                 # Provide more helpful error messages
                 if "404" in error_msg:
@@ -2711,7 +3145,7 @@ Remember:
                     logger.warning(f"Ollama attempt {attempt + 1} failed: {e}")
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("local", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -2730,7 +3164,8 @@ Remember:
         model: Optional[str],
         temperature: float,
         max_tokens: int,
-        stream_callback: Optional[StreamCallback] = None
+        stream_callback: Optional[StreamCallback] = None,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """
         Call Ollama API with streaming support (OpenAI-compatible).
@@ -2763,54 +3198,62 @@ Remember:
 
         for attempt in range(self.retry_config.max_retries):
             try:
-                # Enable streaming
-                stream = await self.ollama_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    stream=True  # Enable streaming
-                )
-
-                accumulated_content = ""
-                input_tokens = 0
-                output_tokens = 0
-
-                async for chunk in stream:
-                    if chunk.choices and len(chunk.choices) > 0:
-                        delta = chunk.choices[0].delta
-                        if delta and delta.content:
-                            accumulated_content += delta.content
-
-                            # Emit streaming callback
-                            if stream_callback:
-                                await stream_callback(StreamingChunk(
-                                    content=delta.content,
-                                    is_final=False,
-                                    accumulated_content=accumulated_content
-                                ))
+                async with self._llm_slot("local", model, max_tokens, system_prompt, prompt) as slot:
+                    # Enable streaming
+                    stream = await self.ollama_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,  # Enable streaming
+                        **self._response_format_kwargs(response_schema)
+                    )
 
-                    # Track usage if available in chunk
-                    if hasattr(chunk, 'usage') and chunk.usage:
-                        input_tokens = chunk.usage.prompt_tokens or 0
-                        output_tokens = chunk.usage.completion_tokens or 0
+                    accumulated_content = ""
+                    input_tokens = 0
+                    output_tokens = 0
+
+                    async for chunk in stream:
+                        if chunk.choices and len(chunk.choices) > 0:
+                            delta = chunk.choices[0].delta
+                            if delta and delta.content:
+                                accumulated_content += delta.content
+
+                                # Emit streaming callback
+                                if stream_callback:
+                                    await stream_callback(StreamingChunk(
+                                        content=delta.content,
+                                        is_final=False,
+                                        accumulated_content=accumulated_content
+                                    ))
+
+                        # Track usage if available in chunk
+                        if hasattr(chunk, 'usage') and chunk.usage:
+                            input_tokens = chunk.usage.prompt_tokens or 0
+                            output_tokens = chunk.usage.completion_tokens or 0
+
+                    # Final callback
+                    if stream_callback:
+                        await stream_callback(StreamingChunk(
+                            content="",
+                            is_final=True,
+                            accumulated_content=accumulated_content
+                        ))
 
-                # Final callback
-                if stream_callback:
-                    await stream_callback(StreamingChunk(
-                        content="",
-                        is_final=True,
-                        accumulated_content=accumulated_content
-                    ))
+                    slot.settle(input_tokens + output_tokens)
 
-                return LLMResponse(
-                    content=accumulated_content,
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    total_tokens=input_tokens + output_tokens
-                )
+                    return LLMResponse(
+                        content=accumulated_content,
+                        model=model,
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        total_tokens=input_tokens + output_tokens,
+                        structured=response_schema is not None
+                    )
 
+            except StreamingJSONError:
+                # Aborted by the consumer: retrying the same request won't help
+                raise
             except Exception as e:
                 last_error = e
                 error_msg = str(e)
@@ -2818,9 +3261,11 @@ Remember:
                     logger.error(f"Ollama streaming 404 error - model '{model}' may not exist")
                 else:
                     logger.warning(f"Ollama streaming attempt {attempt + 1} failed: {e}")
+                if response_schema is not None and is_schema_rejection(e):
+                    break
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("local", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -2835,7 +3280,8 @@ Remember:
         model: Optional[str],
         temperature: float,
         max_tokens: int,
-        stream_callback: Optional[StreamCallback] = None
+        stream_callback: Optional[StreamCallback] = None,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """
         Call Google Gemini API with streaming support.
@@ -2860,68 +3306,87 @@ Remember:
             try:
                 from google.genai import types
 
-                # Use streaming API
-                stream = self.gemini_client.models.generate_content_stream(
-                    model=model,
-                    contents=full_prompt,
-                    config=types.GenerateContentConfig(
-                        temperature=temperature,
-                        max_output_tokens=max_tokens,
+                async with self._llm_slot("google", model, max_tokens, full_prompt) as slot:
+                    # Use streaming API
+                    stream = self.gemini_client.models.generate_content_stream(
+                        model=model,
+                        contents=full_prompt,
+                        config=types.GenerateContentConfig(
+                            temperature=temperature,
+                            max_output_tokens=max_tokens,
+                            **({
+                                "response_mime_type": "application/json",
+                                "response_json_schema": response_schema,
+                            } if response_schema is not None else {})
+                        )
                     )
-                )
-
-                accumulated_content = ""
-                input_tokens = 0
-                output_tokens = 0
-
-                for chunk in stream:
-                    # Extract text from chunk
-                    chunk_text = ""
-                    if hasattr(chunk, 'text') and chunk.text:
-                        chunk_text = chunk.text
-                    elif hasattr(chunk, 'parts'):
-                        for part in chunk.parts:
-                            if hasattr(part, 'text') and part.text:
-                                chunk_text += part.text
 
-                    if chunk_text:
-                        accumulated_content += chunk_text
+                    accumulated_content = ""
+                    input_tokens = 0
+                    output_tokens = 0
+
+                    # The stream is a blocking iterator: pull each chunk in the
+                    # thread pool so other pipeline tasks keep running
+                    stream = iter(stream)
+                    while True:
+                        chunk = await asyncio.to_thread(next, stream, None)
+                        if chunk is None:
+                            break
+                        # Extract text from chunk
+                        chunk_text = ""
+                        if hasattr(chunk, 'text') and chunk.text:
+                            chunk_text = chunk.text
+                        elif hasattr(chunk, 'parts'):
+                            for part in chunk.parts:
+                                if hasattr(part, 'text') and part.text:
+                                    chunk_text += part.text
+
+                        if chunk_text:
+                            accumulated_content += chunk_text
 
-                        # Emit streaming callback
-                        if stream_callback:
-                            await stream_callback(StreamingChunk(
-                                content=chunk_text,
-                                is_final=False,
-                                accumulated_content=accumulated_content
-                            ))
+                            # Emit streaming callback
+                            if stream_callback:
+                                await stream_callback(StreamingChunk(
+                                    content=chunk_text,
+                                    is_final=False,
+                                    accumulated_content=accumulated_content
+                                ))
 
-                    # Track usage if available
-                    if hasattr(chunk, 'usage_metadata') and chunk.usage_metadata:
-                        input_tokens = getattr(chunk.usage_metadata, 'prompt_token_count', 0) or 0
-                        output_tokens = getattr(chunk.usage_metadata, 'candidates_token_count', 0) or 0
+                        # Track usage if available
+                        if hasattr(chunk, 'usage_metadata') and chunk.usage_metadata:
+                            input_tokens = getattr(chunk.usage_metadata, 'prompt_token_count', 0) or 0
+                            output_tokens = getattr(chunk.usage_metadata, 'candidates_token_count', 0) or 0
+
+                    # Final callback
+                    if stream_callback:
+                        await stream_callback(StreamingChunk(
+                            content="",
+                            is_final=True,
+                            accumulated_content=accumulated_content
+                        ))
 
-                # Final callback
-                if stream_callback:
-                    await stream_callback(StreamingChunk(
-                        content="",
-                        is_final=True,
-                        accumulated_content=accumulated_content
-                    ))
+                    slot.settle(input_tokens + output_tokens)
 
-                return LLMResponse(
-                    content=accumulated_content,
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    total_tokens=input_tokens + output_tokens
-                )
+                    return LLMResponse(
+                        content=accumulated_content,
+                        model=model,
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        total_tokens=input_tokens + output_tokens,
+                        structured=response_schema is not None
+                    )
 
+            except StreamingJSONError:
+                # Aborted by the consumer: retrying the same request won't help
+                raise
             except Exception as e:
                 last_error = e
                 logger.warning(f"Gemini streaming attempt {attempt + 1} failed: {e}")
+                if response_schema is not None and is_schema_rejection(e):
+                    break
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("google", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -2958,56 +3423,62 @@ Remember:
 
         for attempt in range(self.retry_config.max_retries):
             try:
-                stream = await self.groq_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    stream=True
-                )
-
-                accumulated_content = ""
-                input_tokens = 0
-                output_tokens = 0
-
-                async for chunk in stream:
-                    if chunk.choices and len(chunk.choices) > 0:
-                        delta = chunk.choices[0].delta
-                        if delta and delta.content:
-                            accumulated_content += delta.content
-
-                            if stream_callback:
-                                await stream_callback(StreamingChunk(
-                                    content=delta.content,
-                                    is_final=False,
-                                    accumulated_content=accumulated_content
-                                ))
+                async with self._llm_slot("groq", model, max_tokens, system_prompt, prompt) as slot:
+                    stream = await self.groq_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True
+                    )
 
-                    if hasattr(chunk, 'usage') and chunk.usage:
-                        input_tokens = chunk.usage.prompt_tokens or 0
-                        output_tokens = chunk.usage.completion_tokens or 0
+                    accumulated_content = ""
+                    input_tokens = 0
+                    output_tokens = 0
+
+                    async for chunk in stream:
+                        if chunk.choices and len(chunk.choices) > 0:
+                            delta = chunk.choices[0].delta
+                            if delta and delta.content:
+                                accumulated_content += delta.content
+
+                                if stream_callback:
+                                    await stream_callback(StreamingChunk(
+                                        content=delta.content,
+                                        is_final=False,
+                                        accumulated_content=accumulated_content
+                                    ))
+
+                        if hasattr(chunk, 'usage') and chunk.usage:
+                            input_tokens = chunk.usage.prompt_tokens or 0
+                            output_tokens = chunk.usage.completion_tokens or 0
+
+                    if stream_callback:
+                        await stream_callback(StreamingChunk(
+                            content="",
+                            is_final=True,
+                            accumulated_content=accumulated_content
+                        ))
 
-                if stream_callback:
-                    await stream_callback(StreamingChunk(
-                        content="",
-                        is_final=True,
-                        accumulated_content=accumulated_content
-                    ))
+                    slot.settle(input_tokens + output_tokens)
 
-                return LLMResponse(
-                    content=accumulated_content,
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    total_tokens=input_tokens + output_tokens
-                )
+                    return LLMResponse(
+                        content=accumulated_content,
+                        model=model,
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        total_tokens=input_tokens + output_tokens
+                    )
 
+            except StreamingJSONError:
+                # Aborted by the consumer: retrying the same request won't help
+                raise
             except Exception as e:
                 last_error = e
                 logger.warning(f"Groq streaming attempt {attempt + 1} failed: {e}")
 
                 if attempt < self.retry_config.max_retries - 1:
-                    await asyncio.sleep(delay)
+                    await self._retry_backoff("groq", model, e, delay)
                     delay = min(
                         delay * self.retry_config.exponential_base,
                         self.retry_config.max_delay
@@ -0,0 +1,534 @@
+"""Shared EasyOCR engine with warm worker processes and a result cache.
+
+Several stages OCR the same diagram in one run (label removal, combined
+label detection, the Qwen fallback, label classification), and each used to
+build its own easyocr.Reader (hundreds of MB of weights, seconds to load)
+and call readtext on the default thread pool. This engine replaces them:
+
+- Warm readers: OCR runs in N spawned worker processes; each loads its
+  reader once in the initializer and keeps it for the life of the pool
+- Result cache: in-memory LRU keyed by SHA-256 of the image content, the
+  confidence threshold and readtext options. Raw detections are kept under
+  threshold 0.0 so a stricter threshold is served by filtering them
+- Coalescing: identical images in flight (or repeated in one batch) are
+  OCR'd once
+- Batch API: readtext_batch() splits images or tiles across the workers
+- Stats: per-stage OCR latency, cache hits and worker peak RSS are recorded
+  in a context-local OCRStats that InstrumentedAgentContext writes into the
+  stage output snapshot as _ocr_metrics
+
+Environment Variables:
+    OCR_POOL_ENABLED: "true" (default) or "false" to OCR in-process on one thread
+    OCR_WORKERS: Number of worker processes (default: 1 with GPU, else cpu_count // 4, max 2)
+    OCR_CACHE_SIZE: Max cached OCR results (default: 256)
+    EASYOCR_GPU: "true" to run readers on the GPU (default: false)
+
+Usage:
+    engine = get_ocr_engine()
+    detections = await engine.readtext(image_path, min_confidence=0.3)
+    for polygon, text, confidence in detections:
+        ...
+    per_tile = await engine.readtext_batch([tile_a, tile_b])
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar, Token
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+logger = logging.getLogger("gamed_ai.services.ocr_engine")
+
+MAX_WORKERS_CPU = 2
+DEFAULT_CACHE_SIZE = 256
+LATENCY_WINDOW = 200
+
+# (polygon [[x, y] x 4], text, confidence), as returned by easyocr readtext
+Detection = Tuple[List[List[float]], str, float]
+ImageInput = Union[str, Path, bytes, np.ndarray]
+ReaderFactory = Callable[[List[str], bool], Any]
+
+
+class OCRError(Exception):
+    """Raised when OCR cannot run (EasyOCR missing or the reader failed to load)."""
+    pass
+
+
+# ── Per-stage stats ──────────────────────────────────────────────────────────
+
+@dataclass
+class OCRStats:
+    """OCR counters for one pipeline stage."""
+    calls: int = 0
+    images: int = 0
+    cache_hits: int = 0
+    ocr_ms: int = 0
+    latency_ms: int = 0
+    worker_peak_rss_mb: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# Same scoping as the LLM cache stats: the object is mutable so child tasks
+# (which get a copy of the context) still count towards the stage.
+_stage_ocr_stats: ContextVar[Optional[OCRStats]] = ContextVar("ocr_stats", default=None)
+
+
+def begin_stage_ocr_stats() -> Token:
+    """Start collecting OCR stats for the current stage."""
+    return _stage_ocr_stats.set(OCRStats())
+
+
+def get_stage_ocr_stats() -> Optional[OCRStats]:
+    """Get the OCR stats for the current stage (None outside a stage)."""
+    return _stage_ocr_stats.get()
+
+
+def end_stage_ocr_stats(token: Token) -> None:
+    """Close the stage scope opened by begin_stage_ocr_stats()."""
+    try:
+        _stage_ocr_stats.reset(token)
+    except ValueError:
+        _stage_ocr_stats.set(None)
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+_worker_reader = None
+_worker_error: Optional[str] = None
+
+
+def easyocr_reader(languages: List[str], gpu: bool):
+    """Default reader factory."""
+    try:
+        import easyocr
+    except ImportError:
+        raise OCRError("EasyOCR not installed. Run: pip install easyocr")
+    return easyocr.Reader(languages, gpu=gpu, verbose=False)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    divisor = 1024 * 1024 if os.uname().sysname == "Darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _worker_init(languages: List[str], gpu: bool, threads: int, reader_factory: ReaderFactory) -> None:
+    """Runs once per worker: load the reader so the first job is warm."""
+    global _worker_reader, _worker_error
+    if threads > 0:
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(var, str(threads))
+    _worker_reader, _worker_error = None, None
+    try:
+        _worker_reader = reader_factory(languages, gpu)
+    except Exception as e:
+        _worker_error = str(e)
+
+
+def _to_detection(raw) -> Detection:
+    polygon, text, confidence = raw
+    return [[float(x), float(y)] for x, y in polygon], str(text), float(confidence)
+
+
+def _run_ocr(images: List[Union[bytes, np.ndarray]], options: Dict[str, Any]) -> Dict[str, Any]:
+    """OCR a chunk of images with this worker's reader."""
+    if _worker_reader is None:
+        raise OCRError(_worker_error or "OCR reader not initialised")
+    started = time.perf_counter()
+    results = [[_to_detection(d) for d in _worker_reader.readtext(image, detail=1, **options)]
+               for image in images]
+    return {
+        "results": results,
+        "ocr_ms": int((time.perf_counter() - started) * 1000),
+        "pid": os.getpid(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# ── Result cache ─────────────────────────────────────────────────────────────
+
+def filter_detections(detections: List[Detection], min_confidence: float) -> List[Detection]:
+    return [d for d in detections if d[2] >= min_confidence]
+
+
+class OCRResultCache:
+    """LRU of OCR results keyed by (image hash, confidence threshold, options)."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, float, str], List[Detection]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image_key: str, min_confidence: float, options_key: str) -> Optional[List[Detection]]:
+        key = (image_key, min_confidence, options_key)
+        raw_key = (image_key, 0.0, options_key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if raw_key in self._entries:
+                self._entries.move_to_end(raw_key)
+                detections = filter_detections(self._entries[raw_key], min_confidence)
+                self._put_locked(key, detections)
+                self.hits += 1
+                return detections
+            self.misses += 1
+            return None
+
+    def put_raw(self, image_key: str, options_key: str, detections: List[Detection]) -> None:
+        with self._lock:
+            self._put_locked((image_key, 0.0, options_key), detections)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put_locked(self, key, detections: List[Detection]) -> None:
+        self._entries[key] = detections
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# ── Engine ───────────────────────────────────────────────────────────────────
+
+def default_worker_count(gpu: bool) -> int:
+    """OCR_WORKERS, else 1 with GPU (one device) or cpu_count // 4 (max 2) on CPU."""
+    configured = os.getenv("OCR_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    if gpu:
+        return 1
+    return max(1, min(MAX_WORKERS_CPU, (os.cpu_count() or 1) // 4))
+
+
+def _prepare_image(image: ImageInput) -> Tuple[str, Union[bytes, np.ndarray]]:
+    """Return (content hash, payload sent to the reader)."""
+    if isinstance(image, (str, Path)):
+        image = Path(image).read_bytes()
+    if isinstance(image, bytes):
+        return hashlib.sha256(image).hexdigest(), image
+    array = np.ascontiguousarray(np.asarray(image))
+    digest = hashlib.sha256(f"{array.shape}|{array.dtype}|".encode())
+    digest.update(array.data)
+    return digest.hexdigest(), array
+
+
+class OCREngine:
+    """Runs EasyOCR readtext on warm readers and caches the results."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        languages: Sequence[str] = ("en",),
+        gpu: Optional[bool] = None,
+        use_processes: Optional[bool] = None,
+        reader_factory: ReaderFactory = easyocr_reader,
+        cache: Optional[OCRResultCache] = None,
+        mp_context: str = "spawn",
+    ):
+        self.languages = list(languages)
+        self.gpu = os.getenv("EASYOCR_GPU", "false").lower() == "true" if gpu is None else gpu
+        if use_processes is None:
+            use_processes = os.getenv("OCR_POOL_ENABLED", "true").lower() == "true"
+        self.use_processes = use_processes
+        # In-process mode shares one reader, which is not safe to call concurrently
+        self.workers = (workers or default_worker_count(self.gpu)) if use_processes else 1
+        self.cache = cache or OCRResultCache(int(os.getenv("OCR_CACHE_SIZE", str(DEFAULT_CACHE_SIZE))))
+        self._reader_factory = reader_factory
+        self._mp_context = mp_context
+        self._threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.RLock()  # done-callbacks may fire inside dispatch
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._closed = False
+
+        self._images_requested = 0
+        self._images_ocrd = 0
+        self._coalesced = 0
+        self._latencies_ms: deque = deque(maxlen=LATENCY_WINDOW)
+        self._worker_rss_mb: Dict[int, float] = {}
+        self._last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def readtext(
+        self,
+        image: ImageInput,
+        min_confidence: float = 0.0,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> List[Detection]:
+        """OCR one image (path, encoded bytes or array)."""
+        return (await self.readtext_batch([image], min_confidence, options))[0]
+
+    async def readtext_batch(
+        self,
+        images: Sequence[ImageInput],
+        min_confidence: float = 0.0,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Detection]]:
+        """OCR several images or tiles in one call, results in input order."""
+        started = time.perf_counter()
+        # File reads and hashing of large images stay off the event loop
+        prepared = await asyncio.to_thread(lambda: [_prepare_image(image) for image in images])
+        future = self._submit_prepared(prepared, min_confidence, options, started)
+        return await asyncio.wrap_future(future)
+
+    def submit_batch(
+        self,
+        images: Sequence[ImageInput],
+        min_confidence: float = 0.0,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Future:
+        """
+        Queue a batch; the future resolves to one detection list per image.
+
+        Reads and hashes the images on the calling thread; async code should
+        use readtext_batch() instead.
+        """
+        started = time.perf_counter()
+        prepared = [_prepare_image(image) for image in images]
+        return self._submit_prepared(prepared, min_confidence, options, started)
+
+    def _submit_prepared(
+        self,
+        prepared: List[Tuple[str, Union[bytes, np.ndarray]]],
+        min_confidence: float,
+        options: Optional[Dict[str, Any]],
+        started: float,
+    ) -> Future:
+        stage_stats = get_stage_ocr_stats()
+        options = dict(options or {})
+        options_key = repr(sorted(options.items()))
+
+        results: List[Optional[List[Detection]]] = [None] * len(prepared)
+        waiting: Dict[str, List[int]] = {}
+        to_run: Dict[str, Union[bytes, np.ndarray]] = {}
+        shared: Dict[str, Future] = {}
+        cache_hits = 0
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("OCR engine is shut down")
+            self._images_requested += len(prepared)
+            for index, (key, payload) in enumerate(prepared):
+                cached = self.cache.get(key, min_confidence, options_key)
+                if cached is not None:
+                    results[index] = cached
+                    cache_hits += 1
+                    continue
+                if key not in waiting:
+                    inflight = self._inflight.get((key, options_key))
+                    if inflight is not None:
+                        shared[key] = inflight
+                    else:
+                        to_run[key] = payload
+                else:
+                    self._coalesced += 1
+                waiting.setdefault(key, []).append(index)
+            self._coalesced += len(shared)
+            own = self._dispatch_locked(to_run, options, options_key)
+
+        batch_future: Future = Future()
+        pending = {**own, **shared}
+        if stage_stats is not None:
+            stage_stats.calls += 1
+            stage_stats.images += len(prepared)
+            stage_stats.cache_hits += cache_hits
+
+        def finish() -> None:
+            try:
+                for key, future in pending.items():
+                    outcome = future.result()
+                    detections = filter_detections(outcome["detections"], min_confidence)
+                    for index in waiting[key]:
+                        results[index] = detections
+            except BaseException as e:
+                batch_future.set_exception(e)
+                return
+            latency_ms = int((time.perf_counter() - started) * 1000)
+            with self._lock:
+                self._latencies_ms.append(latency_ms)
+            if stage_stats is not None:
+                stage_stats.latency_ms += latency_ms
+                stage_stats.ocr_ms += sum(f.result()["ocr_ms"] for f in own.values())
+                rss = [f.result()["peak_rss_mb"] for f in pending.values() if f.result()["peak_rss_mb"]]
+                if rss:
+                    stage_stats.worker_peak_rss_mb = max(rss + [stage_stats.worker_peak_rss_mb or 0.0])
+            batch_future.set_result(results)
+
+        remaining = [len(pending)]
+        remaining_lock = threading.Lock()
+
+        def on_done(_future: Future) -> None:
+            with remaining_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                finish()
+
+        if not pending:
+            finish()
+        for future in pending.values():
+            future.add_done_callback(on_done)
+        return batch_future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            return {
+                "workers": self.workers,
+                "mode": "processes" if self.use_processes else "in_process",
+                "images_requested": self._images_requested,
+                "images_ocrd": self._images_ocrd,
+                "coalesced": self._coalesced,
+                "cache_entries": len(self.cache),
+                "cache_hits": self.cache.hits,
+                "cache_misses": self.cache.misses,
+                "latency_ms": {
+                    "p50": latencies[len(latencies) // 2] if latencies else None,
+                    "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+                },
+                "worker_peak_rss_mb": dict(self._worker_rss_mb),
+                "last_error": self._last_error,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _ensure_executor_locked(self) -> Executor:
+        if self._executor is None:
+            initargs = (self.languages, self.gpu, self._threads_per_worker, self._reader_factory)
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self._mp_context),
+                    initializer=_worker_init,
+                    initargs=initargs,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="ocr", initializer=_worker_init, initargs=initargs,
+                )
+            logger.info(f"[OCR] Started {self.workers} {'worker process' if self.use_processes else 'thread'}(s)")
+        return self._executor
+
+    def _dispatch_locked(
+        self,
+        to_run: Dict[str, Union[bytes, np.ndarray]],
+        options: Dict[str, Any],
+        options_key: str,
+    ) -> Dict[str, Future]:
+        """Split uncached images into one chunk per worker (caller holds the lock)."""
+        if not to_run:
+            return {}
+        keys = list(to_run)
+        chunk_size = math.ceil(len(keys) / self.workers)
+        per_image: Dict[str, Future] = {}
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            image_futures = {key: Future() for key in chunk}
+            for key, future in image_futures.items():
+                future.set_running_or_notify_cancel()
+                self._inflight[(key, options_key)] = future
+            per_image.update(image_futures)
+            try:
+                job = self._ensure_executor_locked().submit(_run_ocr, [to_run[k] for k in chunk], options)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._executor = None
+                self._fail_chunk_locked(image_futures, options_key, e)
+                continue
+            job.add_done_callback(lambda f, futures=image_futures: self._on_chunk_done(futures, options_key, f))
+        return per_image
+
+    def _on_chunk_done(self, image_futures: Dict[str, Future], options_key: str, job: Future) -> None:
+        with self._lock:
+            try:
+                output = job.result()
+            except BaseException as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._executor = None  # Recreated on next dispatch
+                self._fail_chunk_locked(image_futures, options_key, e)
+                return
+            self._images_ocrd += len(image_futures)
+            if output.get("peak_rss_mb") is not None:
+                self._worker_rss_mb[output["pid"]] = output["peak_rss_mb"]
+            for (key, future), detections in zip(image_futures.items(), output["results"]):
+                self.cache.put_raw(key, options_key, detections)
+                self._inflight.pop((key, options_key), None)
+        for future, detections in zip(image_futures.values(), output["results"]):
+            future.set_result({
+                "detections": detections,
+                "ocr_ms": output["ocr_ms"] // max(1, len(image_futures)),
+                "peak_rss_mb": output.get("peak_rss_mb"),
+            })
+
+    def _fail_chunk_locked(self, image_futures: Dict[str, Future], options_key: str, error: BaseException) -> None:
+        self._last_error = f"{type(error).__name__}: {error}"
+        logger.error(f"[OCR] Chunk of {len(image_futures)} image(s) failed: {self._last_error}")
+        for key, future in image_futures.items():
+            self._inflight.pop((key, options_key), None)
+            future.set_exception(error)
+
+
+# Singleton instance
+_engine: Optional[OCREngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine() -> OCREngine:
+    """Get the process-wide OCR engine."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OCREngine()
+    return _engine
+
+
+def shutdown_ocr_engine() -> None:
+    """Stop OCR workers (called on app shutdown)."""
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        engine.shutdown(wait=False)
@@ -7,9 +7,14 @@ It supports:
 - Per-label zone detection (more accurate than bulk detection)
 - Bounding box generation in normalized coordinates
 
+The image is resized/JPEG-encoded once per file (cached with its scale
+factors) and per-label prompts fan out concurrently under a semaphore.
+
 Environment Variables:
     OLLAMA_BASE_URL: Ollama server URL (default: http://localhost:11434)
     QWEN_VL_MODEL: Model name (default: qwen2.5vl:7b)
+    QWEN_VL_CONCURRENCY: Per-label requests in flight (default: 4; 1 = sequential).
+        Ollama serves them in parallel up to its OLLAMA_NUM_PARALLEL
 """
 
 from __future__ import annotations
@@ -20,7 +25,10 @@ import json
 import logging
 import os
 import re
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -215,14 +223,36 @@ Focus on scientific/anatomical parts, ignore decorative elements.
 Return ONLY the JSON, no other text."""
 
 
+@dataclass
+class EncodedImage:
+    """Base64 JPEG payload sent to the VLM plus the scale back to the original."""
+    data: str
+    original_size: Tuple[int, int]
+    encoded_size: Tuple[int, int]
+
+    @property
+    def scale_x(self) -> float:
+        return self.original_size[0] / self.encoded_size[0]
+
+    @property
+    def scale_y(self) -> float:
+        return self.original_size[1] / self.encoded_size[1]
+
+
 class QwenVLService:
     """Service for Qwen2.5-VL vision-language model operations."""
-    
+
+    MAX_IMAGE_SIZE = 1024
+    ENCODED_CACHE_SIZE = 8
+
     def __init__(self):
         self.model = os.getenv("QWEN_VL_MODEL", "qwen2.5vl:7b")
         self.ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         self._available = None
         self.timeout = float(os.getenv("QWEN_VL_TIMEOUT", "300.0"))  # VLM can be slow, default 5 minutes
+        self.concurrency = max(1, int(os.getenv("QWEN_VL_CONCURRENCY", "4")))
+        self._encoded: "OrderedDict[tuple, EncodedImage]" = OrderedDict()
+        self._encoded_lock = threading.Lock()
     
     async def is_available(self) -> bool:
         """Check if Qwen VL model is available via Ollama."""
@@ -264,21 +294,13 @@ class QwenVLService:
         if not await self.is_available():
             raise QwenVLError(f"Qwen VL model '{self.model}' not available")
         
-        # Encode image
-        image_data = self._encode_image(image_path)
-        
-        # Get image dimensions for context
-        try:
-            from PIL import Image
-            img = Image.open(image_path)
-            img_width, img_height = img.size
-            dimension_hint = f"\n\nNote: Image dimensions are {img_width}x{img_height} pixels. Use 0-1000 normalized scale."
-            prompt = TEXT_DETECTION_PROMPT + dimension_hint
-        except (IOError, OSError, FileNotFoundError) as e:
-            logger.debug(f"Could not read image dimensions: {e}, using base prompt")
-            prompt = TEXT_DETECTION_PROMPT
+        # Encode image (cached) and add its dimensions for context
+        encoded = self.prepare_image(image_path)
+        img_width, img_height = encoded.original_size
+        dimension_hint = f"\n\nNote: Image dimensions are {img_width}x{img_height} pixels. Use 0-1000 normalized scale."
+        prompt = TEXT_DETECTION_PROMPT + dimension_hint
         
-        response = await self._call_ollama(prompt, image_data)
+        response = await self._call_ollama(prompt, encoded.data)
         
         # Parse response
         try:
@@ -302,7 +324,8 @@ class QwenVLService:
         self,
         image_path: str,
         text_label: str,
-        text_bbox: List[int]
+        text_bbox: List[int],
+        image_data: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Step 2: For a specific text label, detect its connecting leader line.
@@ -311,6 +334,7 @@ class QwenVLService:
             image_path: Path to the diagram image
             text_label: The text content
             text_bbox: [x1, y1, x2, y2] in normalized 0-1000 scale
+            image_data: Optional pre-encoded image data
             
         Returns:
             Dict with line info if found, None otherwise
@@ -318,8 +342,8 @@ class QwenVLService:
         if not await self.is_available():
             return None
         
-        # Encode image
-        image_data = self._encode_image(image_path)
+        if image_data is None:
+            image_data = self._encode_image(image_path)
         
         # Build prompt with text label and coordinates
         x1, y1, x2, y2 = text_bbox
@@ -347,14 +371,21 @@ class QwenVLService:
     
     async def detect_labels_and_lines_per_word(
         self,
-        image_path: str
+        image_path: str,
+        concurrency: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Per-word approach: Detect all text labels, then for each detect its leader line.
         This is more accurate than bulk detection.
+
+        The image is encoded once and the per-label leader-line prompts run
+        concurrently (bounded by a semaphore); results keep label order.
+        Coordinates stay in the 0-1000 normalized scale, which doesn't
+        depend on the encoding resize.
         
         Args:
             image_path: Path to the diagram image
+            concurrency: Leader-line requests in flight (default: QWEN_VL_CONCURRENCY, 1 = sequential)
             
         Returns:
             Dict with annotations and mask_path
@@ -377,16 +408,28 @@ class QwenVLService:
                 "latency_ms": int((time.time() - start_time) * 1000)
             }
         
-        # Step 2: For each text label, detect its leader line
-        logger.info(f"Step 2: Detecting leader lines for {len(text_labels)} text labels...")
+        # Step 2: For each text label, detect its leader line (image encoded once)
+        labels = [t for t in text_labels if len(t.get("bbox", [])) == 4]
+        concurrency = max(1, concurrency or self.concurrency)
+        logger.info(
+            f"Step 2: Detecting leader lines for {len(labels)} text labels "
+            f"({concurrency} concurrent)..."
+        )
+        encoded = self.prepare_image(image_path)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _leader_line(text_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self.detect_leader_line_for_text(
+                    image_path, text_info.get("content", ""), text_info["bbox"], encoded.data
+                )
+
+        line_infos = await asyncio.gather(*[_leader_line(t) for t in labels])
+
         annotations = []
-        
-        for text_info in text_labels:
+        for text_info, line_info in zip(labels, line_infos):
             text_content = text_info.get("content", "")
-            text_bbox = text_info.get("bbox", [])
-            
-            if len(text_bbox) != 4:
-                continue
+            text_bbox = text_info["bbox"]
             
             # Add text annotation
             annotations.append({
@@ -395,11 +438,6 @@ class QwenVLService:
                 "bbox": text_bbox
             })
             
-            # Detect leader line for this text
-            line_info = await self.detect_leader_line_for_text(
-                image_path, text_content, text_bbox
-            )
-            
             if line_info:
                 annotations.append({
                     "type": "line",
@@ -455,46 +493,17 @@ class QwenVLService:
                 f"Run: ollama pull {self.model}"
             )
 
-        # Get original image dimensions before encoding (for coordinate scaling)
-        try:
-            from PIL import Image
-            original_img = Image.open(image_path)
-            original_width, original_height = original_img.size
-            # Check if image was resized during encoding
-            max_size = 1024
-            if original_width > max_size or original_height > max_size:
-                if original_width > original_height:
-                    encoded_width = max_size
-                    encoded_height = int(original_height * (max_size / original_width))
-                else:
-                    encoded_height = max_size
-                    encoded_width = int(original_width * (max_size / original_height))
-                scale_x = original_width / encoded_width
-                scale_y = original_height / encoded_height
-            else:
-                scale_x = 1.0
-                scale_y = 1.0
-        except Exception as e:
-            logger.warning(f"Could not get image dimensions: {e}, assuming no scaling")
-            scale_x = 1.0
-            scale_y = 1.0
-
-        # Encode image (may resize if too large)
-        image_data = self._encode_image(image_path)
+        # Encode image (may resize if too large); scale factors come with it
+        encoded = self.prepare_image(image_path)
+        image_data = encoded.data
 
         # Build prompt with image dimensions for better coordinate accuracy
         base_prompt = custom_prompt or LABEL_LINE_DETECTION_PROMPT
         
         # Add image dimension context to help with coordinate accuracy
-        try:
-            from PIL import Image
-            img = Image.open(image_path)
-            img_width, img_height = img.size
-            dimension_hint = f"\n\nNote: The image dimensions are approximately {img_width}x{img_height} pixels. Use coordinates in 0-1000 normalized scale where 1000 represents the full width/height."
-            prompt = base_prompt + dimension_hint
-        except (IOError, OSError, FileNotFoundError) as e:
-            logger.debug(f"Could not read image dimensions: {e}, using base prompt")
-            prompt = base_prompt
+        img_width, img_height = encoded.original_size
+        dimension_hint = f"\n\nNote: The image dimensions are approximately {img_width}x{img_height} pixels. Use coordinates in 0-1000 normalized scale where 1000 represents the full width/height."
+        prompt = base_prompt + dimension_hint
         
         response = await self._call_ollama(prompt, image_data)
         
@@ -505,22 +514,7 @@ class QwenVLService:
         annotations = self._parse_annotations_response(response)
         
         # Scale coordinates back to original image size if image was resized
-        if scale_x != 1.0 or scale_y != 1.0:
-            logger.info(f"Scaling annotations from encoded size to original (scale: {scale_x:.2f}x, {scale_y:.2f}x)")
-            for ann in annotations:
-                bbox = ann.get("bbox", [])
-                if len(bbox) == 4:
-                    ann["bbox"] = [
-                        int(bbox[0] * scale_x),
-                        int(bbox[1] * scale_y),
-                        int(bbox[2] * scale_x),
-                        int(bbox[3] * scale_y)
-                    ]
-                # Scale line start/end points if present
-                if ann.get("start") and len(ann["start"]) == 2:
-                    ann["start"] = [int(ann["start"][0] * scale_x), int(ann["start"][1] * scale_y)]
-                if ann.get("end") and len(ann["end"]) == 2:
-                    ann["end"] = [int(ann["end"][0] * scale_x), int(ann["end"][1] * scale_y)]
+        self._scale_annotations(annotations, encoded)
 
         logger.info(
             f"Detected {len(annotations)} annotations "
@@ -599,7 +593,7 @@ class QwenVLService:
         Args:
             image_path: Path to the diagram image
             labels: List of labels to find
-            parallel: Whether to run queries in parallel (faster but may overwhelm Ollama)
+            parallel: Run queries concurrently, bounded by QWEN_VL_CONCURRENCY
             
         Returns:
             Dict with detected_zones and missing labels
@@ -614,12 +608,14 @@ class QwenVLService:
         image_data = self._encode_image(image_path)
         
         if parallel:
-            # Run all queries in parallel
-            tasks = [
-                self.detect_zone_for_label(image_path, label, image_data)
-                for label in labels
-            ]
-            results = await asyncio.gather(*tasks)
+            # Run queries concurrently, at most self.concurrency in flight
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def _detect(label: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.detect_zone_for_label(image_path, label, image_data)
+
+            results = await asyncio.gather(*[_detect(label) for label in labels])
         else:
             # Run sequentially (more reliable)
             results = []
@@ -649,26 +645,41 @@ class QwenVLService:
         }
     
     def _encode_image(self, image_path: str) -> str:
+        """Base64 payload for image_path (see prepare_image)."""
+        return self.prepare_image(image_path).data
+
+    def prepare_image(self, image_path: str) -> EncodedImage:
         """
-        Encode image to base64, with optimization for large images.
+        Encode image to base64 once, with optimization for large images.
         
         Optimizations:
         - Resize if too large (max 1024px longest side)
         - Compress to JPEG quality 85
         - This prevents Ollama crashes and reduces payload size
+
+        Results are cached per file (path, mtime, size), so the per-label
+        prompts for one diagram reuse a single encoding.
         """
         try:
             from PIL import Image
             import io
         except ImportError:
             raise QwenVLError("PIL required: pip install Pillow")
+
+        stat = os.stat(image_path)
+        key = (str(image_path), stat.st_mtime_ns, stat.st_size)
+        with self._encoded_lock:
+            cached = self._encoded.get(key)
+            if cached is not None:
+                self._encoded.move_to_end(key)
+                return cached
         
         img = Image.open(image_path)
         width, height = img.size
-        max_size = 1024
+        max_size = self.MAX_IMAGE_SIZE
+        new_width, new_height = width, height
         
         # Resize if too large
-        scale_x = scale_y = 1.0
         if width > max_size or height > max_size:
             if width > height:
                 new_width = max_size
@@ -677,9 +688,6 @@ class QwenVLService:
                 new_height = max_size
                 new_width = int(width * (max_size / height))
             
-            scale_x = width / new_width
-            scale_y = height / new_height
-            
             logger.info(f"Resizing image from {width}x{height} to {new_width}x{new_height} for Qwen VL")
             img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
         
@@ -693,9 +701,38 @@ class QwenVLService:
         image_bytes = buffer.getvalue()
         
         # Encode to base64
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        return image_base64
-    
+        encoded = EncodedImage(
+            data=base64.b64encode(image_bytes).decode("utf-8"),
+            original_size=(width, height),
+            encoded_size=(new_width, new_height),
+        )
+        with self._encoded_lock:
+            self._encoded[key] = encoded
+            while len(self._encoded) > self.ENCODED_CACHE_SIZE:
+                self._encoded.popitem(last=False)
+        return encoded
+
+    def _scale_annotations(self, annotations: List[Dict[str, Any]], encoded: EncodedImage) -> None:
+        """Scale bbox/start/end in place from the encoded image to the original size."""
+        scale_x, scale_y = encoded.scale_x, encoded.scale_y
+        if scale_x == 1.0 and scale_y == 1.0:
+            return
+        logger.info(f"Scaling annotations from encoded size to original (scale: {scale_x:.2f}x, {scale_y:.2f}x)")
+        for ann in annotations:
+            bbox = ann.get("bbox", [])
+            if len(bbox) == 4:
+                ann["bbox"] = [
+                    int(bbox[0] * scale_x),
+                    int(bbox[1] * scale_y),
+                    int(bbox[2] * scale_x),
+                    int(bbox[3] * scale_y)
+                ]
+            # Scale line start/end points if present
+            if ann.get("start") and len(ann["start"]) == 2:
+                ann["start"] = [int(ann["start"][0] * scale_x), int(ann["start"][1] * scale_y)]
+            if ann.get("end") and len(ann["end"]) == 2:
+                ann["end"] = [int(ann["end"][0] * scale_x), int(ann["end"][1] * scale_y)]
+
     def _parse_annotations_response(self, response: str) -> List[Dict[str, Any]]:
         """
         Parse Qwen VL response to extract annotations.
@@ -0,0 +1,202 @@
+"""
+Run Event Bus for GamED.AI v2
+
+In-process pub/sub that lets the observability SSE stream push run updates
+instead of re-querying the database every second.
+
+- Publishers: instrumentation (stage start/complete/failed, live steps) and
+  the run status updaters in routes/generate.py and routes/observability.py
+- Subscribers: one per open /runs/{run_id}/stream connection, each with its
+  own bounded asyncio.Queue
+- Events carry deltas only (a single stage, a single live step, a run status);
+  the SSE handler folds them into its own view of the run
+- Backpressure: a subscriber that falls behind has its queue drained and
+  replaced with a single "resync" marker, so a slow client costs one DB
+  snapshot instead of unbounded memory or a blocked pipeline
+
+The bus only sees runs executing in this process. ``is_local(run_id)`` tells
+the SSE handler whether it can rely on pushes or must poll the database
+(run executing in another worker).
+
+Usage:
+    bus = get_run_event_bus()
+    bus.publish(run_id, "stage", {"stage_id": ..., "status": "running"})
+
+    sub = bus.subscribe(run_id)
+    try:
+        event = await sub.get(timeout=15)
+    finally:
+        bus.unsubscribe(sub)
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional, Set
+
+logger = logging.getLogger("gamed_ai.services.run_event_bus")
+
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 256
+
+# Event types
+EVENT_STAGE = "stage"
+EVENT_LIVE_STEP = "live_step"
+EVENT_RUN_STATUS = "run_status"
+EVENT_RESYNC = "resync"
+
+TERMINAL_RUN_STATUSES = ("success", "completed", "failed", "cancelled")
+
+
+class RunSubscription:
+    """A single subscriber's bounded view of one run's event stream."""
+
+    def __init__(self, run_id: str, loop: asyncio.AbstractEventLoop, max_queue_size: int):
+        self.run_id = run_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.resyncs = 0
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event; returns None if timeout elapses first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _offer(self, event: Dict[str, Any]) -> None:
+        # Runs on self.loop
+        if self.queue.full():
+            # Slow consumer: discard the backlog and ask it to resync from the DB
+            self.dropped += self.queue.qsize() + 1
+            self.resyncs += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": EVENT_RESYNC, "run_id": self.run_id, "data": {}})
+            return
+        self.queue.put_nowait(event)
+
+
+class RunEventBus:
+    """
+    Fan-out of run deltas to SSE subscribers.
+
+    publish() is safe to call from any thread; delivery always happens on the
+    subscriber's event loop. Publishing never blocks the pipeline.
+    """
+
+    def __init__(self, max_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[RunSubscription]] = {}
+        self._local_runs: Set[str] = set()
+        self._published = 0
+        self._dropped = 0
+
+    # ------------------------------------------------------------------
+    # Run ownership
+    # ------------------------------------------------------------------
+
+    def mark_local(self, run_id: str) -> None:
+        """Record that run_id is executing in this process."""
+        with self._lock:
+            self._local_runs.add(run_id)
+
+    def mark_finished(self, run_id: str) -> None:
+        """Record that run_id is no longer executing in this process."""
+        with self._lock:
+            self._local_runs.discard(run_id)
+
+    def is_local(self, run_id: str) -> bool:
+        """True if run_id is executing in this process (pushes will arrive)."""
+        with self._lock:
+            return run_id in self._local_runs
+
+    # ------------------------------------------------------------------
+    # Pub/sub
+    # ------------------------------------------------------------------
+
+    def subscribe(self, run_id: str) -> RunSubscription:
+        """Open a subscription for run_id on the running event loop."""
+        sub = RunSubscription(run_id, asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(run_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: RunSubscription) -> None:
+        """Close a subscription opened by subscribe()."""
+        with self._lock:
+            subs = self._subscribers.get(sub.run_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.run_id]
+            self._dropped += sub.dropped
+
+    def publish(self, run_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        """Push a delta to every subscriber of run_id."""
+        with self._lock:
+            subs = list(self._subscribers.get(run_id, ()))
+            self._published += 1
+        if not subs:
+            return
+
+        event = {"type": event_type, "run_id": run_id, "data": data}
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for sub in subs:
+            try:
+                if sub.loop is current_loop:
+                    sub._offer(event)
+                else:
+                    sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:
+                # Subscriber's loop already closed; it will be unsubscribed by its own finally
+                pass
+
+    def publish_run_status(
+        self,
+        run_id: str,
+        status: str,
+        duration_ms: Optional[int] = None,
+        error_message: Optional[str] = None
+    ) -> None:
+        """Publish a run status change; terminal statuses release local ownership."""
+        self.publish(run_id, EVENT_RUN_STATUS, {
+            "status": status,
+            "duration_ms": duration_ms,
+            "error_message": error_message,
+        })
+        if status in TERMINAL_RUN_STATUSES:
+            self.mark_finished(run_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Subscriber counts and delivery counters."""
+        with self._lock:
+            subs = [s for group in self._subscribers.values() for s in group]
+            return {
+                "local_runs": len(self._local_runs),
+                "subscribed_runs": len(self._subscribers),
+                "subscribers": len(subs),
+                "published": self._published,
+                "dropped": self._dropped + sum(s.dropped for s in subs),
+                "max_queue_size": self.max_queue_size,
+            }
+
+
+# Singleton instance
+_run_event_bus: Optional[RunEventBus] = None
+_run_event_bus_lock = threading.Lock()
+
+
+def get_run_event_bus() -> RunEventBus:
+    """Get the process-wide run event bus."""
+    global _run_event_bus
+    if _run_event_bus is None:
+        with _run_event_bus_lock:
+            if _run_event_bus is None:
+                _run_event_bus = RunEventBus()
+    return _run_event_bus
@@ -19,6 +19,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from app.utils.rle_mask import RLEMask
+
 # Add mlx_sam3 to path
 MLX_SAM3_PATH = Path(__file__).parent.parent.parent / "third_party" / "mlx_sam3"
 if str(MLX_SAM3_PATH) not in sys.path:
@@ -188,7 +190,7 @@ class SAM3MLXService:
             canonical_labels: List of labels to segment (e.g., ["nucleus", "mitochondria"])
 
         Returns:
-            List of zones with id, label, bbox, mask, confidence
+            List of zones with id, label, bbox, mask (RLEMask), confidence
         """
         self._ensure_loaded()
 
@@ -231,7 +233,7 @@ class SAM3MLXService:
                             }
 
                             if masks and len(masks) > best_idx:
-                                zone["mask"] = masks[best_idx]
+                                zone["mask"] = RLEMask.encode(masks[best_idx])
 
                             zones.append(zone)
                             logger.info(f"SAM3 detected '{label}' with confidence {score:.2f}")
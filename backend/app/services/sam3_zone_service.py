@@ -21,6 +21,9 @@ from typing import Any, Dict, List, Optional, Tuple
 import cv2
 import numpy as np
 
+from app.utils.rle_mask import RLEMask
+from app.utils.spatial_index import greedy_suppress, xywh_to_boxes
+
 logger = logging.getLogger("gamed_ai.services.sam3_zone")
 
 
@@ -141,7 +144,7 @@ class SAM3ZoneDetector:
                 - bbox: {x, y, width, height} bounding box
                 - area: Area in pixels
                 - confidence: Predicted IoU score
-                - mask: Binary segmentation mask
+                - mask: RLEMask (compact, JSON-safe; decode() for the array)
         """
         self._ensure_loaded()
 
@@ -169,7 +172,7 @@ class SAM3ZoneDetector:
                 "area": int(mask_data["area"]),
                 "confidence": float(mask_data["predicted_iou"]),
                 "stability_score": float(mask_data["stability_score"]),
-                "mask": mask_data["segmentation"]  # Boolean array
+                "mask": RLEMask.encode(mask_data["segmentation"])
             })
 
         # Sort by area (largest first)
@@ -219,20 +222,13 @@ class SAM3ZoneDetector:
         if not zones:
             return []
 
-        keep = []
-        for zone in zones:
-            # Check if this zone overlaps significantly with any kept zone
-            is_duplicate = False
-            for kept in keep:
-                iou = self._compute_bbox_iou(zone["bbox"], kept["bbox"])
-                if iou > iou_threshold:
-                    is_duplicate = True
-                    break
-
-            if not is_duplicate:
-                keep.append(zone)
-
-        return keep
+        # Greedy suppression over sweep-and-prune candidates instead of
+        # comparing every zone with every kept zone
+        boxes = xywh_to_boxes([
+            (z["bbox"]["x"], z["bbox"]["y"], z["bbox"]["width"], z["bbox"]["height"]) for z in zones
+        ])
+        keep = greedy_suppress(boxes, iou_threshold)
+        return [zone for zone, kept in zip(zones, keep) if kept]
 
     def _compute_bbox_iou(
         self,
@@ -24,6 +24,8 @@ from typing import Any, Dict, List, Optional, Tuple
 import cv2
 import numpy as np
 
+from app.utils.rle_mask import RLEMask
+
 logger = logging.getLogger("gamed_ai.services.sam_guided_detection")
 
 
@@ -182,7 +184,8 @@ class SAMGuidedLineDetector:
             confidence_threshold: Minimum SAM confidence to accept
 
         Returns:
-            Tuple of (combined_mask, list_of_line_segments)
+            Tuple of (combined_mask, list_of_line_segments); each segment's
+            "mask" is an RLEMask
         """
         self._ensure_sam_loaded()
 
@@ -225,7 +228,7 @@ class SAMGuidedLineDetector:
                             "text_region_idx": i,
                             "prompt_point": point,
                             "confidence": float(score),
-                            "mask": mask
+                            "mask": RLEMask.encode(mask)
                         })
 
                         logger.debug(
@@ -335,7 +338,7 @@ class SAMCLIPLineDetector:
     def _verify_annotation_with_clip(
         self,
         image: np.ndarray,
-        mask: np.ndarray,
+        mask: RLEMask,
         threshold: float = 0.5
     ) -> float:
         """
@@ -348,13 +351,12 @@ class SAMCLIPLineDetector:
 
         self._ensure_clip_loaded()
 
-        # Get bounding box of mask
-        coords = np.where(mask)
-        if len(coords[0]) == 0:
+        # Get bounding box of mask (from the run lengths, no decode)
+        if mask.area == 0:
             return 0.0
 
-        y_min, y_max = coords[0].min(), coords[0].max()
-        x_min, x_max = coords[1].min(), coords[1].max()
+        x_min, y_min, box_w, box_h = mask.bbox
+        x_max, y_max = x_min + box_w - 1, y_min + box_h - 1
 
         # Add padding
         padding = 10
@@ -416,13 +418,13 @@ class SAMCLIPLineDetector:
 
         verified_count = 0
         for segment in segments:
-            mask = segment["mask"]
+            mask = RLEMask.from_dict(segment["mask"])
 
             # Verify with CLIP
             clip_score = self._verify_annotation_with_clip(image, mask)
 
             if clip_score >= clip_threshold:
-                verified_mask = np.maximum(verified_mask, mask.astype(np.uint8) * 255)
+                verified_mask[mask.decode()] = 255
                 verified_count += 1
                 logger.debug(f"CLIP verified segment with score {clip_score:.2f}")
             else:
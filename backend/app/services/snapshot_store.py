@@ -0,0 +1,497 @@
+"""
+Size-Bounded Snapshots for StageExecution
+
+Stage input/output snapshots can be several MB (zone polygons, base64 image
+assets, full blueprints). They used to be truncated by re-serialising the
+payload for every key, list item and nested dict, which is quadratic in the
+snapshot size. This module walks the structure once instead:
+
+- Bounded walk: builds the stored snapshot while tracking the exact size of
+  its JSON encoding, stopping each branch when the byte budget runs out and
+  recording the elided paths (``_elided_paths``)
+- Blob side store: strings/bytes above a threshold are written to a
+  content-addressed store (SHA-256, deduplicated) and replaced inline by
+  ``{"_blob": "<sha256>", "bytes": n}``; fetch them via
+  GET /observability/snapshot-blobs/{digest}
+- Blob cleanup: blobs unused for the TTL are deleted, then least-recently-used
+  ones (reads and dedup hits refresh a blob's mtime) until the store is under
+  its size cap. A snapshot whose blob was swept keeps its reference; fetching
+  it returns 404
+- restore_snapshot(): swaps blob references back for their content, for
+  callers (retry state reconstruction) that merge snapshots into state
+
+Environment Variables:
+    SNAPSHOT_BLOBS_ENABLED: "true" (default) or "false" to truncate large strings instead
+    SNAPSHOT_BLOB_DIR: Blob directory (default: pipeline_outputs/snapshot_blobs)
+    SNAPSHOT_BLOB_THRESHOLD_KB: Strings larger than this go to the blob store (default: 32)
+    SNAPSHOT_BLOB_MAX_MB: Size cap before LRU eviction kicks in (default: 1024)
+    SNAPSHOT_BLOB_TTL_DAYS: Delete blobs unused for this long (default: 14)
+
+Usage:
+    snapshot = bound_snapshot(state_subset, max_bytes=200 * 1024)
+    blob = get_snapshot_blob_store().get(snapshot["image"]["_blob"])
+    state.update(restore_snapshot(snapshot, get_snapshot_blob_store()))
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger("gamed_ai.services.snapshot_store")
+
+DEFAULT_BLOB_DIR = Path(__file__).parent.parent.parent / "pipeline_outputs" / "snapshot_blobs"
+DEFAULT_BLOB_THRESHOLD_KB = 32
+DEFAULT_BLOB_MAX_MB = 1024
+DEFAULT_BLOB_TTL_DAYS = 14
+
+# Sweep at most this often unless the size cap is exceeded
+SWEEP_INTERVAL_SECONDS = 3600
+# Evict down to this fraction of max_bytes so sweeps don't run on every put
+_EVICTION_LOW_WATERMARK = 0.9
+
+# Keep at most this many elided paths in the snapshot metadata
+MAX_ELIDED_PATHS = 50
+# Budget held back for the _truncated/_elided_paths metadata
+METADATA_RESERVE_BYTES = 4096
+# Don't bother emitting a truncated string shorter than this
+MIN_STRING_BYTES = 64
+
+TRUNCATED_SUFFIX = "... (truncated)"
+
+_encode_str = json.encoder.encode_basestring_ascii  # what json.dumps uses by default
+
+
+class SnapshotBlobStore:
+    """
+    Content-addressed blob files: <dir>/<sha256[:2]>/<sha256>.
+
+    A blob's mtime is its last use. put() sweeps expired and least-recently-used
+    blobs once per SWEEP_INTERVAL_SECONDS, or sooner when the store grows past
+    max_bytes; sweep() can also be called directly (e.g. from a cleanup job).
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        max_bytes: Optional[int] = DEFAULT_BLOB_MAX_MB * 1024 * 1024,
+        ttl_seconds: Optional[float] = DEFAULT_BLOB_TTL_DAYS * 86400,
+        clock=time.time
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._writes = 0
+        self._dedup_hits = 0
+        self._bytes_written = 0
+        self._evicted = 0
+        # Unknown until the first sweep (on the first write) scans the directory
+        self._total_bytes: Optional[int] = None
+        self._last_sweep = float("-inf")
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its SHA-256 hex digest (no-op if already stored)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            self._touch(path)
+            with self._lock:
+                self._dedup_hits += 1
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._writes += 1
+            self._bytes_written += len(data)
+            if self._total_bytes is not None:
+                self._total_bytes += len(data)
+            due = self._clock() - self._last_sweep >= SWEEP_INTERVAL_SECONDS or (
+                self.max_bytes is not None and self._total_bytes is not None
+                and self._total_bytes > self.max_bytes
+            )
+        if due:
+            self.sweep()
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Read a blob by digest (None if unknown, malformed or already swept)."""
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            return None
+        path = self._path(digest)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return data
+
+    def sweep(self) -> int:
+        """Delete blobs unused for ttl_seconds, then LRU blobs over max_bytes; returns the count removed."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0  # Another thread is already sweeping
+        try:
+            now = self._clock()
+            entries = []
+            for path in self.root.glob("??/*"):
+                if path.name.startswith(".tmp-"):
+                    continue
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            entries.sort()  # Least recently used first
+
+            total = sum(size for _, size, _ in entries)
+            target = None if self.max_bytes is None else int(self.max_bytes * _EVICTION_LOW_WATERMARK)
+            removed = 0
+            for mtime, size, path in entries:
+                expired = self.ttl_seconds is not None and now - mtime > self.ttl_seconds
+                if not expired and (target is None or total <= target):
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+
+            with self._lock:
+                self._total_bytes = total
+                self._evicted += removed
+                self._last_sweep = now
+            if removed:
+                logger.info(f"Snapshot blob sweep removed {removed} blobs ({total} bytes remain)")
+            return removed
+        finally:
+            self._sweep_lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "writes": self._writes,
+                "dedup_hits": self._dedup_hits,
+                "bytes_written": self._bytes_written,
+                "evicted": self._evicted,
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def _touch(self, path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Swept concurrently or read-only store; the blob is served either way
+
+
+class _ElidedType:
+    """Marker for a value that didn't fit the budget."""
+
+
+_ELIDED = _ElidedType()
+
+
+class _BoundedWalker:
+    """
+    Single pass over a snapshot.
+
+    walk() returns the value to store and the byte size of its JSON encoding
+    (json.dumps default separators). Once a branch is out of budget, the rest
+    of it is only measured so the original size is still reported.
+    """
+
+    def __init__(self, blob_store: Optional[SnapshotBlobStore], blob_threshold_bytes: int):
+        self.blob_store = blob_store
+        self.blob_threshold_bytes = blob_threshold_bytes
+        self.original_size = 0
+        self.elided_paths: List[str] = []
+        self.elided_count = 0
+        self.blob_count = 0
+
+    def walk(self, value: Any, path: str, budget: int) -> Tuple[Any, int]:
+        if isinstance(value, dict):
+            return self._walk_dict(value, path, budget)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return self._walk_list(list(value), path, budget)
+        if isinstance(value, (bytes, bytearray)):
+            return self._walk_bytes(bytes(value), path, budget)
+        if isinstance(value, str):
+            return self._walk_str(value, path, budget)
+        if value is None or isinstance(value, (bool, int, float)):
+            size = _scalar_size(value)
+            self.original_size += size
+            if size > budget:
+                self._elide(path)
+                return _ELIDED, 0
+            return value, size
+        # Same as json.dumps(default=str)
+        return self._walk_str(str(value), path, budget)
+
+    def _walk_dict(self, value: Dict, path: str, budget: int) -> Tuple[Any, int]:
+        if budget < 2:
+            self._measure(value)
+            self._elide(path)
+            return _ELIDED, 0
+        self.original_size += 2 + max(0, 2 * (len(value) - 1))
+        out: Dict[str, Any] = {}
+        size = 2  # {}
+        for key, item in value.items():
+            key = key if isinstance(key, str) else str(key)
+            item_path = f"{path}.{key}" if path else key
+            key_size = len(_encode_str(key)) + 2  # "key" plus ": "
+            self.original_size += key_size
+            overhead = key_size + (2 if out else 0)  # ", " before all but the first
+            if size + overhead >= budget:
+                self._measure(item)
+                self._elide(item_path)
+                continue
+            child, child_size = self.walk(item, item_path, budget - size - overhead)
+            if child is _ELIDED:
+                continue
+            out[key] = child
+            size += overhead + child_size
+        return out, size
+
+    def _walk_list(self, value: List, path: str, budget: int) -> Tuple[Any, int]:
+        if budget < 2:
+            self._measure(value)
+            self._elide(path)
+            return _ELIDED, 0
+        self.original_size += 2 + max(0, 2 * (len(value) - 1))
+        out: List[Any] = []
+        size = 2  # []
+        for index, item in enumerate(value):
+            separator = 2 if out else 0
+            if size + separator >= budget:
+                self._measure_items(value[index:])
+                self._elide(f"{path}[{index}:]")
+                break
+            child, child_size = self.walk(item, f"{path}[{index}]", budget - size - separator)
+            if child is _ELIDED:
+                # Cut the list here rather than leave gaps that shift indices
+                if self.elided_paths and self.elided_paths[-1] == f"{path}[{index}]":
+                    self.elided_paths[-1] = f"{path}[{index}:]"
+                self._measure_items(value[index + 1:])
+                break
+            out.append(child)
+            size += separator + child_size
+        return out, size
+
+    def _measure_items(self, items: List) -> None:
+        for item in items:
+            self._measure(item)
+
+    def _walk_str(self, value: str, path: str, budget: int) -> Tuple[Any, int]:
+        encoded_size = len(_encode_str(value))
+        self.original_size += encoded_size
+        if encoded_size > self.blob_threshold_bytes and self.blob_store is not None:
+            return self._to_blob(value.encode("utf-8", "surrogatepass"), path, budget)
+        if encoded_size <= budget:
+            return value, encoded_size
+        return self._truncate_str(value, path, budget)
+
+    def _walk_bytes(self, value: bytes, path: str, budget: int) -> Tuple[Any, int]:
+        if self.blob_store is not None:
+            self.original_size += len(value)
+            return self._to_blob(value, path, budget)
+        text = value.decode("utf-8", "replace")
+        return self._walk_str(text, path, budget)
+
+    def _truncate_str(self, value: str, path: str, budget: int) -> Tuple[Any, int]:
+        room = budget - len(_encode_str(TRUNCATED_SUFFIX))
+        if room < MIN_STRING_BYTES:
+            self._elide(path)
+            return _ELIDED, 0
+        # Escapes can make the encoding longer than the text; shrink until it fits
+        prefix = value[:room]
+        while prefix:
+            truncated = prefix + TRUNCATED_SUFFIX
+            size = len(_encode_str(truncated))
+            if size <= budget:
+                self._elide(f"{path}[{len(prefix)}:]")
+                return truncated, size
+            prefix = prefix[:max(0, len(prefix) - (size - budget) - 1)]
+        self._elide(path)
+        return _ELIDED, 0
+
+    def _to_blob(self, data: bytes, path: str, budget: int) -> Tuple[Any, int]:
+        try:
+            digest = self.blob_store.put(data)
+        except OSError as e:
+            logger.warning(f"Snapshot blob write failed for {path}: {e}")
+            self._elide(path)
+            return _ELIDED, 0
+        ref = {"_blob": digest, "bytes": len(data)}
+        size = len(json.dumps(ref))
+        if size > budget:
+            self._elide(path)
+            return _ELIDED, 0
+        self.blob_count += 1
+        return ref, size
+
+    def _measure(self, value: Any) -> None:
+        """Add value's encoded size to original_size without emitting anything."""
+        if isinstance(value, dict):
+            self.original_size += 2 + max(0, 2 * (len(value) - 1))
+            for key, item in value.items():
+                self.original_size += len(_encode_str(key if isinstance(key, str) else str(key))) + 2
+                self._measure(item)
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            self.original_size += 2 + max(0, 2 * (len(value) - 1))
+            for item in value:
+                self._measure(item)
+        elif isinstance(value, (bytes, bytearray)):
+            self.original_size += len(value)
+        elif isinstance(value, str):
+            self.original_size += len(_encode_str(value))
+        elif value is None or isinstance(value, (bool, int, float)):
+            self.original_size += _scalar_size(value)
+        else:
+            self.original_size += len(_encode_str(str(value)))
+
+    def _elide(self, path: str) -> None:
+        self.elided_count += 1
+        if len(self.elided_paths) < MAX_ELIDED_PATHS:
+            self.elided_paths.append(path)
+
+
+def _scalar_size(value: Any) -> int:
+    if value is None:
+        return 4
+    if value is True:
+        return 4
+    if value is False:
+        return 5
+    if isinstance(value, float):
+        return len(json.dumps(value))
+    return len(str(value))
+
+
+def bound_snapshot(
+    data: Dict[str, Any],
+    max_bytes: int,
+    blob_store: Optional[SnapshotBlobStore] = None,
+    blob_threshold_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Return a JSON-ready copy of data whose encoding is at most max_bytes.
+
+    Large strings/bytes go to blob_store (when given) and are referenced by
+    digest. Values that don't fit are dropped in document order and their
+    paths listed under ``_elided_paths``. The result never shares containers
+    with data, so the caller may keep mutating it.
+    """
+    if blob_threshold_bytes is None:
+        blob_threshold_bytes = DEFAULT_BLOB_THRESHOLD_KB * 1024
+    reserve = min(METADATA_RESERVE_BYTES, max_bytes // 4)
+    walker = _BoundedWalker(blob_store, blob_threshold_bytes)
+    bounded, size = walker.walk(data, "", max_bytes - reserve)
+
+    if not walker.elided_count and not walker.blob_count:
+        return bounded
+
+    bounded["_truncated"] = True
+    bounded["_original_size_kb"] = round(walker.original_size / 1024, 2)
+    if walker.blob_count:
+        bounded["_blob_count"] = walker.blob_count
+    if walker.elided_count:
+        bounded["_elided_paths"] = walker.elided_paths
+        if walker.elided_count > len(walker.elided_paths):
+            bounded["_elided_count"] = walker.elided_count
+    # Metadata is small; measure it directly
+    metadata_size = len(json.dumps({k: v for k, v in bounded.items() if k.startswith("_")})) + 4
+    bounded["_truncated_size_kb"] = round((size + metadata_size + 32) / 1024, 2)
+    return bounded
+
+
+# Keys bound_snapshot() adds alongside the payload
+_SNAPSHOT_METADATA_KEYS = ("_truncated", "_original_size_kb", "_truncated_size_kb", "_blob_count")
+
+
+def _is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 2 and isinstance(value.get("_blob"), str) and "bytes" in value
+
+
+def restore_snapshot(snapshot: Dict[str, Any], blob_store: Optional[SnapshotBlobStore]) -> Dict[str, Any]:
+    """
+    Return a copy of a bound snapshot with blob references replaced by their content.
+
+    Blobs are restored as UTF-8 strings (raw bytes if they don't decode). A
+    reference whose blob is gone (swept, or blobs disabled) is kept as is.
+    When every reference resolved and nothing was elided, the truncation
+    metadata is dropped too, so the result equals the original data.
+    """
+    missing = 0
+
+    def restore(value: Any) -> Any:
+        nonlocal missing
+        if _is_blob_ref(value):
+            data = blob_store.get(value["_blob"]) if blob_store is not None else None
+            if data is None:
+                missing += 1
+                return value
+            try:
+                return data.decode("utf-8", "surrogatepass")
+            except UnicodeDecodeError:
+                return data
+        if isinstance(value, dict):
+            return {key: restore(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [restore(item) for item in value]
+        return value
+
+    restored = restore(snapshot)
+    if missing:
+        logger.warning(f"{missing} snapshot blob(s) no longer in the blob store; references kept")
+    elif restored.get("_blob_count") and "_elided_paths" not in restored:
+        for key in _SNAPSHOT_METADATA_KEYS:
+            restored.pop(key, None)
+    return restored
+
+
+# Singleton instance
+_blob_store: Optional[SnapshotBlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_snapshot_blob_store() -> Optional[SnapshotBlobStore]:
+    """Get the process-wide blob store (None when SNAPSHOT_BLOBS_ENABLED=false)."""
+    global _blob_store
+    if os.getenv("SNAPSHOT_BLOBS_ENABLED", "true").lower() != "true":
+        return None
+    if _blob_store is None:
+        with _blob_store_lock:
+            if _blob_store is None:
+                _blob_store = SnapshotBlobStore(
+                    os.getenv("SNAPSHOT_BLOB_DIR", str(DEFAULT_BLOB_DIR)),
+                    max_bytes=int(float(os.getenv("SNAPSHOT_BLOB_MAX_MB", str(DEFAULT_BLOB_MAX_MB))) * 1024 * 1024),
+                    ttl_seconds=float(os.getenv("SNAPSHOT_BLOB_TTL_DAYS", str(DEFAULT_BLOB_TTL_DAYS))) * 86400,
+                )
+    return _blob_store
+
+
+def get_blob_threshold_bytes() -> int:
+    """Blob threshold from SNAPSHOT_BLOB_THRESHOLD_KB."""
+    return int(float(os.getenv("SNAPSHOT_BLOB_THRESHOLD_KB", str(DEFAULT_BLOB_THRESHOLD_KB))) * 1024)
@@ -0,0 +1,334 @@
+"""
+Incremental JSON Parser for Streaming LLM Output
+
+Consumes StreamingChunk text as it arrives and reports values as soon as
+they close, so JSON agents don't have to wait for the whole completion:
+
+- Events: each completed top-level field of the root object, and each
+  element of an array that is a top-level field (or of a root array)
+- Early abort: structural corruption that repair_json() can't fix raises
+  StreamingJSONError while the model is still generating (mismatched
+  brackets, runaway nesting, the same array element repeated over and over),
+  so the stream is dropped instead of running to max_tokens
+- Leniency: text before the root (prose, ```json fences) and after it is
+  ignored. Quirks repair_json() handles (single quotes, unquoted keys,
+  missing commas) make the parser stand down without raising; the full
+  text still goes through repair_json() at the end
+
+Environment Variables:
+    LLM_STREAM_JSON: Which generate_json_for_agent() calls stream: "false"
+        (default), "true" for all agents, or comma-separated agent names
+        ("content_generator" also matches content_generator_flash / _pro).
+        Streamed calls go straight to the provider, bypassing the LLM
+        router's hedging and failover
+
+Usage:
+    parser = IncrementalJSONParser()
+
+    async def on_chunk(chunk: StreamingChunk):
+        for event in parser.feed(chunk.content):
+            print(event.path, event.value)   # ("labels", 0) "Nucleus"
+
+    validator = PydanticStreamValidator(DragDropContent)
+    validator.check(event)   # raises StreamingJSONError on an invalid item
+"""
+
+import json
+import logging
+import os
+import types
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+logger = logging.getLogger("gamed_ai.services.streaming_json")
+
+# Nesting deeper than this is treated as a runaway generation
+MAX_DEPTH = 32
+
+# Identical consecutive array elements (objects/arrays/strings) before aborting
+MAX_REPEATS = 5
+
+FIELD = "field"
+ITEM = "item"
+
+
+def json_streaming_enabled(agent_name: str) -> bool:
+    """Whether LLM_STREAM_JSON enables streaming for this agent's JSON calls."""
+    setting = os.getenv("LLM_STREAM_JSON", "false").strip()
+    if setting.lower() in ("true", "false", ""):
+        return setting.lower() == "true"
+    entries = [entry.strip() for entry in setting.split(",") if entry.strip()]
+    return any(agent_name == entry or agent_name.startswith(entry + "_") for entry in entries)
+
+
+class StreamingJSONError(Exception):
+    """Raised to abort a streaming JSON generation (corrupt structure or invalid item)"""
+    def __init__(self, message: str, position: int = -1):
+        self.message = message
+        self.position = position
+        super().__init__(message)
+
+
+@dataclass
+class JSONEvent:
+    """
+    A value that closed while streaming.
+
+    Attributes:
+        kind: "field" (top-level field) or "item" (element of a top-level array)
+        path: ("labels",) for a field, ("labels", 0) for an item, (0,) for a root array item
+        value: The parsed value
+        attempt: generate_json_for_agent attempt the event belongs to (events of
+            an aborted attempt are followed by those of the next one)
+    """
+    kind: str
+    path: Tuple[Union[str, int], ...]
+    value: Any
+    attempt: int = 1
+
+
+class _Frame:
+    """One open object/array: what it expects next and where its value started."""
+    __slots__ = ("kind", "phase", "key", "start", "index", "last_item", "repeats")
+
+    def __init__(self, kind: str, start: int):
+        self.kind = kind
+        self.phase = "key" if kind == "object" else "value"
+        self.key: Optional[str] = None
+        self.start = start
+        self.index = 0
+        self.last_item: Any = None
+        self.repeats = 0
+
+
+class IncrementalJSONParser:
+    """Character-level JSON scanner that emits JSONEvents as values close."""
+
+    def __init__(self, max_depth: int = MAX_DEPTH, max_repeats: int = MAX_REPEATS):
+        self.max_depth = max_depth
+        self.max_repeats = max_repeats
+        self.text = ""
+        # Stopped tracking after a quirk repair_json() will deal with
+        self.degraded = False
+        self.done = False
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._events: List[JSONEvent] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._scalar_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[JSONEvent]:
+        """Consume more text; returns the events completed by it."""
+        self.text += chunk
+        self._events = []
+        text = self.text
+        while self._pos < len(text) and not self.degraded:
+            self._step(text[self._pos], self._pos)
+            self._pos += 1
+        return self._events
+
+    # ------------------------------------------------------------------
+    # Scanner
+    # ------------------------------------------------------------------
+
+    def _step(self, c: str, i: int) -> None:
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                self._end_string(i)
+            return
+
+        if self._scalar_start is not None:
+            if c not in ",]}" and not c.isspace():
+                return
+            start, self._scalar_start = self._scalar_start, None
+            self._end_value(start, i)
+
+        if not self._stack:
+            # Preamble before the root, or trailing text after it
+            if not self.done and c in "{[":
+                self._push("object" if c == "{" else "array", i)
+            return
+        if c.isspace():
+            return
+
+        frame = self._stack[-1]
+        if frame.kind == "object":
+            self._step_object(frame, c, i)
+        else:
+            self._step_array(frame, c, i)
+
+    def _step_object(self, frame: _Frame, c: str, i: int) -> None:
+        if c == "]":
+            raise StreamingJSONError(f"']' closes an object at position {i}", i)
+        if frame.phase == "key":
+            if c == '"':
+                self._start_string(i, is_key=True)
+            elif c == "}":
+                self._close(i)
+            else:
+                self._stand_down(f"expected a key at position {i}")
+        elif frame.phase == "colon":
+            if c == ":":
+                frame.phase = "value"
+            else:
+                self._stand_down(f"expected ':' at position {i}")
+        elif frame.phase == "value":
+            self._start_value(c, i)
+        elif c == ",":
+            frame.phase = "key"
+        elif c == "}":
+            self._close(i)
+        else:
+            self._stand_down(f"expected ',' or '}}' at position {i}")
+
+    def _step_array(self, frame: _Frame, c: str, i: int) -> None:
+        if c == "}":
+            raise StreamingJSONError(f"'}}' closes an array at position {i}", i)
+        if c == "]":
+            # Also accepts a trailing comma before ']'
+            self._close(i)
+        elif frame.phase == "value":
+            self._start_value(c, i)
+        elif c == ",":
+            frame.phase = "value"
+        else:
+            self._stand_down(f"expected ',' or ']' at position {i}")
+
+    def _start_value(self, c: str, i: int) -> None:
+        if c == '"':
+            self._start_string(i, is_key=False)
+        elif c in "{[":
+            self._push("object" if c == "{" else "array", i)
+        elif c in ",:}":
+            self._stand_down(f"missing value at position {i}")
+        else:
+            self._scalar_start = i
+
+    def _start_string(self, i: int, is_key: bool) -> None:
+        self._in_string = True
+        self._string_start = i
+        self._string_is_key = is_key
+
+    def _end_string(self, i: int) -> None:
+        if not self._string_is_key:
+            self._end_value(self._string_start, i + 1)
+            return
+        frame = self._stack[-1]
+        try:
+            frame.key = json.loads(self.text[self._string_start:i + 1], strict=False)
+        except ValueError:
+            frame.key = self.text[self._string_start + 1:i]
+        frame.phase = "colon"
+
+    def _push(self, kind: str, i: int) -> None:
+        if len(self._stack) >= self.max_depth:
+            raise StreamingJSONError(f"JSON nested deeper than {self.max_depth} levels at position {i}", i)
+        self._stack.append(_Frame(kind, i))
+
+    def _close(self, i: int) -> None:
+        frame = self._stack.pop()
+        if not self._stack:
+            self.done = True
+            return
+        self._end_value(frame.start, i + 1)
+
+    def _stand_down(self, reason: str) -> None:
+        logger.debug(f"Streaming JSON parser standing down ({reason}); leaving it to repair_json")
+        self.degraded = True
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def _end_value(self, start: int, end: int) -> None:
+        """A value in the innermost open container finished at text[start:end]."""
+        parent = self._stack[-1]
+        path: Optional[Tuple[Union[str, int], ...]] = None
+        if len(self._stack) == 1:
+            path = (parent.key,) if parent.kind == "object" else (parent.index,)
+        elif len(self._stack) == 2 and parent.kind == "array" and self._stack[0].kind == "object":
+            path = (self._stack[0].key, parent.index)
+
+        if path is not None:
+            try:
+                value = json.loads(self.text[start:end], strict=False)
+            except ValueError:
+                # e.g. a bare Python literal; repair_json sorts it out at the end
+                value = None
+            else:
+                kind = ITEM if parent.kind == "array" else FIELD
+                if kind == ITEM:
+                    self._check_repeats(parent, value, start)
+                self._events.append(JSONEvent(kind=kind, path=path, value=value))
+
+        parent.phase = "comma"
+        if parent.kind == "array":
+            parent.index += 1
+
+    def _check_repeats(self, frame: _Frame, value: Any, position: int) -> None:
+        if isinstance(value, (dict, list, str)) and value and value == frame.last_item:
+            frame.repeats += 1
+            if frame.repeats >= self.max_repeats:
+                raise StreamingJSONError(
+                    f"Array element repeated {frame.repeats + 1} times in a row at position {position} "
+                    f"(degenerate generation)",
+                    position
+                )
+        else:
+            frame.repeats = 0
+        frame.last_item = value
+
+
+class PydanticStreamValidator:
+    """
+    Validates streamed fields and array items against a Pydantic model's field types.
+
+    Only fields that arrive are checked, so whole-model rules (required
+    fields, cross-field consistency) still need the final model parse.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self._fields: Dict[str, TypeAdapter] = {}
+        self._items: Dict[str, TypeAdapter] = {}
+        for name, field in model.model_fields.items():
+            annotation = field.rebuild_annotation()
+            adapter = TypeAdapter(annotation)
+            item_type = _list_item_type(field.annotation)
+            for key in {name, field.alias or name}:
+                self._fields[key] = adapter
+                if item_type is not None:
+                    self._items[key] = TypeAdapter(item_type)
+
+    def check(self, event: JSONEvent) -> None:
+        """Raise StreamingJSONError if a streamed field or item is invalid."""
+        key = event.path[0]
+        adapter = self._items.get(key) if event.kind == ITEM else self._fields.get(key)
+        if adapter is None:
+            return
+        try:
+            adapter.validate_python(event.value)
+        except ValidationError as e:
+            where = f"{key}[{event.path[1]}]" if event.kind == ITEM else str(key)
+            errors = "; ".join(error["msg"] for error in e.errors()[:3])
+            raise StreamingJSONError(f"Invalid '{where}': {errors}")
+
+
+def _list_item_type(annotation: Any) -> Any:
+    """Element type of list[X] / Optional[list[X]] annotations, else None."""
+    if get_origin(annotation) is list:
+        return (get_args(annotation) or (Any,))[0]
+    if get_origin(annotation) in (Union, types.UnionType):
+        lists = [arg for arg in get_args(annotation) if get_origin(arg) is list]
+        if len(lists) == 1:
+            return (get_args(lists[0]) or (Any,))[0]
+    return None
@@ -0,0 +1,273 @@
+"""
+Native Structured Output for GamED.AI v2
+
+Lets generate_json_for_agent() have the provider constrain decoding to a JSON
+schema, instead of asking for JSON in the prompt and fixing it afterwards
+with repair_json() and error-feedback re-prompts:
+
+- Schemas come from the Pydantic models in app/v4/schemas and
+  app/agents/schemas (a model class, any TypeAdapter-able type, or a plain
+  JSON schema dict)
+- Per provider:
+    google     GenerateContentConfig(response_mime_type="application/json",
+               response_json_schema=...)
+    openai     response_format={"type": "json_schema", ...}
+    anthropic  one tool whose input_schema is the schema, forced with
+               tool_choice; the tool input is the JSON result
+    local      Ollama's OpenAI-compatible endpoint, where a json_schema
+               response_format is passed on as Ollama's native `format`
+    groq       not supported: prompt instructions + repair as before
+- A schema a model rejects (a 400 whose message refers to the schema) is
+  remembered for that model and schema for a while, and those calls use the
+  prompted path until it expires. Other 400s (context length, content
+  policy) leave native output on
+- Per-agent stats split native and prompted calls (repairs, re-prompts,
+  failures) and estimate the repairs and retries avoided from the prompted
+  baseline
+
+Environment Variables:
+    LLM_STRUCTURED_OUTPUT: "true" (default) or "false" to always use prompted JSON
+    LLM_SCHEMA_REJECTION_TTL_SECONDS: How long a rejected model/schema pair uses
+        prompted JSON before native output is tried again (default: 3600)
+
+Usage:
+    schema = resolve_json_schema(GameConcept)
+    if use_native_structured_output(model_key, "google", schema):
+        response = await llm.generate(prompt, model=model_id, response_schema=schema)
+    get_structured_output_stats().record("game_concept_designer", native=True, attempts=1,
+                                         repaired=False, ok=True)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger("gamed_ai.services.structured_output")
+
+# Providers (ModelProvider values) with a native constrained-output mode
+NATIVE_PROVIDERS = {"google", "openai", "anthropic", "local"}
+
+_DEFAULT_SCHEMA_NAME = "structured_output"
+
+DEFAULT_REJECTION_TTL_SECONDS = 3600
+
+# Provider error text that points at the schema / structured-output parameters
+_SCHEMA_ERROR_MARKERS = ("schema", "response_format", "response_mime_type", "tool_choice")
+
+
+def resolve_json_schema(schema: Any) -> Optional[Dict[str, Any]]:
+    """JSON schema dict for a Pydantic model class, TypeAdapter-able type or dict (None passes through)."""
+    if schema is None or isinstance(schema, dict):
+        return schema
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_json_schema()
+    return TypeAdapter(schema).json_schema()
+
+
+def schema_name(schema: Dict[str, Any]) -> str:
+    """Identifier for the schema as an OpenAI json_schema name / Anthropic tool name."""
+    name = re.sub(r"[^A-Za-z0-9_-]", "_", str(schema.get("title") or ""))[:64]
+    return name or _DEFAULT_SCHEMA_NAME
+
+
+def openai_response_format(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """response_format for OpenAI-compatible chat completions (OpenAI, Ollama)."""
+    # Non-strict: strict mode requires every property to be required and
+    # additionalProperties=false, which the Pydantic schemas don't follow
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema_name(schema), "schema": schema, "strict": False},
+    }
+
+
+def anthropic_tool(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Tool definition whose forced call carries the structured result as its input."""
+    return {
+        "name": schema_name(schema),
+        "description": "Return the complete response as this tool's input.",
+        "input_schema": schema,
+    }
+
+
+def supports_native(provider: str, schema: Optional[Dict[str, Any]]) -> bool:
+    """Whether a provider can constrain output to this schema (object schemas only)."""
+    return bool(schema) and provider in NATIVE_PROVIDERS and schema.get("type") == "object"
+
+
+def schema_fingerprint(schema: Optional[Dict[str, Any]]) -> str:
+    """Short stable hash of a JSON schema, used to remember rejections per schema."""
+    encoded = json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+def is_schema_rejection(error: Exception) -> bool:
+    """Whether a provider error is the structured-output schema being refused (not any other bad request)."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status not in (400, 422):
+        return False
+    text = str(error).lower()
+    return any(marker in text for marker in _SCHEMA_ERROR_MARKERS)
+
+
+def structured_output_enabled() -> bool:
+    return os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+
+@dataclass
+class _ModeStats:
+    """Outcome counters for one agent's calls in one mode (native or prompted)."""
+    calls: int = 0
+    attempts: int = 0
+    repaired: int = 0
+    retries: int = 0
+    failures: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **vars(self),
+            "repair_rate": round(self.repaired / self.calls, 3) if self.calls else None,
+            "retries_per_call": round(self.retries / self.calls, 3) if self.calls else None,
+        }
+
+
+class StructuredOutputStats:
+    """
+    Per-agent native vs prompted JSON outcomes, and models that rejected a schema.
+
+    "Avoided" estimates apply the prompted repair / retry rate (the agent's
+    own if it has prompted calls, else the process-wide one) to the native
+    calls and subtract what native calls actually needed. They stay None
+    until a prompted baseline exists (e.g. LLM_STRUCTURED_OUTPUT=false for a
+    while, Groq agents, or fallbacks).
+    """
+
+    def __init__(self, rejection_ttl: float = DEFAULT_REJECTION_TTL_SECONDS, clock=time.monotonic):
+        self.rejection_ttl = rejection_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, _ModeStats]] = {}
+        self._fallbacks: Dict[str, int] = {}
+        # (model_key, schema fingerprint) -> (expiry, schema name)
+        self._rejected: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+    def record(self, agent_name: str, native: bool, attempts: int, repaired: bool, ok: bool) -> None:
+        """Record one generate_json_for_agent() call."""
+        with self._lock:
+            modes = self._agents.setdefault(agent_name, {"native": _ModeStats(), "prompted": _ModeStats()})
+            mode = modes["native" if native else "prompted"]
+            mode.calls += 1
+            mode.attempts += attempts
+            mode.retries += max(0, attempts - 1)
+            mode.repaired += int(repaired)
+            mode.failures += int(not ok)
+
+    def record_fallback(
+        self,
+        agent_name: str,
+        model_key: str,
+        error: Exception,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """A native call was rejected: count it and stop sending this schema to the model for a while."""
+        key = (model_key, schema_fingerprint(schema))
+        with self._lock:
+            self._fallbacks[agent_name] = self._fallbacks.get(agent_name, 0) + 1
+            first = key not in self._rejected or self._rejected[key][0] <= self._clock()
+            self._rejected[key] = (self._clock() + self.rejection_ttl, schema_name(schema or {}))
+        if first:
+            logger.warning(
+                f"Model '{model_key}' rejected native structured output for schema "
+                f"'{schema_name(schema or {})}' ({error}); using prompted JSON for it "
+                f"for the next {self.rejection_ttl:.0f}s"
+            )
+
+    def is_rejected(self, model_key: str, schema: Optional[Dict[str, Any]] = None) -> bool:
+        key = (model_key, schema_fingerprint(schema))
+        with self._lock:
+            entry = self._rejected.get(key)
+            if entry is None:
+                return False
+            if entry[0] <= self._clock():
+                del self._rejected[key]
+                return False
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            totals = _ModeStats()
+            for modes in self._agents.values():
+                for field in vars(totals):
+                    setattr(totals, field, getattr(totals, field) + getattr(modes["prompted"], field))
+
+            agents: Dict[str, Any] = {}
+            repairs_avoided = retries_avoided = 0.0
+            estimated = False
+            for agent_name, modes in sorted(self._agents.items()):
+                native, prompted = modes["native"], modes["prompted"]
+                baseline = prompted if prompted.calls else totals
+                entry: Dict[str, Any] = {
+                    "native": native.as_dict(),
+                    "prompted": prompted.as_dict(),
+                    "fallbacks": self._fallbacks.get(agent_name, 0),
+                    "repairs_avoided": None,
+                    "retries_avoided": None,
+                }
+                if native.calls and baseline.calls:
+                    entry["repairs_avoided"] = round(
+                        native.calls * baseline.repaired / baseline.calls - native.repaired, 1
+                    )
+                    entry["retries_avoided"] = round(
+                        native.calls * baseline.retries / baseline.calls - native.retries, 1
+                    )
+                    repairs_avoided += entry["repairs_avoided"]
+                    retries_avoided += entry["retries_avoided"]
+                    estimated = True
+                agents[agent_name] = entry
+
+            return {
+                "enabled": structured_output_enabled(),
+                "agents": agents,
+                "repairs_avoided": round(repairs_avoided, 1) if estimated else None,
+                "retries_avoided": round(retries_avoided, 1) if estimated else None,
+                "rejected_models": sorted({model_key for (model_key, _), (expiry, _) in self._rejected.items()
+                                           if expiry > now}),
+                "rejected_schemas": [
+                    {"model": model_key, "schema": name, "expires_in_s": round(expiry - now)}
+                    for (model_key, _), (expiry, name) in sorted(self._rejected.items())
+                    if expiry > now
+                ],
+            }
+
+
+_stats: Optional[StructuredOutputStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_structured_output_stats() -> StructuredOutputStats:
+    """Get or create the process-wide structured output stats."""
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = StructuredOutputStats(rejection_ttl=float(
+                    os.getenv("LLM_SCHEMA_REJECTION_TTL_SECONDS", str(DEFAULT_REJECTION_TTL_SECONDS))
+                ))
+    return _stats
+
+
+def use_native_structured_output(model_key: str, provider: str, schema: Optional[Dict[str, Any]]) -> bool:
+    """Whether a generate_json_for_agent() call on this model should send the schema natively."""
+    return (
+        structured_output_enabled()
+        and supports_native(provider, schema)
+        and not get_structured_output_stats().is_rejected(model_key, schema)
+    )
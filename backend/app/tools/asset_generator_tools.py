@@ -1181,6 +1181,7 @@ def register_asset_generator_tools() -> None:
             "required": ["description"],
         },
         function=generate_diagram_image_impl,
+        parallel_safe=False,
     )
 
     register_tool(
@@ -1280,6 +1281,7 @@ def register_asset_generator_tools() -> None:
             "required": ["scenes"],
         },
         function=submit_assets_impl,
+        parallel_safe=False,
     )
 
     logger.info("Registered 5 asset generator v3 tools")
@@ -2248,6 +2248,7 @@ def register_blueprint_assembler_tools() -> None:
             "required": ["blueprint"],
         },
         function=submit_blueprint_impl,
+        parallel_safe=False,
     )
 
     logger.info("Registered 4 blueprint assembler v3 tools")
@@ -713,6 +713,7 @@ def register_game_design_v3_tools() -> None:
             "required": ["title", "labels", "scenes"],
         },
         function=submit_game_design_impl,
+        parallel_safe=False,
     )
 
     logger.info("Registered 5 v3 game design tools")
@@ -1128,6 +1128,7 @@ def register_interaction_designer_tools() -> None:
             "required": ["interaction_specs"],
         },
         function=submit_interaction_specs_impl,
+        parallel_safe=False,
     )
 
     logger.info("Registered 5 interaction designer v3 tools")
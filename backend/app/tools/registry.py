@@ -334,7 +334,8 @@ def create_tool(
     name: str,
     description: str,
     parameters: Dict[str, Any],
-    function: Callable[..., Awaitable[Any]]
+    function: Callable[..., Awaitable[Any]],
+    parallel_safe: bool = True
 ) -> Any:
     """
     Factory function to create a Tool instance.
@@ -344,6 +345,8 @@ def create_tool(
         description: Human-readable description
         parameters: JSON Schema for parameters
         function: Async callable that executes the tool
+        parallel_safe: False for tools with side effects that must not run
+            concurrently with other calls from the same LLM turn
 
     Returns:
         Tool instance
@@ -353,7 +356,8 @@ def create_tool(
         name=name,
         description=description,
         parameters=parameters,
-        function=function
+        function=function,
+        parallel_safe=parallel_safe
     )
 
 
@@ -361,7 +365,8 @@ def register_tool(
     name: str,
     description: str,
     parameters: Dict[str, Any],
-    function: Callable[..., Awaitable[Any]]
+    function: Callable[..., Awaitable[Any]],
+    parallel_safe: bool = True
 ) -> Any:
     """
     Create and register a tool in one step.
@@ -371,11 +376,12 @@ def register_tool(
         description: Human-readable description
         parameters: JSON Schema for parameters
         function: Async callable that executes the tool
+        parallel_safe: False for tools with side effects (see create_tool)
 
     Returns:
         Tool instance
     """
-    tool = create_tool(name, description, parameters, function)
+    tool = create_tool(name, description, parameters, function, parallel_safe)
     get_tool_registry().register(tool)
     return tool
 
@@ -1026,6 +1026,7 @@ def register_scene_architect_tools() -> None:
             "required": ["scene_specs"],
         },
         function=submit_scene_specs_impl,
+        parallel_safe=False,
     )
 
     logger.info("Registered 5 scene architect v3 tools")
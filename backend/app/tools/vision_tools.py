@@ -493,7 +493,8 @@ def register_vision_tools() -> None:
             },
             "required": ["prompt"]
         },
-        function=generate_diagram_image_impl
+        function=generate_diagram_image_impl,
+        parallel_safe=False
     )
 
     # detect_zones
@@ -0,0 +1,123 @@
+"""
+Optimal One-to-One Assignment
+
+Maximum-weight bipartite matching for label/zone style problems, replacing
+"sort every (row, column, score) triple and take greedily" loops. Greedy
+picks can lock a row into its second-best column and leave a better overall
+matching on the table; the Hungarian method maximises the total score.
+
+- Uses scipy.optimize.linear_sum_assignment when SciPy is installed
+- Otherwise a NumPy Hungarian (shortest augmenting path, O(n^2 m) with a
+  vectorised inner step); fine for the few hundred rows/columns we match
+
+Weights are non-negative scores. Pairs below min_weight (or NaN / -inf)
+are never assigned, so rows and columns may stay unmatched.
+
+Usage:
+    pairs = max_weight_assignment(scores, min_weight=0.1)   # [(row, col), ...]
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment as _scipy_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+def _hungarian(cost: np.ndarray) -> np.ndarray:
+    """Column index for each row minimising total cost (rows <= columns)."""
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # owner[j]: 1-based row matched to column j
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for row in range(1, n + 1):
+        owner[0] = row
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    assignment = np.full(n, -1, dtype=np.int64)
+    for col in range(1, m + 1):
+        if owner[col]:
+            assignment[owner[col] - 1] = col - 1
+    return assignment
+
+
+def solve_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum-cost assignment for a rectangular cost matrix.
+
+    Returns (rows, cols) like scipy.optimize.linear_sum_assignment: every row
+    (or every column, whichever is fewer) is matched, rows ascending.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    if SCIPY_AVAILABLE:
+        rows, cols = _scipy_assignment(cost)
+        return rows.astype(np.int64), cols.astype(np.int64)
+
+    if cost.shape[0] <= cost.shape[1]:
+        cols = _hungarian(cost)
+        return np.arange(cost.shape[0]), cols
+    rows = _hungarian(cost.T)
+    order = np.argsort(rows)
+    return rows[order], np.arange(cost.shape[1])[order]
+
+
+def max_weight_assignment(
+    weights: np.ndarray,
+    min_weight: Optional[float] = None,
+) -> List[Tuple[int, int]]:
+    """
+    One-to-one (row, col) pairs maximising the summed weight.
+
+    Args:
+        weights: (rows, cols) non-negative scores
+        min_weight: Pairs scoring below this are never assigned
+
+    Returns:
+        Assigned (row, col) pairs sorted by row
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.ndim != 2 or weights.size == 0:
+        return []
+    valid = np.isfinite(weights)
+    if min_weight is not None:
+        valid &= weights >= min_weight
+    if not valid.any():
+        return []
+
+    # Invalid pairs cost the same as leaving both sides unmatched
+    cost = np.where(valid, -weights, 0.0)
+    rows, cols = solve_assignment(cost)
+    return [(int(r), int(c)) for r, c in zip(rows, cols) if valid[r, c]]
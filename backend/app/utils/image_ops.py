@@ -0,0 +1,214 @@
+"""
+Vectorised Image Operations
+
+Shared NumPy/OpenCV helpers for the diagram image paths (asset background
+removal, annotation masks for inpainting, leader-line filtering). They
+replace per-pixel and per-box Python loops and repeated PIL <-> OpenCV
+round trips:
+
+- Format conversion: decode/encode bytes, single-read loading
+- Background keying: near-white pixels to transparent in one array op
+- Masks: boxes and line segments rasterised in one call each;
+  union, dilation and closing
+- Geometry: segment lengths/angles and point-to-box distances for N x M
+  candidates at once
+
+Usage:
+    png = remove_background(image_bytes, threshold=240)
+    mask = boxes_to_mask(image.shape, [r["bbox"] for r in regions], padding=10)
+    keep = (segment_lengths(segments) >= 20) & points_near_boxes(ends, boxes, 50).any(axis=1)
+
+Benchmark against the previous loops: python scripts/bench_image_ops.py
+"""
+
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+BoxLike = Union[Dict[str, Any], Sequence[float]]
+
+
+# =============================================================================
+# FORMAT CONVERSION
+# =============================================================================
+
+def decode_image(data: bytes, mode: str = "RGB") -> np.ndarray:
+    """Decode image bytes to an array in a PIL mode ("RGB", "RGBA", "L")."""
+    return np.asarray(Image.open(BytesIO(data)).convert(mode))
+
+
+def load_image(path: str, mode: str = "BGR") -> Optional[np.ndarray]:
+    """Read an image file once with OpenCV ("BGR" or "GRAY"); None if unreadable."""
+    flag = cv2.IMREAD_GRAYSCALE if mode == "GRAY" else cv2.IMREAD_COLOR
+    return cv2.imread(str(path), flag)
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    """BGR (or already single-channel) array to grayscale."""
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def encode_png(image: Union[np.ndarray, Image.Image]) -> bytes:
+    """Encode an RGB/RGBA/L array or PIL image as PNG bytes."""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    buf = BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+# =============================================================================
+# BACKGROUND KEYING
+# =============================================================================
+
+def key_background(rgba: np.ndarray, threshold: int = 240) -> np.ndarray:
+    """Return a copy of an RGBA array with near-white pixels made transparent.
+
+    A pixel is background when R, G and B are all above threshold; its colour
+    is kept and only alpha is set to 0.
+    """
+    out = np.array(rgba, dtype=np.uint8, copy=True)
+    background = (out[..., :3] > threshold).all(axis=-1)
+    out[..., 3][background] = 0
+    return out
+
+
+def remove_background(image_bytes: bytes, threshold: int = 240) -> bytes:
+    """Near-white background to transparent; returns PNG bytes."""
+    return encode_png(key_background(decode_image(image_bytes, "RGBA"), threshold))
+
+
+# =============================================================================
+# MASKS
+# =============================================================================
+
+def boxes_array(boxes: Iterable[BoxLike]) -> np.ndarray:
+    """(N, 4) float array of x, y, width, height.
+
+    Accepts {"x", "y", "width", "height"} dicts, regions holding such a dict
+    under "bbox", or (x, y, width, height) sequences.
+    """
+    rows = []
+    for box in boxes:
+        if isinstance(box, dict):
+            box = box.get("bbox", box)
+            rows.append((box.get("x", 0), box.get("y", 0), box.get("width", 0), box.get("height", 0)))
+        else:
+            rows.append(tuple(box[:4]))
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 4)
+
+
+def boxes_to_mask(
+    shape: Tuple[int, ...],
+    boxes: Iterable[BoxLike],
+    padding: Union[int, Sequence[int], np.ndarray] = 0,
+    value: int = 255,
+) -> np.ndarray:
+    """Fill padded boxes into a uint8 mask of shape[:2].
+
+    Corners are clipped to the image and both are inclusive, matching
+    cv2.rectangle(..., -1) and ImageDraw.rectangle. padding may be a scalar
+    or one value per box.
+    """
+    h, w = shape[:2]
+    mask = np.zeros((h, w), dtype=np.uint8)
+    arr = boxes_array(boxes)
+    if len(arr) == 0:
+        return mask
+    pad = np.broadcast_to(np.asarray(padding, dtype=np.float64), (len(arr),))
+    x1 = np.maximum(0, arr[:, 0] - pad).astype(np.int64)
+    y1 = np.maximum(0, arr[:, 1] - pad).astype(np.int64)
+    x2 = np.minimum(w, arr[:, 0] + arr[:, 2] + pad).astype(np.int64)
+    y2 = np.minimum(h, arr[:, 1] + arr[:, 3] + pad).astype(np.int64)
+    for bx1, by1, bx2, by2 in zip(x1, y1, x2, y2):
+        mask[by1:by2 + 1, bx1:bx2 + 1] = value
+    return mask
+
+
+def as_segments(lines: Optional[Iterable[Any]]) -> np.ndarray:
+    """(N, 4) int array of x1, y1, x2, y2 from HoughLinesP output or a list of lines."""
+    if lines is None:
+        return np.zeros((0, 4), dtype=np.int64)
+    arr = np.asarray(list(lines) if not isinstance(lines, np.ndarray) else lines)
+    return arr.reshape(-1, 4).astype(np.int64)
+
+
+def lines_to_mask(shape: Tuple[int, ...], lines: Optional[Iterable[Any]], thickness: int = 8) -> np.ndarray:
+    """Draw all line segments into a uint8 mask in a single OpenCV call."""
+    h, w = shape[:2]
+    mask = np.zeros((h, w), dtype=np.uint8)
+    segments = as_segments(lines)
+    if len(segments):
+        cv2.polylines(mask, list(segments.reshape(-1, 2, 2).astype(np.int32)), False, 255, thickness)
+    return mask
+
+
+def combine_masks(*masks: np.ndarray) -> np.ndarray:
+    """Union of same-shaped uint8 masks."""
+    return np.bitwise_or.reduce(np.stack(masks), axis=0)
+
+
+def _kernel(kernel_size: int) -> np.ndarray:
+    return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+
+
+def dilate_mask(mask: np.ndarray, kernel_size: int = 5, iterations: int = 1) -> np.ndarray:
+    """Dilate with an elliptical kernel."""
+    return cv2.dilate(mask, _kernel(kernel_size), iterations=iterations)
+
+
+def close_mask(mask: np.ndarray, kernel_size: int = 5) -> np.ndarray:
+    """Morphological closing with an elliptical kernel (fills small gaps)."""
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, _kernel(kernel_size))
+
+
+# =============================================================================
+# GEOMETRY
+# =============================================================================
+
+def segment_lengths(segments: np.ndarray) -> np.ndarray:
+    """Euclidean length of each (x1, y1, x2, y2) segment."""
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    return np.hypot(segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1])
+
+
+def segment_angles(segments: np.ndarray) -> np.ndarray:
+    """Angle of each segment folded into 0-90 degrees (0 = horizontal)."""
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    angle = np.abs(np.degrees(np.arctan2(segments[:, 3] - segments[:, 1], segments[:, 2] - segments[:, 0])))
+    return np.where(angle > 90, 180 - angle, angle)
+
+
+def points_to_boxes_distance(points: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """(N, M) distance from each point to each x, y, width, height box (0 inside)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    px, py = points[:, 0:1], points[:, 1:2]
+    bx, by = boxes[:, 0], boxes[:, 1]
+    dx = np.maximum.reduce([bx - px, np.zeros_like(px - bx), px - (bx + boxes[:, 2])])
+    dy = np.maximum.reduce([by - py, np.zeros_like(py - by), py - (by + boxes[:, 3])])
+    return np.hypot(dx, dy)
+
+
+def points_near_boxes(points: np.ndarray, boxes: np.ndarray, max_distance: float) -> np.ndarray:
+    """(N, M) bool: point within max_distance of box."""
+    return points_to_boxes_distance(points, boxes) <= max_distance
+
+
+def pairwise_center_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, M) distance between the centres of x, y, width, height boxes."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    ca = a[:, :2] + a[:, 2:] / 2
+    cb = b[:, :2] + b[:, 2:] / 2
+    return np.hypot(ca[:, None, 0] - cb[None, :, 0], ca[:, None, 1] - cb[None, :, 1])
+
+
+def select(items: List[Any], keep: np.ndarray) -> List[Any]:
+    """Items whose keep flag is set (keeps the original objects)."""
+    return [items[i] for i in np.flatnonzero(keep)]
@@ -0,0 +1,200 @@
+"""
+Run-Length Encoded Segmentation Masks
+
+Zones used to carry full-resolution boolean arrays in "mask" (1MB per zone
+for a 1024x1024 diagram), which were copied through LangGraph state,
+checkpoints and stage snapshots. RLEMask keeps masks compressed instead:
+
+- Format: COCO RLE (column-major run lengths, first run is background),
+  stored as {"size": [h, w], "counts": "<COCO string>"}, so it is a plain
+  JSON-safe dict and interoperates with pycocotools
+- Lazy decode: the boolean array is only rebuilt by decode() / np.asarray()
+- Compressed-domain ops: area, bbox and intersection/IoU work on the run
+  lengths without decoding
+- Round trips: a mask that came back from JSON/checkpoints as a plain dict
+  is re-wrapped with RLEMask.from_dict()
+
+Usage:
+    rle = RLEMask.encode(bool_mask)
+    zone["mask"] = rle                      # JSON-serialisable as is
+    rle.area, rle.bbox                      # (x, y, width, height)
+    RLEMask.from_dict(zone["mask"]).iou(other)
+    array = rle.decode()                    # (h, w) bool
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+def _counts_to_string(counts: np.ndarray) -> str:
+    """COCO compressed RLE string (delta + LEB128-style, 6 bits per char)."""
+    chars: List[str] = []
+    for i, count in enumerate(counts.tolist()):
+        x = count - counts[i - 2] if i > 2 else count
+        x = int(x)
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return "".join(chars)
+
+
+def _string_to_counts(data: str) -> np.ndarray:
+    counts: List[int] = []
+    p = 0
+    while p < len(data):
+        x, k, more = 0, 0, True
+        while more:
+            c = ord(data[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return np.asarray(counts, dtype=np.int64)
+
+
+def _binarise(mask) -> np.ndarray:
+    """(h, w) bool array; extra leading dims are squeezed, probabilities cut at 0.5."""
+    mask = np.asarray(mask)
+    while mask.ndim > 2:
+        mask = mask[0]
+    if mask.dtype == bool:
+        return mask
+    if np.issubdtype(mask.dtype, np.floating):
+        return mask > 0.5
+    return mask != 0
+
+
+class RLEMask(dict):
+    """COCO-style run-length encoded mask; a dict with "size" and "counts"."""
+
+    def __init__(self, size: Tuple[int, int], counts: Union[str, np.ndarray, List[int]]):
+        if isinstance(counts, str):
+            runs = None
+        else:
+            runs = np.asarray(counts, dtype=np.int64)
+            counts = _counts_to_string(runs)
+        super().__init__(size=[int(size[0]), int(size[1])], counts=counts)
+        self._runs: Optional[np.ndarray] = runs
+
+    @classmethod
+    def encode(cls, mask) -> "RLEMask":
+        """Encode a binary (h, w) mask."""
+        mask = _binarise(mask)
+        h, w = mask.shape
+        flat = mask.T.ravel()
+        if flat.size == 0:
+            return cls((h, w), np.zeros(1, dtype=np.int64))
+        change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        runs = np.diff(np.concatenate([[0], change, [flat.size]]))
+        if flat[0]:
+            runs = np.concatenate([[0], runs])
+        return cls((h, w), runs)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RLEMask":
+        """Wrap a deserialised {"size", "counts"} dict (no-op for an RLEMask)."""
+        if isinstance(data, RLEMask):
+            return data
+        return cls(data["size"], data["counts"])
+
+    # ------------------------------------------------------------------
+    # Compressed-domain properties
+    # ------------------------------------------------------------------
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return int(self["size"][0]), int(self["size"][1])
+
+    @property
+    def runs(self) -> np.ndarray:
+        """Run lengths, alternating background / foreground."""
+        if getattr(self, "_runs", None) is None:
+            self._runs = _string_to_counts(self["counts"])
+        return self._runs
+
+    def intervals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Start/end (exclusive) offsets of foreground runs in column-major order."""
+        ends = np.cumsum(self.runs)
+        return (ends - self.runs)[1::2], ends[1::2]
+
+    @property
+    def area(self) -> int:
+        return int(self.runs[1::2].sum())
+
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        """Tight (x, y, width, height) box; zeros for an empty mask."""
+        starts, ends = self.intervals()
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep] - 1
+        if starts.size == 0:
+            return 0, 0, 0, 0
+        h = self.shape[0]
+        col0, col1 = starts // h, ends // h
+        same_col = col0 == col1
+        # A run that wraps into the next column covers the top and bottom rows
+        y_min = int(np.where(same_col, starts % h, 0).min())
+        y_max = int(np.where(same_col, ends % h, h - 1).max())
+        x_min, x_max = int(col0.min()), int(col1.max())
+        return x_min, y_min, x_max - x_min + 1, y_max - y_min + 1
+
+    def intersection(self, other: "RLEMask") -> int:
+        """Overlapping pixel count, by sweeping both run boundaries."""
+        other = RLEMask.from_dict(other)
+        if self.shape != other.shape:
+            raise ValueError(f"Mask sizes differ: {self.shape} vs {other.shape}")
+        a_start, a_end = self.intervals()
+        b_start, b_end = other.intervals()
+        positions = np.concatenate([a_start, a_end, b_start, b_end])
+        if positions.size == 0:
+            return 0
+        deltas = np.concatenate([
+            np.ones_like(a_start), -np.ones_like(a_end), np.ones_like(b_start), -np.ones_like(b_end)
+        ])
+        order = np.argsort(positions, kind="stable")
+        positions, coverage = positions[order], np.cumsum(deltas[order])
+        return int(np.diff(positions)[coverage[:-1] == 2].sum())
+
+    def iou(self, other: "RLEMask") -> float:
+        other = RLEMask.from_dict(other)
+        intersection = self.intersection(other)
+        union = self.area + other.area - intersection
+        return intersection / union if union > 0 else 0.0
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+
+    def decode(self) -> np.ndarray:
+        """Full (h, w) boolean array."""
+        h, w = self.shape
+        values = np.arange(self.runs.size) % 2 == 1
+        flat = np.repeat(values, self.runs)
+        return np.ascontiguousarray(flat.reshape(w, h).T)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        array = self.decode()
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"RLEMask(size={self['size']}, area={self.area}, runs={self.runs.size})"
+
+
+def decode_mask(mask) -> Optional[np.ndarray]:
+    """Boolean array from an RLEMask, RLE dict or array (None passes through)."""
+    if mask is None:
+        return None
+    if isinstance(mask, dict):
+        return RLEMask.from_dict(mask).decode()
+    return _binarise(mask)
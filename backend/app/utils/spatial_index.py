@@ -0,0 +1,141 @@
+"""
+Bounding-Box Spatial Index Helpers
+
+Broad-phase and IoU helpers for zone/mask overlap checks that used to test
+every pair in Python:
+
+- Sweep and prune: sort boxes by min_x once, take each box's x-overlapping
+  successors with searchsorted, then filter on y, all vectorised. Cost is
+  O(n log n + candidates) instead of O(n^2) Python comparisons
+- Vectorised IoU: for candidate pairs, or as a full matrix for small sets
+- Greedy suppression: NMS-style "drop boxes overlapping an earlier kept box"
+  driven by the candidate pairs
+
+Boxes are (N, 4) arrays of min_x, min_y, max_x, max_y.
+
+Usage:
+    boxes = np.array([[0, 0, 10, 10], [5, 5, 15, 15], [50, 50, 60, 60]])
+    i, j = bbox_candidate_pairs(boxes)          # -> [0], [1]
+    iou, inter = pair_iou(boxes, i, j)
+    keep = greedy_suppress(boxes, iou_threshold=0.5)
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def as_boxes(boxes) -> np.ndarray:
+    """(N, 4) float array of min_x, min_y, max_x, max_y."""
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def xywh_to_boxes(xywh) -> np.ndarray:
+    """Convert x, y, width, height rows to min/max boxes."""
+    arr = np.asarray(xywh, dtype=np.float64).reshape(-1, 4)
+    return np.column_stack([arr[:, 0], arr[:, 1], arr[:, 0] + arr[:, 2], arr[:, 1] + arr[:, 3]])
+
+
+def bbox_candidate_pairs(boxes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs (i < j) whose boxes overlap with positive area.
+
+    Pairs are returned sorted by (i, j), the order of a nested i/j loop.
+    Boxes that only touch along an edge are not candidates.
+    """
+    boxes = as_boxes(boxes)
+    n = len(boxes)
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    # Sweep along x: for each box (in min_x order), successors starting before it ends
+    order = np.argsort(boxes[:, 0], kind="stable")
+    sorted_boxes = boxes[order]
+    ends = np.searchsorted(sorted_boxes[:, 0], sorted_boxes[:, 2], side="left")
+    counts = np.maximum(ends - np.arange(n) - 1, 0)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    first = np.repeat(np.arange(n), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = first + 1 + offsets
+
+    # Sweep guarantees min_x[second] < max_x[first]; check y on 1-D columns,
+    # then the remaining x condition (degenerate boxes) on the survivors
+    min_y, max_y = sorted_boxes[:, 1], sorted_boxes[:, 3]
+    hit = np.maximum(min_y[first], min_y[second]) < np.minimum(max_y[first], max_y[second])
+    first, second = first[hit], second[hit]
+    hit = sorted_boxes[second, 0] < np.minimum(sorted_boxes[first, 2], sorted_boxes[second, 2])
+    a, b = order[first[hit]], order[second[hit]]
+
+    i, j = np.minimum(a, b), np.maximum(a, b)
+    ordering = np.argsort(i * n + j, kind="stable")
+    return i[ordering], j[ordering]
+
+
+def pair_iou(
+    boxes,
+    i: np.ndarray,
+    j: np.ndarray,
+    areas: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    IoU and intersection area for the given index pairs.
+
+    areas overrides the per-box area used in the union (e.g. circle area for
+    circular zones); defaults to the box area.
+    """
+    boxes = as_boxes(boxes)
+    if areas is None:
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    areas = np.asarray(areas, dtype=np.float64)
+    ba, bb = boxes[i], boxes[j]
+    w = np.minimum(ba[:, 2], bb[:, 2]) - np.maximum(ba[:, 0], bb[:, 0])
+    h = np.minimum(ba[:, 3], bb[:, 3]) - np.maximum(ba[:, 1], bb[:, 1])
+    intersection = np.where((w > 0) & (h > 0), w * h, 0.0)
+    union = areas[i] + areas[j] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        iou = np.where(union > 0, intersection / union, 0.0)
+    return iou, intersection
+
+
+def bbox_iou_matrix(boxes_a, boxes_b) -> np.ndarray:
+    """(N, M) IoU between every box in boxes_a and every box in boxes_b."""
+    a, b = as_boxes(boxes_a), as_boxes(boxes_b)
+    w = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    h = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    intersection = np.clip(w, 0, None) * np.clip(h, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, intersection / union, 0.0)
+
+
+def greedy_suppress(boxes, iou_threshold: float) -> np.ndarray:
+    """
+    Keep mask for greedy suppression in input order.
+
+    A box is dropped when its IoU with an earlier *kept* box exceeds
+    iou_threshold (callers sort by priority first, e.g. area or score).
+    """
+    boxes = as_boxes(boxes)
+    keep = np.ones(len(boxes), dtype=bool)
+    i, j = bbox_candidate_pairs(boxes)
+    if len(i) == 0:
+        return keep
+    iou, _ = pair_iou(boxes, i, j)
+    hits = iou > iou_threshold
+    i, j = i[hits], j[hits]
+    if len(i) == 0:
+        return keep
+
+    # Pairs are sorted by i: walk kept boxes in order and drop their later neighbours
+    starts = np.searchsorted(i, np.arange(len(boxes)), side="left")
+    stops = np.searchsorted(i, np.arange(len(boxes)), side="right")
+    for index in np.unique(i):
+        if keep[index]:
+            keep[j[starts[index]:stops[index]]] = False
+    return keep
@@ -248,21 +248,15 @@ def _error_result(scene_id: str, error: str) -> dict:
 
 
 async def _download_image(url: str) -> bytes | None:
-    """Download image bytes from URL."""
+    """Download image bytes from URL (shared pooled client + download cache)."""
     try:
-        import httpx
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-            "Accept": "image/*,*/*;q=0.8",
-        }
-        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            ct = resp.headers.get("content-type", "")
-            if not ct.startswith("image/") and len(resp.content) < 1000:
-                logger.warning(f"Image download got non-image content-type: {ct}, size={len(resp.content)}")
-                return None
-            return resp.content
+        from app.services.http_downloader import get_downloader
+        result = await get_downloader().fetch(url)
+        ct = result.content_type
+        if not ct.startswith("image/") and len(result.content) < 1000:
+            logger.warning(f"Image download got non-image content-type: {ct}, size={len(result.content)}")
+            return None
+        return result.content
     except Exception as e:
         logger.warning(f"Image download failed for {url[:80]}: {e}")
         return None
@@ -12,6 +12,7 @@ import time
 from typing import Any, Optional
 
 from app.services.llm_service import get_llm_service
+from app.services.streaming_json import JSONEvent, PydanticStreamValidator
 from app.utils.logging_config import get_logger
 from app.v4.contracts import MODEL_ROUTING, CONTENT_ONLY_MECHANICS
 from app.v4.helpers.dk_field_resolver import project_dk_for_mechanic
@@ -20,6 +21,7 @@ from app.v4.prompts.interaction_designer import build_interaction_prompt
 from app.v4.prompts.retry import condense_mechanic_content
 from app.v4.schemas.mechanic_content import get_content_model
 from app.v4.schemas.game_plan import MechanicPlan
+from app.v4.schemas.interaction import SceneInteractionResult
 from app.v4.validators.content_validator import validate_mechanic_content
 
 logger = get_logger("gamed_ai.v4.content_builder")
@@ -227,8 +229,13 @@ async def _generate_and_validate(
     Returns (validated_content_dict_or_None, attempt_records).
     """
     content_model = get_content_model(mechanic_type)
+    validator = PydanticStreamValidator(content_model)
     attempt_records: list[dict] = []
 
+    async def check_streamed(event: JSONEvent) -> None:
+        # Invalid items re-prompt; mid-stream when LLM_STREAM_JSON enables this agent
+        validator.check(event)
+
     for attempt in range(max_retries + 1):
         t_attempt = time.time()
         try:
@@ -240,6 +247,8 @@ async def _generate_and_validate(
                 agent_name=agent_name,
                 prompt=prompt,
                 schema_hint=f"{content_model.__name__} JSON",
+                json_schema=content_model,
+                on_json_event=check_streamed,
             )
             # Extract LLM metrics (includes prompt/response previews for observability)
             llm_call_metrics = raw.pop("_llm_metrics", {}) if isinstance(raw, dict) else {}
@@ -347,6 +356,7 @@ async def _generate_interaction(
             agent_name="interaction_designer",
             prompt=prompt,
             schema_hint="SceneInteractionResult with mechanic_scoring, mechanic_feedback, mode_transitions",
+            json_schema=SceneInteractionResult,
         )
         if isinstance(raw, dict):
             raw.pop("_llm_metrics", None)  # Metrics tracked by instrumentation wrapper
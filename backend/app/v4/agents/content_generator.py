@@ -13,6 +13,7 @@ import time
 from typing import Any, Optional
 
 from app.services.llm_service import get_llm_service
+from app.services.streaming_json import JSONEvent, PydanticStreamValidator
 from app.utils.logging_config import get_logger
 from app.v4.contracts import MODEL_ROUTING
 from app.v4.prompts.content_generator import build_content_prompt
@@ -58,11 +59,19 @@ async def content_generator(state: dict) -> dict:
         llm = get_llm_service()
         model_tier = MODEL_ROUTING.get(mechanic_type, "flash")
         agent_name = f"content_generator_{model_tier}"
+        content_model = get_content_model(mechanic_type)
+        validator = PydanticStreamValidator(content_model)
+
+        async def check_streamed(event: JSONEvent) -> None:
+            # Invalid items re-prompt; mid-stream when LLM_STREAM_JSON enables this agent
+            validator.check(event)
 
         raw = await llm.generate_json_for_agent(
             agent_name=agent_name,
             prompt=prompt,
             schema_hint=f"{mechanic_type} content JSON",
+            json_schema=content_model,
+            on_json_event=check_streamed,
         )
         llm_metrics = raw.pop("_llm_metrics", None) if isinstance(raw, dict) else None
 
@@ -74,7 +83,6 @@ async def content_generator(state: dict) -> dict:
                 logger.info(f"Auto-filled missing startNodeId='{raw['startNodeId']}' for {mechanic_id}")
 
         # Parse through Pydantic
-        content_model = get_content_model(mechanic_type)
         try:
             parsed = content_model(**raw)
             content_dict = parsed.model_dump()
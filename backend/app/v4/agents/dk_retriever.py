@@ -3,15 +3,25 @@
 Gathers domain knowledge via web search and LLM extraction.
 ~60% reused from V3 domain_knowledge_retriever.py.
 
+Sub-extractions run as a small dependency graph, each starting as soon as
+its inputs exist:
+
+    question ──> search ──> main extraction ──> canonical_labels ─┬─> label descriptions
+       │                                                        ├─> comparison data
+       └──> sequence search ───────────────────────────────────┴─> sequence extraction
+
+If one branch fails, the branches still running are cancelled.
+
 State writes: domain_knowledge
 Model: gemini-2.5-flash (via agent config)
 """
 
+import asyncio
 import json
 import re
 import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
 
 from app.services.llm_service import get_llm_service
 from app.services.web_search import get_serper_client, WebSearchError
@@ -22,6 +32,35 @@ logger = get_logger("gamed_ai.v4.dk_retriever")
 # Hard char limit per DK field (V3 pattern)
 DK_FIELD_CHAR_LIMIT = 4000
 
+T = TypeVar("T")
+
+
+async def _timed(awaitable: Awaitable[T]) -> tuple[T, int]:
+    """Await a sub-extraction and return (result, duration_ms)."""
+    start = time.time()
+    result = await awaitable
+    return result, int((time.time() - start) * 1000)
+
+
+async def _gather_or_cancel(*awaitables: Awaitable[Any]) -> list:
+    """asyncio.gather that cancels the branches still running on the first failure.
+
+    Cancelling the caller cancels them too, so no LLM call is left running unobserved.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in awaitables]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    return [task.result() for task in tasks]
+
 
 def _detect_query_intent(question: str) -> Dict[str, Any]:
     """Detect what type of knowledge the query requires.
@@ -107,33 +146,39 @@ def _build_search_query(
     return " ".join(parts)
 
 
-async def _search_for_sequence(
-    question: str,
-    seq_type: str,
-    labels: List[str],
-) -> Optional[Dict[str, Any]]:
-    """Search for sequence/ordering data from authoritative sources."""
+async def _search_sequence_snippets(question: str) -> Optional[List[Dict[str, str]]]:
+    """Search for sequence/ordering sources (needs only the question)."""
     search_query = f"{question} correct order steps sequence"
 
     try:
         client = get_serper_client()
         results = await client.search(search_query)
+    except (WebSearchError, Exception) as e:
+        logger.warning(f"Sequence search failed: {e}")
+        return None
 
-        if not results:
-            return None
+    snippets = []
+    for r in (results or [])[:5]:
+        snippet = r.get("snippet") or ""
+        if snippet:
+            snippets.append({
+                "url": r.get("link") or r.get("url") or "",
+                "snippet": snippet,
+            })
+    return snippets or None
 
-        snippets = []
-        for r in results[:5]:
-            snippet = r.get("snippet") or ""
-            if snippet:
-                snippets.append({
-                    "url": r.get("link") or r.get("url") or "",
-                    "snippet": snippet,
-                })
 
-        if not snippets:
-            return None
+async def _extract_sequence(
+    question: str,
+    seq_type: str,
+    labels: List[str],
+    snippets: Optional[List[Dict[str, str]]],
+) -> Optional[Dict[str, Any]]:
+    """Extract sequence/ordering data from the sequence search snippets."""
+    if not snippets:
+        return None
 
+    try:
         llm = get_llm_service()
         extraction_prompt = f"""Extract the correct sequence/order from search results.
 
@@ -168,8 +213,8 @@ Return JSON:
             return data
         return None
 
-    except (WebSearchError, Exception) as e:
-        logger.warning(f"Sequence search failed: {e}")
+    except Exception as e:
+        logger.warning(f"Sequence extraction failed: {e}")
         return None
 
 
@@ -340,6 +385,27 @@ async def dk_retriever(state: dict) -> dict:
     logger.info(f"Intent: sequence={content_characteristics['needs_sequence']}, "
                 f"comparison={content_characteristics['needs_comparison']}")
 
+    # The sequence search needs only the question: run it alongside the main search/extraction
+    sequence_search: Optional[asyncio.Task] = None
+    if content_characteristics.get("needs_sequence"):
+        sequence_search = asyncio.create_task(_timed(_search_sequence_snippets(question_text)))
+
+    try:
+        return await _retrieve_knowledge(
+            question_text, pedagogical_context, content_characteristics, sequence_search,
+        )
+    finally:
+        if sequence_search and not sequence_search.done():
+            sequence_search.cancel()
+
+
+async def _retrieve_knowledge(
+    question_text: str,
+    pedagogical_context: Dict[str, Any],
+    content_characteristics: Dict[str, Any],
+    sequence_search: Optional["asyncio.Task[tuple[Optional[List[Dict[str, str]]], int]]"],
+) -> dict:
+    """Search, main extraction, then the label-dependent sub-extractions concurrently."""
     # Build and execute search
     query = _build_search_query(question_text, pedagogical_context)
     logger.info(f"Search query: {query}")
@@ -458,12 +524,33 @@ Return structured JSON with:
         },
     })
 
-    # Generate label descriptions
-    t_labels = time.time()
-    label_descriptions, labels_metrics = await _generate_label_descriptions(
-        canonical_labels, question_text, llm,
+    # Sub-extractions that depend on canonical_labels start together
+    async def sequence_flow() -> tuple[Optional[Dict[str, Any]], int]:
+        snippets, search_ms = await sequence_search
+        data, extract_ms = await _timed(_extract_sequence(
+            question_text,
+            content_characteristics.get("sequence_type", "linear"),
+            canonical_labels,
+            snippets,
+        ))
+        # Work time of this branch (the search overlapped the main extraction)
+        return data, search_ms + extract_ms
+
+    async def skip(result: Any) -> Any:
+        return result
+
+    needs_comparison = content_characteristics.get("needs_comparison")
+    (
+        ((label_descriptions, labels_metrics), labels_ms),
+        ((comparison_data, comp_metrics), comp_ms),
+        (sequence_flow_data, seq_ms),
+    ) = await _gather_or_cancel(
+        _timed(_generate_label_descriptions(canonical_labels, question_text, llm)),
+        _timed(_generate_comparison_data(canonical_labels, question_text, llm))
+        if needs_comparison else skip(((None, {}), 0)),
+        sequence_flow() if sequence_search else skip((None, 0)),
     )
-    labels_ms = int((time.time() - t_labels) * 1000)
+
     sub_stages.append({
         "id": "dk_label_descriptions",
         "name": "Label descriptions",
@@ -479,14 +566,7 @@ Return structured JSON with:
         },
     })
 
-    # Generate comparison data if needed
-    comparison_data = None
-    if content_characteristics.get("needs_comparison"):
-        t_comp = time.time()
-        comparison_data, comp_metrics = await _generate_comparison_data(
-            canonical_labels, question_text, llm,
-        )
-        comp_ms = int((time.time() - t_comp) * 1000)
+    if needs_comparison:
         sub_stages.append({
             "id": "dk_comparison_data",
             "name": "Comparison data",
@@ -499,16 +579,7 @@ Return structured JSON with:
             "output_summary": comparison_data if comparison_data else {},
         })
 
-    # Generate sequence data if needed
-    sequence_flow_data = None
-    if content_characteristics.get("needs_sequence"):
-        t_seq = time.time()
-        sequence_flow_data = await _search_for_sequence(
-            question_text,
-            content_characteristics.get("sequence_type", "linear"),
-            canonical_labels,
-        )
-        seq_ms = int((time.time() - t_seq) * 1000)
+    if sequence_search:
         sub_stages.append({
             "id": "dk_sequence_flow",
             "name": "Sequence flow",
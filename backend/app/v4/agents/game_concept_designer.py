@@ -68,6 +68,7 @@ async def game_concept_designer(state: dict) -> dict:
             prompt=prompt,
             system_prompt=SYSTEM_PROMPT,
             schema_hint="GameConcept JSON with title, scenes, mechanics, narrative",
+            json_schema=GameConcept,
         )
         llm_metrics = raw.pop("_llm_metrics", None) if isinstance(raw, dict) else None
 
@@ -79,6 +79,7 @@ async def game_designer(state: dict) -> dict:
             prompt=prompt,
             system_prompt=SYSTEM_PROMPT,
             schema_hint="GamePlan JSON with scenes, mechanics, zone_labels",
+            json_schema=GamePlan,
         )
         llm_metrics = None
         if isinstance(raw, dict):
@@ -54,6 +54,7 @@ async def interaction_designer(state: dict) -> dict:
             agent_name="interaction_designer_pro",
             prompt=prompt,
             schema_hint="SceneInteractionResult JSON with scoring, feedback, transitions",
+            json_schema=SceneInteractionResult,
         )
         llm_metrics = raw.pop("_llm_metrics", None) if isinstance(raw, dict) else None
 
@@ -75,6 +75,7 @@ async def scene_designer(state: dict) -> dict:
             prompt=prompt,
             system_prompt=SYSTEM_PROMPT,
             schema_hint="SceneCreativeDesign JSON with visual_concept, mechanic_designs",
+            json_schema=SceneCreativeDesign,
         )
         llm_metrics = raw.pop("_llm_metrics", None) if isinstance(raw, dict) else None
 
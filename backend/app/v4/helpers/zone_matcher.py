@@ -5,16 +5,130 @@ Labels reference zone labels by TEXT. This module translates text -> zone_id
 during assembly, after zone detection completes.
 
 Matching priority: exact > case-insensitive > normalized > substring > fuzzy.
+Zone forms and a character n-gram (unigram count) index are built once.
+Exact/case/normalized tiers are dict lookups; for labels without one, the
+index bounds every zone at once: substrings must contain each other's
+characters and SequenceMatcher.ratio() can't exceed the character overlap,
+so only zones passing the bound are compared. Labels are then assigned to
+zones one-to-one by maximising the total score, so the result does not
+depend on label order. Labels that normalize to the same text count as one
+label and share its zone.
 """
 
 import logging
 from difflib import SequenceMatcher
-from typing import Any
+from typing import Any, Optional, Sequence
 
+import numpy as np
+
+from app.utils.assignment import max_weight_assignment
 from app.v4.helpers.utils import generate_zone_id, normalize_label_text
 
 logger = logging.getLogger("gamed_ai.v4.zone_matcher")
 
+FUZZY_THRESHOLD = 0.7
+
+# Score bands per tier: base + similarity in [0, 1], so bands never overlap
+EXACT_SCORE = 5.0
+CASE_INSENSITIVE_SCORE = 4.0
+NORMALIZED_SCORE = 3.0
+SUBSTRING_SCORE = 2.0
+FUZZY_SCORE = 1.0
+
+
+class ZoneMatcher:
+    """Scores label texts against a fixed set of zone labels and assigns them one-to-one."""
+
+    def __init__(self, zone_labels: Sequence[str], fuzzy_threshold: float = FUZZY_THRESHOLD):
+        self.zone_labels = [label or "" for label in zone_labels]
+        self.fuzzy_threshold = fuzzy_threshold
+        self._norm = [normalize_label_text(label) for label in self.zone_labels]
+
+        self._exact: dict[str, list[int]] = {}
+        self._lower: dict[str, list[int]] = {}
+        self._normalized: dict[str, list[int]] = {}
+        for j, (label, norm) in enumerate(zip(self.zone_labels, self._norm)):
+            if label:
+                self._exact.setdefault(label, []).append(j)
+                self._lower.setdefault(label.lower(), []).append(j)
+                self._normalized.setdefault(norm, []).append(j)
+
+        # Character index: (zones, alphabet) counts of each normalized zone label
+        self._alphabet = {c: k for k, c in enumerate(sorted(set("".join(self._norm))))}
+        self._counts = np.zeros((len(self._norm), len(self._alphabet)), dtype=np.int32)
+        for j, norm in enumerate(self._norm):
+            for c in norm:
+                self._counts[j, self._alphabet[c]] += 1
+        self._lengths = np.array([len(norm) for norm in self._norm], dtype=np.int32)
+
+    def score(self, labels: Sequence[str]) -> np.ndarray:
+        """(labels, zones) score matrix; 0 means no match.
+
+        Labels with an exact, case-insensitive or normalized hit are not
+        scored on the weaker tiers.
+        """
+        scores = np.zeros((len(labels), len(self.zone_labels)))
+        for i, label in enumerate(labels):
+            row = scores[i]
+            norm = normalize_label_text(label)
+            # Later (stronger) tiers overwrite earlier ones
+            for j in self._normalized.get(norm, ()):
+                row[j] = NORMALIZED_SCORE + 1.0
+            for j in self._lower.get(label.lower(), ()):
+                row[j] = CASE_INSENSITIVE_SCORE + 1.0
+            for j in self._exact.get(label, ()):
+                row[j] = EXACT_SCORE + 1.0
+            if norm and not row.any():
+                self._score_partial(norm, row)
+        return scores
+
+    def _score_partial(self, norm: str, row: np.ndarray) -> None:
+        """Substring and fuzzy tiers for one label, bounded via the character index."""
+        counts = np.zeros(len(self._alphabet), dtype=np.int32)
+        for c in norm:
+            k = self._alphabet.get(c)
+            if k is not None:
+                counts[k] += 1
+        overlap = np.minimum(self._counts, counts).sum(axis=1)
+        total = self._lengths + len(norm)
+        # Containment needs every character of the shorter string in the longer
+        substring = (overlap == np.minimum(self._lengths, len(norm))) & (self._lengths > 0)
+        # Upper bound of SequenceMatcher.ratio() (same as quick_ratio())
+        fuzzy = 2.0 * overlap > self.fuzzy_threshold * total
+
+        for j in np.flatnonzero(substring | fuzzy):
+            zone_norm = self._norm[j]
+            if norm in zone_norm or zone_norm in norm:
+                shorter, longer = sorted((len(norm), len(zone_norm)))
+                row[j] = SUBSTRING_SCORE + shorter / longer
+            elif fuzzy[j]:
+                ratio = SequenceMatcher(None, norm, zone_norm).ratio()
+                if ratio > self.fuzzy_threshold:
+                    row[j] = FUZZY_SCORE + ratio
+
+    def match(self, labels: Sequence[str]) -> dict[str, Optional[int]]:
+        """Map each distinct label to a zone index (None if unmatched).
+
+        Assignment is one-to-one per normalized text: labels differing only
+        in case or whitespace ("anther", "Anther ") name the same part and
+        share one zone instead of competing for it.
+        """
+        unique = list(dict.fromkeys(labels))
+        result: dict[str, Optional[int]] = dict.fromkeys(unique)
+        groups: dict[str, list[int]] = {}
+        for i, label in enumerate(unique):
+            groups.setdefault(normalize_label_text(label) or label, []).append(i)
+        members = list(groups.values())
+
+        scores = self.score(unique)
+        group_scores = np.array([scores[rows].max(axis=0) for rows in members]).reshape(
+            len(members), len(self.zone_labels)
+        )
+        for row, col in max_weight_assignment(group_scores, min_weight=FUZZY_SCORE):
+            for i in members[row]:
+                result[unique[i]] = col
+        return result
+
 
 def match_labels_to_zones(
     canonical_labels: list[str],
@@ -27,89 +141,18 @@ def match_labels_to_zones(
     If a zone already has a matching ID, uses it. Otherwise generates one.
     Unmatched labels get a generated zone_id with a warning.
     """
-    result: dict[str, str] = {}
-
-    # Build lookup from zone label/name to zone
-    zone_lookup: dict[str, dict[str, Any]] = {}
-    for zone in detected_zones:
-        zone_label = zone.get("label") or zone.get("name") or ""
-        if zone_label:
-            zone_lookup[zone_label] = zone
-
-    # Normalized lookup
-    norm_zone_lookup: dict[str, tuple[str, dict[str, Any]]] = {}
-    for label_text, zone in zone_lookup.items():
-        norm_zone_lookup[normalize_label_text(label_text)] = (label_text, zone)
-
-    unmatched_zones = list(detected_zones)
-
-    for label in canonical_labels:
-        zone_id = _find_match(label, zone_lookup, norm_zone_lookup, unmatched_zones, scene_number)
-        result[label] = zone_id
+    matcher = ZoneMatcher([zone.get("label") or zone.get("name") or "" for zone in detected_zones])
 
+    result: dict[str, str] = {}
+    for label, index in matcher.match(canonical_labels).items():
+        if index is None:
+            logger.warning(f"No zone match for label '{label}' — generating synthetic zone_id")
+            result[label] = generate_zone_id(scene_number, label)
+        else:
+            result[label] = detected_zones[index].get("id") or generate_zone_id(scene_number, label)
     return result
 
 
-def _find_match(
-    label: str,
-    zone_lookup: dict[str, dict[str, Any]],
-    norm_zone_lookup: dict[str, tuple[str, dict[str, Any]]],
-    unmatched_zones: list[dict[str, Any]],
-    scene_number: int,
-) -> str:
-    """Find best zone match for a label. Returns zone_id."""
-    norm_label = normalize_label_text(label)
-
-    # 1. Exact match
-    if label in zone_lookup:
-        zone = zone_lookup[label]
-        _remove_zone(unmatched_zones, zone)
-        return zone.get("id") or generate_zone_id(scene_number, label)
-
-    # 2. Case-insensitive match
-    for zone_label, zone in zone_lookup.items():
-        if zone_label.lower() == label.lower():
-            _remove_zone(unmatched_zones, zone)
-            return zone.get("id") or generate_zone_id(scene_number, label)
-
-    # 3. Normalized match
-    if norm_label in norm_zone_lookup:
-        _, zone = norm_zone_lookup[norm_label]
-        _remove_zone(unmatched_zones, zone)
-        return zone.get("id") or generate_zone_id(scene_number, label)
-
-    # 4. Substring match (label contained in zone label or vice versa)
-    for zone_label, zone in zone_lookup.items():
-        if norm_label in normalize_label_text(zone_label) or normalize_label_text(zone_label) in norm_label:
-            _remove_zone(unmatched_zones, zone)
-            return zone.get("id") or generate_zone_id(scene_number, label)
-
-    # 5. Fuzzy match (>0.7 similarity)
-    best_score = 0.0
-    best_zone = None
-    for zone_label, zone in zone_lookup.items():
-        score = SequenceMatcher(None, norm_label, normalize_label_text(zone_label)).ratio()
-        if score > best_score and score > 0.7:
-            best_score = score
-            best_zone = zone
-
-    if best_zone is not None:
-        _remove_zone(unmatched_zones, best_zone)
-        return best_zone.get("id") or generate_zone_id(scene_number, label)
-
-    # 6. No match — generate zone_id, log warning
-    logger.warning(f"No zone match for label '{label}' — generating synthetic zone_id")
-    return generate_zone_id(scene_number, label)
-
-
-def _remove_zone(zones: list[dict[str, Any]], zone: dict[str, Any]) -> None:
-    """Remove a zone from the unmatched list (by identity)."""
-    try:
-        zones.remove(zone)
-    except ValueError:
-        pass
-
-
 def canonical_to_zone_id(label: str, scene_number: int) -> str:
     """Generate a deterministic zone ID from a canonical label."""
     return generate_zone_id(scene_number, label)
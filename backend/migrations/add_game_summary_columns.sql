@@ -0,0 +1,17 @@
+-- Migration: Add gallery summary columns to visualizations
+-- /processes and /observability/games read title, thumbnail and mechanic from
+-- these columns instead of the full blueprint JSON.
+-- init_db() applies this automatically (and backfills existing rows); the SQL
+-- is here for databases managed outside the app.
+
+-- SQLite / PostgreSQL
+ALTER TABLE visualizations ADD COLUMN title VARCHAR(500);
+ALTER TABLE visualizations ADD COLUMN thumbnail_url TEXT;
+ALTER TABLE visualizations ADD COLUMN mechanic_type VARCHAR(100);
+
+-- Indexes for the joined listing queries and keyset pagination
+CREATE INDEX IF NOT EXISTS idx_visualization_process ON visualizations(process_id);
+CREATE INDEX IF NOT EXISTS idx_process_created ON processes(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_run_process_started ON pipeline_runs(process_id, started_at);
+
+-- Note: existing rows are backfilled by app.db.game_summary.backfill_game_summaries()
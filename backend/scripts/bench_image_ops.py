@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Image Ops Micro-Benchmark
+
+Compares the previous per-pixel / per-box Python loops against the
+vectorised helpers in app/utils/image_ops.py on synthetic diagrams of
+representative sizes, and checks both paths produce identical output.
+
+Operations:
+    remove_background   AssetGenService._remove_background (getdata loop vs array keying)
+    text_mask           box masks (cv2.rectangle / ImageDraw per box vs slice fill)
+    line_filters        HoughLineDetector proximity/length/angle filters (nested loops vs N x M arrays)
+    line_mask           cv2.line per segment vs one cv2.polylines call
+
+Usage:
+    python scripts/bench_image_ops.py
+    python scripts/bench_image_ops.py --sizes 1024x768,2048x1536 --repeat 5
+"""
+
+import argparse
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils import image_ops
+
+DEFAULT_SIZES = "512x512,1024x768,1600x1200,2048x1536"
+
+
+# =============================================================================
+# PREVIOUS IMPLEMENTATIONS (kept here as the baseline)
+# =============================================================================
+
+def legacy_remove_background(image_bytes: bytes, threshold: int = 240) -> bytes:
+    img = Image.open(BytesIO(image_bytes)).convert("RGBA")
+    new_data = []
+    for r, g, b, a in img.getdata():
+        if r > threshold and g > threshold and b > threshold:
+            new_data.append((r, g, b, 0))
+        else:
+            new_data.append((r, g, b, a))
+    img.putdata(new_data)
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def legacy_text_mask(shape, regions, padding=10) -> np.ndarray:
+    h, w = shape[:2]
+    mask = np.zeros((h, w), dtype=np.uint8)
+    for region in regions:
+        bbox = region["bbox"]
+        x = max(0, bbox["x"] - padding)
+        y = max(0, bbox["y"] - padding)
+        x2 = min(w, bbox["x"] + bbox["width"] + padding)
+        y2 = min(h, bbox["y"] + bbox["height"] + padding)
+        cv2.rectangle(mask, (x, y), (x2, y2), 255, -1)
+    return mask
+
+
+def _legacy_point_near_box(point, box, max_distance) -> bool:
+    px, py = point
+    dx = max(box["x"] - px, 0, px - (box["x"] + box["width"]))
+    dy = max(box["y"] - py, 0, py - (box["y"] + box["height"]))
+    return np.sqrt(dx**2 + dy**2) <= max_distance
+
+
+def legacy_line_filters(lines, regions, shape, max_dist=50) -> list:
+    near = []
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        for region in regions:
+            box = region["bbox"]
+            if _legacy_point_near_box((x1, y1), box, max_dist) or _legacy_point_near_box((x2, y2), box, max_dist):
+                near.append(line)
+                break
+    h, w = shape[:2]
+    diagonal = np.sqrt(h**2 + w**2)
+    by_length = []
+    for line in near:
+        x1, y1, x2, y2 = line[0]
+        length = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+        if diagonal * 0.02 <= length <= diagonal * 0.15:
+            by_length.append(line)
+    out = []
+    for line in by_length:
+        x1, y1, x2, y2 = line[0]
+        angle = abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
+        if angle > 90:
+            angle = 180 - angle
+        for lo, hi in [(0, 20), (70, 90), (40, 50)]:
+            if lo <= angle <= hi:
+                out.append(line)
+                break
+    return out
+
+
+def legacy_line_mask(shape, lines, thickness=8) -> np.ndarray:
+    h, w = shape[:2]
+    mask = np.zeros((h, w), dtype=np.uint8)
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        cv2.line(mask, (int(x1), int(y1)), (int(x2), int(y2)), 255, thickness)
+    return mask
+
+
+# =============================================================================
+# VECTORISED PATHS
+# =============================================================================
+
+def vectorised_line_filters(lines, regions, shape, max_dist=50) -> list:
+    segments = image_ops.as_segments(lines)
+    boxes = image_ops.boxes_array(regions)
+    near = (image_ops.points_near_boxes(segments[:, :2], boxes, max_dist)
+            | image_ops.points_near_boxes(segments[:, 2:], boxes, max_dist)).any(axis=1)
+    h, w = shape[:2]
+    diagonal = np.sqrt(h**2 + w**2)
+    lengths = image_ops.segment_lengths(segments)
+    angles = image_ops.segment_angles(segments)
+    keep = near & (lengths >= diagonal * 0.02) & (lengths <= diagonal * 0.15)
+    keep &= ((angles <= 20) | (angles >= 70) | ((angles >= 40) & (angles <= 50)))
+    return image_ops.select(list(lines), keep)
+
+
+# =============================================================================
+# SYNTHETIC INPUTS
+# =============================================================================
+
+def make_diagram(width: int, height: int, seed: int = 0) -> Tuple[bytes, list, list]:
+    """White diagram with shapes, label boxes and leader lines."""
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    for _ in range(40):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = tuple(int(c) for c in rng.integers(0, 200, 3))
+        cv2.circle(img, center, int(rng.integers(10, min(width, height) // 6)), color, -1)
+    regions = []
+    for _ in range(30):
+        x, y = int(rng.integers(0, width - 80)), int(rng.integers(0, height - 20))
+        regions.append({"bbox": {"x": x, "y": y, "width": int(rng.integers(30, 80)), "height": int(rng.integers(10, 20))}})
+    lines = [
+        np.array([[int(rng.integers(0, width)), int(rng.integers(0, height)),
+                   int(rng.integers(0, width)), int(rng.integers(0, height))]], dtype=np.int32)
+        for _ in range(400)
+    ]
+    buf = BytesIO()
+    Image.fromarray(img).save(buf, format="PNG")
+    return buf.getvalue(), regions, lines
+
+
+def timed(fn: Callable, repeat: int) -> Tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def run(sizes: List[Tuple[int, int]], repeat: int) -> None:
+    print(f"{'size':>11}  {'operation':<18} {'legacy ms':>10} {'new ms':>9} {'speedup':>8}  same")
+    for width, height in sizes:
+        png, regions, lines = make_diagram(width, height)
+        shape = (height, width)
+        cases = [
+            ("remove_background", lambda: legacy_remove_background(png), lambda: image_ops.remove_background(png),
+             lambda a, b: np.array_equal(np.asarray(Image.open(BytesIO(a))), np.asarray(Image.open(BytesIO(b))))),
+            ("text_mask", lambda: legacy_text_mask(shape, regions),
+             lambda: image_ops.boxes_to_mask(shape, regions, padding=10), np.array_equal),
+            ("line_filters", lambda: legacy_line_filters(lines, regions, shape),
+             lambda: vectorised_line_filters(lines, regions, shape),
+             lambda a, b: len(a) == len(b) and all(x is y for x, y in zip(a, b))),
+            ("line_mask", lambda: legacy_line_mask(shape, lines),
+             lambda: image_ops.lines_to_mask(shape, lines, thickness=8), np.array_equal),
+        ]
+        for name, legacy, new, same in cases:
+            legacy_ms, legacy_out = timed(legacy, 1 if name == "remove_background" else repeat)
+            new_ms, new_out = timed(new, repeat)
+            speedup = legacy_ms / new_ms if new_ms else float("inf")
+            print(f"{width:>5}x{height:<5}  {name:<18} {legacy_ms:>10.1f} {new_ms:>9.2f} {speedup:>7.1f}x  "
+                  f"{'yes' if same(legacy_out, new_out) else 'NO'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark legacy vs vectorised image ops")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated WxH list")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (best time reported)")
+    args = parser.parse_args()
+    sizes = [tuple(int(v) for v in s.lower().split("x")) for s in args.sizes.split(",")]
+    run(sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Label-to-Zone Matching Benchmark
+
+Compares the previous per-label matcher (scan every zone, first hit wins,
+zones can be claimed twice) with ZoneMatcher (app/v4/helpers/zone_matcher.py:
+n-gram indexed scoring + global one-to-one assignment) on synthetic
+hierarchical diagrams.
+
+Each diagram has parent structures and their parts ("left atrium",
+"left atrium wall", "left atrium wall muscle"...), so many labels are
+substrings of each other. Detected zone labels get realistic noise: case
+changes, extra whitespace, single-letter typos and shuffled order.
+
+Reported per size: time per diagram, accuracy (label mapped to its own
+zone) and the number of zones claimed by more than one label.
+
+Usage:
+    python scripts/bench_zone_matcher.py
+    python scripts/bench_zone_matcher.py --labels 50,200,500 --diagrams 20
+"""
+
+import argparse
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.v4.helpers.utils import normalize_label_text
+from app.v4.helpers.zone_matcher import match_labels_to_zones
+
+DEFAULT_LABELS = "50,200,500"
+
+SIDES = ["left", "right", "upper", "lower", "anterior", "posterior", "medial", "lateral", "inner", "outer"]
+STRUCTURES = ["atrium", "ventricle", "lobe", "cortex", "valve", "artery", "vein", "duct", "gland", "node",
+              "chamber", "sinus", "membrane", "canal", "root", "horn", "fossa", "ridge", "plate", "arch"]
+PARTS = ["wall", "muscle", "tissue", "layer", "branch", "segment", "apex", "base", "margin", "surface"]
+
+
+# =============================================================================
+# SYNTHETIC INPUTS
+# =============================================================================
+
+def make_diagram(n: int, seed: int) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, str]]:
+    """Hierarchical canonical labels, noisy detected zones, and the true label -> zone id."""
+    rng = random.Random(seed)
+    labels: List[str] = []
+    seen = set()
+    while len(labels) < n:
+        parent = f"{rng.choice(SIDES)} {rng.choice(STRUCTURES)}"
+        for text in (parent, f"{parent} {rng.choice(PARTS)}", f"{parent} {rng.choice(PARTS)} {rng.choice(PARTS)}"):
+            if text not in seen and len(labels) < n:
+                seen.add(text)
+                labels.append(text.title() if rng.random() < 0.5 else text)
+
+    zones, truth = [], {}
+    for i, label in enumerate(labels):
+        text = label
+        roll = rng.random()
+        if roll < 0.25:
+            text = text.upper()
+        elif roll < 0.4:
+            text = "  " + text.replace(" ", "  ") + " "
+        elif roll < 0.55:
+            k = rng.randrange(len(text))
+            text = text[:k] + rng.choice("aeiou") + text[k + 1:]
+        zones.append({"id": f"zone_{i}", "label": text})
+        truth[label] = f"zone_{i}"
+    rng.shuffle(zones)
+    return labels, zones, truth
+
+
+# =============================================================================
+# LEGACY MATCHER (as it was before ZoneMatcher)
+# =============================================================================
+
+def legacy_match(canonical_labels: List[str], detected_zones: List[Dict[str, Any]]) -> Dict[str, str]:
+    zone_lookup = {(z.get("label") or ""): z for z in detected_zones if z.get("label")}
+    norm_lookup = {normalize_label_text(k): z for k, z in zone_lookup.items()}
+    result = {}
+    for label in canonical_labels:
+        norm = normalize_label_text(label)
+        zone = zone_lookup.get(label)
+        if zone is None:
+            zone = next((z for k, z in zone_lookup.items() if k.lower() == label.lower()), None)
+        if zone is None:
+            zone = norm_lookup.get(norm)
+        if zone is None:
+            zone = next((z for k, z in zone_lookup.items()
+                         if norm in normalize_label_text(k) or normalize_label_text(k) in norm), None)
+        if zone is None:
+            best = 0.0
+            for k, z in zone_lookup.items():
+                score = SequenceMatcher(None, norm, normalize_label_text(k)).ratio()
+                if score > best and score > 0.7:
+                    best, zone = score, z
+        result[label] = zone["id"] if zone else None
+    return result
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+def evaluate(result: Dict[str, str], truth: Dict[str, str]) -> Tuple[int, int]:
+    correct = sum(result.get(label) == zone_id for label, zone_id in truth.items())
+    claimed = [zid for zid in result.values() if zid]
+    return correct, len(claimed) - len(set(claimed))
+
+
+def run(sizes: List[int], diagrams: int) -> None:
+    match_labels_to_zones(*make_diagram(20, seed=-1)[:2])  # warm up imports
+    print(f"{'labels':>6}  {'matcher':<8} {'ms/diagram':>11} {'accuracy':>9} {'dup zones':>10}")
+    for n in sizes:
+        cases = [make_diagram(n, seed) for seed in range(diagrams)]
+        for name, fn in (("legacy", legacy_match), ("indexed", match_labels_to_zones)):
+            elapsed, correct, dups = 0.0, 0, 0
+            for labels, zones, truth in cases:
+                started = time.perf_counter()
+                result = fn(labels, zones)
+                elapsed += time.perf_counter() - started
+                c, d = evaluate(result, truth)
+                correct += c
+                dups += d
+            print(f"{n:>6}  {name:<8} {elapsed * 1000 / diagrams:>11.1f} "
+                  f"{correct / (n * diagrams):>9.1%} {dups / diagrams:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark label-to-zone matching on hierarchical diagrams")
+    parser.add_argument("--labels", default=DEFAULT_LABELS, help="Comma-separated label counts per diagram")
+    parser.add_argument("--diagrams", type=int, default=10, help="Diagrams per size")
+    args = parser.parse_args()
+    run([int(n) for n in args.labels.split(",")], args.diagrams)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Zone Overlap Micro-Benchmark
+
+Compares the previous all-pairs loops against the sweep-and-prune broad
+phase (app/utils/spatial_index.py) on synthetic zone sets, and checks both
+paths find the same overlaps.
+
+Operations:
+    bbox_overlaps      ZoneCollisionResolver._detect_overlaps, bbox IoU path
+    polygon_overlaps   ZoneCollisionResolver._detect_overlaps, Shapely path (if installed)
+    sam_filter         SAM3ZoneDetector._filter_overlapping (greedy suppression)
+    resolve            ZoneCollisionResolver.resolve_overlaps end to end (new path only)
+
+When a legacy run would test more than --max-legacy-pairs pairs, its time
+is extrapolated from a random sample of pairs and marked "est.".
+
+Usage:
+    python scripts/bench_zone_overlaps.py
+    python scripts/bench_zone_overlaps.py --counts 50,500,5000 --max-legacy-pairs 2000000
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.agents.had.zone_collision_resolver import (
+    SHAPELY_AVAILABLE,
+    ZoneCollisionResolver,
+    calculate_polygon_iou,
+)
+from app.services.sam3_zone_service import SAM3ZoneDetector
+
+DEFAULT_COUNTS = "50,500,5000"
+
+
+# =============================================================================
+# SYNTHETIC INPUTS
+# =============================================================================
+
+def make_zones(n: int, polygons: bool, seed: int = 0) -> List[Dict[str, Any]]:
+    """Zones in percentage coordinates with roughly constant overlap density."""
+    rng = random.Random(seed)
+    base = 40 / math.sqrt(n)
+    zones = []
+    for i in range(n):
+        x, y = rng.uniform(5, 95), rng.uniform(5, 95)
+        r = base * rng.uniform(0.5, 1.5)
+        zone = {"id": f"zone_{i}", "label": f"part {i}", "x": x, "y": y, "radius": r}
+        if polygons:
+            sides = rng.randint(5, 9)
+            zone["points"] = [
+                [x + r * math.cos(2 * math.pi * k / sides), y + r * math.sin(2 * math.pi * k / sides)]
+                for k in range(sides)
+            ]
+        zones.append(zone)
+    return zones
+
+
+def make_sam_masks(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Pixel bboxes for an automatic-mask run on a 1024x1024 image, largest first."""
+    rng = random.Random(seed)
+    zones = []
+    for i in range(n):
+        w, h = rng.randint(10, 300), rng.randint(10, 300)
+        zones.append({"id": f"zone_{i}", "bbox": {"x": rng.randint(0, 1024 - w), "y": rng.randint(0, 1024 - h),
+                                                  "width": w, "height": h}, "area": w * h})
+    zones.sort(key=lambda z: z["area"], reverse=True)
+    return zones
+
+
+# =============================================================================
+# PREVIOUS IMPLEMENTATIONS (all pairs)
+# =============================================================================
+
+def _all_pairs(n: int, max_pairs: int) -> Tuple[List[Tuple[int, int]], float]:
+    """All (i, j) pairs, or a random sample plus the scale factor to extrapolate."""
+    total = n * (n - 1) // 2
+    if total <= max_pairs:
+        return [(i, j) for i in range(n) for j in range(i + 1, n)], 1.0
+    rng = random.Random(1)
+    sample = []
+    while len(sample) < max_pairs // 20:
+        i, j = rng.randrange(n), rng.randrange(n)
+        if i != j:
+            sample.append((min(i, j), max(i, j)))
+    return sample, total / len(sample)
+
+
+def legacy_bbox_overlaps(resolver: ZoneCollisionResolver, zones, pairs) -> List[Tuple[str, str]]:
+    bounds = [resolver._get_zone_bounds(z) for z in zones]
+    found = []
+    for i, j in pairs:
+        iou, _ = resolver._calculate_iou(bounds[i], bounds[j])
+        if iou > 0:
+            found.append((bounds[i].zone_id, bounds[j].zone_id))
+    return found
+
+
+def legacy_polygon_overlaps(zones, pairs) -> List[Tuple[str, str]]:
+    found = []
+    for i, j in pairs:
+        iou, _ = calculate_polygon_iou(zones[i], zones[j])
+        if iou > 0:
+            found.append((zones[i]["id"], zones[j]["id"]))
+    return found
+
+
+def legacy_sam_filter(detector: SAM3ZoneDetector, zones, iou_threshold=0.5) -> List[str]:
+    keep = []
+    for zone in zones:
+        if not any(detector._compute_bbox_iou(zone["bbox"], kept["bbox"]) > iou_threshold for kept in keep):
+            keep.append(zone)
+    return [z["id"] for z in keep]
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+def timed(fn: Callable) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def run(counts: List[int], max_legacy_pairs: int) -> None:
+    resolver = ZoneCollisionResolver()
+    detector = SAM3ZoneDetector()
+    # Warm up NumPy/Shapely so first-call costs don't land on the smallest size
+    resolver._detect_overlaps(make_zones(50, polygons=SHAPELY_AVAILABLE))
+    detector._filter_overlapping(make_sam_masks(50))
+
+    print(f"{'zones':>6}  {'operation':<17} {'legacy ms':>12} {'new ms':>9} {'speedup':>9}  same")
+
+    def report(n, name, legacy_ms, scale, new_ms, same):
+        legacy_ms *= scale
+        mark = " est." if scale != 1.0 else ""
+        speedup = legacy_ms / new_ms if new_ms else float("inf")
+        print(f"{n:>6}  {name:<17} {legacy_ms:>8.1f}{mark:<4} {new_ms:>9.1f} {speedup:>8.1f}x  {same}")
+
+    for n in counts:
+        circles = make_zones(n, polygons=False)
+        pairs, scale = _all_pairs(n, max_legacy_pairs)
+        legacy_ms, legacy_out = timed(lambda: legacy_bbox_overlaps(resolver, circles, pairs))
+        new_ms, new_out = timed(lambda: resolver._detect_overlaps(circles))
+        same = [(p.zone_a_id, p.zone_b_id) for p in new_out] == legacy_out if scale == 1.0 else "n/a"
+        report(n, "bbox_overlaps", legacy_ms, scale, new_ms, same)
+
+        if SHAPELY_AVAILABLE:
+            polys = make_zones(n, polygons=True)
+            legacy_ms, legacy_out = timed(lambda: legacy_polygon_overlaps(polys, pairs))
+            new_ms, new_out = timed(lambda: resolver._detect_overlaps(polys))
+            same = [(p.zone_a_id, p.zone_b_id) for p in new_out] == legacy_out if scale == 1.0 else "n/a"
+            report(n, "polygon_overlaps", legacy_ms, scale, new_ms, same)
+
+        masks = make_sam_masks(n)
+        legacy_ms, legacy_out = timed(lambda: legacy_sam_filter(detector, masks))
+        new_ms, new_out = timed(lambda: detector._filter_overlapping(masks))
+        report(n, "sam_filter", legacy_ms, 1.0, new_ms, [z["id"] for z in new_out] == legacy_out)
+
+        new_ms, _ = timed(lambda: resolver.resolve_overlaps(circles, strategy="discrete"))
+        print(f"{n:>6}  {'resolve':<17} {'-':>12} {new_ms:>9.1f} {'':>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark all-pairs vs indexed zone overlap detection")
+    parser.add_argument("--counts", default=DEFAULT_COUNTS, help="Comma-separated zone counts")
+    parser.add_argument("--max-legacy-pairs", type=int, default=2_000_000,
+                        help="Above this many pairs, extrapolate legacy time from a sample")
+    args = parser.parse_args()
+    run([int(c) for c in args.counts.split(",")], args.max_legacy_pairs)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,23 @@
 Pytest configuration and fixtures for GamED.AI v2 tests
 """
 
+import os
 import pytest
 import asyncio
 import sys
+import tempfile
 from pathlib import Path
 
 # Add backend to path
 backend_path = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_path))
 
+# Keep snapshot blobs, feature/download caches and the LLM response cache written by tests out of pipeline_outputs/
+os.environ.setdefault("SNAPSHOT_BLOB_DIR", tempfile.mkdtemp(prefix="gamed_ai_snapshot_blobs_"))
+os.environ.setdefault("SAM3_FEATURE_CACHE_DIR", tempfile.mkdtemp(prefix="gamed_ai_sam3_features_"))
+os.environ.setdefault("DOWNLOAD_CACHE_DIR", tempfile.mkdtemp(prefix="gamed_ai_downloads_"))
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="gamed_ai_llm_cache_"), "llm_responses.db"))
+
 
 @pytest.fixture(scope="session")
 def event_loop():
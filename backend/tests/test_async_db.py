@@ -0,0 +1,114 @@
+"""
+Tests for the async database path (app/db/database.py) and the routes using it
+
+Run with: PYTHONPATH=. pytest tests/test_async_db.py -v
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import get_async_db, to_async_database_url
+from app.db.models import (
+    Base, Question, Process, Visualization, PipelineRun, StageExecution
+)
+from app.routes import generate, observability, sessions
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+
+    db = sessionmaker(bind=sync_engine)()
+    db.add(Question(id="q1", text="Label the parts of a plant cell"))
+    db.add(Process(id="p1", question_id="q1", status="processing", current_agent="router", progress_percent=40))
+    db.add(Visualization(id="v1", process_id="p1", template_type="INTERACTIVE_DIAGRAM",
+                         blueprint={"title": "Plant Cell", "mechanics": [{"type": "drag_drop"}]}))
+    db.add(PipelineRun(id="r1", process_id="p1", status="running"))
+    db.add(StageExecution(id="s1", run_id="r1", stage_name="router", stage_order=1, status="success"))
+    db.add(StageExecution(id="s2", run_id="r1", stage_name="game_planner", stage_order=2, status="running"))
+    db.commit()
+    db.close()
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(generate.router, prefix="/api")
+    app.include_router(sessions.router, prefix="/api")
+    app.include_router(observability.router, prefix="/api")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestAsyncDatabaseUrl:
+
+    def test_maps_sync_drivers(self):
+        assert to_async_database_url("sqlite:///./gamed_ai_v2.db") == "sqlite+aiosqlite:///./gamed_ai_v2.db"
+        assert to_async_database_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+        assert to_async_database_url("postgres://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+        assert to_async_database_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+class TestAsyncRoutes:
+
+    def test_generation_status(self, client):
+        response = client.get("/api/generate/p1/status")
+        assert response.status_code == 200
+        assert response.json()["progress_percent"] == 40
+        assert client.get("/api/generate/missing/status").status_code == 404
+
+    def test_list_processes(self, client):
+        body = client.get("/api/processes").json()
+        assert body["total"] == 1
+        process = body["processes"][0]
+        assert process["question_text"] == "Label the parts of a plant cell"
+        assert process["template_type"] == "INTERACTIVE_DIAGRAM"
+
+    def test_list_runs(self, client):
+        body = client.get("/api/observability/runs", params={"status": "running"}).json()
+        assert body["total"] == 1
+        run = body["runs"][0]
+        assert run["question_text"] == "Label the parts of a plant cell"
+        assert (run["stages_completed"], run["total_stages"]) == (1, 2)
+
+    def test_get_run_by_id_or_process_id(self, client):
+        run = client.get("/api/observability/runs/r1").json()
+        assert [s["stage_name"] for s in run["stages"]] == ["router", "game_planner"]
+        assert run["template_type"] == "INTERACTIVE_DIAGRAM"
+        assert client.get("/api/observability/runs/p1").json()["id"] == "r1"
+        assert client.get("/api/observability/runs/missing").status_code == 404
+
+    def test_session_lifecycle(self, client):
+        created = client.post("/api/sessions", params={
+            "visualization_id": "v1", "question_id": "q1", "user_identifier": "student-1"
+        }).json()
+        session_id = created["session_id"]
+
+        recorded = client.post(f"/api/sessions/{session_id}/attempts", json={
+            "attempts": [{"questionIndex": 0, "attemptNumber": 1, "selectedAnswer": "nucleus", "isCorrect": True}],
+            "score": {"raw": 1, "max": 1},
+        })
+        assert recorded.json()["attempts_count"] == 1
+
+        ended = client.post(f"/api/sessions/{session_id}/end", params={"total_active_time": 30}).json()
+        assert ended["status"] == "completed"
+        assert ended["final_score"]["raw"] == 1
+
+        detail = client.get(f"/api/sessions/{session_id}").json()
+        assert detail["status"] == "completed"
+        assert detail["attempts"][0]["selected_answer"] == "nucleus"
+
+        user_sessions = client.get("/api/sessions/user/student-1").json()
+        assert user_sessions["total"] == 1
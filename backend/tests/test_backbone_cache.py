@@ -0,0 +1,160 @@
+"""
+Tests for the SAM3 backbone feature cache (app/services/asset_gen/backbone_cache.py)
+
+Run with: PYTHONPATH=. pytest tests/test_backbone_cache.py -v
+"""
+
+from io import BytesIO
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.asset_gen import backbone_cache, segmentation
+from app.services.asset_gen.backbone_cache import BackboneFeatureCache, image_content_key
+
+MB = 1024 * 1024
+DEFAULT_MEMORY_BYTES = backbone_cache.DEFAULT_MEMORY_MB * MB
+
+
+def _state(seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "original_height": 64,
+        "original_width": 48,
+        "backbone_out": {
+            "vision_features": rng.standard_normal((1, 8, 16, 16)).astype(np.float32),
+            "fpn": [rng.standard_normal((1, 4, 8, 8)).astype(np.float32), (1, 2)],
+        },
+    }
+
+
+def _assert_same(restored: dict, original: dict):
+    assert restored["original_height"] == 64
+    np.testing.assert_array_equal(restored["backbone_out"]["vision_features"],
+                                  original["backbone_out"]["vision_features"])
+    np.testing.assert_array_equal(restored["backbone_out"]["fpn"][0], original["backbone_out"]["fpn"][0])
+    assert restored["backbone_out"]["fpn"][1] == (1, 2)
+
+
+class TestBackboneFeatureCache:
+
+    def test_memory_hit_returns_fresh_state(self):
+        cache = BackboneFeatureCache()
+        original = _state()
+        cache.put("k", original, backbone_ms=3000)
+
+        first = cache.get("k")
+        _assert_same(first, original)
+        # Callers pop keys from the state; the cache must be unaffected
+        first.pop("backbone_out")
+        _assert_same(cache.get("k"), original)
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["memory_hits"], stats["misses"]) == (2, 2, 0)
+        assert 0 < stats["backbone_ms_saved"] <= 6000
+        assert cache.get("missing") is None
+        assert cache.stats()["hit_rate"] == round(2 / 3, 3)
+
+    def test_lru_eviction_spills_to_memory_mapped_disk(self, tmp_path):
+        entry_bytes = sum(a.nbytes for a in (_state()["backbone_out"]["vision_features"],
+                                              _state()["backbone_out"]["fpn"][0]))
+        cache = BackboneFeatureCache(cache_dir=tmp_path, memory_bytes=int(entry_bytes * 1.5))
+        originals = {key: _state(i) for i, key in enumerate(["a", "b"])}
+        for key, state in originals.items():
+            cache.put(key, state, backbone_ms=100)
+
+        assert cache.stats()["memory_entries"] == 1
+        assert cache.stats()["evictions"] == 1
+        restored = cache.get("a")
+        _assert_same(restored, originals["a"])
+        assert not isinstance(restored["backbone_out"]["vision_features"], np.memmap)
+        assert cache.stats()["disk_hits"] == 1
+
+    @pytest.mark.parametrize("memory_bytes", [DEFAULT_MEMORY_BYTES, 0])
+    def test_mutating_a_hit_does_not_change_the_cache(self, tmp_path, memory_bytes):
+        cache = BackboneFeatureCache(cache_dir=tmp_path, memory_bytes=memory_bytes)
+        original = _state()
+        cache.put("k", original, backbone_ms=100)
+
+        for _ in range(2):  # Second round reads the entry the first disk hit remembered
+            hit = cache.get("k")
+            hit["backbone_out"]["vision_features"] += 1
+            hit["backbone_out"]["fpn"][0][...] = 0
+        _assert_same(cache.get("k"), original)
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        BackboneFeatureCache(cache_dir=tmp_path).put("k", _state(), backbone_ms=2500)
+        fresh = BackboneFeatureCache(cache_dir=tmp_path)
+        _assert_same(fresh.get("k"), _state())
+        assert fresh.stats()["disk_hits"] == 1
+
+    def test_disk_budget_evicts_oldest(self, tmp_path):
+        cache = BackboneFeatureCache(cache_dir=tmp_path, memory_bytes=0, disk_bytes=int(0.015 * MB))
+        for key in ["old", "new"]:
+            cache.put(key, _state(), backbone_ms=100)
+        assert cache.get("old") is None
+        assert cache.get("new") is not None
+
+    def test_corrupt_entry_is_dropped(self, tmp_path):
+        cache = BackboneFeatureCache(cache_dir=tmp_path, memory_bytes=0)
+        cache.put("k", _state(), backbone_ms=100)
+        (tmp_path / "k"[:2] / "k" / "0.npy").write_bytes(b"garbage")
+        assert cache.get("k") is None
+        assert not (tmp_path / "k"[:2] / "k").exists()
+
+    def test_content_key_ignores_encoding(self):
+        image = Image.new("RGB", (32, 24), (10, 200, 30))
+        png, bmp = BytesIO(), BytesIO()
+        image.save(png, format="PNG")
+        image.save(bmp, format="BMP")
+        from_png = Image.open(BytesIO(png.getvalue()))
+        from_bmp = Image.open(BytesIO(bmp.getvalue()))
+        assert image_content_key(from_png) == image_content_key(from_bmp)
+        assert image_content_key(from_png) != image_content_key(Image.new("RGB", (32, 24), (0, 0, 0)))
+        assert image_content_key(from_png, "model-a") != image_content_key(from_png, "model-b")
+
+
+class TestSegmentationUsesCache:
+
+    @pytest.fixture
+    def service(self, monkeypatch, tmp_path):
+        cache = BackboneFeatureCache(cache_dir=tmp_path)
+        monkeypatch.setattr(backbone_cache, "_feature_cache", cache)
+        monkeypatch.setenv("SAM3_FEATURE_CACHE_ENABLED", "true")
+
+        calls = []
+
+        def set_image(image):
+            calls.append(image.size)
+            return _state()
+
+        processor = SimpleNamespace(set_image=set_image)
+        service = segmentation.LocalSegmentationService()
+        service._sam3 = SimpleNamespace(_ensure_loaded=lambda: None, _processor=processor)
+        return service, calls
+
+    def test_backbone_computed_once_per_image(self, service):
+        service, calls = service
+        image = Image.new("RGB", (40, 30), (1, 2, 3))
+
+        first = service._compute_backbone(image)
+        segmentation.LocalSegmentationService._cleanup_state(first)
+        second = service._compute_backbone(image.copy())
+
+        assert calls == [(40, 30)]
+        _assert_same(second, _state())
+        status = segmentation.get_sam3_status()
+        assert status["last_backbone_cached"] is True
+        assert status["feature_cache_hit_rate"] == 0.5
+        assert status["feature_cache"]["hits"] == 1
+
+    def test_disabled_cache_always_computes(self, service, monkeypatch):
+        service, calls = service
+        monkeypatch.setenv("SAM3_FEATURE_CACHE_ENABLED", "false")
+        image = Image.new("RGB", (40, 30), (1, 2, 3))
+        service._compute_backbone(image)
+        service._compute_backbone(image)
+        assert len(calls) == 2
+        assert "feature_cache" not in segmentation.get_sam3_status()
@@ -0,0 +1,150 @@
+"""
+Tests for batched CLIP labeling/filtering (app/services/clip_embeddings.py,
+clip_labeling_service.py, clip_filtering_service.py) and the optimal
+assignment solver (app/utils/assignment.py)
+
+CLIP itself is replaced by colour-based fake embeddings, so these run
+without torch/transformers.
+
+Run with: PYTHONPATH=. pytest tests/test_clip_batching.py -v
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import clip_filtering_service, clip_labeling_service
+from app.services.clip_embeddings import TextEmbeddingCache, similarity_probabilities
+from app.utils.assignment import max_weight_assignment, solve_assignment
+
+COLOURS = {"red": (1.0, 0.0, 0.0), "green": (0.0, 1.0, 0.0), "blue": (0.0, 0.0, 1.0)}
+
+
+def _normalise(rows):
+    rows = np.asarray(rows, dtype=np.float64)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def fake_clip(monkeypatch):
+    """Crops embed as their mean colour; prompts as the colour word they end with."""
+    calls = {"images": [], "texts": []}
+
+    def encode_images(model, processor, device, images, batch_size=None):
+        calls["images"].append(len(images))
+        return _normalise([np.asarray(img.convert("RGB"), dtype=np.float64).reshape(-1, 3).mean(axis=0) + 1e-3
+                           for img in images])
+
+    def encode_texts(model, processor, device, texts):
+        calls["texts"].append(list(texts))
+        return _normalise([np.asarray(COLOURS[t.split()[-1]]) + 0.05 for t in texts])
+
+    for module in (clip_labeling_service, clip_filtering_service):
+        monkeypatch.setattr(module, "encode_images", encode_images)
+        monkeypatch.setattr(module, "encode_texts", encode_texts)
+        monkeypatch.setattr(module, "logit_scale", lambda model: 100.0)
+        monkeypatch.setattr(module, "get_text_embedding_cache", lambda cache=TextEmbeddingCache(64): cache)
+    return calls
+
+
+def _loaded(service):
+    service._model = object()
+    return service
+
+
+class TestAssignment:
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            n, m = int(rng.integers(1, 6)), int(rng.integers(1, 6))
+            cost = rng.random((n, m)).round(1)
+            rows, cols = solve_assignment(cost)
+            if n <= m:
+                best = min(sum(cost[i, p[i]] for i in range(n)) for p in itertools.permutations(range(m), n))
+            else:
+                best = min(sum(cost[p[j], j] for j in range(m)) for p in itertools.permutations(range(n), m))
+            assert cost[rows, cols].sum() == pytest.approx(best)
+            assert len(set(cols.tolist())) == len(cols) == min(n, m)
+
+    def test_beats_greedy_and_respects_min_weight(self):
+        # Greedy takes (0, 0)=0.9 and leaves zone 1 with 0.1; optimal total is 1.65
+        assert max_weight_assignment([[0.9, 0.8], [0.85, 0.1]]) == [(0, 1), (1, 0)]
+        assert max_weight_assignment([[0.9, 0.05], [0.04, 0.02]], min_weight=0.1) == [(0, 0)]
+        assert max_weight_assignment([[-np.inf, 0.5]]) == [(0, 1)]
+        assert max_weight_assignment(np.zeros((0, 3))) == []
+
+
+class TestEmbeddingHelpers:
+
+    def test_text_cache_encodes_each_prompt_once(self):
+        cache = TextEmbeddingCache(max_entries=3)
+        batches = []
+
+        def encode(texts):
+            batches.append(list(texts))
+            return np.eye(4)[[len(t) for t in texts]]
+
+        first = cache.get_many("m", ["a", "bb", "a"], encode)
+        second = cache.get_many("m", ["bb", "ccc"], encode)
+        assert batches == [["a", "bb"], ["ccc"]]
+        assert np.array_equal(first[0], first[2]) and np.array_equal(first[1], second[0])
+        assert cache.stats()["hits"] == 2
+
+        cache.get_many("m", ["x"], encode)  # evicts the least recently used ("a")
+        cache.get_many("m", ["a"], encode)
+        assert batches[-1] == ["a"]
+
+    def test_probabilities_are_per_row_softmax(self):
+        images = _normalise([[1, 0.2], [0.1, 1]])
+        texts = _normalise([[1, 0], [0, 1], [1, 1]])
+        probs = similarity_probabilities(images, texts, 50.0)
+        logits = 50.0 * images @ texts.T
+        expected = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+        assert np.allclose(probs, expected)
+
+
+class TestBatchedLabeling:
+
+    def _image(self):
+        image = Image.new("RGB", (90, 30), "white")
+        for i, colour in enumerate(["red", "green", "blue"]):
+            image.paste(tuple(int(255 * c) for c in COLOURS[colour]), (i * 30, 0, i * 30 + 30, 30))
+        return image
+
+    def test_label_all_zones_batches_and_assigns(self, fake_clip):
+        labeler = _loaded(clip_labeling_service.CLIPZoneLabeler())
+        zones = [
+            {"id": "z1", "bbox": {"x": 60, "y": 0, "width": 30, "height": 30}},
+            {"id": "z2", "bbox": {"x": 0, "y": 0, "width": 30, "height": 30}},
+            {"id": "tiny", "bbox": {"x": 30, "y": 0, "width": 5, "height": 5}},
+            {"id": "z3", "bbox": {"x": 30, "y": 0, "width": 30, "height": 30}},
+        ]
+        labeled = labeler.label_all_zones(self._image(), zones, ["red", "green", "blue"])
+
+        assert [z["label"] for z in labeled] == ["blue", "red", "unknown", "green"]
+        assert labeled[2]["label_confidence"] == 0.0
+        assert fake_clip["images"] == [3]
+        labeler.label_all_zones(self._image(), zones, ["red", "green", "blue"])
+        assert len(fake_clip["texts"]) == 1  # prompts encoded once
+
+    def test_label_zone_keeps_score_dict(self, fake_clip):
+        labeler = _loaded(clip_labeling_service.CLIPZoneLabeler())
+        result = labeler.label_zone(self._image().crop((0, 0, 30, 30)), ["red", "green"])
+        assert result["label"] == "red"
+        assert set(result["all_scores"]) == {"red", "green"}
+        assert sum(result["all_scores"].values()) == pytest.approx(1.0)
+
+    def test_filter_classifies_all_regions_in_one_pass(self, fake_clip, monkeypatch):
+        monkeypatch.setattr(clip_filtering_service, "DEFAULT_ANNOTATION_LABELS", ["text red"])
+        monkeypatch.setattr(clip_filtering_service, "DEFAULT_CONTENT_LABELS", ["organ green", "tissue blue"])
+        clip_filter = _loaded(clip_filtering_service.CLIPAnnotationFilter())
+        results = clip_filter.classify_regions(
+            self._image(), [(0, 0, 30, 30), (30, 0, 60, 30), (200, 200, 210, 210), (0, 0, 5, 5)]
+        )
+        assert [r["is_annotation"] for r in results] == [True, False, False, False]
+        assert results[2]["content_score"] == 1.0 and results[3]["annotation_score"] == 0.5
+        assert fake_clip["images"] == [2]
+        assert clip_filter.classify_region(self._image(), (0, 0, 30, 30)) == results[0]
@@ -0,0 +1,174 @@
+"""
+Tests for denormalised game summaries and keyset-paginated listings
+(app/db/game_summary.py, /processes, /observability/games)
+
+Run with: PYTHONPATH=. pytest tests/test_game_summary.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import get_async_db
+from app.db.game_summary import (
+    summarize_blueprint,
+    ensure_game_summary_schema,
+    encode_cursor,
+    decode_cursor,
+)
+from app.db.models import Base, Question, Process, Visualization, PipelineRun
+from app.routes import generate, observability
+
+BLUEPRINT = {
+    "title": "Heart Anatomy",
+    "scenes": [{"diagram": {"assetUrl": "/assets/heart.png"}}],
+    "interactionMode": "drag_drop",
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "games.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    base = datetime(2026, 1, 1)
+    for i in range(5):
+        db.add(Question(id=f"q{i}", text=f"Question {i}"))
+        db.add(Process(id=f"p{i}", question_id=f"q{i}", status="completed", created_at=base + timedelta(minutes=i)))
+        db.add(Visualization(id=f"v{i}", process_id=f"p{i}", template_type="INTERACTIVE_DIAGRAM",
+                             blueprint={**BLUEPRINT, "title": f"Game {i}"}))
+        db.add(PipelineRun(id=f"r{i}a", process_id=f"p{i}", status="failed", started_at=base + timedelta(minutes=i)))
+        db.add(PipelineRun(id=f"r{i}b", process_id=f"p{i}", status="success",
+                           started_at=base + timedelta(minutes=i, seconds=30)))
+    db.commit()
+    db.close()
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def client(db_path):
+    factory = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{db_path}"), expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(generate.router, prefix="/api")
+    app.include_router(observability.router, prefix="/api")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestGameSummary:
+
+    def test_summarize_blueprint(self):
+        assert summarize_blueprint(BLUEPRINT) == {
+            "title": "Heart Anatomy",
+            "thumbnail_url": "/assets/heart.png",
+            "mechanic_type": "drag_drop",
+        }
+        assert summarize_blueprint(None)["title"] is None
+
+    def test_columns_follow_blueprint_on_save(self, db_path):
+        engine = create_engine(f"sqlite:///{db_path}")
+        db = sessionmaker(bind=engine)()
+        viz = db.get(Visualization, "v0")
+        assert (viz.title, viz.thumbnail_url, viz.mechanic_type) == ("Game 0", "/assets/heart.png", "drag_drop")
+
+        viz.blueprint = {"title": "Renamed", "mechanics": [{"type": "sequencing"}]}
+        db.commit()
+        db.refresh(viz)
+        assert (viz.title, viz.thumbnail_url, viz.mechanic_type) == ("Renamed", None, "sequencing")
+        db.close()
+
+    def test_existing_database_is_migrated_and_backfilled(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            # Simulate a database created before the summary columns existed
+            conn.exec_driver_sql("DROP TABLE visualizations")
+            conn.exec_driver_sql(
+                "CREATE TABLE visualizations (id VARCHAR PRIMARY KEY, process_id VARCHAR, "
+                "template_type VARCHAR(100), blueprint JSON, created_at DATETIME)"
+            )
+            conn.execute(
+                text("INSERT INTO visualizations (id, process_id, template_type, blueprint) VALUES ('v', 'p', 'X', :bp)"),
+                {"bp": '{"title": "Old Game", "diagram": {"assetUrl": "/old.png"}}'}
+            )
+
+        assert ensure_game_summary_schema(engine) == 1
+        columns = {c["name"] for c in inspect(engine).get_columns("visualizations")}
+        assert {"title", "thumbnail_url", "mechanic_type"} <= columns
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT title, thumbnail_url FROM visualizations")).one() == ("Old Game", "/old.png")
+
+        # Second run is a no-op
+        assert ensure_game_summary_schema(engine) == 0
+
+    def test_cursor_round_trip(self):
+        moment = datetime(2026, 3, 4, 5, 6, 7, 890)
+        assert decode_cursor(encode_cursor(moment, "p-1|x")) == (moment, "p-1|x")
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestGalleryListings:
+
+    def test_processes_keyset_pagination(self, client):
+        first = client.get("/api/processes", params={"limit": 2}).json()
+        assert [p["id"] for p in first["processes"]] == ["p4", "p3"]
+        assert first["processes"][0]["title"] == "Game 4"
+        assert first["processes"][0]["thumbnail_url"] == "/assets/heart.png"
+        assert first["total"] == 5
+
+        seen = [p["id"] for p in first["processes"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = client.get("/api/processes", params={"limit": 2, "cursor": cursor}).json()
+            seen += [p["id"] for p in page["processes"]]
+            cursor = page["next_cursor"]
+        assert seen == ["p4", "p3", "p2", "p1", "p0"]
+
+    def test_processes_rejects_bad_cursor(self, client):
+        assert client.get("/api/processes", params={"cursor": "bogus"}).status_code == 400
+
+    def test_games_use_latest_run_per_process(self, client):
+        body = client.get("/api/observability/games", params={"limit": 3}).json()
+        assert body["total"] == 5
+        assert [g["process_id"] for g in body["games"]] == ["p4", "p3", "p2"]
+        game = body["games"][0]
+        assert (game["status"], game["run_count"], game["latest_run_status"]) == ("completed", 2, "success")
+        assert game["title"] == "Game 4"
+
+        rest = client.get("/api/observability/games", params={"limit": 3, "cursor": body["next_cursor"]}).json()
+        assert [g["process_id"] for g in rest["games"]] == ["p1", "p0"]
+        assert rest["next_cursor"] is None
+
+    def test_listings_use_latest_visualization_per_process(self, client, db_path):
+        engine = create_engine(f"sqlite:///{db_path}")
+        db = sessionmaker(bind=engine)()
+        db.add(Visualization(id="v4-old", process_id="p4", template_type="INTERACTIVE_DIAGRAM",
+                             blueprint={**BLUEPRINT, "title": "Old Game 4"}, created_at=datetime(2025, 1, 1)))
+        db.add(Visualization(id="v4-new", process_id="p4", template_type="INTERACTIVE_DIAGRAM",
+                             blueprint={**BLUEPRINT, "title": "New Game 4"}, created_at=datetime(2027, 1, 1)))
+        db.commit()
+        db.close()
+        engine.dispose()
+
+        processes = client.get("/api/processes", params={"limit": 2}).json()["processes"]
+        assert [p["id"] for p in processes] == ["p4", "p3"]
+        assert processes[0]["title"] == "New Game 4"
+
+        games = client.get("/api/observability/games", params={"limit": 2}).json()["games"]
+        assert [g["process_id"] for g in games] == ["p4", "p3"]
+        assert games[0]["title"] == "New Game 4"
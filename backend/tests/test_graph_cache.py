@@ -0,0 +1,80 @@
+"""
+Tests for the compiled graph cache (app/agents/graph.py)
+
+Run with: PYTHONPATH=. pytest tests/test_graph_cache.py -v
+"""
+
+import pytest
+
+from app.agents import graph as graph_module
+from app.agents.graph import (
+    get_compiled_graph,
+    get_compiled_graph_stats,
+    invalidate_compiled_graphs,
+    warm_compiled_graphs,
+)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Replace graph compilation with a recorder returning a fresh object per build."""
+    calls = []
+
+    def fake_build(topology=None, preset=None):
+        calls.append((topology, preset))
+        return object()
+
+    monkeypatch.setattr(graph_module, "_build_compiled_graph", fake_build)
+    monkeypatch.delenv("GRAPH_CACHE_ENABLED", raising=False)
+    invalidate_compiled_graphs()
+    yield calls
+    invalidate_compiled_graphs()
+
+
+class TestCompiledGraphCache:
+
+    def test_reuses_compiled_graph(self, builds):
+        first = get_compiled_graph(preset="v4")
+        assert get_compiled_graph(preset="V4") is first
+        assert len(builds) == 1
+        assert get_compiled_graph_stats()["hits"] >= 1
+
+    def test_key_includes_topology_only_where_it_matters(self, builds):
+        t1 = get_compiled_graph(topology="T1")
+        assert get_compiled_graph() is t1
+        assert get_compiled_graph(topology="T2") is not t1
+        # v3 ignores topology
+        assert get_compiled_graph(topology="T1", preset="v3") is get_compiled_graph(topology="T2", preset="v3")
+        assert len(builds) == 3
+
+    def test_invalidate_forces_recompile(self, builds):
+        first = get_compiled_graph(preset="v3")
+        assert invalidate_compiled_graphs() == 1
+        assert get_compiled_graph(preset="v3") is not first
+
+    def test_agent_config_change_invalidates(self, builds, monkeypatch):
+        first = get_compiled_graph(preset="v3")
+        monkeypatch.setenv("AGENT_MODEL_ROUTER", "gpt-4o-mini")
+        assert get_compiled_graph(preset="v3") is not first
+        assert len(builds) == 2
+
+    def test_disabled_cache_compiles_every_call(self, builds, monkeypatch):
+        monkeypatch.setenv("GRAPH_CACHE_ENABLED", "false")
+        assert get_compiled_graph(preset="v3") is not get_compiled_graph(preset="v3")
+
+    def test_warm_up_uses_route_selection(self, builds, monkeypatch):
+        monkeypatch.setenv("GRAPH_WARMUP_PRESETS", "v4, default")
+        warmed = warm_compiled_graphs(topology="T1")
+        assert set(warmed) == {"v4", "default"}
+        # "default" isn't a full-graph preset, so it warms the topology graph
+        assert builds == [("T1", "v4"), ("T1", None)]
+        get_compiled_graph(topology="T1")
+        assert len(builds) == 2
+
+    def test_warm_up_failure_is_skipped(self, monkeypatch):
+        def broken_build(topology=None, preset=None):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(graph_module, "_build_compiled_graph", broken_build)
+        invalidate_compiled_graphs()
+        assert warm_compiled_graphs(["v3"]) == {}
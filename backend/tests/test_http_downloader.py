@@ -0,0 +1,201 @@
+"""
+Tests for the shared image downloader (app/services/http_downloader.py)
+
+Requests are served by httpx.MockTransport, no network needed.
+
+Run with: PYTHONPATH=. pytest tests/test_http_downloader.py -v
+"""
+
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from app.services import http_downloader
+from app.services.http_downloader import DownloadCache, HttpDownloader
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2000
+
+
+class _Server:
+    """Mock transport handler recording requests and concurrency per host."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        self.active = {}
+        self.max_active = {}
+        self.bodies = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.requests.append(request)
+        self.active[host] = self.active.get(host, 0) + 1
+        self.max_active[host] = max(self.max_active.get(host, 0), self.active[host])
+        try:
+            await asyncio.sleep(self.delay)
+            path = request.url.path
+            if path == "/missing.png":
+                return httpx.Response(404)
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"etag": '"v1"', "cache-control": "max-age=0"})
+            body = self.bodies.get(path, PNG)
+            headers = {"content-type": "image/png", "etag": '"v1"'}
+            if path.startswith("/stale"):
+                headers["cache-control"] = "max-age=0"
+            if path.startswith("/private"):
+                headers["cache-control"] = "private, no-store"
+            return httpx.Response(200, content=body, headers=headers)
+        finally:
+            self.active[host] -= 1
+
+
+def _downloader(server, tmp_path=None, max_bytes=10_000_000):
+    cache = DownloadCache(tmp_path, max_bytes=max_bytes) if tmp_path else None
+    return HttpDownloader(cache=cache, transport=httpx.MockTransport(server))
+
+
+class TestPooling:
+
+    def test_identical_urls_share_one_fetch(self):
+        server = _Server(delay=0.05)
+        downloader = _downloader(server)
+
+        async def run():
+            return await asyncio.gather(*[downloader.get_bytes("https://a.test/x.png") for _ in range(5)])
+
+        assert asyncio.run(run()) == [PNG] * 5
+        assert len(server.requests) == 1
+        assert downloader.stats()["coalesced"] == 4
+
+    def test_uncached_fetch_does_not_join_cached_one(self, tmp_path):
+        server = _Server(delay=0.05)
+        downloader = _downloader(server, tmp_path)
+
+        async def run():
+            return await asyncio.gather(
+                downloader.fetch("https://a.test/x.png"),
+                downloader.fetch("https://a.test/x.png", use_cache=False),
+            )
+
+        assert [r.content for r in asyncio.run(run())] == [PNG, PNG]
+        assert len(server.requests) == 2
+        assert downloader.stats()["coalesced"] == 0
+
+    def test_per_host_concurrency_limit(self, monkeypatch):
+        monkeypatch.setenv("DOWNLOAD_PER_HOST_LIMIT", "2")
+        server = _Server(delay=0.02)
+        downloader = _downloader(server)
+
+        async def run():
+            urls = [f"https://a.test/{i}.png" for i in range(6)] + [f"https://b.test/{i}.png" for i in range(2)]
+            await asyncio.gather(*[downloader.get_bytes(u) for u in urls])
+
+        asyncio.run(run())
+        assert server.max_active == {"a.test": 2, "b.test": 2}
+
+    def test_errors_propagate_and_are_not_cached(self, tmp_path):
+        server = _Server()
+        downloader = _downloader(server, tmp_path)
+
+        async def run():
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await downloader.get_bytes("https://a.test/missing.png")
+
+        asyncio.run(run())
+        assert len(server.requests) == 2
+
+    def test_client_per_event_loop(self):
+        downloader = _downloader(_Server())
+        for _ in range(2):
+            assert asyncio.run(downloader.get_bytes("https://a.test/x.png", use_cache=False)) == PNG
+
+
+class TestDownloadCache:
+
+    def test_hits_and_content_addressing(self, tmp_path):
+        server = _Server()
+        downloader = _downloader(server, tmp_path)
+
+        async def run():
+            first = await downloader.fetch("https://a.test/x.png")
+            second = await downloader.fetch("https://a.test/x.png")
+            await downloader.fetch("https://mirror.test/x.png")
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert not first.from_cache and second.from_cache and second.content == PNG
+        assert second.content_type == "image/png"
+        assert len(server.requests) == 2
+        assert len(os.listdir(tmp_path / "blobs")) == 1  # same bytes stored once
+
+    def test_stale_entries_revalidate(self, tmp_path):
+        server = _Server()
+        downloader = _downloader(server, tmp_path)
+
+        async def run():
+            await downloader.fetch("https://a.test/stale.png")
+            return await downloader.fetch("https://a.test/stale.png")
+
+        result = asyncio.run(run())
+        assert result.from_cache and result.status_code == 304 and result.content == PNG
+        assert server.requests[1].headers["if-none-match"] == '"v1"'
+        assert downloader.stats()["revalidated"] == 1
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        server = _Server()
+        server.bodies = {f"/{i}.png": bytes([i]) * 1000 for i in range(3)}
+        downloader = _downloader(server, tmp_path, max_bytes=2500)
+
+        async def run():
+            await downloader.fetch("https://a.test/0.png")
+            await downloader.fetch("https://a.test/1.png")
+            blobs = sorted((tmp_path / "blobs").iterdir())
+            old = time.time() - 100
+            for path in blobs:
+                os.utime(path, (old, old))
+            await downloader.fetch("https://a.test/0.png")  # hit refreshes recency
+            await downloader.fetch("https://a.test/2.png")  # over budget: evicts 1.png
+            await downloader.fetch("https://a.test/1.png")
+
+        asyncio.run(run())
+        assert [r.url.path for r in server.requests] == ["/0.png", "/1.png", "/2.png", "/1.png"]
+        assert downloader.cache.size_bytes() <= 2500
+        # Records of evicted blobs go with them
+        assert len(os.listdir(tmp_path / "urls")) == len(os.listdir(tmp_path / "blobs")) == 2
+
+    def test_no_store_responses_are_not_cached(self, tmp_path):
+        server = _Server()
+        downloader = _downloader(server, tmp_path)
+
+        async def run():
+            for _ in range(2):
+                assert (await downloader.fetch("https://a.test/private.png")).content == PNG
+
+        asyncio.run(run())
+        assert len(server.requests) == 2
+        assert os.listdir(tmp_path / "blobs") == os.listdir(tmp_path / "urls") == []
+
+
+class TestCallers:
+
+    def test_asset_dispatcher_uses_shared_downloader(self, monkeypatch, tmp_path):
+        from app.v4.agents.asset_dispatcher import _download_image
+
+        server = _Server()
+        server.bodies = {"/page.png": b"<html>nope</html>"}
+
+        async def handler(request):
+            response = await server(request)
+            if request.url.path == "/page.png":
+                return httpx.Response(200, content=response.content, headers={"content-type": "text/html"})
+            return response
+
+        monkeypatch.setattr(http_downloader, "_downloader",
+                            HttpDownloader(cache=DownloadCache(tmp_path), transport=httpx.MockTransport(handler)))
+        assert asyncio.run(_download_image("https://a.test/x.png")) == PNG
+        assert asyncio.run(_download_image("https://a.test/page.png")) is None
+        assert asyncio.run(_download_image("https://a.test/missing.png")) is None
@@ -0,0 +1,116 @@
+"""
+Tests for vectorised image operations (app/utils/image_ops.py) and the
+callers routed through them
+
+Run with: PYTHONPATH=. pytest tests/test_image_ops.py -v
+"""
+
+import asyncio
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.line_detection_service import HoughLineDetector
+from app.utils import image_ops
+
+
+def _png(array: np.ndarray) -> bytes:
+    buf = BytesIO()
+    Image.fromarray(array).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestBackgroundKeying:
+
+    def test_only_near_white_pixels_become_transparent(self):
+        rgb = np.array([[[255, 255, 255], [241, 250, 245], [240, 255, 255], [10, 20, 30]]], dtype=np.uint8)
+        result = image_ops.decode_image(image_ops.remove_background(_png(rgb)), "RGBA")
+        assert result[0, :, 3].tolist() == [0, 0, 255, 255]
+        # Colour is preserved, only alpha changes
+        assert np.array_equal(result[..., :3], rgb)
+
+    def test_existing_alpha_is_kept_for_foreground(self):
+        rgba = np.array([[[0, 0, 0, 128], [250, 250, 250, 128]]], dtype=np.uint8)
+        assert image_ops.key_background(rgba)[0, :, 3].tolist() == [128, 0]
+        assert rgba[0, 1, 3] == 128  # input untouched
+
+
+class TestMasks:
+
+    def test_boxes_match_cv2_rectangle(self):
+        regions = [{"bbox": {"x": 5, "y": 4, "width": 10, "height": 6}},
+                   {"bbox": {"x": 40, "y": 25, "width": 30, "height": 20}}]
+        expected = np.zeros((50, 60), dtype=np.uint8)
+        for r in regions:
+            b = r["bbox"]
+            cv2.rectangle(expected, (max(0, b["x"] - 3), max(0, b["y"] - 3)),
+                          (min(60, b["x"] + b["width"] + 3), min(50, b["y"] + b["height"] + 3)), 255, -1)
+        assert np.array_equal(image_ops.boxes_to_mask((50, 60), regions, padding=3), expected)
+
+    def test_per_box_padding_matches_image_draw(self):
+        boxes = [(10, 10, 5, 5), (30, 30, 10, 4)]
+        pads = [2, 6]
+        expected = Image.new("L", (64, 48), 0)
+        draw = ImageDraw.Draw(expected)
+        for (x, y, w, h), p in zip(boxes, pads):
+            draw.rectangle([max(0, x - p), max(0, y - p), min(64, x + w + p), min(48, y + h + p)], fill=255)
+        assert np.array_equal(image_ops.boxes_to_mask((48, 64), boxes, padding=pads), np.asarray(expected))
+
+    def test_lines_match_cv2_line(self):
+        lines = [np.array([[2, 3, 40, 30]]), np.array([[50, 5, 10, 45]])]
+        expected = np.zeros((50, 60), dtype=np.uint8)
+        for line in lines:
+            x1, y1, x2, y2 = line[0]
+            cv2.line(expected, (int(x1), int(y1)), (int(x2), int(y2)), 255, 4)
+        assert np.array_equal(image_ops.lines_to_mask((50, 60), lines, thickness=4), expected)
+        assert not image_ops.lines_to_mask((50, 60), None).any()
+
+    def test_combine_and_dilate(self):
+        a = np.zeros((9, 9), dtype=np.uint8)
+        b = np.zeros((9, 9), dtype=np.uint8)
+        a[4, 4], b[0, 0] = 255, 255
+        combined = image_ops.combine_masks(a, b)
+        assert combined[4, 4] == combined[0, 0] == 255
+        assert image_ops.dilate_mask(a, 3)[3:6, 4].tolist() == [255, 255, 255]
+
+
+class TestGeometry:
+
+    def test_point_distances(self):
+        boxes = np.array([[10, 10, 10, 10]])
+        points = np.array([[15, 15], [25, 10], [0, 0]])
+        assert np.allclose(image_ops.points_to_boxes_distance(points, boxes)[:, 0], [0, 5, np.hypot(10, 10)])
+
+    def test_angles_fold_into_0_90(self):
+        segments = np.array([[0, 0, 10, 0], [0, 0, 0, 10], [10, 0, 0, 10], [0, 0, -10, 1]])
+        assert np.allclose(image_ops.segment_angles(segments), [0, 90, 45, np.degrees(np.arctan2(1, 10))])
+
+    def test_hough_filters_keep_original_line_objects(self):
+        detector = HoughLineDetector()
+        lines = np.array([[[0, 0, 30, 0]], [[100, 100, 130, 160]], [[55, 50, 55, 80]]], dtype=np.int32)
+        boxes = [{"bbox": {"x": 40, "y": 40, "width": 10, "height": 10}}, {"x": 0, "y": 5, "width": 5, "height": 5}]
+        near = detector.filter_lines_near_text(lines, boxes, max_distance=10)
+        assert [l.tolist() for l in near] == [[[0, 0, 30, 0]], [[55, 50, 55, 80]]]
+        assert [l.tolist() for l in detector.filter_by_angle(list(lines), [(80, 90)])] == [[[55, 50, 55, 80]]]
+        assert [l.tolist() for l in detector.filter_by_length(list(lines), (200, 200), 0.1, 0.2)] == [[[0, 0, 30, 0]], [[55, 50, 55, 80]]]
+
+
+class TestInpaintingMask:
+
+    def test_text_mask_file(self, tmp_path):
+        from app.services.inpainting_service import InpaintingService
+
+        image_path = tmp_path / "diagram.png"
+        Image.new("RGB", (200, 100), "white").save(image_path)
+        regions = [{"bbox": {"x": 20, "y": 20, "width": 30, "height": 20}}]
+
+        mask_path = asyncio.run(InpaintingService().create_text_mask(
+            str(image_path), regions, dilation=10, include_lines=False
+        ))
+        mask = np.asarray(Image.open(mask_path))
+        assert mask.shape == (100, 200)
+        # height 20 -> full dilation of 10px on every side, inclusive corners
+        assert mask[10, 10] == 255 and mask[50, 60] == 255
+        assert mask[9, 10] == 0 and mask[51, 61] == 0
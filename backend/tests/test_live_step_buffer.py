@@ -0,0 +1,82 @@
+"""
+Tests for the per-run live step ring buffer (app/services/live_step_buffer.py)
+
+Run with: PYTHONPATH=. pytest tests/test_live_step_buffer.py -v
+"""
+
+import time
+
+from app.services.live_step_buffer import LiveStepBuffer
+
+
+def _step(content: str) -> dict:
+    return {"stage_name": "router", "step": {"type": "thought", "content": content, "tool": None}}
+
+
+class TestLiveStepBuffer:
+
+    def test_sequence_numbers_are_monotonic_per_run(self):
+        buffer = LiveStepBuffer(capacity=10)
+        assert [buffer.append("r1", _step(str(i))) for i in range(3)] == [0, 1, 2]
+        assert buffer.append("r2", _step("x")) == 0
+        assert buffer.next_seq("r1") == 3
+
+    def test_cursor_reads_return_only_new_events(self):
+        buffer = LiveStepBuffer(capacity=10)
+        for i in range(5):
+            buffer.append("r1", _step(str(i)))
+
+        events = buffer.read("r1", cursor=3)
+        assert [e["seq"] for e in events] == [3, 4]
+        assert buffer.read("r1", cursor=5) == []
+        assert buffer.read("missing") == []
+
+    def test_capacity_evicts_oldest_and_keeps_seq(self):
+        buffer = LiveStepBuffer(capacity=3)
+        for i in range(7):
+            buffer.append("r1", _step(str(i)))
+
+        events = buffer.read("r1", cursor=0)
+        assert [e["seq"] for e in events] == [4, 5, 6]
+        assert [e["step"]["content"] for e in events] == ["4", "5", "6"]
+        stats = buffer.stats()
+        assert stats["events"] == 3
+        assert stats["evicted_events"] == 4
+
+    def test_memory_estimate_tracks_evictions(self):
+        buffer = LiveStepBuffer(capacity=2)
+        buffer.append("r1", _step("a" * 1000))
+        big = buffer.stats()["approx_bytes"]
+        buffer.append("r1", _step("b"))
+        buffer.append("r1", _step("c"))
+        assert buffer.stats()["approx_bytes"] < big
+
+        buffer.clear("r1")
+        assert buffer.stats()["approx_bytes"] == 0
+
+    def test_sweep_drops_idle_runs(self):
+        buffer = LiveStepBuffer(capacity=10, idle_ttl_seconds=60)
+        buffer.append("idle", _step("a"))
+        buffer.append("busy", _step("b"))
+
+        removed = buffer.sweep(now=time.monotonic() + 120)
+        assert removed == 2
+        assert buffer.stats()["runs"] == 0
+        assert buffer.stats()["expired_runs"] == 2
+
+        buffer.append("busy", _step("c"))
+        assert buffer.sweep() == 0
+
+    def test_janitor_start_stop(self):
+        buffer = LiveStepBuffer(capacity=10, idle_ttl_seconds=0)
+        buffer.append("r1", _step("a"))
+        buffer.start_janitor(interval_seconds=0.01)
+        try:
+            deadline = time.monotonic() + 2
+            while buffer.stats()["runs"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert buffer.stats()["runs"] == 0
+            assert buffer.stats()["janitor_running"]
+        finally:
+            buffer.stop_janitor()
+        assert not buffer.stats()["janitor_running"]
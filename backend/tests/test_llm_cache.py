@@ -0,0 +1,127 @@
+"""
+Tests for the LLM response cache (app/services/llm_cache.py)
+
+Run with: PYTHONPATH=. pytest tests/test_llm_cache.py -v
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import llm_cache as llm_cache_module
+from app.services.llm_cache import (
+    LLMResponseCache,
+    begin_stage_cache_stats,
+    get_stage_cache_stats,
+    end_stage_cache_stats,
+)
+from app.services.llm_service import LLMService, LLMResponse
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(path=tmp_path / "llm.db", ttl_seconds=60, max_bytes=1024 * 1024)
+
+
+class TestResponseCache:
+
+    def test_key_covers_all_request_fields(self):
+        base = ("google", "gemini-2.5-flash", "sys", "prompt", 0.2, 4096)
+        key = LLMResponseCache.make_key(*base)
+        assert key == LLMResponseCache.make_key(*base)
+        for i, changed in enumerate(["openai", "gemini-2.5-pro", "sys2", "prompt2", 0.3, 2048]):
+            variant = list(base)
+            variant[i] = changed
+            assert LLMResponseCache.make_key(*variant) != key
+
+    def test_put_get_roundtrip(self, cache):
+        cache.put("k", {"content": "hello", "input_tokens": 10, "output_tokens": 5})
+        assert cache.get("k")["content"] == "hello"
+        assert cache.get("missing") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["tokens_saved"] == 15
+        assert stats["entries"] == 1
+
+    def test_ttl_expiry(self, cache):
+        cache.ttl_seconds = 0
+        cache.put("k", {"content": "stale"})
+        time.sleep(0.01)
+        assert cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction_keeps_recently_used(self, tmp_path):
+        cache = LLMResponseCache(path=tmp_path / "lru.db", max_bytes=1500)
+        cache.put("a", {"content": "a" * 600})
+        cache.put("b", {"content": "b" * 600})
+        time.sleep(0.01)
+        cache.get("a")  # "a" is now more recent than "b"
+        cache.put("c", {"content": "c" * 600})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["size_bytes"] <= 1500
+
+    def test_stage_stats_scope(self, cache):
+        token = begin_stage_cache_stats()
+        try:
+            cache.put("k", {"content": "x", "input_tokens": 3, "output_tokens": 4})
+            cache.get("k")
+            cache.get("other")
+            stats = get_stage_cache_stats()
+            assert (stats.hits, stats.misses, stats.tokens_saved) == (1, 1, 7)
+        finally:
+            end_stage_cache_stats(token)
+        assert get_stage_cache_stats() is None
+
+
+class TestLLMServiceCaching:
+
+    @pytest.fixture
+    def service(self, cache, monkeypatch):
+        monkeypatch.setattr(llm_cache_module, "_llm_cache", cache)
+        monkeypatch.setattr(llm_cache_module, "_llm_cache_initialized", True)
+        service = LLMService()
+        calls = []
+
+        async def fake_generate(prompt, *args):
+            calls.append(prompt)
+            return LLMResponse(content=f"answer:{prompt}", model="m", input_tokens=7, output_tokens=3)
+
+        monkeypatch.setattr(service, "_generate_uncached", fake_generate)
+        service.calls = calls
+        return service
+
+    def test_identical_requests_hit_cache(self, service):
+        async def run():
+            first = await service.generate("q", model="m", temperature=0.1)
+            second = await service.generate("q", model="m", temperature=0.1)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert service.calls == ["q"]
+        assert not first.cached
+        assert second.cached and second.content == "answer:q"
+        assert second.input_tokens == 0 and second.output_tokens == 0
+
+    def test_use_cache_false_bypasses(self, service):
+        async def run():
+            await service.generate("q", model="m")
+            await service.generate("q", model="m", use_cache=False)
+
+        asyncio.run(run())
+        assert service.calls == ["q", "q"]
+
+    def test_invalidate_after_bad_response(self, service):
+        async def run():
+            response = await service.generate("q", model="m")
+            await service._invalidate_cached_response(response)
+            return await service.generate("q", model="m")
+
+        again = asyncio.run(run())
+        assert not again.cached
+        assert service.calls == ["q", "q"]
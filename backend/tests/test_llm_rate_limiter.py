@@ -0,0 +1,245 @@
+"""
+Tests for the shared LLM rate limiter (app/services/llm_rate_limiter.py) and
+its use in LLMService provider calls
+
+Run with: PYTHONPATH=. pytest tests/test_llm_rate_limiter.py -v
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.config.agent_models import AgentModelConfig
+from app.config.run_context import run_context
+from app.services import llm_rate_limiter
+from app.services.llm_rate_limiter import (
+    PRIORITY_CRITICAL,
+    PRIORITY_NORMAL,
+    LLMRateLimiter,
+    RateLimits,
+    TokenBucket,
+    estimate_tokens,
+    is_rate_limit_error,
+    request_priority,
+    retry_hint_seconds,
+)
+from app.services.llm_service import LLMService, RetryConfig
+
+
+class ThrottleError(Exception):
+    """Shape of an SDK 429: status code plus an httpx-like response with headers."""
+
+    def __init__(self, message="Rate limit exceeded", headers=None):
+        super().__init__(message)
+        self.status_code = 429
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class TestRetryHints:
+
+    def test_headers(self):
+        assert retry_hint_seconds(ThrottleError(headers={"retry-after": "7"})) == 7.0
+        assert retry_hint_seconds(ThrottleError(headers={"retry-after-ms": "250"})) == 0.25
+
+    def test_error_bodies(self):
+        gemini = Exception("429 RESOURCE_EXHAUSTED. {'details': [{'retryDelay': '17s'}]}")
+        assert retry_hint_seconds(gemini) == 17.0
+        assert retry_hint_seconds(Exception("Please try again in 1m2.5s.")) == 62.5
+        assert retry_hint_seconds(Exception("Please try again in 350ms")) == 0.35
+        assert retry_hint_seconds(Exception("invalid api key")) is None
+
+    def test_throttle_detection(self):
+        assert is_rate_limit_error(ThrottleError())
+        assert is_rate_limit_error(Exception("429 RESOURCE_EXHAUSTED"))
+        assert not is_rate_limit_error(ValueError("bad request"))
+
+
+class TestTokenBucket:
+
+    def test_refill_and_oversized_requests(self):
+        bucket = TokenBucket(60, now=0.0)
+        bucket.take(60, now=0.0)
+        assert bucket.wait_time(1, now=0.0) == pytest.approx(1.0)
+        assert bucket.wait_time(1, now=1.0) == 0.0
+        # A request bigger than the bucket waits for a full bucket, not forever
+        assert bucket.wait_time(500, now=1.0) == pytest.approx(59.0)
+
+
+class TestLLMRateLimiter:
+
+    def test_requests_per_minute(self):
+        limiter = LLMRateLimiter({"groq": RateLimits(rpm=120)})
+
+        async def run():
+            for _ in range(120):
+                async with limiter.slot("groq", "m", 0):
+                    pass
+            started = time.monotonic()
+            async with limiter.slot("groq", "m", 0) as slot:
+                return time.monotonic() - started, slot.waited_ms
+
+        elapsed, waited_ms = asyncio.run(run())
+        assert 0.4 < elapsed < 2.0 and waited_ms > 400
+
+    def test_token_reservation_is_refunded(self):
+        limiter = LLMRateLimiter({"openai": RateLimits(tpm=1000)})
+
+        async def run():
+            async with limiter.slot("openai", None, 800) as slot:
+                assert limiter.stats()["limiters"]["openai"]["tokens_available"] == 200
+                slot.settle(100)
+            return limiter.stats()["limiters"]["openai"]["tokens_available"]
+
+        assert asyncio.run(run()) == 900
+
+    def test_output_estimate_is_capped_and_overrun_charged(self):
+        assert estimate_tokens("x" * 4000, max_tokens=100) == 1100
+        assert estimate_tokens("x" * 4000, max_tokens=32_000) == 1000 + llm_rate_limiter.OUTPUT_TOKEN_ESTIMATE_CAP
+        limiter = LLMRateLimiter({"anthropic": RateLimits(tpm=40_000)})
+
+        async def run():
+            async with limiter.slot("anthropic", None, estimate_tokens("x" * 4000, max_tokens=32_000)) as slot:
+                slot.settle(5000)
+            return limiter.stats()["limiters"]["anthropic"]["tokens_available"]
+
+        assert asyncio.run(run()) == 35_000
+
+    def test_critical_path_goes_first(self):
+        limiter = LLMRateLimiter({"google": RateLimits(concurrency=1)})
+        order = []
+
+        async def call(name, priority):
+            async with limiter.slot("google", "flash", 0, priority=priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        async def run():
+            async with limiter.slot("google", "flash", 0):
+                tasks = [asyncio.create_task(call(f"worker{i}", PRIORITY_NORMAL)) for i in range(3)]
+                await asyncio.sleep(0.01)
+                with request_priority(PRIORITY_CRITICAL):
+                    tasks.append(asyncio.create_task(call("designer", None)))
+                await asyncio.sleep(0.01)
+                assert limiter.stats()["queue_depth"]["google"] == 4
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        assert order == ["designer", "worker0", "worker1", "worker2"]
+
+    def test_other_models_overtake_a_paused_one(self):
+        limiter = LLMRateLimiter({})
+        order = []
+
+        async def call(model, priority):
+            async with limiter.slot("google", model, 0, priority=priority):
+                order.append(model)
+
+        async def run():
+            limiter.pause("google", "pro", 0.3)
+            await asyncio.gather(call("pro", PRIORITY_CRITICAL), call("flash", PRIORITY_NORMAL))
+
+        asyncio.run(run())
+        assert order == ["flash", "pro"]
+
+    def test_retry_hint_pauses_the_model(self):
+        limiter = LLMRateLimiter({})
+
+        async def run():
+            with pytest.raises(ThrottleError):
+                async with limiter.slot("anthropic", "sonnet", 0):
+                    raise ThrottleError(headers={"retry-after": "0.3"})
+            assert 0 < limiter.paused_for("anthropic", "sonnet") <= 0.3
+            assert limiter.paused_for("anthropic", "haiku") == 0
+            async with limiter.slot("anthropic", "sonnet", 0) as slot:
+                return slot.waited_ms
+
+        assert asyncio.run(run()) >= 250
+
+    def test_per_run_queue_and_throttle_stats(self):
+        limiter = LLMRateLimiter({"local": RateLimits(concurrency=1)})
+
+        async def call():
+            async with limiter.slot("local", "llama", 0):
+                await asyncio.sleep(0.02)
+
+        async def run():
+            with run_context(run_id="run-1"):
+                await asyncio.gather(*(call() for _ in range(3)))
+
+        asyncio.run(run())
+        stats = limiter.run_stats("run-1")
+        assert stats["requests"] == 3 and stats["throttled_requests"] == 2
+        assert stats["max_queue_depth"] == 2 and stats["queued"] == stats["in_flight"] == 0
+        assert stats["throttle_ms"] >= 40
+        assert limiter.run_stats("other") is None
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        limiter = LLMRateLimiter({"groq": RateLimits(concurrency=1)})
+
+        async def run():
+            async with limiter.slot("groq", "m", 0):
+                waiter = asyncio.create_task(limiter.slot("groq", "m", 0).__aenter__())
+                await asyncio.sleep(0.01)
+                waiter.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await waiter
+            async with limiter.slot("groq", "m", 0):
+                return limiter.stats()["queue_depth"]["groq"]
+
+        assert asyncio.run(run()) == 0
+
+
+class TestLLMServiceIntegration:
+
+    @pytest.fixture
+    def limiter(self, monkeypatch):
+        limiter = LLMRateLimiter({"groq": RateLimits(rpm=100, tpm=100_000)})
+        monkeypatch.setattr(llm_rate_limiter, "_rate_limiter", limiter)
+        return limiter
+
+    def _service(self, responses):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            result = responses.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        service = LLMService(retry_config=RetryConfig(initial_delay=5.0))
+        service.groq_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        return service, calls
+
+    def test_retry_waits_for_server_hint_not_backoff(self, limiter):
+        ok = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="hi"))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+        )
+        service, calls = self._service([ThrottleError(headers={"retry-after": "0.2"}), ok])
+
+        started = time.monotonic()
+        response = asyncio.run(service._call_groq("hello", None, "m", 0.2, 100))
+        elapsed = time.monotonic() - started
+
+        assert response.content == "hi" and len(calls) == 2
+        assert 0.15 < elapsed < 2.0
+        groq = limiter.stats()["limiters"]["groq/m"]
+        assert groq["retry_pauses"] == 1 and groq["granted"] == 2 and groq["in_flight"] == 0
+
+    def test_throttle_without_hint_pauses_for_backoff_delay(self, limiter):
+        service, _ = self._service([ThrottleError(), ThrottleError()])
+        service.retry_config = RetryConfig(max_retries=2, initial_delay=0.1)
+
+        with pytest.raises(ThrottleError):
+            asyncio.run(service._call_groq("hello", None, "m", 0.2, 100))
+        assert limiter.stats()["limiters"]["groq/m"]["retry_pauses"] == 1
+
+    def test_agent_priority_config(self):
+        config = AgentModelConfig(agent_priorities={"scene_designer": 2})
+        assert config.get_priority("game_concept_designer") == PRIORITY_CRITICAL
+        assert config.get_priority("content_generator") == PRIORITY_NORMAL
+        assert config.get_priority("scene_designer") == 2
+        assert AgentModelConfig.from_dict(config.to_dict()).agent_priorities == {"scene_designer": 2}
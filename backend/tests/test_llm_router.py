@@ -0,0 +1,264 @@
+"""
+Tests for latency-aware LLM routing (app/services/llm_router.py) and model
+equivalence classes (app/config/models.py)
+
+Run with: PYTHONPATH=. pytest tests/test_llm_router.py -v
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.config.models import get_equivalent_models, resolve_model_key
+from app.services import llm_router
+from app.services.llm_rate_limiter import PRIORITY_CRITICAL, PRIORITY_NORMAL, request_priority
+from app.services.llm_router import CircuitBreaker, LLMRouter
+from app.services.llm_service import LLMResponse, LLMService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _error_with(**attrs):
+    error = Exception("provider error")
+    for name, value in attrs.items():
+        setattr(error, name, value)
+    return error
+
+
+def _warm(router, model_key, latency, max_tokens=100, count=10):
+    for _ in range(count):
+        router.record(model_key, max_tokens, latency, ok=True)
+
+
+class BadRequestError(Exception):
+    """Shaped like an SDK 400 error."""
+    status_code = 400
+
+
+def _fake_call(delays, calls, failures=(), bad_requests=()):
+    """Coroutine factory: sleeps delays[model] then answers (or raises for failures / bad_requests)."""
+    cancelled = []
+
+    async def call(model_key):
+        calls.append(model_key)
+        try:
+            await asyncio.sleep(delays.get(model_key, 0))
+        except asyncio.CancelledError:
+            cancelled.append(model_key)
+            raise
+        if model_key in failures:
+            raise ConnectionError(f"{model_key} down")
+        if model_key in bad_requests:
+            raise BadRequestError(f"{model_key} rejected the request")
+        return model_key
+
+    call.cancelled = cancelled
+    return call
+
+
+class TestEquivalenceClasses:
+
+    def test_members_and_aliases(self):
+        assert get_equivalent_models("gemini-2.5-pro") == ["gemini-3-pro", "claude-sonnet", "gpt-4o"]
+        # Alias of claude-sonnet shares its class, without listing itself
+        assert "claude-sonnet" not in get_equivalent_models("claude-3-5-sonnet-20241022")
+        assert get_equivalent_models("local-llama") == []
+        assert resolve_model_key("gpt-4-turbo-preview") == "gpt-4-turbo"
+        assert resolve_model_key("not-a-model") is None
+
+
+class TestCircuitBreaker:
+
+    def test_trips_on_consecutive_failures_and_recovers_via_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, cooldown=10, clock=clock)
+        for _ in range(3):
+            breaker.record(False)
+        assert breaker.state == "open" and not breaker.available()
+
+        clock.now = 10
+        assert breaker.admit() and breaker.state == "half_open"
+        assert not breaker.admit()  # one probe at a time
+        breaker.record(True)
+        assert breaker.state == "closed" and breaker.trips == 1
+
+    def test_trips_on_error_rate(self):
+        breaker = CircuitBreaker(failure_threshold=100, error_rate=0.5, min_volume=10)
+        for ok in [True, False] * 4 + [True]:
+            breaker.record(ok)
+        assert breaker.state == "closed"
+        breaker.record(False)
+        assert breaker.state == "open"
+
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=5, clock=clock)
+        breaker.record(False)
+        clock.now = 5
+        breaker.admit()
+        breaker.record(False)
+        assert breaker.state == "open" and not breaker.available()
+
+
+class TestHedging:
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        router = LLMRouter(hedge_min_delay_ms=0)
+        _warm(router, "gemini-2.5-pro", 0.05)
+        calls = []
+        call = _fake_call({"gemini-2.5-pro": 5.0, "gemini-3-pro": 0.01}, calls)
+
+        result = asyncio.run(router.route("gemini-2.5-pro", call, max_tokens=100, priority=PRIORITY_CRITICAL))
+
+        assert result == "gemini-3-pro"
+        assert calls == ["gemini-2.5-pro", "gemini-3-pro"] and call.cancelled == ["gemini-2.5-pro"]
+        stats = router.stats()
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+    def test_fast_primary_is_not_hedged(self):
+        router = LLMRouter(hedge_min_delay_ms=0)
+        _warm(router, "gemini-2.5-pro", 0.2)
+        calls = []
+        result = asyncio.run(router.route(
+            "gemini-2.5-pro", _fake_call({"gemini-2.5-pro": 0.01}, calls), max_tokens=100, priority=0
+        ))
+        assert result == "gemini-2.5-pro" and calls == ["gemini-2.5-pro"]
+
+    def test_only_critical_priority_and_warm_stats_are_hedged(self):
+        router = LLMRouter(hedge_min_delay_ms=0)
+        calls = []
+        delays = {"gemini-2.5-flash": 0.1}
+
+        async def run():
+            # No latency samples yet: nothing to base a hedge delay on
+            with request_priority(PRIORITY_CRITICAL):
+                await router.route("gemini-2.5-flash", _fake_call(delays, calls), max_tokens=7)
+            _warm(router, "gemini-2.5-flash", 0.01, max_tokens=7)
+            with request_priority(PRIORITY_NORMAL):
+                await router.route("gemini-2.5-flash", _fake_call(delays, calls), max_tokens=7)
+
+        asyncio.run(run())
+        assert calls == ["gemini-2.5-flash", "gemini-2.5-flash"]
+        assert router.stats()["hedges"] == 0
+
+    def test_hedge_uses_fastest_available_equivalent(self):
+        router = LLMRouter(hedge_min_delay_ms=0)
+        _warm(router, "gemini-2.5-pro", 0.01)
+        _warm(router, "claude-sonnet", 0.5)
+        _warm(router, "gpt-4o", 0.02)
+        calls = []
+        call = _fake_call({"gemini-2.5-pro": 1.0}, calls)
+
+        result = asyncio.run(router.route(
+            "gemini-2.5-pro", call, is_available=lambda key: key != "gemini-3-pro",
+            max_tokens=100, priority=0
+        ))
+        assert result == "gpt-4o"
+
+
+class TestFailover:
+
+    def test_error_fails_over_to_equivalent(self):
+        router = LLMRouter()
+        calls = []
+        result = asyncio.run(router.route(
+            "gpt-4o-mini", _fake_call({}, calls, failures={"gpt-4o-mini"}), max_tokens=1
+        ))
+        assert result == "gemini-2.5-flash"
+        assert calls == ["gpt-4o-mini", "gemini-2.5-flash"] and router.stats()["failovers"] == 1
+
+    def test_open_provider_is_routed_around(self):
+        router = LLMRouter()
+        for _ in range(5):
+            router.record("claude-sonnet", 1, 0.1, ok=False)
+        assert router.stats()["breakers"]["anthropic"]["state"] == "open"
+
+        calls = []
+        result = asyncio.run(router.route("claude-sonnet", _fake_call({}, calls), max_tokens=1))
+        assert result == "gemini-2.5-pro" and calls == ["gemini-2.5-pro"]
+        assert router.stats()["breaker_reroutes"] == 1
+
+    def test_no_equivalent_raises_original_error(self):
+        router = LLMRouter()
+        with pytest.raises(ConnectionError, match="local-llama down"):
+            asyncio.run(router.route("local-llama", _fake_call({}, [], failures={"local-llama"})))
+
+    def test_client_error_is_raised_without_failover_or_breaker(self):
+        router = LLMRouter()
+        calls = []
+        for _ in range(6):
+            with pytest.raises(BadRequestError):
+                asyncio.run(router.route(
+                    "gpt-4o-mini", _fake_call({}, calls, bad_requests={"gpt-4o-mini"}), max_tokens=1
+                ))
+        assert set(calls) == {"gpt-4o-mini"}
+        stats = router.stats()
+        assert stats["failovers"] == 0 and stats["client_errors"] == 6
+        assert stats["breakers"]["openai"]["state"] == "closed"
+        assert stats["breakers"]["openai"]["consecutive_failures"] == 0
+
+    def test_client_error_in_hedge_is_raised_at_once(self):
+        router = LLMRouter(hedge_min_delay_ms=0)
+        _warm(router, "gemini-2.5-pro", 0.05)
+        calls = []
+        call = _fake_call({"gemini-2.5-pro": 0.2, "gemini-3-pro": 5.0}, calls, bad_requests={"gemini-2.5-pro"})
+        with pytest.raises(BadRequestError):
+            asyncio.run(router.route("gemini-2.5-pro", call, max_tokens=100, priority=PRIORITY_CRITICAL))
+        assert call.cancelled == ["gemini-3-pro"]
+
+    def test_error_classification(self):
+        assert llm_router.is_provider_error(asyncio.TimeoutError())
+        assert llm_router.is_provider_error(RuntimeError("503 UNAVAILABLE. The model is overloaded."))
+        assert llm_router.is_provider_error(_error_with(status_code=429))
+        assert llm_router.is_provider_error(_error_with(status_code=502))
+        assert not llm_router.is_provider_error(BadRequestError("context length exceeded"))
+        assert not llm_router.is_provider_error(ValueError("invalid JSON schema"))
+
+
+class TestLLMServiceRouting:
+
+    def test_generate_routes_registry_models_across_providers(self, monkeypatch):
+        router = LLMRouter()
+        monkeypatch.setattr(llm_router, "_router", router)
+        service = LLMService()
+        service.gemini_client = object()
+        service.openai_client = object()
+        service.anthropic_client = service.groq_client = service.ollama_client = None
+        calls = []
+
+        async def failing_gemini(prompt, system_prompt, model, temperature, max_tokens):
+            calls.append(model)
+            raise RuntimeError("503 overloaded")
+
+        async def openai(prompt, system_prompt, model, temperature, max_tokens):
+            calls.append(model)
+            return LLMResponse(content="ok", model=model)
+
+        monkeypatch.setattr(service, "_call_gemini", failing_gemini)
+        monkeypatch.setattr(service, "_call_openai", openai)
+
+        response = asyncio.run(service.generate("q", model="gemini-2.5-flash", use_gemini=True, use_cache=False))
+        # Failover skips gemini-3-flash (same failing provider); claude-haiku has no client
+        assert calls == ["gemini-2.5-flash", "gpt-4o-mini"]
+        assert response.content == "ok" and response.model == "gpt-4o-mini"
+
+    def test_non_registry_model_uses_provider_flags(self, monkeypatch):
+        service = LLMService()
+        service.groq_client = SimpleNamespace()
+        calls = []
+
+        async def groq(prompt, system_prompt, model, temperature, max_tokens):
+            calls.append(model)
+            return LLMResponse(content="ok", model=model)
+
+        monkeypatch.setattr(service, "_call_groq", groq)
+        service.ollama_client = None
+        asyncio.run(service.generate("q", model="custom-model", use_groq=True, use_cache=False))
+        assert calls == ["custom-model"]
@@ -0,0 +1,194 @@
+"""
+Tests for the shared OCR engine (app/services/ocr_engine.py)
+
+EasyOCR is replaced by a fake reader factory, so these run without easyocr.
+
+Run with: PYTHONPATH=. pytest tests/test_ocr_engine.py -v
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.services import ocr_engine
+from app.services.ocr_engine import (
+    OCREngine,
+    OCRError,
+    begin_stage_ocr_stats,
+    end_stage_ocr_stats,
+)
+
+
+class FakeReader:
+    """Two detections per image: a confident one naming the image size, and a faint one."""
+    created = 0
+    calls = []
+
+    def __init__(self, languages, gpu):
+        FakeReader.created += 1
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def readtext(self, image, detail=1, **options):
+        FakeReader.calls.append(options)
+        self.gate.wait(5)
+        size = len(image) if isinstance(image, bytes) else image.size
+        box = [[0, 0], [10, 0], [10, 5], [0, 5]]
+        return [(np.array(box), f"size {size}", np.float64(0.9)), (box, "faint", 0.2)]
+
+
+def fake_reader(languages, gpu):
+    return FakeReader(languages, gpu)
+
+
+def broken_reader(languages, gpu):
+    raise OCRError("EasyOCR not installed. Run: pip install easyocr")
+
+
+@pytest.fixture
+def engine():
+    FakeReader.created = 0
+    FakeReader.calls = []
+    engine = OCREngine(use_processes=False, reader_factory=fake_reader)
+    yield engine
+    engine.shutdown()
+
+
+@pytest.fixture
+def image_file(tmp_path):
+    path = tmp_path / "diagram.png"
+    path.write_bytes(b"\x89PNG" + b"\x00" * 96)
+    return str(path)
+
+
+class TestReadtext:
+
+    def test_one_warm_reader_and_cached_results(self, engine, image_file):
+        async def run():
+            first = await engine.readtext(image_file)
+            strict = await engine.readtext(image_file, min_confidence=0.5)
+            again = await engine.readtext(open(image_file, "rb").read(), min_confidence=0.5)
+            return first, strict, again
+
+        first, strict, again = asyncio.run(run())
+        assert [d[1] for d in first] == ["size 100", "faint"]
+        assert first[0][0] == [[0.0, 0.0], [10.0, 0.0], [10.0, 5.0], [0.0, 5.0]]
+        assert type(first[0][2]) is float
+        assert [d[1] for d in strict] == ["size 100"] and again is strict
+        assert FakeReader.created == 1 and len(FakeReader.calls) == 1
+        assert engine.stats()["cache_hits"] == 2
+
+    def test_options_are_part_of_the_key(self, engine, image_file):
+        async def run():
+            await engine.readtext(image_file)
+            await engine.readtext(image_file, options={"text_threshold": 0.3})
+
+        asyncio.run(run())
+        assert FakeReader.calls == [{}, {"text_threshold": 0.3}]
+
+    def test_batch_keeps_order_and_dedupes(self, engine):
+        tiles = [np.zeros((4, 4), np.uint8), np.zeros((2, 3), np.uint8), np.zeros((4, 4), np.uint8)]
+        results = asyncio.run(engine.readtext_batch(tiles, min_confidence=0.5))
+        assert [r[0][1] for r in results] == ["size 16", "size 6", "size 16"]
+        assert len(FakeReader.calls) == 2
+        assert engine.stats()["coalesced"] == 1
+
+    def test_image_is_read_and_hashed_off_the_event_loop(self, engine, image_file, monkeypatch):
+        prepare = ocr_engine._prepare_image
+        threads = []
+
+        def recording_prepare(image):
+            threads.append(threading.current_thread())
+            return prepare(image)
+
+        monkeypatch.setattr(ocr_engine, "_prepare_image", recording_prepare)
+        asyncio.run(engine.readtext(image_file))
+        assert threads and threading.main_thread() not in threads
+
+    def test_concurrent_callers_share_inflight_ocr(self, engine, image_file):
+        async def run():
+            await engine.readtext(b"warmup")
+            reader = ocr_engine._worker_reader
+            reader.gate.clear()
+            tasks = [asyncio.create_task(engine.readtext(image_file, min_confidence=c)) for c in (0.0, 0.5)]
+            await asyncio.sleep(0.05)
+            reader.gate.set()
+            return await asyncio.gather(*tasks)
+
+        loose, strict = asyncio.run(run())
+        assert len(loose) == 2 and len(strict) == 1
+        assert len(FakeReader.calls) == 2
+
+    def test_reader_errors_propagate_and_are_not_cached(self, image_file):
+        engine = OCREngine(use_processes=False, reader_factory=broken_reader)
+        try:
+            for _ in range(2):
+                with pytest.raises(OCRError, match="pip install easyocr"):
+                    asyncio.run(engine.readtext(image_file))
+            assert len(engine.cache) == 0
+        finally:
+            engine.shutdown()
+
+    def test_gpu_is_opt_in(self, monkeypatch):
+        monkeypatch.delenv("EASYOCR_GPU", raising=False)
+        assert OCREngine(use_processes=False, reader_factory=fake_reader).gpu is False
+        monkeypatch.setenv("EASYOCR_GPU", "true")
+        assert OCREngine(use_processes=False, reader_factory=fake_reader).gpu is True
+
+
+class TestStageMetrics:
+
+    def test_stage_scope_records_latency_hits_and_memory(self, engine, image_file):
+        async def run():
+            token = begin_stage_ocr_stats()
+            try:
+                await engine.readtext(image_file)
+                await engine.readtext_batch([image_file, b"other"])
+                return ocr_engine.get_stage_ocr_stats()
+            finally:
+                end_stage_ocr_stats(token)
+
+        stats = asyncio.run(run())
+        assert (stats.calls, stats.images, stats.cache_hits) == (2, 3, 1)
+        assert stats.latency_ms >= 0 and stats.worker_peak_rss_mb > 0
+        assert ocr_engine.get_stage_ocr_stats() is None
+
+
+class TestProcessPool:
+
+    def test_workers_load_reader_once(self, image_file):
+        engine = OCREngine(workers=2, use_processes=True, reader_factory=fake_reader)
+        try:
+            tiles = [bytes([i]) * (i + 1) for i in range(6)]
+            results = asyncio.run(engine.readtext_batch(tiles, min_confidence=0.5))
+            assert [r[0][1] for r in results] == [f"size {i + 1}" for i in range(6)]
+            stats = engine.stats()
+            assert stats["images_ocrd"] == 6 and stats["mode"] == "processes"
+            assert 1 <= len(stats["worker_peak_rss_mb"]) <= 2
+        finally:
+            engine.shutdown()
+
+
+class TestCallers:
+
+    def test_inpainting_service_uses_shared_engine(self, engine, image_file, monkeypatch):
+        from app.services.inpainting_service import InpaintingService
+
+        monkeypatch.setattr(ocr_engine, "_engine", engine)
+        regions = asyncio.run(InpaintingService().detect_text_regions(image_file, min_confidence=0.3))
+        assert [r["text"] for r in regions] == ["size 100"]
+        assert regions[0]["bbox"] == {"x": 0, "y": 0, "width": 10, "height": 5}
+        assert regions[0]["center"] == (5, 2)
+
+    def test_missing_easyocr_surfaces_as_inpainting_error(self, image_file, monkeypatch):
+        from app.services.inpainting_service import InpaintingError, InpaintingService
+
+        engine = OCREngine(use_processes=False, reader_factory=broken_reader)
+        monkeypatch.setattr(ocr_engine, "_engine", engine)
+        try:
+            with pytest.raises(InpaintingError, match="EasyOCR not installed"):
+                asyncio.run(InpaintingService().detect_text_regions(image_file))
+        finally:
+            engine.shutdown()
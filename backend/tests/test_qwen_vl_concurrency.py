@@ -0,0 +1,106 @@
+"""
+Tests for concurrent per-label Qwen VL requests and single image encoding
+(app/services/qwen_vl_service.py)
+
+Ollama is replaced by a fake _call_ollama, no server needed.
+
+Run with: PYTHONPATH=. pytest tests/test_qwen_vl_concurrency.py -v
+"""
+
+import asyncio
+import json
+
+import PIL.Image
+import pytest
+from PIL import Image
+
+from app.services.qwen_vl_service import QwenVLService
+
+LABELS = [{"content": f"label {i}", "bbox": [i * 10, 0, i * 10 + 8, 8]} for i in range(8)]
+
+
+@pytest.fixture
+def diagram(tmp_path):
+    path = tmp_path / "diagram.png"
+    Image.new("RGB", (2048, 1024), "white").save(path)
+    return str(path)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = QwenVLService()
+    service._available = True
+    service.in_flight = 0
+    service.max_in_flight = 0
+    service.payloads = set()
+
+    async def fake_call(prompt, image_base64):
+        service.payloads.add(image_base64)
+        if "text_labels" in prompt:
+            return json.dumps({"text_labels": LABELS + [{"content": "no bbox", "bbox": []}]})
+        service.in_flight += 1
+        service.max_in_flight = max(service.max_in_flight, service.in_flight)
+        try:
+            label = prompt.split('text label "')[1].split('"')[0]
+            index = int(label.split()[-1])
+            # Finish in reverse order to check results keep label order
+            await asyncio.sleep(0.01 * (8 - index))
+            if index % 2:
+                return json.dumps({"found": False})
+            return json.dumps({"found": True, "line": {"bbox": [index, 1, index + 1, 2], "start": [0, 0], "end": [1, 1]}})
+        finally:
+            service.in_flight -= 1
+
+    async def fake_mask(image_path, annotations):
+        return "mask.png"
+
+    monkeypatch.setattr(service, "_call_ollama", fake_call)
+    monkeypatch.setattr(service, "_create_comprehensive_mask", fake_mask)
+    return service
+
+
+class TestPerWordConcurrency:
+
+    def test_bounded_fan_out_keeps_order(self, service, diagram, monkeypatch):
+        opens = []
+        real_open = PIL.Image.open
+        monkeypatch.setattr(PIL.Image, "open", lambda *a, **k: opens.append(a[0]) or real_open(*a, **k))
+
+        result = asyncio.run(service.detect_labels_and_lines_per_word(diagram, concurrency=3))
+
+        assert service.max_in_flight == 3
+        texts = [a["content"] for a in result["annotations"] if a["type"] == "text"]
+        lines = [a["text_label"] for a in result["annotations"] if a["type"] == "line"]
+        assert texts == [f"label {i}" for i in range(8)]
+        assert lines == ["label 0", "label 2", "label 4", "label 6"]
+        assert result["annotations"][1]["bbox"] == [0, 1, 1, 2]  # normalized, not rescaled
+        # One encode for the text pass and all leader-line prompts
+        assert len(opens) == 1 and len(service.payloads) == 1
+
+    def test_concurrency_one_is_sequential(self, service, diagram):
+        asyncio.run(service.detect_labels_and_lines_per_word(diagram, concurrency=1))
+        assert service.max_in_flight == 1
+
+
+class TestEncodedImage:
+
+    def test_scale_factors_and_cache(self, service, diagram):
+        encoded = service.prepare_image(diagram)
+        assert encoded.original_size == (2048, 1024)
+        assert encoded.encoded_size == (1024, 512)
+        assert (encoded.scale_x, encoded.scale_y) == (2.0, 2.0)
+        assert service.prepare_image(diagram) is encoded
+        assert service._encode_image(diagram) == encoded.data
+
+        # Rewriting the file invalidates the cached encoding
+        Image.new("RGB", (300, 200), "black").save(diagram)
+        assert service.prepare_image(diagram).encoded_size == (300, 200)
+
+    def test_bulk_path_scales_with_cached_factors(self, service, diagram, monkeypatch):
+        async def fake_call(prompt, image_base64):
+            return json.dumps({"annotations": [{"type": "line", "bbox": [10, 10, 20, 20], "start": [1, 2], "end": [3, 4]}]})
+
+        monkeypatch.setattr(service, "_call_ollama", fake_call)
+        result = asyncio.run(service.detect_labels_and_lines(diagram))
+        assert result["annotations"][0]["bbox"] == [20, 20, 40, 40]
+        assert result["annotations"][0]["end"] == [6, 8]
@@ -419,6 +419,33 @@ class TestFix11SnapshotTruncation:
         
         # Should be truncated
         assert "_truncated" in result or len(json.dumps(result)) <= 200 * 1024
+    @pytest.mark.asyncio
+    async def test_reconstruction_restores_blob_values(
+        self, db_session: Session, sample_run: PipelineRun, tmp_path, monkeypatch
+    ):
+        """Strings moved to the blob store are merged back as their content on retry"""
+        from app.services import snapshot_store
+
+        monkeypatch.setattr(snapshot_store, "_blob_store", snapshot_store.SnapshotBlobStore(tmp_path))
+        diagram = "data:image/png;base64," + "A" * (40 * 1024)  # Over the 32KB blob threshold
+        output = _truncate_snapshot({"diagram_image": diagram, "zones": [{"id": "z1"}]}, max_size_kb=200)
+        assert output["diagram_image"]["_blob"]
+
+        db_session.add(StageExecution(
+            id="stage-blob",
+            run_id=sample_run.id,
+            stage_name="diagram_image_retriever",
+            stage_order=1,
+            status="success",
+            output_snapshot=output
+        ))
+        db_session.commit()
+
+        state = await reconstruct_state_before_stage(sample_run.id, "blueprint_generator", db_session)
+
+        assert state["diagram_image"] == diagram
+        assert state["zones"] == [{"id": "z1"}]
+        assert "_truncated" not in state
 
 
 class TestIntegrationRetryFlow:
@@ -0,0 +1,107 @@
+"""
+Tests for run-length encoded masks (app/utils/rle_mask.py) and their use in
+SAM zone detection (app/services/sam3_zone_service.py)
+
+Run with: PYTHONPATH=. pytest tests/test_rle_mask.py -v
+"""
+
+import copy
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from app.services.sam3_zone_service import SAM3ZoneDetector
+from app.utils.rle_mask import RLEMask, decode_mask
+
+
+def _random_masks(count=300, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        h, w = (int(v) for v in rng.integers(1, 12, 2))
+        yield rng.random((h, w)) < rng.random()
+
+
+def _expected_bbox(mask):
+    ys, xs = np.nonzero(mask)
+    if not len(xs):
+        return 0, 0, 0, 0
+    return int(xs.min()), int(ys.min()), int(xs.max() - xs.min() + 1), int(ys.max() - ys.min() + 1)
+
+
+class TestRLEMask:
+
+    def test_round_trip_area_and_bbox_match_dense(self):
+        for mask in _random_masks():
+            rle = RLEMask.from_dict(json.loads(json.dumps(RLEMask.encode(mask))))
+            assert np.array_equal(rle.decode(), mask)
+            assert rle.area == mask.sum()
+            assert rle.bbox == _expected_bbox(mask)
+
+    def test_intersection_and_iou_match_dense(self):
+        masks = list(_random_masks(200, seed=1))
+        rng = np.random.default_rng(2)
+        for mask in masks:
+            other = rng.random(mask.shape) < 0.5
+            a, b = RLEMask.encode(mask), RLEMask.encode(other)
+            inter = (mask & other).sum()
+            union = (mask | other).sum()
+            assert a.intersection(b) == inter
+            assert a.iou(dict(b)) == pytest.approx(inter / union if union else 0.0)
+
+    def test_coco_string_format(self):
+        # Column-major runs: 2 background, 3 foreground, 1 background
+        mask = np.array([[0, 1], [0, 1], [1, 0]], dtype=bool)
+        rle = RLEMask.encode(mask)
+        assert rle.runs.tolist() == [2, 3, 1]
+        assert rle == {"size": [3, 2], "counts": "231"}
+        assert RLEMask([3, 2], "231").area == 3
+
+    def test_compact_and_serialisable(self):
+        mask = np.zeros((1024, 1024), dtype=bool)
+        mask[100:400, 200:700] = True
+        rle = RLEMask.encode(mask)
+        assert len(json.dumps(rle)) < 2000 < mask.nbytes
+        assert pickle.loads(pickle.dumps(rle)).area == copy.deepcopy(rle).area == 150000
+        assert np.asarray(rle).sum() == 150000
+
+    def test_input_normalisation(self):
+        probs = np.array([[[0.2, 0.9], [0.7, 0.1]]])
+        assert RLEMask.encode(probs).decode().tolist() == [[False, True], [True, False]]
+        assert RLEMask.encode(np.array([[0, 255]], np.uint8)).area == 1
+        assert RLEMask.encode(np.zeros((0, 4), bool)).area == 0
+        assert decode_mask({"size": [3, 2], "counts": "231"}).sum() == 3
+        assert decode_mask(None) is None
+
+    def test_size_mismatch_raises(self):
+        with pytest.raises(ValueError):
+            RLEMask.encode(np.ones((2, 2))).intersection(RLEMask.encode(np.ones((3, 2))))
+
+
+class TestSAMZones:
+
+    def test_detect_zones_emits_rle_masks(self):
+        masks = []
+        for x in (0, 40):
+            segmentation = np.zeros((64, 96), dtype=bool)
+            segmentation[10:30, x:x + 30] = True
+            masks.append({"bbox": [x, 10, 30, 20], "area": 600, "predicted_iou": 0.9,
+                          "stability_score": 0.95, "segmentation": segmentation})
+
+        class Generator:
+            def generate(self, image):
+                return masks
+
+        detector = SAM3ZoneDetector()
+        detector._mask_generator = Generator()
+        detector._ensure_loaded = lambda: None
+        zones = detector.detect_zones(np.zeros((64, 96, 3), dtype=np.uint8))
+
+        assert len(zones) == 2
+        for zone in zones:
+            assert isinstance(zone["mask"], RLEMask)
+            x, y, w, h = zone["mask"].bbox
+            assert {"x": x, "y": y, "width": w, "height": h} == zone["bbox"]
+            assert zone["mask"].area == zone["area"]
+        json.dumps(zones)
@@ -0,0 +1,74 @@
+"""
+Tests for per-run configuration context (app/config/run_context.py)
+
+Run with: PYTHONPATH=. pytest tests/test_run_context.py -v
+"""
+
+import asyncio
+
+from app.config.agent_models import PRESET_CONFIGS, get_agent_config, get_runtime_config
+from app.config.run_context import (
+    run_context,
+    get_run_context,
+    get_pipeline_preset,
+    get_agent_preset,
+)
+
+
+class TestRunContext:
+
+    def test_falls_back_to_environment_outside_a_run(self, monkeypatch):
+        monkeypatch.setenv("PIPELINE_PRESET", "v3")
+        monkeypatch.delenv("AGENT_CONFIG_PRESET", raising=False)
+        assert get_run_context() is None
+        assert get_pipeline_preset() == "v3"
+        assert get_agent_preset() == "balanced"
+
+    def test_run_context_overrides_environment_and_restores(self, monkeypatch):
+        monkeypatch.setenv("PIPELINE_PRESET", "v3")
+        with run_context(pipeline_preset="v4", agent_preset="openai_only"):
+            assert get_pipeline_preset() == "v4"
+            assert get_agent_preset() == "openai_only"
+            assert get_agent_config() is PRESET_CONFIGS["openai_only"]
+        assert get_pipeline_preset() == "v3"
+
+    def test_nested_context_inherits_unset_fields(self):
+        with run_context(run_id="r1", pipeline_preset="v4", agent_preset="groq_free"):
+            with run_context(agent_preset="local_only") as inner:
+                assert inner.run_id == "r1"
+                assert inner.pipeline_preset == "v4"
+                assert inner.agent_preset == "local_only"
+            assert get_agent_preset() == "groq_free"
+
+    def test_runtime_config_reloads_per_run(self):
+        with run_context(agent_preset="openai_only"):
+            openai_config = get_runtime_config()
+            assert get_runtime_config() is openai_config
+        with run_context(agent_preset="anthropic_only"):
+            anthropic_config = get_runtime_config()
+        assert openai_config.default_model == PRESET_CONFIGS["openai_only"].default_model
+        assert anthropic_config.default_model == PRESET_CONFIGS["anthropic_only"].default_model
+
+    def test_concurrent_runs_see_their_own_presets(self, monkeypatch):
+        monkeypatch.delenv("PIPELINE_PRESET", raising=False)
+        monkeypatch.delenv("AGENT_CONFIG_PRESET", raising=False)
+
+        async def run(pipeline_preset, agent_preset):
+            with run_context(pipeline_preset=pipeline_preset, agent_preset=agent_preset):
+                seen = []
+                for _ in range(5):
+                    # Child tasks (like LangGraph nodes) inherit the context
+                    seen.append(await asyncio.create_task(_read_presets()))
+                    await asyncio.sleep(0)
+                return seen
+
+        async def _read_presets():
+            await asyncio.sleep(0)
+            return get_pipeline_preset(), get_agent_preset(), get_runtime_config().default_model
+
+        async def main():
+            return await asyncio.gather(run("v3", "openai_only"), run("v4", "anthropic_only"))
+
+        first, second = asyncio.run(main())
+        assert set(first) == {("v3", "openai_only", PRESET_CONFIGS["openai_only"].default_model)}
+        assert set(second) == {("v4", "anthropic_only", PRESET_CONFIGS["anthropic_only"].default_model)}
@@ -0,0 +1,143 @@
+"""
+Tests for the run event bus (app/services/run_event_bus.py) and the
+push-based SSE stream in app/routes/observability.py
+
+Run with: PYTHONPATH=. pytest tests/test_run_event_bus.py -v
+"""
+
+import json
+import threading
+
+import pytest
+
+from app.db.database import SessionLocal, init_db
+from app.db.models import Question, Process
+from app.services import run_event_bus as run_event_bus_module
+from app.services.run_event_bus import RunEventBus, EVENT_STAGE, EVENT_RESYNC
+from app.agents.instrumentation import (
+    create_pipeline_run,
+    track_stage_start,
+    track_stage_complete,
+    update_pipeline_run_status,
+    emit_live_step,
+)
+from app.routes.observability import _push_run_events
+
+
+@pytest.fixture
+def process_id():
+    """Create a question/process pair for a pipeline run to hang off"""
+    init_db()
+    db = SessionLocal()
+    try:
+        question = Question(text="Label the parts of a flower")
+        db.add(question)
+        db.flush()
+        process = Process(question_id=question.id)
+        db.add(process)
+        db.commit()
+        return process.id
+    finally:
+        db.close()
+
+
+def _parse_sse(chunk: str):
+    if chunk.startswith(":"):
+        return None, None
+    lines = chunk.strip().split("\n")
+    return lines[0][len("event: "):], json.loads(lines[1][len("data: "):])
+
+
+class TestRunEventBus:
+
+    @pytest.mark.asyncio
+    async def test_publish_fans_out_to_subscribers_of_run(self):
+        bus = RunEventBus()
+        a, b, other = bus.subscribe("r1"), bus.subscribe("r1"), bus.subscribe("r2")
+
+        bus.publish("r1", EVENT_STAGE, {"stage_id": "s1"})
+
+        for sub in (a, b):
+            event = await sub.get(timeout=1)
+            assert event["type"] == EVENT_STAGE and event["data"]["stage_id"] == "s1"
+        assert await other.get(timeout=0.05) is None
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_resync_instead_of_backlog(self):
+        bus = RunEventBus(max_queue_size=3)
+        sub = bus.subscribe("r1")
+
+        for i in range(10):
+            bus.publish("r1", EVENT_STAGE, {"stage_id": f"s{i}"})
+
+        assert sub.queue.qsize() <= 3
+        assert sub.resyncs >= 1
+        types = [sub.queue.get_nowait()["type"] for _ in range(sub.queue.qsize())]
+        assert EVENT_RESYNC in types
+        bus.unsubscribe(sub)
+        assert bus.stats()["dropped"] > 0
+
+    @pytest.mark.asyncio
+    async def test_publish_from_worker_thread(self):
+        bus = RunEventBus()
+        sub = bus.subscribe("r1")
+
+        thread = threading.Thread(target=bus.publish, args=("r1", EVENT_STAGE, {"stage_id": "t"}))
+        thread.start()
+        thread.join()
+
+        event = await sub.get(timeout=1)
+        assert event["data"]["stage_id"] == "t"
+
+    def test_terminal_status_releases_local_run(self):
+        bus = RunEventBus()
+        bus.mark_local("r1")
+        bus.publish_run_status("r1", "running")
+        assert bus.is_local("r1")
+        bus.publish_run_status("r1", "success", duration_ms=10)
+        assert not bus.is_local("r1")
+
+    @pytest.mark.asyncio
+    async def test_retry_that_never_starts_releases_local_run(self, monkeypatch):
+        from app.routes.observability import _run_retry_pipeline
+
+        init_db()
+        bus = RunEventBus()
+        monkeypatch.setattr(run_event_bus_module, "_run_event_bus", bus)
+        bus.mark_local("missing-run")
+        # No PipelineRun row: the retry returns before publishing any status
+        await _run_retry_pipeline("missing-run", "original-run", "blueprint_generator")
+        assert not bus.is_local("missing-run")
+
+
+class TestPushStream:
+
+    @pytest.mark.asyncio
+    async def test_stream_pushes_stage_deltas_and_completes(self, monkeypatch, process_id):
+        monkeypatch.setattr(run_event_bus_module, "_run_event_bus", RunEventBus())
+
+        run_id = create_pipeline_run(process_id=process_id, topology="T1")
+        assert run_event_bus_module.get_run_event_bus().is_local(run_id)
+
+        stream = _push_run_events(run_id)
+        event, data = _parse_sse(await stream.__anext__())
+        assert event == "update" and data["status"] == "running" and data["stages"] == []
+
+        stage_id = track_stage_start(run_id, "input_enhancer", 1)
+        event, data = _parse_sse(await stream.__anext__())
+        assert data["current_stage"] == "input_enhancer"
+
+        emit_live_step(run_id, "input_enhancer", "thought", "thinking")
+        event, data = _parse_sse(await stream.__anext__())
+        assert event == "live_step" and data["step"]["content"] == "thinking"
+
+        track_stage_complete(stage_id, model_id="gpt-4o", prompt_tokens=100, completion_tokens=50)
+        event, data = _parse_sse(await stream.__anext__())
+        assert data["stages"][0]["status"] == "success"
+        assert data["total_tokens"] == 150
+
+        update_pipeline_run_status(run_id, "success")
+        events = [_parse_sse(chunk) async for chunk in stream]
+        assert events[-1][0] == "complete"
+        assert events[-1][1]["status"] == "success"
+        assert not run_event_bus_module.get_run_event_bus().is_local(run_id)
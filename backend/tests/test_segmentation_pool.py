@@ -0,0 +1,156 @@
+"""
+Tests for the out-of-process SAM3 worker pool (app/services/asset_gen/segmentation_pool.py)
+
+Run with: PYTHONPATH=. pytest tests/test_segmentation_pool.py -v
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.asset_gen import segmentation
+from app.services.asset_gen.segmentation_pool import SegmentationWorkerPool
+
+
+def fake_batch(image_bytes, labels, guide_boxes, scene_id):
+    """Stands in for the SAM3 worker: one zone per label, after a short delay."""
+    if image_bytes == b"crash":
+        raise RuntimeError("worker exploded")
+    if image_bytes == b"no-model":
+        return {"zones": [], "unavailable": True, "error": "SAM3 requires MLX"}
+    time.sleep(float(image_bytes.split(b":")[1]) if b":" in image_bytes else 0.0)
+    return {
+        "zones": [{"id": f"zone_{label}", "label": label, "points": [[0, 0], [1, 0], [1, 1]],
+                   "box": (guide_boxes or {}).get(label)} for label in labels],
+        "backbone_ms": 5,
+        "backbone_cached": False,
+        "prompt_ms": len(labels),
+        "labels_run": list(labels),
+        "pid": os.getpid(),
+        "device": "cpu",
+    }
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(workers):
+        pool = SegmentationWorkerPool(workers=workers, job_fn=fake_batch, mp_context="fork")
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+class TestSegmentationWorkerPool:
+
+    def test_different_images_run_in_parallel(self, make_pool):
+        pool = make_pool(workers=2)
+        pool.submit(b"warm", ["x"]).result(timeout=30)  # start both processes
+
+        started = time.time()
+        futures = [pool.submit(f"scene{i}:0.6".encode(), ["a"], scene_id=f"s{i}") for i in range(2)]
+        results = [f.result(timeout=30) for f in futures]
+        assert time.time() - started < 1.1
+        assert all(r["zones"][0]["label"] == "a" for r in results)
+
+    def test_queued_jobs_for_same_image_are_batched(self, make_pool):
+        pool = make_pool(workers=1)
+        busy = pool.submit(b"other:0.5", ["z"])
+        first = pool.submit(b"diagram", ["heart", "lung"], scene_id="s1")
+        second = pool.submit(b"diagram", ["lung", "liver"], scene_id="s2")
+
+        r1, r2 = first.result(timeout=30), second.result(timeout=30)
+        busy.result(timeout=30)
+        assert r1["labels_run"] == ["heart", "lung", "liver"]
+        assert [z["label"] for z in r1["zones"]] == ["heart", "lung"]
+        assert [z["label"] for z in r2["zones"]] == ["lung", "liver"]
+        assert r1["zones"][1] is not r2["zones"][0]
+
+        stats = pool.stats()
+        assert stats["jobs_merged"] == 1
+        assert stats["batches_dispatched"] == 2
+        assert stats["jobs_completed"] == 3
+        assert stats["queue_depth"] == 0
+        assert stats["job_latency_ms"]["p95"] >= stats["job_latency_ms"]["p50"] > 0
+        assert stats["devices"] == ["cpu"]
+
+    def test_conflicting_guide_boxes_are_not_merged(self, make_pool):
+        pool = make_pool(workers=1)
+        busy = pool.submit(b"other:0.3", ["z"])
+        one = pool.submit(b"diagram", ["heart"], guide_boxes={"heart": {"x": 1, "y": 1}})
+        two = pool.submit(b"diagram", ["heart"], guide_boxes={"heart": {"x": 50, "y": 50}})
+        text = pool.submit(b"diagram", ["heart"])
+
+        assert one.result(timeout=30)["zones"][0]["box"] == {"x": 1, "y": 1}
+        assert two.result(timeout=30)["zones"][0]["box"] == {"x": 50, "y": 50}
+        assert text.result(timeout=30)["zones"][0]["box"] is None
+        busy.result(timeout=30)
+        assert pool.stats()["jobs_merged"] == 0
+
+    def test_worker_errors_fail_only_their_batch(self, make_pool):
+        pool = make_pool(workers=1)
+        with pytest.raises(RuntimeError, match="worker exploded"):
+            pool.submit(b"crash", ["a"]).result(timeout=30)
+        assert pool.submit(b"fine", ["a"]).result(timeout=30)["zones"]
+        stats = pool.stats()
+        assert (stats["jobs_failed"], stats["jobs_completed"]) == (1, 1)
+        assert "worker exploded" in stats["last_error"]
+
+
+class TestSegmentationServiceUsesPool:
+
+    @pytest.fixture
+    def pool(self, make_pool, monkeypatch):
+        pool = make_pool(workers=2)
+        monkeypatch.setattr(segmentation, "get_segmentation_pool", lambda: pool)
+        monkeypatch.setattr(segmentation, "peek_segmentation_pool", lambda: pool)
+        return pool
+
+    def test_scenes_segment_through_pool(self, pool):
+        service = segmentation.LocalSegmentationService()
+
+        async def run():
+            return await asyncio.gather(
+                service.detect_zones(b"img1", ["nucleus"], scene_id="scene_1"),
+                service.detect_zones_guided(b"img2", ["wall"], {"wall": {"x": 5, "y": 5, "radius": 3}},
+                                            scene_id="scene_2"),
+            )
+
+        text_zones, guided_zones = asyncio.run(run())
+        assert [z["label"] for z in text_zones] == ["nucleus"]
+        assert guided_zones[0]["box"] == {"x": 5, "y": 5, "radius": 3}
+        # The API process never loads the model
+        assert service._sam3 is None
+        status = segmentation.get_sam3_status()
+        assert status["worker_pool"]["jobs_completed"] == 2
+        assert status["queue_waiting"] == 0
+
+    def test_status_shows_scenes_in_progress(self, pool):
+        service = segmentation.LocalSegmentationService()
+
+        async def run():
+            task = asyncio.ensure_future(service.detect_zones(b"img:0.5", ["nucleus"], scene_id="scene_7"))
+            await asyncio.sleep(0.2)
+            busy = segmentation.get_sam3_status()
+            await task
+            return busy
+
+        busy = asyncio.run(run())
+        assert busy["state"] == "busy"
+        assert busy["current_scene"] == "scene_7"
+        assert busy["active_scenes"] == ["scene_7"]
+        idle = segmentation.get_sam3_status()
+        assert idle["state"] == "idle"
+        assert idle["current_scene"] is None
+        assert idle["active_scenes"] == []
+
+    def test_unavailable_model_returns_none(self, pool):
+        service = segmentation.LocalSegmentationService()
+        assert asyncio.run(service.detect_zones(b"no-model", ["a"])) is None
+        assert segmentation.get_sam3_status()["last_error"] == "SAM3 requires MLX"
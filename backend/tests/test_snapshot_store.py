@@ -0,0 +1,132 @@
+"""
+Tests for size-bounded stage snapshots (app/services/snapshot_store.py)
+
+Run with: PYTHONPATH=. pytest tests/test_snapshot_store.py -v
+"""
+
+import json
+import os
+from datetime import datetime
+
+from app.services import snapshot_store
+from app.services.snapshot_store import SnapshotBlobStore, bound_snapshot, restore_snapshot
+
+
+def _size(value) -> int:
+    return len(json.dumps(value))
+
+
+class TestBoundSnapshot:
+
+    def test_small_snapshot_is_copied_unchanged(self):
+        data = {"question": "What is mitosis?", "zones": [{"id": 1, "points": [[0, 1], [2, 3]]}], "ok": True}
+        result = bound_snapshot(data, max_bytes=10_000)
+        assert result == data
+        assert result is not data
+        assert result["zones"] is not data["zones"]
+
+    def test_non_json_values_are_stringified_like_default_str(self):
+        moment = datetime(2026, 1, 2, 3, 4, 5)
+        result = bound_snapshot({"at": moment, "tags": ("a", "b")}, max_bytes=10_000)
+        assert result == {"at": str(moment), "tags": ["a", "b"]}
+
+    def test_output_respects_budget_and_records_paths(self):
+        data = {
+            "status": "ok",
+            "zones": [{"id": i, "points": [[i, i + 1]] * 20} for i in range(500)],
+            "notes": "n" * 50_000,
+            "summary": "short",
+        }
+        result = bound_snapshot(data, max_bytes=20 * 1024, blob_threshold_bytes=10**9)
+
+        assert _size(result) <= 20 * 1024
+        assert result["_truncated"] is True
+        assert result["_original_size_kb"] == round(_size(data) / 1024, 2)
+        assert result["_truncated_size_kb"] >= round(_size(result) / 1024, 2)
+        # Budget is spent in document order; everything after it is listed
+        assert result["status"] == "ok"
+        assert any(path.startswith("zones[") and path.endswith(":]") for path in result["_elided_paths"])
+        assert result["_elided_paths"][-2:] == ["notes", "summary"]
+        # Kept list items are a prefix of the original list (the last one may itself be cut)
+        kept = len(result["zones"])
+        assert result["zones"][:-1] == data["zones"][:kept - 1]
+
+    def test_long_string_is_truncated_in_place(self):
+        result = bound_snapshot({"text": "x" * 50_000}, max_bytes=20 * 1024, blob_threshold_bytes=10**9)
+        assert result["text"].endswith("... (truncated)")
+        assert _size(result) <= 20 * 1024
+        assert result["_elided_paths"][0].startswith("text[")
+
+    def test_large_strings_go_to_blob_store(self, tmp_path):
+        store = SnapshotBlobStore(tmp_path)
+        image = "data:image/png;base64," + "A" * 100_000
+        data = {"scenes": [{"image": image}, {"image": image}], "title": "Cell"}
+
+        result = bound_snapshot(data, max_bytes=200 * 1024, blob_store=store, blob_threshold_bytes=1024)
+
+        refs = [scene["image"] for scene in result["scenes"]]
+        assert refs[0] == refs[1] == {"_blob": refs[0]["_blob"], "bytes": len(image)}
+        assert store.get(refs[0]["_blob"]) == image.encode()
+        assert result["_blob_count"] == 2
+        assert "_elided_paths" not in result
+        # Same content is stored once
+        assert store.stats()["writes"] == 1
+        assert store.stats()["dedup_hits"] == 1
+
+    def test_restore_snapshot_replaces_blob_refs(self, tmp_path):
+        store = SnapshotBlobStore(tmp_path)
+        data = {"image": "é" * 5_000, "raw": b"\xff" * 2_000, "title": "Cell"}
+        bounded = bound_snapshot(data, max_bytes=200 * 1024, blob_store=store, blob_threshold_bytes=1024)
+
+        assert restore_snapshot(bounded, store) == data
+        # A swept blob leaves its reference (and the metadata) in place
+        for path in tmp_path.glob("??/*"):
+            path.unlink()
+        assert restore_snapshot(bounded, store) == bounded
+
+    def test_blob_store_rejects_bad_digests(self, tmp_path):
+        store = SnapshotBlobStore(tmp_path)
+        assert store.get("../../etc/passwd") is None
+        assert store.get("0" * 64) is None
+
+    def test_blob_store_sweeps_expired_then_lru(self, tmp_path):
+        now = [1_000_000.0]
+        store = SnapshotBlobStore(tmp_path, max_bytes=10_000, ttl_seconds=3600, clock=lambda: now[0])
+        digests = [store.put(bytes([i]) * 1000) for i in range(3)]
+        for age, digest in zip((7200, 200, 100), digests):
+            path = tmp_path / digest[:2] / digest
+            os.utime(path, (now[0] - age, now[0] - age))
+        # Reading a blob marks it as recently used
+        assert store.get(digests[1]) == bytes([1]) * 1000
+
+        assert store.sweep() == 1
+        assert store.get(digests[0]) is None
+        assert store.stats()["total_bytes"] == 2000
+
+        # Over the cap: the least recently used blob (digests[2]) goes
+        store.max_bytes = 2500
+        store.put(b"x" * 1000)
+        assert store.get(digests[2]) is None
+        assert store.get(digests[1]) is not None
+        assert store.stats()["evicted"] == 2
+
+    def test_linear_in_snapshot_size(self, monkeypatch):
+        encode = snapshot_store._encode_str
+
+        def encoded_chars(n):
+            data = {f"key{i}": {"values": list(range(50)), "label": "z" * 200} for i in range(n)}
+            total = [0]
+
+            def counting_encode(value):
+                result = encode(value)
+                total[0] += len(result)
+                return result
+
+            monkeypatch.setattr(snapshot_store, "_encode_str", counting_encode)
+            bound_snapshot(data, max_bytes=200 * 1024, blob_threshold_bytes=10**9)
+            return total[0], _size(data)
+
+        for n in (1000, 8000):
+            encoded, size = encoded_chars(n)
+            # Every string is encoded once, not once per enclosing level
+            assert encoded <= size
@@ -0,0 +1,153 @@
+"""
+Tests for the bbox spatial index (app/utils/spatial_index.py) and the zone
+overlap paths that use it
+
+Run with: PYTHONPATH=. pytest tests/test_spatial_index.py -v
+"""
+
+import numpy as np
+import pytest
+
+from app.agents.had.zone_collision_resolver import (
+    SHAPELY_AVAILABLE,
+    ZoneCollisionResolver,
+    calculate_polygon_iou,
+)
+from app.services.sam3_zone_service import SAM3ZoneDetector
+from app.utils.spatial_index import (
+    bbox_candidate_pairs,
+    bbox_iou_matrix,
+    greedy_suppress,
+    pair_iou,
+    xywh_to_boxes,
+)
+
+
+def _random_boxes(n, seed=0, size=100.0, max_side=20.0):
+    rng = np.random.default_rng(seed)
+    mins = rng.uniform(0, size, (n, 2))
+    return np.hstack([mins, mins + rng.uniform(0, max_side, (n, 2))])
+
+
+def _circle_zones(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"id": f"zone_{i}", "x": float(x), "y": float(y), "radius": float(r)}
+        for i, (x, y, r) in enumerate(zip(rng.uniform(5, 95, n), rng.uniform(5, 95, n), rng.uniform(1, 8, n)))
+    ]
+
+
+class TestCandidatePairs:
+
+    def test_matches_brute_force(self):
+        boxes = _random_boxes(300)
+        # Include duplicates, shared min_x and a zero-width box
+        boxes = np.vstack([boxes, boxes[:5], [[boxes[0, 0], 0, boxes[0, 0] + 3, 100]], [[50, 0, 50, 100]]])
+        expected = [
+            (i, j)
+            for i in range(len(boxes)) for j in range(i + 1, len(boxes))
+            if max(boxes[i, 0], boxes[j, 0]) < min(boxes[i, 2], boxes[j, 2])
+            and max(boxes[i, 1], boxes[j, 1]) < min(boxes[i, 3], boxes[j, 3])
+        ]
+        i, j = bbox_candidate_pairs(boxes)
+        assert list(zip(i.tolist(), j.tolist())) == expected
+
+    def test_touching_and_small_inputs(self):
+        assert len(bbox_candidate_pairs([[0, 0, 10, 10], [10, 0, 20, 10]])[0]) == 0
+        assert len(bbox_candidate_pairs([[0, 0, 10, 10]])[0]) == 0
+        assert len(bbox_candidate_pairs(np.zeros((0, 4)))[0]) == 0
+
+
+class TestIoU:
+
+    def test_pair_iou_matches_matrix(self):
+        boxes = _random_boxes(80, seed=1)
+        i, j = bbox_candidate_pairs(boxes)
+        iou, inter = pair_iou(boxes, i, j)
+        assert np.allclose(iou, bbox_iou_matrix(boxes, boxes)[i, j])
+        assert (inter > 0).all()
+
+    def test_area_override(self):
+        iou, inter = pair_iou([[0, 0, 2, 2], [1, 1, 3, 3]], np.array([0]), np.array([1]), areas=np.array([10.0, 10.0]))
+        assert inter[0] == 1.0
+        assert iou[0] == pytest.approx(1 / 19)
+
+    def test_greedy_suppress_matches_sequential_nms(self):
+        boxes = _random_boxes(400, seed=2, max_side=30)
+        boxes = boxes[np.argsort(-(boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), kind="stable")]
+        full = bbox_iou_matrix(boxes, boxes)
+        kept = []
+        for k in range(len(boxes)):
+            if not any(full[k, m] > 0.3 for m in kept):
+                kept.append(k)
+        assert np.flatnonzero(greedy_suppress(boxes, 0.3)).tolist() == kept
+
+
+class TestZoneOverlaps:
+
+    def test_bbox_path_matches_all_pairs(self):
+        resolver = ZoneCollisionResolver()
+        zones = _circle_zones(150)
+        bounds = [resolver._get_zone_bounds(z) for z in zones]
+        expected = []
+        for i in range(len(bounds)):
+            for j in range(i + 1, len(bounds)):
+                iou, inter = resolver._calculate_iou(bounds[i], bounds[j])
+                if iou > 0:
+                    expected.append((bounds[i].zone_id, bounds[j].zone_id, iou, inter))
+
+        found = resolver._detect_overlaps(zones)
+        assert [(p.zone_a_id, p.zone_b_id) for p in found] == [e[:2] for e in expected]
+        assert np.allclose([p.iou for p in found], [e[2] for e in expected])
+        assert np.allclose([p.intersection_area for p in found], [e[3] for e in expected])
+
+    @pytest.mark.skipif(not SHAPELY_AVAILABLE, reason="shapely not installed")
+    def test_polygon_path_matches_all_pairs(self):
+        zones = []
+        for zone in _circle_zones(60, seed=4):
+            x, y, r = zone["x"], zone["y"], zone["radius"]
+            zone["points"] = [[x - r, y], [x, y - r], [x + r, y], [x, y + r]]
+            zones.append(zone)
+        expected = []
+        for i in range(len(zones)):
+            for j in range(i + 1, len(zones)):
+                iou, _ = calculate_polygon_iou(zones[i], zones[j])
+                if iou > 0:
+                    expected.append((zones[i]["id"], zones[j]["id"], iou))
+
+        found = ZoneCollisionResolver()._detect_overlaps(zones)
+        assert [(p.zone_a_id, p.zone_b_id) for p in found] == [e[:2] for e in expected]
+        assert np.allclose([p.iou for p in found], [e[2] for e in expected])
+
+    def test_discrete_separation_moves_zones_apart(self):
+        zones = [
+            {"id": "a", "x": 40.0, "y": 50.0, "radius": 6, "center": {"x": 40.0, "y": 50.0}},
+            {"id": "b", "x": 44.0, "y": 50.0, "radius": 6},
+            {"id": "c", "points": [[80, 10], [90, 10], [90, 20], [80, 20]]},
+        ]
+        resolver = ZoneCollisionResolver()
+        result = resolver.resolve_overlaps(zones, strategy="discrete")
+
+        assert result[0]["x"] < 40 and result[1]["x"] > 44
+        assert result[0]["center"]["x"] == pytest.approx(result[0]["x"])
+        assert result[2] == zones[2]
+        # Inputs are left untouched
+        assert zones[0]["center"] == {"x": 40.0, "y": 50.0}
+        assert resolver._detect_overlaps(result) == []
+
+
+class TestSAMFilter:
+
+    def test_filter_keeps_largest_of_overlapping_masks(self):
+        zones = [
+            {"id": "big", "bbox": {"x": 0, "y": 0, "width": 100, "height": 100}, "area": 10000},
+            {"id": "dup", "bbox": {"x": 5, "y": 5, "width": 90, "height": 90}, "area": 8100},
+            {"id": "inner", "bbox": {"x": 10, "y": 10, "width": 20, "height": 20}, "area": 400},
+            {"id": "far", "bbox": {"x": 300, "y": 300, "width": 90, "height": 90}, "area": 8100},
+        ]
+        kept = SAM3ZoneDetector()._filter_overlapping(zones)
+        assert [z["id"] for z in kept] == ["big", "inner", "far"]
+        assert kept[0] is zones[0]
+
+    def test_xywh_conversion(self):
+        assert xywh_to_boxes([(1, 2, 3, 4)]).tolist() == [[1, 2, 4, 6]]
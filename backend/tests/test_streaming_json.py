@@ -0,0 +1,233 @@
+"""
+Tests for the incremental streaming JSON parser (app/services/streaming_json.py)
+and streamed generate_json_for_agent calls
+
+Run with: PYTHONPATH=. pytest tests/test_streaming_json.py -v
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.config.agent_models import AgentModelConfig
+from app.services import llm_rate_limiter, llm_router, structured_output
+from app.services.llm_rate_limiter import LLMRateLimiter
+from app.services.llm_service import LLMService, RetryConfig
+from app.services.streaming_json import (
+    IncrementalJSONParser,
+    JSONEvent,
+    PydanticStreamValidator,
+    StreamingJSONError,
+    json_streaming_enabled,
+)
+from app.services.structured_output import StructuredOutputStats
+from app.v4.schemas.mechanic_content import SequencingContent
+
+
+def _feed(parser, text, size=3):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+class TestIncrementalJSONParser:
+
+    def test_emits_fields_and_items_as_they_close(self):
+        parser = IncrementalJSONParser()
+        events = parser.feed('{"labels": ["Nucleus", "Cell')
+        assert [(e.kind, e.path, e.value) for e in events] == [("item", ("labels", 0), "Nucleus")]
+
+        events = parser.feed(' \\"wall\\""], "count": 2, "meta": {"a": [1, 2]}}')
+        assert [(e.kind, e.path, e.value) for e in events] == [
+            ("item", ("labels", 1), 'Cell "wall"'),
+            ("field", ("labels",), ["Nucleus", 'Cell "wall"']),
+            ("field", ("count",), 2),
+            ("field", ("meta",), {"a": [1, 2]}),
+        ]
+        assert parser.done and not parser.degraded
+
+    def test_ignores_prose_and_fences(self):
+        parser = IncrementalJSONParser()
+        events = _feed(parser, 'Here it is:\n```json\n[{"id": 1}, {"id": 2},]\n```\nDone.')
+        assert [(e.path, e.value) for e in events] == [((0,), {"id": 1}), ((1,), {"id": 2})]
+        assert parser.done
+
+    def test_mismatched_bracket_aborts(self):
+        with pytest.raises(StreamingJSONError) as exc:
+            _feed(IncrementalJSONParser(), '{"items": [1, 2}')
+        assert exc.value.position == 15
+
+    def test_runaway_nesting_and_repetition_abort(self):
+        with pytest.raises(StreamingJSONError, match="nested deeper"):
+            IncrementalJSONParser(max_depth=4).feed('{"a": [[[[')
+        with pytest.raises(StreamingJSONError, match="repeated"):
+            _feed(IncrementalJSONParser(max_repeats=3), '{"steps": [' + '"go on", ' * 10)
+        # Repeated scalars (e.g. a zero-filled grid) are legitimate
+        assert IncrementalJSONParser(max_repeats=3).feed('{"grid": [0, 0, 0, 0, 0, 0]}')[-1].value == [0] * 6
+
+    def test_repairable_quirks_stand_down(self):
+        parser = IncrementalJSONParser()
+        assert parser.feed("{'labels': ['a'}") == []
+        assert parser.degraded
+
+
+class TestPydanticStreamValidator:
+
+    def test_checks_items_and_fields(self):
+        validator = PydanticStreamValidator(SequencingContent)
+        validator.check(JSONEvent("item", ("items", 0), {"id": "s1", "content": "Prophase"}))
+        validator.check(JSONEvent("field", ("unknown",), 1))
+        with pytest.raises(StreamingJSONError, match=r"items\[1\]"):
+            validator.check(JSONEvent("item", ("items", 1), {"id": "s2"}))
+        with pytest.raises(StreamingJSONError, match="'items'"):
+            validator.check(JSONEvent("field", ("items",), [{"id": "s1", "content": "Prophase"}]))
+
+
+class _Stream:
+    """Async iterator over OpenAI-style streaming chunks that records how far it got."""
+
+    def __init__(self, text, size=4):
+        self.pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        self.sent = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent >= len(self.pieces):
+            raise StopAsyncIteration
+        self.sent += 1
+        delta = SimpleNamespace(content=self.pieces[self.sent - 1])
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+
+class TestStreamedGenerateJson:
+
+    @pytest.fixture(autouse=True)
+    def isolate(self, monkeypatch):
+        monkeypatch.setattr(structured_output, "_stats", StructuredOutputStats())
+        monkeypatch.setattr(llm_router, "_router", None)
+        monkeypatch.setattr(llm_rate_limiter, "_rate_limiter", LLMRateLimiter(enabled=False))
+        monkeypatch.setenv("LLM_ROUTER_ENABLED", "false")
+        monkeypatch.setenv("LLM_STREAM_JSON", "content_generator")
+        config = AgentModelConfig(
+            agent_models={"content_generator_flash": "llama-3.1-8b-instant"},
+            agent_cache_enabled={"content_generator_flash": False},
+        )
+        monkeypatch.setattr("app.config.agent_models.get_runtime_config", lambda: config)
+
+    def _service(self, outputs):
+        streams = []
+
+        async def create(**kwargs):
+            assert kwargs["stream"] is True
+            streams.append(_Stream(outputs.pop(0)))
+            return streams[-1]
+
+        service = LLMService(retry_config=RetryConfig(max_retries=2, initial_delay=0.01))
+        service.groq_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        return service, streams
+
+    def test_events_reach_the_caller_while_streaming(self):
+        service, _ = self._service(['{"labels": ["a", "b"], "n": 1}'])
+        events = []
+
+        async def on_event(event):
+            events.append((event.path, event.value))
+
+        result = asyncio.run(service.generate_json_for_agent("content_generator_flash", "p", on_json_event=on_event))
+
+        assert events == [(("labels", 0), "a"), (("labels", 1), "b"), (("labels",), ["a", "b"]), (("n",), 1)]
+        assert result["labels"] == ["a", "b"] and result["_llm_metrics"]["json_stream_aborts"] == 0
+
+    def test_corrupt_stream_is_aborted_and_reprompted(self):
+        corrupt = '{"items": [1, 2} ' + '"filler", ' * 200
+        service, streams = self._service([corrupt, '{"items": [1, 2]}'])
+
+        result = asyncio.run(service.generate_json_for_agent(
+            "content_generator_flash", "p", on_json_event=lambda event: asyncio.sleep(0)
+        ))
+
+        assert result["items"] == [1, 2]
+        # The first generation was dropped a few chunks in, not read to the end
+        assert streams[0].sent < len(streams[0].pieces) / 10
+        assert result["_llm_metrics"]["json_stream_aborts"] == 1
+        assert result["_llm_metrics"]["json_attempts"] == 2
+
+    def test_rejected_item_aborts_with_validation_feedback(self, monkeypatch):
+        prompts = []
+        service, streams = self._service([
+            '{"items": [{"id": "s1", "content": "A"}, {"id": "s2"}, {"id": "s3", "content": "C"}]}',
+            '{"items": [{"id": "s1", "content": "A"}, {"id": "s2", "content": "B"}], "correct_order": ["s1", "s2"]}',
+        ])
+        original = service._add_error_feedback_to_prompt
+
+        def feedback(**kwargs):
+            prompts.append(kwargs["error"])
+            return original(**kwargs)
+
+        monkeypatch.setattr(service, "_add_error_feedback_to_prompt", feedback)
+        validator = PydanticStreamValidator(SequencingContent)
+
+        async def check(event):
+            validator.check(event)
+
+        result = asyncio.run(service.generate_json_for_agent("content_generator_flash", "p", on_json_event=check))
+
+        assert SequencingContent(**{k: v for k, v in result.items() if k != "_llm_metrics"})
+        assert len(prompts) == 1 and "items[1]" in prompts[0]
+        assert streams[0].sent < len(streams[0].pieces)
+
+    def test_non_streaming_provider_replays_the_full_response(self, monkeypatch):
+        config = AgentModelConfig(agent_models={"designer": "gpt-4o"}, agent_cache_enabled={"designer": False})
+        monkeypatch.setattr("app.config.agent_models.get_runtime_config", lambda: config)
+
+        async def create(**kwargs):
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content='{"a": [1]}'))],
+                usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2),
+            )
+
+        service = LLMService()
+        service.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        events = []
+
+        async def on_event(event):
+            events.append(event.path)
+
+        asyncio.run(service.generate_json_for_agent("designer", "p", on_json_event=on_event))
+        assert events == [("a", 0), ("a",)]
+
+    def test_agents_not_opted_in_check_the_complete_output(self, monkeypatch):
+        monkeypatch.setenv("LLM_STREAM_JSON", "false")
+        outputs = ['{"items": [1, "x"]}', '{"items": [1, 2]}']
+        requests = []
+
+        async def create(**kwargs):
+            requests.append(kwargs)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=outputs.pop(0)))],
+                usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2),
+            )
+
+        service = LLMService(retry_config=RetryConfig(max_retries=1))
+        service.groq_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        async def check(event):
+            if event.path == ("items", 1) and not isinstance(event.value, int):
+                raise StreamingJSONError("items[1] must be an integer")
+
+        result = asyncio.run(service.generate_json_for_agent("content_generator_flash", "p", on_json_event=check))
+
+        assert result["items"] == [1, 2] and result["_llm_metrics"]["json_stream_aborts"] == 1
+        assert not any(request.get("stream") for request in requests)
+
+    def test_stream_setting_selects_agents(self, monkeypatch):
+        monkeypatch.setenv("LLM_STREAM_JSON", "content_generator, blueprint_generator")
+        assert json_streaming_enabled("content_generator_pro")
+        assert json_streaming_enabled("blueprint_generator")
+        assert not json_streaming_enabled("content_builder_flash")
+        monkeypatch.setenv("LLM_STREAM_JSON", "TRUE")
+        assert json_streaming_enabled("anything")
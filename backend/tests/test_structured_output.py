@@ -0,0 +1,295 @@
+"""
+Tests for provider-native structured output (app/services/structured_output.py)
+and its use in LLMService.generate_json_for_agent
+
+Run with: PYTHONPATH=. pytest tests/test_structured_output.py -v
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.config.agent_models import AgentModelConfig
+from app.services import llm_router, structured_output
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_service import LLMService, RetryConfig
+from app.services.structured_output import (
+    StructuredOutputStats,
+    anthropic_tool,
+    openai_response_format,
+    resolve_json_schema,
+    supports_native,
+)
+from app.v4.schemas.game_concept import GameConcept
+from app.v4.schemas.interaction import SceneInteractionResult
+
+
+class BadRequest(Exception):
+    def __init__(self, message="Invalid schema for response_format"):
+        super().__init__(message)
+        self.status_code = 400
+
+
+def _completion(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+    )
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = StructuredOutputStats()
+    monkeypatch.setattr(structured_output, "_stats", stats)
+    monkeypatch.setattr(llm_router, "_router", None)
+    monkeypatch.setenv("LLM_ROUTER_ENABLED", "false")
+    return stats
+
+
+def _use_model(monkeypatch, model_key):
+    config = AgentModelConfig(agent_models={"scene_designer": model_key}, agent_cache_enabled={"scene_designer": False})
+    monkeypatch.setattr("app.config.agent_models.get_runtime_config", lambda: config)
+
+
+class TestSchemas:
+
+    def test_resolve_from_pydantic_and_dict(self):
+        schema = resolve_json_schema(GameConcept)
+        assert schema["title"] == "GameConcept" and schema["type"] == "object"
+        assert resolve_json_schema({"type": "object"}) == {"type": "object"}
+        assert resolve_json_schema(None) is None
+        assert resolve_json_schema(dict[str, str])["type"] == "object"
+
+    def test_provider_payloads(self):
+        schema = resolve_json_schema(SceneInteractionResult)
+        response_format = openai_response_format(schema)
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["name"] == "SceneInteractionResult"
+        assert response_format["json_schema"]["schema"] is schema
+        assert anthropic_tool({"title": "Game Plan!", "type": "object"})["name"] == "Game_Plan_"
+
+    def test_supported_providers(self):
+        schema = {"type": "object"}
+        assert supports_native("google", schema) and supports_native("local", schema)
+        assert not supports_native("groq", schema)
+        assert not supports_native("openai", {"type": "array"})
+        assert not supports_native("openai", None)
+
+    def test_cache_key_varies_with_schema_only_when_given(self):
+        base = ("openai", "gpt-4o", "sys", "p", 0.2, 100)
+        assert LLMResponseCache.make_key(*base) == LLMResponseCache.make_key(*base, None)
+        assert LLMResponseCache.make_key(*base, {"type": "object"}) != LLMResponseCache.make_key(*base)
+
+
+class TestProviderCalls:
+
+    def test_openai_sends_json_schema(self, stats):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            return _completion('{"a": 1}')
+
+        service = LLMService()
+        service.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        schema = resolve_json_schema(GameConcept)
+        response = asyncio.run(service._call_openai("p", None, "gpt-4o", 0.2, 100, response_schema=schema))
+
+        assert response.structured
+        assert calls[0]["response_format"]["json_schema"]["schema"] is schema
+
+    def test_anthropic_forces_tool_and_returns_its_input(self, stats):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(
+                content=[SimpleNamespace(type="tool_use", input={"scene_id": "s1"})],
+                stop_reason="tool_use",
+                usage=SimpleNamespace(input_tokens=10, output_tokens=5),
+            )
+
+        service = LLMService()
+        service.anthropic_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        schema = resolve_json_schema(SceneInteractionResult)
+        response = asyncio.run(service._call_anthropic("p", None, "claude", 0.2, 100, response_schema=schema))
+
+        assert json.loads(response.content) == {"scene_id": "s1"} and response.structured
+        assert calls[0]["tool_choice"] == {"type": "tool", "name": "SceneInteractionResult"}
+        assert calls[0]["tools"][0]["input_schema"] is schema
+
+    def test_schema_rejection_is_not_retried(self, stats):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            raise BadRequest()
+
+        service = LLMService(retry_config=RetryConfig(max_retries=3, initial_delay=0.01))
+        service.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        with pytest.raises(BadRequest):
+            asyncio.run(service._call_openai("p", None, "gpt-4o", 0.2, 100, response_schema={"type": "object"}))
+        assert len(calls) == 1
+
+
+    def test_streaming_schema_rejection_is_not_retried(self, stats):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            raise BadRequest()
+
+        async def on_chunk(chunk):
+            pass
+
+        service = LLMService(retry_config=RetryConfig(max_retries=3, initial_delay=0.01))
+        service.ollama_client = SimpleNamespace(
+            base_url="http://localhost:11434/v1",
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create)),
+        )
+        with pytest.raises(BadRequest):
+            asyncio.run(service._call_ollama_streaming(
+                "p", None, "llama", 0.2, 100, stream_callback=on_chunk, response_schema={"type": "object"}
+            ))
+        assert len(calls) == 1
+
+
+class TestGenerateJsonForAgent:
+
+    def _service(self, responses):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            result = responses.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return _completion(result)
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        service = LLMService(retry_config=RetryConfig(max_retries=1))
+        service.openai_client = service.groq_client = client
+        return service, calls
+
+    def test_native_path_records_clean_parse(self, stats, monkeypatch):
+        _use_model(monkeypatch, "gpt-4o")
+        service, calls = self._service(['{"scene_id": "s1"}'])
+
+        result = asyncio.run(service.generate_json_for_agent(
+            "scene_designer", "p", json_schema=SceneInteractionResult
+        ))
+
+        assert "response_format" in calls[0]
+        assert result["_llm_metrics"]["structured_output"] == "native"
+        native = stats.stats()["agents"]["scene_designer"]["native"]
+        assert native["calls"] == 1 and native["retries"] == 0 and native["repaired"] == 0
+
+    def test_provider_without_native_mode_uses_prompt_and_repair(self, stats, monkeypatch):
+        _use_model(monkeypatch, "llama-3.1-8b-instant")
+        service, calls = self._service(['Here you go: {"scene_id": "s1"}'])
+
+        result = asyncio.run(service.generate_json_for_agent(
+            "scene_designer", "p", json_schema=SceneInteractionResult
+        ))
+
+        assert "response_format" not in calls[0] and result["scene_id"] == "s1"
+        prompted = stats.stats()["agents"]["scene_designer"]["prompted"]
+        assert prompted["calls"] == 1 and prompted["repaired"] == 1
+
+    def test_rejected_schema_falls_back_and_is_remembered(self, stats, monkeypatch):
+        _use_model(monkeypatch, "gpt-4o")
+        service, calls = self._service([BadRequest(), '{"scene_id": "s1"}', '{"scene_id": "s2"}'])
+
+        asyncio.run(service.generate_json_for_agent("scene_designer", "p", json_schema=SceneInteractionResult))
+        asyncio.run(service.generate_json_for_agent("scene_designer", "p", json_schema=SceneInteractionResult))
+
+        assert ["response_format" in call for call in calls] == [True, False, False]
+        summary = stats.stats()
+        assert summary["rejected_models"] == ["gpt-4o"]
+        assert summary["agents"]["scene_designer"]["fallbacks"] == 1
+
+    def test_rejection_does_not_use_up_the_only_attempt(self, stats, monkeypatch):
+        _use_model(monkeypatch, "gpt-4o")
+        service, calls = self._service([BadRequest(), '{"scene_id": "s1"}'])
+
+        result = asyncio.run(service.generate_json_for_agent(
+            "scene_designer", "p", json_schema=SceneInteractionResult, max_json_retries=1
+        ))
+
+        assert result["scene_id"] == "s1"
+        assert ["response_format" in call for call in calls] == [True, False]
+        assert result["_llm_metrics"]["json_attempts"] == 1
+
+    def test_unrelated_bad_request_keeps_native_output(self, stats, monkeypatch):
+        _use_model(monkeypatch, "gpt-4o")
+        too_long = BadRequest("This model's maximum context length is 128000 tokens")
+        service, calls = self._service([too_long, '{"scene_id": "s1"}'])
+
+        asyncio.run(service.generate_json_for_agent("scene_designer", "p", json_schema=SceneInteractionResult))
+
+        assert ["response_format" in call for call in calls] == [True, True]
+        assert stats.stats()["rejected_models"] == []
+
+    def test_rejection_blames_the_model_that_served_the_call(self, stats, monkeypatch):
+        _use_model(monkeypatch, "gpt-4o")
+        rejection = BadRequest()
+        rejection.routed_model_key = "gemini-2.5-pro"
+        service, calls = self._service([rejection, '{"scene_id": "s1"}'])
+
+        asyncio.run(service.generate_json_for_agent("scene_designer", "p", json_schema=SceneInteractionResult))
+
+        assert stats.stats()["rejected_models"] == ["gemini-2.5-pro"]
+
+    def test_disabled_by_env(self, stats, monkeypatch):
+        monkeypatch.setenv("LLM_STRUCTURED_OUTPUT", "false")
+        _use_model(monkeypatch, "gpt-4o")
+        service, calls = self._service(['{"scene_id": "s1"}'])
+        asyncio.run(service.generate_json_for_agent("scene_designer", "p", json_schema=SceneInteractionResult))
+        assert "response_format" not in calls[0]
+
+
+class TestStats:
+
+    def test_rejections_are_per_schema_and_expire(self):
+        now = [0.0]
+        stats = StructuredOutputStats(rejection_ttl=60, clock=lambda: now[0])
+        plan, scene = resolve_json_schema(GameConcept), resolve_json_schema(SceneInteractionResult)
+        stats.record_fallback("designer", "gpt-4o", BadRequest(), plan)
+
+        assert stats.is_rejected("gpt-4o", plan)
+        assert not stats.is_rejected("gpt-4o", scene)
+        assert stats.stats()["rejected_schemas"] == [{"model": "gpt-4o", "schema": "GameConcept", "expires_in_s": 60}]
+        now[0] = 61
+        assert not stats.is_rejected("gpt-4o", plan)
+        assert stats.stats()["rejected_models"] == []
+
+    def test_only_schema_errors_count_as_rejections(self):
+        assert structured_output.is_schema_rejection(BadRequest("Invalid schema for response_format 'x'"))
+        assert structured_output.is_schema_rejection(
+            RuntimeError("400 INVALID_ARGUMENT: response_json_schema: unsupported keyword")
+        )
+        assert not structured_output.is_schema_rejection(BadRequest("Request blocked by content policy"))
+        assert not structured_output.is_schema_rejection(RuntimeError("400 INVALID_ARGUMENT: prompt too long"))
+        unavailable = RuntimeError("schema service unavailable")
+        unavailable.status_code = 503
+        assert not structured_output.is_schema_rejection(unavailable)
+
+    def test_avoided_estimates_use_prompted_baseline(self):
+        stats = StructuredOutputStats()
+        assert stats.stats()["repairs_avoided"] is None
+
+        # Prompted baseline: half repaired, one re-prompt per two calls
+        stats.record("designer", native=False, attempts=2, repaired=True, ok=True)
+        stats.record("designer", native=False, attempts=1, repaired=False, ok=True)
+        for _ in range(4):
+            stats.record("designer", native=True, attempts=1, repaired=False, ok=True)
+        # No prompted calls of its own: process-wide baseline
+        stats.record("planner", native=True, attempts=1, repaired=False, ok=True)
+
+        summary = stats.stats()
+        assert summary["agents"]["designer"]["repairs_avoided"] == 2.0
+        assert summary["agents"]["designer"]["retries_avoided"] == 2.0
+        assert summary["agents"]["planner"]["repairs_avoided"] == 0.5
+        assert summary["repairs_avoided"] == 2.5
@@ -0,0 +1,87 @@
+"""
+Tests for concurrent tool execution in LLMService._execute_tools
+
+Run with: PYTHONPATH=. pytest tests/test_tool_execution.py -v
+"""
+
+import asyncio
+import time
+
+from app.services.llm_service import LLMService, Tool, ToolCall, ToolCallStatus
+
+
+def _sleepy_tool(name: str, delay: float, log: list, parallel_safe: bool = True) -> Tool:
+    async def fn(**kwargs):
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return {"tool": name, **kwargs}
+    return Tool(name=name, description=name, parameters={}, function=fn, parallel_safe=parallel_safe)
+
+
+def _calls(*names):
+    return [ToolCall(id=f"c{i}", name=n, arguments={"i": i}) for i, n in enumerate(names)]
+
+
+class TestConcurrentToolExecution:
+
+    def test_independent_calls_run_concurrently_in_order(self):
+        log = []
+        tools = [_sleepy_tool("a", 0.2, log), _sleepy_tool("b", 0.05, log)]
+        service = LLMService()
+
+        start = time.time()
+        results = asyncio.run(service._execute_tools(_calls("a", "b"), tools, timeout=5, concurrency=4))
+        elapsed = time.time() - start
+
+        assert [r.tool_call_id for r in results] == ["c0", "c1"]
+        assert all(r.status == ToolCallStatus.SUCCESS for r in results)
+        assert elapsed < 0.24
+        # "b" finished before "a" even though results are in call order
+        assert log.index(("end", "b")) < log.index(("end", "a"))
+
+    def test_concurrency_one_is_sequential(self):
+        log = []
+        tools = [_sleepy_tool("a", 0.05, log), _sleepy_tool("b", 0.01, log)]
+        asyncio.run(LLMService()._execute_tools(_calls("a", "b"), tools, timeout=5, concurrency=1))
+        assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b")]
+
+    def test_side_effect_tool_is_a_barrier(self):
+        log = []
+        tools = [
+            _sleepy_tool("a", 0.05, log),
+            _sleepy_tool("submit", 0.01, log, parallel_safe=False),
+            _sleepy_tool("b", 0.01, log),
+        ]
+        results = asyncio.run(
+            LLMService()._execute_tools(_calls("a", "submit", "b"), tools, timeout=5, concurrency=4)
+        )
+        assert [r.name for r in results] == ["a", "submit", "b"]
+        assert log.index(("end", "a")) < log.index(("start", "submit"))
+        assert log.index(("end", "submit")) < log.index(("start", "b"))
+
+    def test_timeout_and_missing_tool_keep_positions(self):
+        log = []
+        tools = [_sleepy_tool("slow", 1.0, log), _sleepy_tool("fast", 0.0, log)]
+        results = asyncio.run(LLMService()._execute_tools(
+            _calls("slow", "missing", "fast"), tools, timeout=0.05, max_retries=0, concurrency=4
+        ))
+        assert [r.status for r in results] == [
+            ToolCallStatus.TIMEOUT, ToolCallStatus.ERROR, ToolCallStatus.SUCCESS
+        ]
+
+    def test_transient_errors_are_retried(self):
+        attempts = []
+
+        async def flaky(**kwargs):
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise RuntimeError("503 service unavailable")
+            return "ok"
+
+        tools = [Tool(name="flaky", description="", parameters={}, function=flaky)]
+        results = asyncio.run(LLMService()._execute_tools(
+            _calls("flaky"), tools, timeout=5, retry_delay=0.0, concurrency=4
+        ))
+        assert results[0].status == ToolCallStatus.SUCCESS
+        assert len(attempts) == 2
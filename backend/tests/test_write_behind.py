@@ -0,0 +1,149 @@
+"""
+Tests for the write-behind queue (app/db/write_behind.py)
+
+Run with: PYTHONPATH=. pytest tests/test_write_behind.py -v
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Question
+from app.db.write_behind import WriteBehindQueue
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writes.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _add_question(text: str):
+    def apply(db):
+        db.add(Question(id=text, text=text))
+    return apply
+
+
+def _texts(session_factory):
+    db = session_factory()
+    try:
+        return sorted(q.text for q in db.query(Question).all())
+    finally:
+        db.close()
+
+
+class TestWriteBehindQueue:
+
+    def test_flush_commits_everything_submitted(self, session_factory):
+        writes = WriteBehindQueue(session_factory=session_factory, batch_size=10, flush_interval=0.5)
+        try:
+            for i in range(25):
+                writes.submit("add", _add_question(f"q{i:02d}"))
+            assert writes.flush(timeout=5)
+            assert len(_texts(session_factory)) == 25
+
+            stats = writes.stats()
+            assert stats["written"] == 25
+            assert stats["queue_depth"] == 0
+            # 25 writes with batch_size=10 need at least 3 transactions, but far fewer than 25
+            assert 3 <= stats["batches"] < 25
+        finally:
+            writes.close()
+
+    def test_writes_apply_in_submission_order(self, session_factory):
+        writes = WriteBehindQueue(session_factory=session_factory, flush_interval=0.5)
+        seen = []
+
+        def update(db):
+            question = db.query(Question).filter(Question.id == "q").first()
+            seen.append(question is not None)
+            question.text = "updated"
+
+        try:
+            writes.submit("add", _add_question("q"))
+            writes.submit("update", update)
+            writes.flush(timeout=5)
+        finally:
+            writes.close()
+
+        assert seen == [True]
+        assert _texts(session_factory) == ["updated"]
+
+    def test_failing_write_does_not_drop_batch(self, session_factory):
+        writes = WriteBehindQueue(session_factory=session_factory, flush_interval=0.5)
+
+        def broken(db):
+            raise RuntimeError("boom")
+
+        try:
+            writes.submit("add", _add_question("a"))
+            writes.submit("broken", broken)
+            writes.submit("add", _add_question("b"))
+            writes.flush(timeout=5)
+        finally:
+            writes.close()
+
+        assert _texts(session_factory) == ["a", "b"]
+        assert writes.stats()["failed"] == 1
+
+    def test_post_commit_callback_runs_on_writer_thread(self, session_factory):
+        writes = WriteBehindQueue(session_factory=session_factory)
+        threads = []
+
+        def apply(db):
+            db.add(Question(id="c", text="c"))
+            return lambda: threads.append(threading.current_thread().name)
+
+        try:
+            writes.submit("add", apply, flush=True)
+            writes.flush(timeout=5)
+        finally:
+            writes.close()
+        assert threads == ["db-write-behind"]
+
+    def test_close_drains_pending_writes(self, session_factory):
+        writes = WriteBehindQueue(session_factory=session_factory, flush_interval=10)
+        for i in range(5):
+            writes.submit("add", _add_question(f"q{i}"))
+        writes.close()
+        assert len(_texts(session_factory)) == 5
+        assert not writes.stats()["running"]
+
+    def test_disabled_writes_inline(self, session_factory):
+        writes = WriteBehindQueue(session_factory=session_factory, enabled=False)
+        writes.submit("add", _add_question("inline"))
+        assert _texts(session_factory) == ["inline"]
+        assert not writes.stats()["running"]
+
+    def test_aflush_does_not_block_loop(self, session_factory):
+        writes = WriteBehindQueue(session_factory=session_factory)
+
+        def slow_add(db):
+            time.sleep(0.2)
+            db.add(Question(id="x", text="x"))
+
+        async def scenario():
+            writes.submit("add", slow_add)
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            await writes.aflush(timeout=5)
+            task.cancel()
+            return ticks
+
+        try:
+            assert asyncio.run(scenario()) > 5
+        finally:
+            writes.close()
+        assert _texts(session_factory) == ["x"]
@@ -0,0 +1,140 @@
+"""Tests for the V4 domain-knowledge retriever's sub-extraction graph."""
+
+import asyncio
+
+import pytest
+
+from app.services.web_search import WebSearchError
+from app.v4.agents import dk_retriever as dk
+
+QUESTION = "Compare the steps of mitosis and meiosis"
+LABELS = ["Prophase", "Metaphase", "Anaphase"]
+
+RESPONSES = {
+    "DomainKnowledge": {"canonical_labels": LABELS, "sources": []},
+    "label text to description": {label: f"{label} description" for label in LABELS},
+    "Comparison data": {"groups": [{"group_name": "Mitosis", "members": LABELS}]},
+    "SequenceFlowData": {"flow_type": "linear", "sequence_items": [{"id": "step_1", "text": "Prophase"}]},
+}
+
+
+class FakeSearch:
+    def __init__(self, log, fail_main=False, sequence_delay=0.02):
+        self.log = log
+        self.fail_main = fail_main
+        self.sequence_delay = sequence_delay
+        self.sequence_cancelled = False
+
+    async def search(self, query):
+        if "correct order steps sequence" in query:
+            self.log.append("start sequence_search")
+            try:
+                await asyncio.sleep(self.sequence_delay)
+            except asyncio.CancelledError:
+                self.sequence_cancelled = True
+                raise
+            self.log.append("end sequence_search")
+            return [{"link": "https://example.org/seq", "snippet": "Prophase comes first"}]
+        self.log.append("start search")
+        await asyncio.sleep(0.01)
+        if self.fail_main:
+            raise WebSearchError("quota exceeded")
+        return [{"link": "https://example.org", "title": "Cell division", "snippet": "Mitosis phases"}]
+
+
+class FakeLLM:
+    def __init__(self, log):
+        self.log = log
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_json_for_agent(self, agent_name, prompt, schema_hint=None, **kwargs):
+        name = next(key for key in RESPONSES if key in schema_hint)
+        self.log.append(f"start {name}")
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        self.log.append(f"end {name}")
+        return {**RESPONSES[name], "_llm_metrics": {"model": "fake"}}
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    log = []
+    search, llm = FakeSearch(log), FakeLLM(log)
+    monkeypatch.setattr(dk, "get_serper_client", lambda: search)
+    monkeypatch.setattr(dk, "get_llm_service", lambda: llm)
+    return log, search, llm
+
+
+class TestSubExtractionGraph:
+    def test_sequence_search_overlaps_main_extraction(self, fakes):
+        log, _, _ = fakes
+        asyncio.run(dk.dk_retriever({"question_text": QUESTION}))
+        # Started while the main search was still in flight
+        assert log.index("start sequence_search") < log.index("start DomainKnowledge")
+        assert log.index("end sequence_search") < log.index("end DomainKnowledge")
+
+    def test_label_dependent_extractions_run_together(self, fakes):
+        log, _, llm = fakes
+        asyncio.run(dk.dk_retriever({"question_text": QUESTION}))
+        # Descriptions, comparison and sequence all wait for the labels, then run at once
+        assert llm.max_active == 3
+        first_sub = min(log.index(f"start {name}") for name in ("label text to description", "Comparison data"))
+        assert log.index("end DomainKnowledge") < first_sub
+
+    def test_result_shape_is_unchanged(self, fakes):
+        result = asyncio.run(dk.dk_retriever({"question_text": QUESTION}))
+
+        assert [stage["id"] for stage in result["_sub_stages"]] == [
+            "dk_main_extraction", "dk_label_descriptions", "dk_comparison_data", "dk_sequence_flow",
+        ]
+        assert all(stage["status"] == "success" for stage in result["_sub_stages"])
+        knowledge = result["domain_knowledge"]
+        assert knowledge["canonical_labels"] == LABELS
+        assert knowledge["label_descriptions"]["Prophase"] == "Prophase description"
+        assert knowledge["comparison_data"]["groups"][0]["group_name"] == "Mitosis"
+        assert knowledge["sequence_flow_data"]["sequence_items"][0]["text"] == "Prophase"
+        # The sequence branch reports its own work time: search + extraction
+        assert result["_sub_stages"][3]["duration_ms"] >= 60
+
+    def test_no_sequence_or_comparison_intent(self, fakes):
+        log, _, _ = fakes
+        result = asyncio.run(dk.dk_retriever({"question_text": "Label the parts of a plant cell"}))
+        assert [stage["id"] for stage in result["_sub_stages"]] == ["dk_main_extraction", "dk_label_descriptions"]
+        assert result["domain_knowledge"]["comparison_data"] is None
+        assert result["domain_knowledge"]["sequence_flow_data"] is None
+        assert "start sequence_search" not in log
+
+    def test_early_return_cancels_sequence_search(self, fakes):
+        _, search, _ = fakes
+        search.fail_main = True
+        search.sequence_delay = 10
+
+        result = asyncio.run(dk.dk_retriever({"question_text": QUESTION}))
+
+        assert result["phase_errors"][0]["error"] == "search failed: quota exceeded"
+        assert search.sequence_cancelled
+
+    def test_failed_branch_cancels_its_siblings(self):
+        cancelled = []
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("extraction crashed")
+
+        async def slow(name):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+
+        async def run():
+            with pytest.raises(RuntimeError, match="extraction crashed"):
+                await dk._gather_or_cancel(slow("descriptions"), fail(), slow("comparison"))
+            assert await dk._gather_or_cancel(asyncio.sleep(0, "a"), asyncio.sleep(0, "b")) == ["a", "b"]
+
+        asyncio.run(asyncio.wait_for(run(), timeout=2))
+        assert sorted(cancelled) == ["comparison", "descriptions"]
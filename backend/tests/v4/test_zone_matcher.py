@@ -1,6 +1,16 @@
 """Tests for zone matcher."""
 
-from app.v4.helpers.zone_matcher import match_labels_to_zones, canonical_to_zone_id
+import random
+from difflib import SequenceMatcher
+
+from app.v4.helpers.utils import normalize_label_text
+from app.v4.helpers.zone_matcher import (
+    FUZZY_SCORE,
+    SUBSTRING_SCORE,
+    ZoneMatcher,
+    canonical_to_zone_id,
+    match_labels_to_zones,
+)
 
 
 class TestExactMatch:
@@ -61,3 +71,88 @@ class TestCanonicalToZoneId:
         assert zid == "zone_s1_cell_wall"
         # Same input -> same output
         assert canonical_to_zone_id("Cell Wall", 1) == zid
+
+
+class TestSubstring:
+    def test_label_inside_zone_label(self):
+        zones = [{"id": "z1", "label": "Left Ventricle Wall"}]
+        assert match_labels_to_zones(["left ventricle"], zones)["left ventricle"] == "z1"
+
+
+class TestOneToOne:
+    def test_zone_not_claimed_twice(self):
+        zones = [{"id": "z1", "label": "Ventricle"}, {"id": "z2", "label": "Left Ventricle Wall"}]
+        result = match_labels_to_zones(["Ventricle", "Left Ventricle"], zones)
+        assert result == {"Ventricle": "z1", "Left Ventricle": "z2"}
+
+    def test_independent_of_label_order(self):
+        # First-come matching would give "Anther" the closer fuzzy zone and
+        # leave "Anthers" with nothing
+        zones = [{"id": "z1", "label": "Anthr"}, {"id": "z2", "label": "Anthers tip"}]
+        labels = ["Anther", "Anthers"]
+        forward = match_labels_to_zones(labels, zones)
+        backward = match_labels_to_zones(labels[::-1], zones)
+        assert forward == backward
+        assert sorted(forward.values()) == ["z1", "z2"]
+
+    def test_duplicate_labels_collapse(self):
+        zones = [{"id": "z1", "label": "Nucleus"}]
+        assert match_labels_to_zones(["Nucleus", "Nucleus"], zones) == {"Nucleus": "z1"}
+
+    def test_case_and_whitespace_variants_share_a_zone(self):
+        zones = [{"id": "z1", "label": "Nucleus"}, {"id": "z2", "label": "Nucleolus"}]
+        result = match_labels_to_zones(["nucleus", "Nucleus ", "NUCLEUS", "Nucleolus"], zones)
+        assert result == {"nucleus": "z1", "Nucleus ": "z1", "NUCLEUS": "z1", "Nucleolus": "z2"}
+
+
+class TestZoneMatcherScores:
+    def test_tiers_rank_in_priority_order(self):
+        matcher = ZoneMatcher(["Nucleus", "nucleus", " Nucleus ", "Nucleus envelope", "Nucleas", ""])
+        scores = matcher.score(["Nucleus", "nucleolus"])
+        assert scores[0, 0] > scores[0, 1] > scores[0, 2] > 0
+        # Weaker tiers are skipped once a label has a direct hit
+        assert scores[0, 3] == scores[0, 4] == scores[0, 5] == 0
+        assert FUZZY_SCORE < scores[1, 4] < SUBSTRING_SCORE and scores[1, 5] == 0
+
+    def test_character_bound_keeps_every_fuzzy_match(self):
+        rng = random.Random(0)
+        words = ["".join(rng.choice("abcde ") for _ in range(rng.randint(1, 9))) for _ in range(300)]
+        matcher = ZoneMatcher(words)
+        for label in words[:60]:
+            label = label + "x"
+            row = matcher.score([label])[0]
+            norm = normalize_label_text(label)
+            for j, word in enumerate(words):
+                zone = normalize_label_text(word)
+                if not zone:
+                    continue
+                expected = norm in zone or zone in norm or SequenceMatcher(None, norm, zone).ratio() > 0.7
+                assert bool(row[j]) == expected, (label, word)
+
+
+class TestV3Reuse:
+    def test_zone_groups_and_parent_links(self):
+        from app.agents.gemini_zone_detector import create_zone_groups, zones_to_entity_registry
+
+        zones = [
+            {"id": "z1", "label": "Stamen"},
+            {"id": "z2", "label": "Anther"},
+            {"id": "z3", "label": "Filament"},
+            {"id": "z4", "label": "Pollen", "parentLabel": "anther"},
+        ]
+        groups = create_zone_groups([{"parent": "stamen", "children": ["anther", "filaments", "sepal"]}], zones)
+        assert groups[0]["parentZoneId"] == "z1"
+        assert groups[0]["childZoneIds"] == ["z2", "z3"]
+
+        registry = zones_to_entity_registry(zones)
+        assert registry["zones"]["z4"]["parent_zone_id"] == "z2"
+
+    def test_zone_groups_accept_differently_cased_references(self):
+        from app.agents.gemini_zone_detector import create_zone_groups
+
+        zones = [{"id": "z1", "label": "Stamen"}, {"id": "z2", "label": "Anther"}, {"id": "z3", "label": "Pollen"}]
+        groups = create_zone_groups([
+            {"parent": "Stamen", "children": ["anther"]},
+            {"parent": "Anther ", "children": ["pollen"]},
+        ], zones)
+        assert [(g["parentZoneId"], g["childZoneIds"]) for g in groups] == [("z1", ["z2"]), ("z2", ["z3"])]